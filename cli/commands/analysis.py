@@ -38,6 +38,29 @@ from cli.constants.messages import (
     ERR_GENERATE_PDF_FAILED,
     ERR_GENERATE_PDF_NO_SESSION,
     ERR_GENERATE_PDF_SESSION_NOT_FOUND,
+    CMD_GENERATE_BATCH_REPORTS_DESC,
+    ARG_HELP_BATCH_WORKERS,
+    ARG_HELP_BATCH_FORCE,
+    ARG_HELP_BATCH_INDEX,
+    MSG_BATCH_REPORTS_SUMMARY,
+    INFO_NO_RUNS_TO_REPORT,
+    ERR_BATCH_REPORTS_FAILED,
+    CMD_BACKFILL_RUN_METRICS_DESC,
+    ARG_HELP_BACKFILL_DB_PATH,
+    MSG_BACKFILL_RUN_METRICS_SUCCESS,
+    ERR_BACKFILL_RUN_METRICS_FAILED,
+    CMD_EXPORT_RUN_TIMESERIES_DESC,
+    ARG_HELP_TIMESERIES_RUN_ID,
+    ARG_HELP_TIMESERIES_FORMAT,
+    ARG_HELP_TIMESERIES_OUTPUT,
+    MSG_EXPORT_RUN_TIMESERIES_SUCCESS,
+    ERR_EXPORT_RUN_TIMESERIES_FAILED,
+    CMD_EXPORT_STEP_TRACE_DESC,
+    ARG_HELP_STEP_TRACE_RUN_ID,
+    ARG_HELP_STEP_TRACE_FORMAT,
+    ARG_HELP_STEP_TRACE_OUTPUT,
+    MSG_EXPORT_STEP_TRACE_SUCCESS,
+    ERR_EXPORT_STEP_TRACE_FAILED,
 )
 
 
@@ -436,6 +459,293 @@ class GeneratePDFCommand(CommandHandler):
             )
 
 
+class GenerateBatchReportsCommand(CommandHandler):
+    """Handle generate-batch-reports command."""
+    
+    @property
+    def name(self) -> str:
+        """Get command name."""
+        return "generate-batch-reports"
+    
+    @property
+    def description(self) -> str:
+        """Get command description."""
+        return CMD_GENERATE_BATCH_REPORTS_DESC
+    
+    def register(self, subparsers: argparse._SubParsersAction) -> argparse.ArgumentParser:
+        """Register the command with the argument parser."""
+        parser = subparsers.add_parser(
+            self.name,
+            help=self.description,
+            description=self.description
+        )
+        self.add_common_arguments(parser)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help=ARG_HELP_BATCH_WORKERS
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help=ARG_HELP_BATCH_FORCE
+        )
+        parser.add_argument(
+            "--index-path",
+            help=ARG_HELP_BATCH_INDEX
+        )
+        parser.set_defaults(handler=self)
+        return parser
+    
+    def run(self, args: argparse.Namespace, context: ApplicationContext) -> CommandResult:
+        """Execute the command."""
+        from cli.services.analysis_service import AnalysisService
+        
+        service = AnalysisService(context)
+        success, result_data = service.generate_batch_reports(
+            workers=args.workers,
+            force=args.force,
+            index_path=args.index_path
+        )
+        
+        if 'reports' not in result_data:
+            if success:
+                print(INFO_NO_RUNS_TO_REPORT)
+                return CommandResult(success=True, message=INFO_NO_RUNS_TO_REPORT)
+            return CommandResult(
+                success=False,
+                message=result_data.get('error', ERR_BATCH_REPORTS_FAILED),
+                exit_code=1
+            )
+        
+        for report in result_data['reports']:
+            line = f"  [{report['status']}] {report['app_package']} run {report['run_id']}: {report['pdf_path']}"
+            if report.get('error'):
+                line += f" ({report['error']})"
+            print(line)
+        
+        return CommandResult(
+            success=success,
+            message=MSG_BATCH_REPORTS_SUMMARY.format(**result_data),
+            data=result_data,
+            exit_code=0 if success else 1
+        )
+
+
+class BackfillRunMetricsCommand(CommandHandler):
+    """Handle backfill-run-metrics command."""
+    
+    @property
+    def name(self) -> str:
+        """Get command name."""
+        return "backfill-run-metrics"
+    
+    @property
+    def description(self) -> str:
+        """Get command description."""
+        return CMD_BACKFILL_RUN_METRICS_DESC
+    
+    def register(self, subparsers: argparse._SubParsersAction) -> argparse.ArgumentParser:
+        """Register the command with the argument parser."""
+        parser = subparsers.add_parser(
+            self.name,
+            help=self.description,
+            description=self.description
+        )
+        self.add_common_arguments(parser)
+        parser.add_argument(
+            "--db-path",
+            help=ARG_HELP_BACKFILL_DB_PATH
+        )
+        parser.set_defaults(handler=self)
+        return parser
+    
+    def run(self, args: argparse.Namespace, context: ApplicationContext) -> CommandResult:
+        """Execute the command."""
+        from cli.services.analysis_service import AnalysisService
+        
+        service = AnalysisService(context)
+        success, result_data = service.backfill_run_metrics(args.db_path)
+        
+        if success:
+            return CommandResult(
+                success=True,
+                message=MSG_BACKFILL_RUN_METRICS_SUCCESS.format(**result_data)
+            )
+        return CommandResult(
+            success=False,
+            message=result_data.get('error', ERR_BACKFILL_RUN_METRICS_FAILED),
+            exit_code=1
+        )
+
+
+class ExportRunTimeseriesCommand(CommandHandler):
+    """Handle export-run-timeseries command."""
+    
+    @property
+    def name(self) -> str:
+        """Get command name."""
+        return "export-run-timeseries"
+    
+    @property
+    def description(self) -> str:
+        """Get command description."""
+        return CMD_EXPORT_RUN_TIMESERIES_DESC
+    
+    def register(self, subparsers: argparse._SubParsersAction) -> argparse.ArgumentParser:
+        """Register the command with the argument parser."""
+        parser = subparsers.add_parser(
+            self.name,
+            help=self.description,
+            description=self.description
+        )
+        self.add_common_arguments(parser)
+        
+        target_group = parser.add_mutually_exclusive_group(required=True)
+        target_group.add_argument(
+            "--target-index",
+            type=int,
+            help=ARG_HELP_TARGET_INDEX
+        )
+        target_group.add_argument(
+            "--target-app-package",
+            help=ARG_HELP_TARGET_APP_PACKAGE
+        )
+        parser.add_argument(
+            "--run-id",
+            type=int,
+            help=ARG_HELP_TIMESERIES_RUN_ID
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "json"],
+            default="csv",
+            help=ARG_HELP_TIMESERIES_FORMAT
+        )
+        parser.add_argument(
+            "--output",
+            help=ARG_HELP_TIMESERIES_OUTPUT
+        )
+        
+        parser.set_defaults(handler=self)
+        return parser
+    
+    def run(self, args: argparse.Namespace, context: ApplicationContext) -> CommandResult:
+        """Execute the command."""
+        from cli.services.analysis_service import AnalysisService
+        
+        service = AnalysisService(context)
+        
+        if args.target_index is not None:
+            target = service.get_target_by_index(args.target_index)
+        else:
+            target = service.get_target_by_package(args.target_app_package)
+        
+        if not target:
+            return CommandResult(
+                success=False,
+                message=ERR_EXPORT_RUN_TIMESERIES_FAILED,
+                exit_code=1
+            )
+        
+        success, result_data = service.export_run_timeseries(target, args.run_id, args.format, args.output)
+        
+        if success:
+            return CommandResult(
+                success=True,
+                message=MSG_EXPORT_RUN_TIMESERIES_SUCCESS.format(**result_data)
+            )
+        return CommandResult(
+            success=False,
+            message=result_data.get('error', ERR_EXPORT_RUN_TIMESERIES_FAILED),
+            exit_code=1
+        )
+
+
+class ExportStepTraceCommand(CommandHandler):
+    """Handle export-step-trace command."""
+    
+    @property
+    def name(self) -> str:
+        """Get command name."""
+        return "export-step-trace"
+    
+    @property
+    def description(self) -> str:
+        """Get command description."""
+        return CMD_EXPORT_STEP_TRACE_DESC
+    
+    def register(self, subparsers: argparse._SubParsersAction) -> argparse.ArgumentParser:
+        """Register the command with the argument parser."""
+        parser = subparsers.add_parser(
+            self.name,
+            help=self.description,
+            description=self.description
+        )
+        self.add_common_arguments(parser)
+        
+        target_group = parser.add_mutually_exclusive_group(required=True)
+        target_group.add_argument(
+            "--target-index",
+            type=int,
+            help=ARG_HELP_TARGET_INDEX
+        )
+        target_group.add_argument(
+            "--target-app-package",
+            help=ARG_HELP_TARGET_APP_PACKAGE
+        )
+        parser.add_argument(
+            "--run-id",
+            type=int,
+            help=ARG_HELP_STEP_TRACE_RUN_ID
+        )
+        parser.add_argument(
+            "--format",
+            choices=["chrome", "speedscope"],
+            default="chrome",
+            help=ARG_HELP_STEP_TRACE_FORMAT
+        )
+        parser.add_argument(
+            "--output",
+            help=ARG_HELP_STEP_TRACE_OUTPUT
+        )
+        
+        parser.set_defaults(handler=self)
+        return parser
+    
+    def run(self, args: argparse.Namespace, context: ApplicationContext) -> CommandResult:
+        """Execute the command."""
+        from cli.services.analysis_service import AnalysisService
+        
+        service = AnalysisService(context)
+        
+        if args.target_index is not None:
+            target = service.get_target_by_index(args.target_index)
+        else:
+            target = service.get_target_by_package(args.target_app_package)
+        
+        if not target:
+            return CommandResult(
+                success=False,
+                message=ERR_EXPORT_STEP_TRACE_FAILED,
+                exit_code=1
+            )
+        
+        success, result_data = service.export_step_trace(target, args.run_id, args.format, args.output)
+        
+        if success:
+            return CommandResult(
+                success=True,
+                message=MSG_EXPORT_STEP_TRACE_SUCCESS.format(**result_data)
+            )
+        return CommandResult(
+            success=False,
+            message=result_data.get('error', ERR_EXPORT_STEP_TRACE_FAILED),
+            exit_code=1
+        )
+
+
 class AnalysisCommandGroup(CommandGroup):
     """Analysis command group."""
     
@@ -451,4 +761,8 @@ class AnalysisCommandGroup(CommandGroup):
             GenerateAnalysisPDFCommand(),
             PrintAnalysisSummaryCommand(),
             GeneratePDFCommand(),
+            GenerateBatchReportsCommand(),
+            BackfillRunMetricsCommand(),
+            ExportRunTimeseriesCommand(),
+            ExportStepTraceCommand(),
         ]
@@ -5,6 +5,7 @@ Crawler control commands.
 
 
 import argparse
+import os
 from typing import List
 
 from cli.commands.base import CommandGroup, CommandHandler, CommandResult
@@ -54,6 +55,16 @@ class StartCrawlerCommand(CommandHandler):
             action="store_true",
             help=MSG.START_CMD_ENABLE_MOBSF_ANALYSIS_HELP
         )
+        parser.add_argument(
+            MSG.START_CMD_REPLAY_DB_ARG,
+            metavar="DB_PATH",
+            help=MSG.START_CMD_REPLAY_DB_HELP
+        )
+        parser.add_argument(
+            MSG.START_CMD_REPLAY_RUN_ID_ARG,
+            type=int,
+            help=MSG.START_CMD_REPLAY_RUN_ID_HELP
+        )
         parser.set_defaults(handler=self)
         return parser
     
@@ -102,6 +113,19 @@ class StartCrawlerCommand(CommandHandler):
         else:
             # Default: disabled (overrides config if it's enabled)
             feature_flags['ENABLE_MOBSF_ANALYSIS'] = False
+        
+        # Handle replay of a recorded run (default: normal crawl)
+        replay_db = getattr(args, 'replay_db', None)
+        if replay_db:
+            replay_db = os.path.abspath(replay_db)
+            if not os.path.isfile(replay_db):
+                return CommandResult(
+                    success=False,
+                    message=MSG.START_REPLAY_DB_NOT_FOUND.format(db_path=replay_db),
+                    exit_code=1
+                )
+        feature_flags['REPLAY_SOURCE_DB'] = replay_db or ""
+        feature_flags['REPLAY_RUN_ID'] = getattr(args, 'replay_run_id', None) or 0
 
         # Get generate_pdf flag (argparse converts --generate-pdf to generate_pdf)
         generate_pdf_after_run = getattr(args, 'generate_pdf', False)
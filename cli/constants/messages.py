@@ -189,6 +189,11 @@ START_CMD_ENABLE_VIDEO_RECORDING_ARG = "--enable-video-recording"
 START_CMD_ENABLE_VIDEO_RECORDING_HELP = "Enable video recording during crawl"
 START_CMD_ENABLE_MOBSF_ANALYSIS_ARG = "--enable-mobsf-analysis"
 START_CMD_ENABLE_MOBSF_ANALYSIS_HELP = "Enable automatic MobSF analysis after crawl completes"
+START_CMD_REPLAY_DB_ARG = "--replay-db"
+START_CMD_REPLAY_DB_HELP = "Replay the actions of a run in this session database without AI calls where the app still matches it"
+START_CMD_REPLAY_RUN_ID_ARG = "--replay-run-id"
+START_CMD_REPLAY_RUN_ID_HELP = "Run of --replay-db to replay (default: latest run)"
+START_REPLAY_DB_NOT_FOUND = "Cannot start crawler: replay database not found: {db_path}"
 START_MOBSF_API_KEY_MISSING = "Cannot start crawler: --enable-mobsf-analysis is set but MOBSF_API_KEY is not configured. Please set MOBSF_API_KEY in your .env file."
 START_SUCCESS = "Crawler started successfully"
 START_FAIL = "Failed to start crawler"
@@ -290,6 +295,38 @@ ERR_GENERATE_PDF_FAILED = "PDF generation failed"
 ERR_GENERATE_PDF_NO_SESSION = "No session directory found"
 ERR_GENERATE_PDF_SESSION_NOT_FOUND = "Session directory not found: {session_dir}"
 
+# GenerateBatchReportsCommand
+CMD_GENERATE_BATCH_REPORTS_DESC = "Generate PDF reports for every run of every session, in parallel"
+ARG_HELP_BATCH_WORKERS = "Worker processes (default: REPORT_BATCH_WORKERS)"
+ARG_HELP_BATCH_FORCE = "Re-render reports that are up to date"
+ARG_HELP_BATCH_INDEX = "Summary index path (default: <OUTPUT_DATA_DIR>/reports/report_index.json)"
+MSG_BATCH_REPORTS_SUMMARY = "Reports: {generated} generated, {up_to_date} up to date, {failed} failed in {wall_seconds:.1f}s. Index: {index_path}"
+INFO_NO_RUNS_TO_REPORT = "No session databases with runs found."
+ERR_BATCH_REPORTS_FAILED = "Batch report generation failed"
+
+# BackfillRunMetricsCommand
+CMD_BACKFILL_RUN_METRICS_DESC = "Rebuild the run_metrics table from logged steps (all session databases by default)"
+ARG_HELP_BACKFILL_DB_PATH = "Rebuild a single database instead of every session database"
+MSG_BACKFILL_RUN_METRICS_SUCCESS = "Rebuilt run metrics for {runs} runs in {databases} databases"
+ERR_BACKFILL_RUN_METRICS_FAILED = "Failed to rebuild run metrics"
+
+# ExportRunTimeseriesCommand
+CMD_EXPORT_RUN_TIMESERIES_DESC = "Export per-step coverage and phase timings of a run as CSV or JSON"
+ARG_HELP_TIMESERIES_RUN_ID = "Run to export (default: latest run)"
+ARG_HELP_TIMESERIES_FORMAT = "Output format (default: csv)"
+ARG_HELP_TIMESERIES_OUTPUT = "Output file (default: <session>/reports/<package>_run<id>_timeseries.<format>)"
+MSG_EXPORT_RUN_TIMESERIES_SUCCESS = "Exported {points} steps of run {run_id} to: {output_path}"
+ERR_EXPORT_RUN_TIMESERIES_FAILED = "Failed to export run time series"
+
+# ExportStepTraceCommand
+CMD_EXPORT_STEP_TRACE_DESC = "Export the profiled step phases of a run as a Chrome trace or speedscope profile"
+ARG_HELP_STEP_TRACE_RUN_ID = "Run to export (default: latest run)"
+ARG_HELP_STEP_TRACE_FORMAT = "Trace format: chrome (chrome://tracing, Perfetto) or speedscope (default: chrome)"
+ARG_HELP_STEP_TRACE_OUTPUT = "Output file (default: <session>/reports/<package>_run<id>_trace.json)"
+MSG_EXPORT_STEP_TRACE_SUCCESS = "Exported {steps} profiled steps of run {run_id} to: {output_path}"
+ERR_EXPORT_STEP_TRACE_FAILED = "Failed to export step trace"
+ERR_NO_STEP_SPANS = "Run {run_id} has no profiled steps (recorded with STEP_PROFILER_PERSIST_SPANS disabled or before profiling existed)"
+
 # Apps command group
 APPS_GROUP_DESC = "App management commands"
 
@@ -6,7 +6,8 @@ This service provides functionality to:
 - Discover and list analysis targets from crawl data
 - Retrieve targets by index or package name
 - List runs for specific targets
-- Generate PDF analysis reports
+- Generate PDF analysis reports, one at a time or in batch across sessions
+- Export per-step coverage and timing time series
 - Get analysis summaries with metrics
 
 The service works with SQLite databases containing crawl session data and integrates
@@ -14,6 +15,8 @@ with the RunAnalyzer from domain.analysis_viewer for detailed analysis operation
 """
 
 
+import csv
+import json
 import logging
 import os
 import sqlite3
@@ -276,6 +279,235 @@ class AnalysisService:
             self.logger.error(error_msg, exc_info=True)
             return False, {CKeys.KEY_ERROR: error_msg}
     
+    def generate_batch_reports(
+        self,
+        workers: Optional[int] = None,
+        force: bool = False,
+        index_path: Optional[str] = None,
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """Generate reports for every run of every session database under the output directory.
+        
+        Reports are rendered in a process pool; runs whose report is up to date are skipped.
+        
+        Args:
+            workers: Worker processes (default: REPORT_BATCH_WORKERS)
+            force: Re-render reports that are up to date
+            index_path: Summary index path (default: <OUTPUT_DATA_DIR>/reports/report_index.json)
+            
+        Returns:
+            Tuple of (success, data) where data is the batch summary written to the index
+            (plus index_path), or contains error
+        """
+        try:
+            from domain.analysis_viewer import XHTML2PDF_AVAILABLE
+            from domain.report_batch import REPORT_INDEX_FILENAME, discover_report_jobs, generate_reports
+        except ImportError as e:
+            self.logger.error(CMsg.ERR_RUN_ANALYZER_IMPORT_FAILED.format(error=e))
+            return False, {CKeys.KEY_ERROR: CMsg.ERR_RUN_ANALYZER_IMPORT_FAILED.format(error=e)}
+        
+        if not XHTML2PDF_AVAILABLE:
+            self.logger.error(CMsg.ERR_XHTML2PDF_NOT_AVAILABLE)
+            return False, {CKeys.KEY_ERROR: CMsg.ERR_XHTML2PDF_NOT_AVAILABLE}
+        
+        output_data_dir = self.context.config.get(CKeys.CONFIG_OUTPUT_DATA_DIR)
+        if not output_data_dir:
+            self.logger.error(CMsg.ERR_OUTPUT_DATA_DIR_NOT_CONFIGURED)
+            return False, {CKeys.KEY_ERROR: CMsg.ERR_OUTPUT_DATA_DIR_NOT_CONFIGURED}
+        output_root = Path(output_data_dir)
+        if not output_root.is_dir():
+            error_msg = CMsg.ERR_OUTPUT_DIRECTORY_NOT_FOUND.format(db_output_root=output_root)
+            self.logger.error(error_msg)
+            return False, {CKeys.KEY_ERROR: error_msg}
+        
+        jobs = discover_report_jobs(output_root)
+        if not jobs:
+            return True, {"total": 0}
+        
+        index = Path(index_path) if index_path else output_root / CKeys.DIR_REPORTS / REPORT_INDEX_FILENAME
+        if workers is None:
+            workers = int(self.context.config.get('REPORT_BATCH_WORKERS', 4) or 1)
+        try:
+            summary = generate_reports(jobs, str(output_root), index, workers=workers, force=force)
+        except Exception as e:
+            self.logger.error(f"Batch report generation failed: {e}", exc_info=True)
+            return False, {CKeys.KEY_ERROR: str(e)}
+        summary["index_path"] = str(index)
+        return summary["failed"] == 0, summary
+    
+    def backfill_run_metrics(self, db_path: Optional[str] = None) -> Tuple[bool, Dict[str, Any]]:
+        """Rebuild the run_metrics table of one database, or of every session database.
+        
+        Args:
+            db_path: Database to rebuild (default: every *_crawl_data.db under OUTPUT_DATA_DIR)
+            
+        Returns:
+            Tuple of (success, data) where data contains databases and runs counts, or error
+        """
+        from infrastructure.run_metrics_store import backfill_run_metrics
+        
+        if db_path:
+            db_paths = [Path(db_path)]
+        else:
+            output_data_dir = self.context.config.get(CKeys.CONFIG_OUTPUT_DATA_DIR)
+            if not output_data_dir:
+                self.logger.error(CMsg.ERR_OUTPUT_DATA_DIR_NOT_CONFIGURED)
+                return False, {CKeys.KEY_ERROR: CMsg.ERR_OUTPUT_DATA_DIR_NOT_CONFIGURED}
+            db_paths = sorted(Path(output_data_dir).glob("**/*_crawl_data.db"))
+        
+        runs = 0
+        for path in db_paths:
+            if not path.exists():
+                error_msg = CMsg.ERR_DATABASE_FILE_NOT_FOUND.format(operation="run metrics backfill", db_path=path)
+                self.logger.error(error_msg)
+                return False, {CKeys.KEY_ERROR: error_msg}
+            try:
+                conn = sqlite3.connect(str(path))
+                try:
+                    runs += backfill_run_metrics(conn)
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                self.logger.error(f"Run metrics backfill failed for {path}: {e}")
+                return False, {CKeys.KEY_ERROR: f"{path}: {e}"}
+        return True, {"databases": len(db_paths), "runs": runs}
+    
+    def export_run_timeseries(
+        self,
+        target: Dict[str, Any],
+        run_id: Optional[int] = None,
+        output_format: str = "csv",
+        output_path: Optional[str] = None,
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """Write the per-step coverage and phase timings of a run to a CSV or JSON file.
+        
+        Args:
+            target: Target dictionary containing target information
+            run_id: Run to export (default: latest run)
+            output_format: "csv" or "json"
+            output_path: Output file (default: in the session's reports directory)
+            
+        Returns:
+            Tuple of (success, data) where data contains run_id, points and output_path, or error
+        """
+        if not target:
+            return False, {CKeys.KEY_ERROR: CMsg.ERR_TARGET_NOT_FOUND}
+        
+        try:
+            from domain.analysis_viewer import RunAnalyzer
+            from infrastructure.run_timeseries_store import TIMESERIES_FIELDS
+        except ImportError as e:
+            self.logger.error(CMsg.ERR_RUN_ANALYZER_IMPORT_FAILED.format(error=e))
+            return False, {CKeys.KEY_ERROR: CMsg.ERR_RUN_ANALYZER_IMPORT_FAILED.format(error=e)}
+        
+        if run_id is None:
+            run_id = self._determine_run_id(target[CKeys.KEY_DB_PATH])
+        if run_id is None:
+            error_msg = CMsg.ERR_FAILED_TO_DETERMINE_RUN_ID.format(operation="time series export", app_package=target[CKeys.KEY_APP_PACKAGE])
+            self.logger.error(error_msg)
+            return False, {CKeys.KEY_ERROR: error_msg}
+        
+        try:
+            analyzer = RunAnalyzer(
+                db_path=target[CKeys.KEY_DB_PATH],
+                output_data_dir=self.context.config.get(CKeys.CONFIG_OUTPUT_DATA_DIR) or "",
+                app_package_for_run=target[CKeys.KEY_APP_PACKAGE],
+            )
+            timeseries_result = analyzer.get_run_timeseries(run_id)
+        except FileNotFoundError:
+            error_msg = CMsg.ERR_DATABASE_FILE_NOT_FOUND.format(operation="time series export", db_path=target[CKeys.KEY_DB_PATH])
+            self.logger.error(error_msg)
+            return False, {CKeys.KEY_ERROR: error_msg}
+        if not timeseries_result[CKeys.KEY_SUCCESS]:
+            return False, {CKeys.KEY_ERROR: timeseries_result.get(CKeys.KEY_ERROR) or CMsg.ERR_EXPORT_RUN_TIMESERIES_FAILED}
+        series = timeseries_result["series"]
+        
+        if not output_path:
+            reports_dir = SessionPathManager.get_reports_dir(target[CKeys.KEY_SESSION_DIR])
+            output_path = str(SessionPathManager.get_pdf_report_path(
+                reports_dir, target[CKeys.KEY_APP_PACKAGE], f"run{run_id}_timeseries.{output_format}"
+            ))
+        try:
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(output_path, "w", encoding="utf-8", newline="") as f:
+                if output_format == "json":
+                    json.dump({"run_id": run_id, "app_package": target[CKeys.KEY_APP_PACKAGE], "series": series}, f, indent=2)
+                else:
+                    writer = csv.DictWriter(f, fieldnames=TIMESERIES_FIELDS)
+                    writer.writeheader()
+                    writer.writerows(series)
+        except OSError as e:
+            self.logger.error(f"Could not write time series to {output_path}: {e}")
+            return False, {CKeys.KEY_ERROR: f"{output_path}: {e}"}
+        return True, {"run_id": run_id, "points": len(series), "output_path": output_path}
+    
+    def export_step_trace(
+        self,
+        target: Dict[str, Any],
+        run_id: Optional[int] = None,
+        trace_format: str = "chrome",
+        output_path: Optional[str] = None,
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """Write the profiled step spans of a run as a Chrome trace or speedscope file.
+        
+        Args:
+            target: Target dictionary containing target information
+            run_id: Run to export (default: latest run)
+            trace_format: "chrome" or "speedscope"
+            output_path: Output file (default: in the session's reports directory)
+            
+        Returns:
+            Tuple of (success, data) where data contains run_id, steps and output_path, or error
+        """
+        if not target:
+            return False, {CKeys.KEY_ERROR: CMsg.ERR_TARGET_NOT_FOUND}
+        
+        from infrastructure.step_profiler import to_chrome_trace, to_speedscope
+        from infrastructure.step_spans_store import get_step_spans
+        
+        db_path = target[CKeys.KEY_DB_PATH]
+        if not Path(db_path).exists():
+            error_msg = CMsg.ERR_DATABASE_FILE_NOT_FOUND.format(operation="step trace export", db_path=db_path)
+            self.logger.error(error_msg)
+            return False, {CKeys.KEY_ERROR: error_msg}
+        if run_id is None:
+            run_id = self._determine_run_id(db_path)
+        if run_id is None:
+            error_msg = CMsg.ERR_FAILED_TO_DETERMINE_RUN_ID.format(operation="step trace export", app_package=target[CKeys.KEY_APP_PACKAGE])
+            self.logger.error(error_msg)
+            return False, {CKeys.KEY_ERROR: error_msg}
+        
+        try:
+            conn = sqlite3.connect(db_path)
+            try:
+                steps = get_step_spans(conn, run_id)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self.logger.error(f"Could not read step spans from {db_path}: {e}")
+            return False, {CKeys.KEY_ERROR: f"{db_path}: {e}"}
+        if not steps:
+            return False, {CKeys.KEY_ERROR: CMsg.ERR_NO_STEP_SPANS.format(run_id=run_id)}
+        
+        profile_name = f"{target[CKeys.KEY_APP_PACKAGE]} run {run_id}"
+        if trace_format == "speedscope":
+            trace = to_speedscope(steps, name=profile_name)
+        else:
+            trace = to_chrome_trace(steps, process_name=profile_name)
+        
+        if not output_path:
+            reports_dir = SessionPathManager.get_reports_dir(target[CKeys.KEY_SESSION_DIR])
+            output_path = str(SessionPathManager.get_pdf_report_path(
+                reports_dir, target[CKeys.KEY_APP_PACKAGE], f"run{run_id}_trace.json"
+            ))
+        try:
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(trace, f, separators=(",", ":"))
+        except OSError as e:
+            self.logger.error(f"Could not write step trace to {output_path}: {e}")
+            return False, {CKeys.KEY_ERROR: f"{output_path}: {e}"}
+        return True, {"run_id": run_id, "steps": len(steps), "output_path": output_path}
+    
     def get_analysis_summary(self, target: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
         """Get summary metrics for a target.
         
@@ -284,6 +284,41 @@ class Config:
             template = template.replace(f"{{{CONFIG_OUTPUT_DATA_DIR}}}", output_dir)
         return str(Path(template).resolve()) if template else None
 
+    def _resolve_core_db_path(self, key: str) -> Optional[str]:
+        """Resolve an {OUTPUT_DATA_DIR}-based database path and make sure its directory exists."""
+        template = self._resolve_output_dir_placeholder(self.get(key))
+        if not template:
+            return None
+        path = Path(template).resolve()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return str(path)
+
+    @property
+    def AI_RATE_LIMIT_DB_PATH(self):
+        """Returns the absolute path to the AI rate limit state shared by crawler processes."""
+        return self._resolve_core_db_path("AI_RATE_LIMIT_DB_PATH")
+
+    @property
+    def AI_ROUTING_LATENCY_DB_PATH(self):
+        """Returns the absolute path to the persisted per-app AI backend latency histograms."""
+        return self._resolve_core_db_path("AI_ROUTING_LATENCY_DB_PATH")
+
+    @property
+    def SHARED_EXPLORATION_DB_PATH(self):
+        """Returns the absolute path to the shared exploration store for the current app package."""
+        template = self.get("SHARED_EXPLORATION_DB_PATH")
+        if not template:
+            return None
+        template = self._resolve_output_dir_placeholder(template)
+        if not template:
+            return None
+        app_package = self.get("APP_PACKAGE")
+        if "{package}" in template:
+            if not app_package:
+                return None
+            template = template.replace("{package}", str(app_package).replace(".", "_"))
+        return str(Path(template).resolve())
+
     @property
     def AI_PROVIDER(self):
         return self.get("AI_PROVIDER")
@@ -700,6 +735,8 @@ DB_NAME = f"{{session_dir}}/{PathConstants.DATABASE_DIR}/{{package}}{PathConstan
 MOBSF_SCAN_DIR = f"{{session_dir}}/{PathConstants.MOBSF_SCAN_DIR}"
 EXTRACTED_APK_DIR = f"{{session_dir}}/{PathConstants.EXTRACTED_APK_DIR}"
 PDF_REPORT_DIR = f"{{session_dir}}/{PathConstants.REPORTS_DIR}"
+REPORT_BATCH_WORKERS = 4  # Worker processes for batch report generation
+STEP_PROFILER_PERSIST_SPANS = True  # Store each step's phase spans in step_spans (exportable as Chrome trace / speedscope)
 # Database and time constants are now in config.numeric_constants
 from config.numeric_constants import (
     DB_CONNECT_TIMEOUT,
@@ -725,6 +762,26 @@ from config.numeric_constants import (
     CACHE_MAX_SCREENS,
 )
 USE_AI_FILTER_FOR_TARGET_APP_DISCOVERY = True
+# AI provider transport: timeouts, retries with backoff, per-provider limits and hedging
+from config.numeric_constants import (
+    AI_REQUEST_TIMEOUT_SECONDS,
+    AI_MAX_RETRIES,
+    AI_RETRY_BASE_DELAY_SECONDS,
+    AI_RETRY_MAX_DELAY_SECONDS,
+    AI_MAX_CONCURRENT_REQUESTS,
+    AI_REQUESTS_PER_MINUTE,
+    AI_HEDGE_AFTER_SECONDS,
+    AI_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+)
+# Shared by all crawler processes so parallel devices using one API key share the rate budget
+AI_RATE_LIMIT_DB_PATH = f"{{{CONFIG_OUTPUT_DATA_DIR}}}/core/ai_rate_limits.db"
+# Decision routing: race or fall back between the primary and a secondary provider/model
+AI_ROUTING_ENABLED = False
+AI_ROUTING_MODE = "race"  # 'race' (concurrent, first valid answer wins) or 'fallback' (sequential)
+AI_ROUTING_SECONDARY_PROVIDER = None  # e.g. 'ollama' or 'openrouter'
+AI_ROUTING_SECONDARY_MODEL = None
+AI_ROUTING_LATENCY_DB_PATH = f"{{{CONFIG_OUTPUT_DATA_DIR}}}/core/ai_routing_latency.db"
+from config.numeric_constants import AI_ROUTING_TIMEOUT_SECONDS, AI_ROUTING_MIN_SAMPLES
 # AI Safety Settings for Gemini - Less restrictive configuration
 # Set to BLOCK_NONE for all categories to allow all content through
 # Categories: HARM_CATEGORY_HARASSMENT, HARM_CATEGORY_HATE_SPEECH, 
@@ -748,6 +805,22 @@ AI_SAFETY_SETTINGS = [
         "threshold": "BLOCK_NONE"
     }
 ]
+# How the current screen is described to the model: 'xml' (simplified XML) or
+# 'element_table' (numbered rows the model references by index, resolved locally to bounds)
+PROMPT_SCREEN_ENCODING = "xml"
+# Resolve target_identifier against the captured page source and act by coordinates,
+# using Appium's server-side element lookups only when the local index has no match
+USE_LOCAL_ELEMENT_RESOLVER = True
+# Aim scrolls at the scrollable container in the page source (scrollGesture reports the end of the
+# list) and turn scrolls that reach the end or do not move into feedback
+USE_GESTURE_ENGINE = True
+# Macro actions (several taps/inputs on one screen executed as one step)
+from config.numeric_constants import MACRO_MAX_STEPS, MACRO_STEP_PAUSE_MS
+# Keyword -> value for form fields (e.g. {"email": "qa@example.com", "password": "..."}). When set,
+# a screen with two or more matching fields is filled by a planned macro without an AI call
+MACRO_FORM_FIELD_VALUES = {}
+# Token budget for the decision prompt; None uses the provider's context_token_budget capability
+AI_CONTEXT_TOKEN_BUDGET = None
 # Prompt and XML compacting/caching for latency reduction
 PROMPT_COMPACT_MODE = True
 XML_INTERACTIVE_ONLY = True
@@ -766,13 +839,20 @@ CRAWLER_AVAILABLE_ACTIONS = {
     "clear_text": "Clear all text from the target input element.",
     "replace_text": "Replace existing text in the target input element with new text.",
     "flick": "Perform a fast flick gesture in the specified direction (faster than scroll for quick navigation).",
-    "reset_app": "Reset the app to its initial state (clears app data and restarts)."
+    "reset_app": "Reset the app to its initial state (clears app data and restarts).",
+    "macro": "Perform several steps on the current screen at once (e.g. fill a form): put them in 'steps' as a list of {action, target_identifier, input_text} using click, input or scroll actions."
 }
 
 CRAWL_MODE = "steps"
 MAX_CRAWL_STEPS = 10
 MAX_CRAWL_DURATION_SECONDS = 600
 VISUAL_SIMILARITY_THRESHOLD = 5
+REPLAY_SOURCE_DB = ""  # Session DB of a previous run to replay without AI calls (empty = normal crawl)
+REPLAY_RUN_ID = 0  # Run of REPLAY_SOURCE_DB to replay (0 = latest)
+SIMULATOR_SOURCE_DB = ""  # Session DB to crawl offline instead of a device and model (empty = real device)
+SIMULATOR_RUN_ID = 0  # Run of SIMULATOR_SOURCE_DB whose first screen and actions drive the simulation (0 = latest)
+SIMULATOR_MODEL_LATENCY_MS = 0  # Simulated model response time
+SIMULATOR_MODEL_JITTER_MS = 0  # Uniform +/- jitter on the simulated model response time (seeded, deterministic)
 
 LONG_PRESS_MIN_DURATION_MS = 600
 
@@ -795,6 +875,13 @@ MAX_CONSECUTIVE_NO_OP_FAILURES = 2
 MAX_SAME_ACTION_REPEAT = 2
 USE_ADB_INPUT_FALLBACK = True
 
+# Direct ADB capture backend (screencap over adb instead of base64 through Appium; Appium stays the fallback)
+ADB_CAPTURE_ENABLED = False
+ADB_CAPTURE_ADB_PATH = "adb"  # adb executable; point at a shim to test without a device
+ADB_CAPTURE_PERSISTENT_SHELL = True  # Reuse one adb shell for screenshots instead of one exec-out per capture
+ADB_CAPTURE_TIMEOUT = 10.0  # Seconds per capture before falling back to Appium
+ADB_UI_DUMP_ENABLED = False  # Page source via 'uiautomator dump'; can conflict with the UiAutomator2 server
+
 # Safety tap configuration and toast handling defaults
 SAFE_TAP_MARGIN_RATIO = 0.03  # 3% from each screen edge considered unsafe
 SAFE_TAP_EDGE_HANDLING = "snap"  # Options: 'reject' or 'snap' to safe area
@@ -813,11 +900,21 @@ AUTO_HIDE_KEYBOARD_BEFORE_NON_INPUT = (
 APPIUM_IMPLICIT_WAIT = 5000  # Implicit wait timeout in milliseconds (reduced from 10000 for faster element finding)
 APPIUM_MAX_RETRIES = 3  # Maximum retry attempts for Appium operations
 APPIUM_RETRY_DELAY = 1.0  # Delay between retries in seconds
+APPIUM_FOREGROUND_CONTEXT_MAX_AGE = 2.0  # Seconds a foreground package/activity probe is reused within a step
+APPIUM_FAST_REATTACH = True  # Recover crashed sessions by re-attaching (skip server install/device init) before a full restart
+APPIUM_SESSION_HEALTH_CHECK_INTERVAL = 15.0  # Background session probe interval in seconds (0 disables)
+APP_CONTEXT_WATCHDOG_INTERVAL = 1.0  # Background foreground-app poll over adb in seconds; 0 checks synchronously every step
 APPIUM_WAIT_FOR_IDLE_TIMEOUT = 0  # Disable idle waiting for faster element finding
 APPIUM_SNAPSHOT_MAX_DEPTH = 25  # Limit XML tree depth to reduce scanning overhead
 APPIUM_IGNORE_UNIMPORTANT_VIEWS = True  # Filter out non-interactive elements
 APPIUM_DISABLE_WINDOW_ANIMATION = True  # Skip animation waits
 
+# Shared exploration state across parallel crawler processes on the same app
+ENABLE_SHARED_EXPLORATION = False
+SHARED_EXPLORATION_DB_PATH = f"{{{CONFIG_OUTPUT_DATA_DIR}}}/shared/{{package}}_exploration.db"
+SHARED_EXPLORATION_WORKER_ID = None  # Defaults to the device UDID, then the process ID
+from config.numeric_constants import FRONTIER_CLAIM_LEASE_SECONDS
+
 # MobSF Integration settings 
 MOBSF_API_KEY = None  # Will be loaded from environment variable
 ENABLE_MOBSF_ANALYSIS = False 
@@ -849,6 +946,7 @@ AI_PROVIDER_CAPABILITIES = {
         "auto_disable_image_context": False,  # Keep enabled for vision tasks
         "description": "Google Gemini - High capacity, supports large payloads and images",
         "online": True,
+        "context_token_budget": 32000,  # Prompt token budget for decision context
     },
     "ollama": {
         "xml_max_len": 200000,  # Slightly lowered to reasonable local model limit
@@ -860,6 +958,7 @@ AI_PROVIDER_CAPABILITIES = {
         "auto_disable_image_context": False,
         "description": "Ollama - Local LLM provider with vision support for compatible models",
         "online": False,
+        "context_token_budget": 6000,  # Local models often run with small context windows
     },
     "openrouter": {
         "xml_max_len": 200000,  # Balanced default accepted industry standard
@@ -871,6 +970,7 @@ AI_PROVIDER_CAPABILITIES = {
         "auto_disable_image_context": False,
         "description": "OpenRouter - Unified gateway to multiple model providers",
         "online": True,
+        "context_token_budget": 16000,  # Prompt token budget for decision context
     },
 }
 
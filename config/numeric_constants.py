@@ -24,6 +24,18 @@ XML_SUMMARY_MAX_LINES_DEFAULT = 120
 # Hash distance threshold for similarity detection
 HASH_DISTANCE_ERROR_THRESHOLD = 1000
 
+# Element-table prompt encoding: bounds rounded to this many pixels, long text cells cut
+ELEMENT_TABLE_BOUNDS_QUANTUM_PX = 10
+ELEMENT_TABLE_TEXT_MAX_LEN = 40
+
+# Macro actions: upper bound on steps per macro, pause between steps (ms) so the UI can settle
+MACRO_MAX_STEPS = 8
+MACRO_STEP_PAUSE_MS = 150
+
+# Container scrolling: swipe inset from the container edges, and share of the container scrolled per gesture
+GESTURE_SCROLL_INSET_RATIO = 0.15
+GESTURE_SCROLL_PERCENT = 0.7
+
 # ========== Time Constants ==========
 
 # Time conversion factors
@@ -108,6 +120,48 @@ BEEP_DELAY_MS = 220
 DB_CONNECT_TIMEOUT = 10  # seconds
 DB_BUSY_TIMEOUT = 5000  # milliseconds
 
+# ========== Shared Exploration Constants ==========
+
+# How long a worker's claim on a frontier item (screen + action) blocks other workers
+FRONTIER_CLAIM_LEASE_SECONDS = 120
+
+# ========== Run Replay Constants ==========
+
+# Recorded steps searched for the current screen when a replay no longer matches the recording
+REPLAY_RESYNC_LOOKAHEAD = 20
+
+# ========== AI Provider Transport Constants ==========
+
+# Per-request timeout and retry policy for AI provider calls
+AI_REQUEST_TIMEOUT_SECONDS = 60.0
+AI_MAX_RETRIES = 3
+AI_RETRY_BASE_DELAY_SECONDS = 1.0
+AI_RETRY_MAX_DELAY_SECONDS = 30.0
+
+# Per-provider limits (requests per minute of 0 disables rate limiting)
+AI_MAX_CONCURRENT_REQUESTS = 4
+AI_REQUESTS_PER_MINUTE = 0
+
+# Start a second identical request if the first has not answered after this many seconds (0 disables)
+AI_HEDGE_AFTER_SECONDS = 0.0
+
+# Keep-alive connections kept open per provider
+AI_HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+
+# Decision routing across providers: overall deadline per decision, and samples needed
+# before learned latencies change the backend order or delay the backup request
+AI_ROUTING_TIMEOUT_SECONDS = 30.0
+AI_ROUTING_MIN_SAMPLES = 20
+
+# ========== Prompt Context Budget Constants ==========
+
+# Token budget for a decision prompt when the provider declares none
+AI_CONTEXT_TOKEN_BUDGET_DEFAULT = 16000
+# Tokens kept free for the model's answer
+AI_CONTEXT_RESPONSE_RESERVE_TOKENS = 1024
+# Starting chars-per-token ratio for the estimator (calibrated from provider token counts)
+AI_CONTEXT_CHARS_PER_TOKEN_DEFAULT = 3.5
+
 # ========== Cache Constants ==========
 
 # Maximum number of screens to cache
@@ -145,6 +199,29 @@ IMAGE_SHARPEN_RADIUS = 0.5
 IMAGE_SHARPEN_PERCENT = 150
 IMAGE_SHARPEN_THRESHOLD = 3
 
+# Encoded AI images kept for revisited screens (keyed by composite hash)
+IMAGE_PAYLOAD_CACHE_SIZE = 32
+
+# Visual hash is computed on a box-reduced copy at least this wide (pHash itself works on 32x32)
+VISUAL_HASH_THUMBNAIL_MIN_WIDTH = 128
+
+# ========== Report Constants ==========
+
+# Steps rendered into each partial PDF before the parts are concatenated
+REPORT_STEPS_PER_CHUNK = 50
+
+# Report screenshots are downscaled JPEG thumbnails cached next to the report
+REPORT_THUMBNAIL_MAX_WIDTH = 360
+REPORT_THUMBNAIL_QUALITY = 70
+
+# Upper bounds (ms) of the latency histogram buckets kept in run_metrics; one overflow bucket follows
+RUN_METRICS_LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2000, 5000, 10000, 30000)
+
+# Coverage/phase chart of the run report (pixels); the phase bars merge steps beyond this many bars
+REPORT_CHART_WIDTH = 1400
+REPORT_CHART_HEIGHT = 900
+REPORT_CHART_MAX_BARS = 200
+
 # ========== Model Configuration Constants ==========
 
 # Default model parameters
@@ -7,12 +7,12 @@ This module implements the core decision-execution cycle.
 import io
 import logging
 import os
+import sqlite3
 import sys
 import time
-import base64
 import asyncio
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set, Tuple
 
 try:
     from config.app_config import Config
@@ -22,6 +22,11 @@ try:
     from utils.paths import SessionPathManager
     from domain.traffic_capture_manager import TrafficCaptureManager
     from domain.video_recording_manager import VideoRecordingManager
+    from domain.gesture_engine import SCROLL_ACTIONS, GestureStats, ScrollContainer, container_moved
+    from domain.macro_actions import plan_form_fill
+    from infrastructure.app_context_watchdog import AppContextWatchdog, adb_foreground_probe
+    from infrastructure.step_profiler import StepProfiler, encode_spans
+    from domain.run_replay import ReplaySession, load_replay_plan
 except ImportError as e:
     print(f"FATAL: Import error: {e}", file=sys.stderr, flush=True)
     import traceback
@@ -34,6 +39,19 @@ logger = logging.getLogger(__name__)
 DEFAULT_SHUTDOWN_FLAG = 'crawler_shutdown.flag'
 DEFAULT_PAUSE_FLAG = 'crawler_pause.flag'
 
+# Time series phase of each top-level step span; time outside these spans is "other"
+TIMESERIES_PHASE_OF_SPAN = {
+    'capture': 'capture',
+    'post_capture': 'capture',
+    'hashing': 'hashing',
+    'state_lookup': 'db',
+    'db_context': 'db',
+    'persistence': 'db',
+    'ai_decision': 'ai',
+    'action': 'element_find',
+    'sleep': 'wait',
+}
+
 
 class CrawlerLoop:
     """Main crawler loop that orchestrates AI decision-making and action execution."""
@@ -50,6 +68,7 @@ class CrawlerLoop:
             
             self.agent_assistant: Optional[AgentAssistant] = None
             self.app_context_manager: Optional[AppContextManager] = None
+            self.app_context_watchdog: Optional[AppContextWatchdog] = None
             self.traffic_capture_manager: Optional[TrafficCaptureManager] = None
             self.video_recording_manager: Optional[VideoRecordingManager] = None
             self.step_count = 0
@@ -60,6 +79,19 @@ class CrawlerLoop:
             self.screen_state_manager = None
             self.current_run_id: Optional[int] = None
             self.current_from_screen_id: Optional[int] = None
+            self.shared_exploration_store = None
+            self.gesture_stats = GestureStats()
+            # (screen composite hash, scroll action) pairs known to be at the end of their list
+            self._exhausted_scrolls: Set[Tuple[str, str]] = set()
+            # Field identifiers of forms already filled by a planned macro (each form is planned once)
+            self._planned_forms: Set[Tuple[str, ...]] = set()
+            # Spans of the current step; summed into the run's time series and stored per step
+            self.step_profiler = StepProfiler()
+            self.persist_step_spans = bool(config.get('STEP_PROFILER_PERSIST_SPANS', True))
+            self._run_started_at: Optional[float] = None
+            self._step_started_at: Optional[float] = None
+            # Replays a recorded run's actions instead of asking the AI where the screens still match
+            self.replay_session: Optional[ReplaySession] = None
             
             # Set up flag controller
             logger.debug("Setting up flag controller...")
@@ -101,7 +133,11 @@ class CrawlerLoop:
             
             # Initialize AgentAssistant
             logger.debug("Creating AgentAssistant...")
-            self.agent_assistant = AgentAssistant(self.config)
+            simulator_db = self.config.get('SIMULATOR_SOURCE_DB')
+            if simulator_db:
+                self.agent_assistant = self._create_simulated_assistant(simulator_db)
+            else:
+                self.agent_assistant = AgentAssistant(self.config)
             logger.debug("AgentAssistant created successfully")
             
             # Ensure driver is connected
@@ -207,6 +243,19 @@ class CrawlerLoop:
             else:
                 logger.warning("AppContextManager not initialized - cannot launch app")
             
+            # Watch the foreground app in the background so steps skip the synchronous check
+            watchdog_interval = float(self.config.get('APP_CONTEXT_WATCHDOG_INTERVAL', 0) or 0)
+            if self.app_context_manager and watchdog_interval > 0:
+                driver = self.agent_assistant.tools.driver
+                udid = driver.get_device_udid() if hasattr(driver, 'get_device_udid') else None
+                allowed = [self.config.get('APP_PACKAGE')] + list(self.config.get('ALLOWED_EXTERNAL_PACKAGES') or [])
+                self.app_context_watchdog = AppContextWatchdog(
+                    adb_foreground_probe(self.config.get('ADB_CAPTURE_ADB_PATH', 'adb') or 'adb', udid),
+                    [package for package in allowed if package],
+                    watchdog_interval
+                )
+                self.app_context_watchdog.start()
+            
             # Initialize database to ensure it exists even if no screens are saved
             # This is important for post-run tasks like PDF generation
             # IMPORTANT: This must be done AFTER all managers are initialized and device name is resolved
@@ -243,12 +292,17 @@ class CrawlerLoop:
                 if self.db_manager.connect():
                     logger.debug("Database connection successful, tables created.")
                     
+                    # Open the shared exploration store when several workers crawl the same app
+                    if self.config.get('ENABLE_SHARED_EXPLORATION', False):
+                        self.shared_exploration_store = self._create_shared_exploration_store()
+                    
                     # Initialize ScreenStateManager
                     from domain.screen_state_manager import ScreenStateManager
                     self.screen_state_manager = ScreenStateManager(
                         self.db_manager,
                         self.agent_assistant.tools.driver,
-                        self.config
+                        self.config,
+                        shared_store=self.shared_exploration_store
                     )
                     logger.debug("ScreenStateManager initialized successfully.")
                     
@@ -268,6 +322,10 @@ class CrawlerLoop:
                         else:
                             logger.warning("Failed to get or create run_id")
                     
+                    replay_source_db = self.config.get('REPLAY_SOURCE_DB')
+                    if replay_source_db:
+                        self.replay_session = self._create_replay_session(replay_source_db)
+                    
                     # Keep connection open for step logging during execution
                     # Don't close it here - we'll use it during execution
                     
@@ -293,6 +351,40 @@ class CrawlerLoop:
             print(f"STATUS: Initialization failed - {str(e)}", flush=True)
             return False
     
+    def _create_shared_exploration_store(self):
+        """Create the shared exploration store used to coordinate parallel workers.
+        
+        Returns:
+            Connected SharedExplorationStore, or None if it could not be opened
+        """
+        try:
+            from infrastructure.shared_exploration_store import SharedExplorationStore
+            from config.numeric_constants import FRONTIER_CLAIM_LEASE_SECONDS
+            
+            db_path = self.config.SHARED_EXPLORATION_DB_PATH
+            if not db_path:
+                logger.warning("ENABLE_SHARED_EXPLORATION is set but SHARED_EXPLORATION_DB_PATH could not be resolved")
+                return None
+            
+            worker_id = self.config.get('SHARED_EXPLORATION_WORKER_ID')
+            if not worker_id and hasattr(self.config, '_path_manager'):
+                worker_id = self.config._path_manager.get_device_udid()
+            if not worker_id:
+                worker_id = f"pid-{os.getpid()}"
+            
+            store = SharedExplorationStore(
+                db_path,
+                worker_id,
+                lease_seconds=float(self.config.get('FRONTIER_CLAIM_LEASE_SECONDS', FRONTIER_CLAIM_LEASE_SECONDS))
+            )
+            if not store.connect():
+                return None
+            logger.info(f"Shared exploration enabled: {db_path} (worker: {worker_id})")
+            return store
+        except Exception as e:
+            logger.warning(f"Could not open shared exploration store: {e}. Continuing without it.")
+            return None
+    
     def check_shutdown_flag(self) -> bool:
         """Check if shutdown flag exists.
         
@@ -323,11 +415,8 @@ class CrawlerLoop:
         try:
             driver = self.agent_assistant.tools.driver
             
-            # Get screenshot
-            screenshot_base64 = driver.get_screenshot_as_base64()
-            screenshot_bytes = None
-            if screenshot_base64:
-                screenshot_bytes = base64.b64decode(screenshot_base64)
+            # Get screenshot (PNG bytes; direct over ADB when enabled, Appium otherwise)
+            screenshot_bytes = driver.get_screenshot_bytes()
             
             # Get XML/page source
             xml_context_raw = driver.get_page_source()
@@ -383,29 +472,43 @@ class CrawlerLoop:
             
             # Increment step count
             self.step_count += 1
+            self._step_started_at = time.perf_counter()
+            if self._run_started_at is None:
+                self._run_started_at = self._step_started_at
+            self.step_profiler.start_step()
             print(f"UI_STEP:{self.step_count}", flush=True)
             print(f"STEP: {self.step_count}")
             logger.info(f"Starting step {self.step_count}")
             
             # CRITICAL: Ensure we're in the correct app BEFORE getting screen state and making AI decisions
             # This prevents the AI from analyzing the wrong app's UI
-            if self.app_context_manager:
+            if self.app_context_manager and self.app_context_watchdog and not self.app_context_watchdog.needs_check():
+                logger.debug("App context watchdog reports the app in the foreground - skipping context check")
+            elif self.app_context_manager:
                 logger.debug("Checking app context before screen state extraction...")
-                if not self.app_context_manager.ensure_in_app():
+                with self.step_profiler.span('app_context_check'):
+                    in_app = self.app_context_manager.ensure_in_app()
+                if not in_app:
                     logger.warning("Failed to ensure app context - attempting recovery and retrying...")
                     # Wait a bit for recovery to complete
-                    time.sleep(2.0)
+                    with self.step_profiler.span('sleep'):
+                        time.sleep(2.0)
                     # Retry once
-                    if not self.app_context_manager.ensure_in_app():
+                    with self.step_profiler.span('app_context_check'):
+                        in_app = self.app_context_manager.ensure_in_app()
+                    if not in_app:
                         logger.error("Could not return to correct app context after retry - skipping this step")
                         self.last_action_feedback = "App context check failed - not in target app"
                         return True  # Continue to next step
+                if self.app_context_watchdog:
+                    self.app_context_watchdog.acknowledge()
                 logger.debug("App context verified - proceeding with screen state extraction")
             else:
                 logger.warning("AppContextManager not initialized - skipping app context check")
             
             # Get current screen state (only after we've verified we're in the correct app)
-            screen_state = self.get_screen_state()
+            with self.step_profiler.span('capture'):
+                screen_state = self.get_screen_state()
             if not screen_state:
                 logger.error("Failed to get screen state")
                 return True  # Continue despite error
@@ -423,8 +526,9 @@ class CrawlerLoop:
                     screenshot_bytes = screen_state.get("screenshot_bytes")
                     
                     if xml_str and screenshot_bytes:
-                        xml_hash = utils.calculate_xml_hash(xml_str)
-                        visual_hash = utils.calculate_visual_hash(screenshot_bytes)
+                        with self.step_profiler.span('hashing'):
+                            xml_hash = utils.calculate_xml_hash(xml_str)
+                            visual_hash = utils.calculate_visual_hash(screenshot_bytes)
                         composite_hash = f"{xml_hash}_{visual_hash}"
                         self.current_composite_hash = composite_hash
                         
@@ -454,9 +558,10 @@ class CrawlerLoop:
                         
                         # Process and record the screen state (this ensures it's in the database)
                         # Don't increment visit count here - we'll do it after the action
-                        final_screen, visit_info = self.screen_state_manager.process_and_record_state(
-                            candidate_screen, self.current_run_id, self.step_count, increment_visit_count=False
-                        )
+                        with self.step_profiler.span('state_lookup'):
+                            final_screen, visit_info = self.screen_state_manager.process_and_record_state(
+                                candidate_screen, self.current_run_id, self.step_count, increment_visit_count=False
+                            )
                         from_screen_id = final_screen.id
                         current_screen_visit_count = visit_info.get("visit_count_this_run", 0)
                         self.current_screen_visit_count = current_screen_visit_count
@@ -476,15 +581,16 @@ class CrawlerLoop:
             
             if self.db_manager and self.current_run_id:
                 try:
-                    # Get recent steps with details (last 20 steps)
-                    action_history = self.db_manager.get_recent_steps_with_details(
-                        self.current_run_id, limit=20
-                    )
-                    
-                    # Get visited screens summary (filter out system dialogs)
-                    all_visited_screens = self.db_manager.get_visited_screens_summary(
-                        self.current_run_id
-                    )
+                    with self.step_profiler.span('db_context'):
+                        # Get recent steps with details (last 20 steps)
+                        action_history = self.db_manager.get_recent_steps_with_details(
+                            self.current_run_id, limit=20
+                        )
+                        
+                        # Get visited screens summary (filter out system dialogs)
+                        all_visited_screens = self.db_manager.get_visited_screens_summary(
+                            self.current_run_id
+                        )
                     # Filter out system dialogs/pickers
                     visited_screens = []
                     target_package = self.config.get('APP_PACKAGE', '')
@@ -510,9 +616,20 @@ class CrawlerLoop:
                     
                     # Get actions already tried on current screen (if we know the screen ID)
                     if from_screen_id is not None:
-                        current_screen_actions = self.db_manager.get_actions_for_screen_with_details(
-                            from_screen_id, run_id=self.current_run_id
-                        )
+                        with self.step_profiler.span('db_context'):
+                            current_screen_actions = self.db_manager.get_actions_for_screen_with_details(
+                                from_screen_id, run_id=self.current_run_id
+                            )
+                        # Include actions other workers claimed or completed on this screen
+                        if self.shared_exploration_store:
+                            for explored in self.shared_exploration_store.get_explored_actions(self.current_composite_hash):
+                                current_screen_actions.append({
+                                    'step_number': None,
+                                    'action_description': f"{explored['action_description']} (by worker {explored['claimed_by']})",
+                                    'execution_success': bool(explored['execution_success']),
+                                    'error_message': "in progress on another worker" if explored['status'] == 'claimed' else None,
+                                    'to_screen_id': explored['to_screen_id']
+                                })
                 except Exception as e:
                     logger.warning(f"Error collecting action history from database: {e}", exc_info=True)
                     # If database query fails, action_history will remain empty
@@ -624,21 +741,34 @@ class CrawlerLoop:
                 logger.info(f"  [{status}] {action_desc}{screen_info}{error_info}")
             logger.info("=" * 80)
             
-            # Get next action from AI
+            # Replay the recorded action when the screen matches the recording, else ask the AI
+            replay_step = self.replay_session.next_step(self.current_composite_hash) if self.replay_session else None
+            form_macro = None if replay_step else self._plan_form_macro(screen_state.get("xml_context", ""))
             ai_decision_start = time.time()
-            action_result = self.agent_assistant._get_next_action_langchain(
-                screenshot_bytes=screen_state.get("screenshot_bytes"),
-                xml_context=screen_state.get("xml_context", ""),
-                action_history=action_history,
-                visited_screens=visited_screens,
-                current_screen_actions=current_screen_actions,
-                current_screen_id=from_screen_id,
-                current_screen_visit_count=current_screen_visit_count,
-                current_composite_hash=self.current_composite_hash,
-                last_action_feedback=self.last_action_feedback,
-                is_stuck=is_stuck,
-                stuck_reason=stuck_reason if is_stuck else None
-            )
+            if replay_step:
+                logger.info(f"Replaying recorded step {replay_step.step_number} (no AI call)")
+                # The recorded target is resolved on this screen, not the one of the last AI-decided step
+                self.agent_assistant.prepare_screen_context(screen_state.get("xml_context", ""), build_element_table=True)
+                action_result = (replay_step.live_action(), None, None, None)
+            elif form_macro:
+                logger.info(f"Filling form with a planned macro of {len(form_macro['steps'])} steps (no AI call)")
+                self.agent_assistant.prepare_screen_context(screen_state.get("xml_context", ""))
+                action_result = (form_macro, None, None, None)
+            else:
+                with self.step_profiler.span('ai_decision'):
+                    action_result = self.agent_assistant._get_next_action_langchain(
+                        screenshot_bytes=screen_state.get("screenshot_bytes"),
+                        xml_context=screen_state.get("xml_context", ""),
+                        action_history=action_history,
+                        visited_screens=visited_screens,
+                        current_screen_actions=current_screen_actions,
+                        current_screen_id=from_screen_id,
+                        current_screen_visit_count=current_screen_visit_count,
+                        current_composite_hash=self.current_composite_hash,
+                        last_action_feedback=self.last_action_feedback,
+                        is_stuck=is_stuck,
+                        stuck_reason=stuck_reason if is_stuck else None
+                    )
             ai_decision_time = time.time() - ai_decision_start  # Time in seconds
             
             if not action_result:
@@ -648,21 +778,22 @@ class CrawlerLoop:
                 if self.db_manager and self.current_run_id:
                     try:
                         import json
-                        self.db_manager.insert_step_log(
-                            run_id=self.current_run_id,
-                            step_number=self.step_count,
-                            from_screen_id=from_screen_id,
-                            to_screen_id=None,
-                            action_description="AI decision failed",
-                            ai_suggestion_json=None,
-                            mapped_action_json=None,
-                            execution_success=False,
-                            error_message="AI did not return a valid action",
-                            ai_response_time=ai_decision_time * 1000.0,  # Convert to ms
-                            total_tokens=None,
-                            ai_input_prompt=None,
-                            element_find_time_ms=None
-                        )
+                        with self.step_profiler.span('persistence'):
+                            self.db_manager.insert_step_log(
+                                run_id=self.current_run_id,
+                                step_number=self.step_count,
+                                from_screen_id=from_screen_id,
+                                to_screen_id=None,
+                                action_description="AI decision failed",
+                                ai_suggestion_json=None,
+                                mapped_action_json=None,
+                                execution_success=False,
+                                error_message="AI did not return a valid action",
+                                ai_response_time=ai_decision_time * 1000.0,  # Convert to ms
+                                total_tokens=None,
+                                ai_input_prompt=None,
+                                element_find_time_ms=None
+                            )
                     except Exception as e:
                         logger.error(f"Error logging failed step: {e}")
                 return True  # Continue despite error
@@ -683,20 +814,56 @@ class CrawlerLoop:
                 logger.info(f"AI reasoning: {reasoning}")
             logger.info(f"AI decision time: {ai_decision_time:.3f}s")
             
+            # A scroll already known to be at the end of its list on this screen is not repeated:
+            # no gesture, capture or step log, the AI is asked for a different action next step
+            action_type = self.agent_assistant._normalize_action_type(
+                str(action_data.get('action', '')).lower(), action_data
+            )
+            scroll_key = (self.current_composite_hash, action_type) if action_type in SCROLL_ACTIONS else None
+            scroll_feedback: Optional[str] = None
+            if scroll_key and scroll_key in self._exhausted_scrolls:
+                self.gesture_stats.scroll_steps_saved += 1
+                logger.info(f"Skipping {action_type}: list already at its end on this screen")
+                self.last_action_feedback = (f"'{action_type}' skipped: the list on this screen is already at its "
+                                             f"end in that direction. Choose a different action")
+                return True
+            
+            # Claim the action on this screen so parallel workers don't execute it concurrently
+            shared_frontier_hash = self.current_composite_hash
+            if self.shared_exploration_store and from_screen_id is not None:
+                if not self.shared_exploration_store.claim_action(shared_frontier_hash, action_str):
+                    logger.info(f"Action '{action_str}' is being explored by another worker - skipping")
+                    self.last_action_feedback = f"Action '{action_str}' is already being explored by another worker; choose a different action"
+                    return True
+            
+            # Keep the suggestion as the AI sent it; execute_action adds resolved bounds and
+            # element_resolution to action_data, which is logged as the mapped action
+            ai_suggestion_snapshot = dict(action_data) if action_data else None
+            
             # Execute the action (includes element finding)
             element_find_start = time.time()
-            success = self.agent_assistant.execute_action(action_data)
+            with self.step_profiler.span('action'):
+                success = self.agent_assistant.execute_action(action_data)
+            if self.app_context_watchdog:
+                self.app_context_watchdog.note_action()
             element_find_time = time.time() - element_find_start  # Time in seconds
             element_find_time_ms = element_find_time * 1000.0  # Convert to milliseconds
+            # The pre-action package/activity probe is stale once the action ran
+            driver = getattr(getattr(self.agent_assistant, 'tools', None), 'driver', None)
+            if driver is not None and hasattr(driver, 'invalidate_foreground_context'):
+                driver.invalidate_foreground_context()
             print(f"ELEMENT_FIND_TIME: {element_find_time:.3f}s")
             logger.info(f"Element find and execution time: {element_find_time:.3f}s")
             
             # Get to_screen_id after action execution (process the new screen state)
             to_screen_id = None
+            after_xml: Optional[str] = None
+            after_composite_hash: Optional[str] = None
             if success and self.screen_state_manager and self.current_run_id:
                 try:
                     # Get new screen state after action
-                    new_screen_state = self.get_screen_state()
+                    with self.step_profiler.span('post_capture'):
+                        new_screen_state = self.get_screen_state()
                     if new_screen_state:
                         from domain.screen_state_manager import ScreenRepresentation
                         import utils.utils as utils
@@ -705,9 +872,11 @@ class CrawlerLoop:
                         screenshot_bytes = new_screen_state.get("screenshot_bytes")
                         
                         if xml_str and screenshot_bytes:
-                            xml_hash = utils.calculate_xml_hash(xml_str)
-                            visual_hash = utils.calculate_visual_hash(screenshot_bytes)
+                            with self.step_profiler.span('hashing'):
+                                xml_hash = utils.calculate_xml_hash(xml_str)
+                                visual_hash = utils.calculate_visual_hash(screenshot_bytes)
                             composite_hash = f"{xml_hash}_{visual_hash}"
+                            after_xml, after_composite_hash = xml_str, composite_hash
                             
                             # Get activity name from driver if available
                             activity_name = None
@@ -734,9 +903,10 @@ class CrawlerLoop:
                             )
                             
                             # Process and record the new screen state (increment visit count here)
-                            final_screen, visit_info_after = self.screen_state_manager.process_and_record_state(
-                                candidate_screen, self.current_run_id, self.step_count, increment_visit_count=True
-                            )
+                            with self.step_profiler.span('state_lookup'):
+                                final_screen, visit_info_after = self.screen_state_manager.process_and_record_state(
+                                    candidate_screen, self.current_run_id, self.step_count, increment_visit_count=True
+                                )
                             # Emit UI_SCREENSHOT for UI to display the new screen state after action
                             if final_screen.screenshot_path and os.path.exists(final_screen.screenshot_path):
                                 print(f"UI_SCREENSHOT:{final_screen.screenshot_path}", flush=True)
@@ -747,30 +917,45 @@ class CrawlerLoop:
                 except Exception as e:
                     logger.warning(f"Error getting to_screen_id: {e}", exc_info=True)
             
+            if replay_step:
+                # Logged with the mapped action so replayed steps can be told apart from AI decisions
+                action_data['replayed_from_step'] = replay_step.step_number
+                self.replay_session.record_outcome(replay_step, after_composite_hash, success)
+            
+            if scroll_key and success:
+                scroll_feedback = self._record_scroll_outcome(
+                    action_type, action_data, screen_state.get("xml_context", ""), after_xml,
+                    self.current_composite_hash, after_composite_hash
+                )
+            
+            if self.shared_exploration_store and from_screen_id is not None:
+                self.shared_exploration_store.complete_action(shared_frontier_hash, action_str, to_screen_id, success)
+            
             # Log step to database
             if self.db_manager and self.current_run_id:
                 try:
                     import json
-                    ai_suggestion_json = json.dumps(action_data) if action_data else None
+                    ai_suggestion_json = json.dumps(ai_suggestion_snapshot) if ai_suggestion_snapshot else None
                     mapped_action_json = json.dumps(action_data) if action_data else None
                     action_description = action_str
                     error_message = None if success else "Action execution failed"
                     
-                    self.db_manager.insert_step_log(
-                        run_id=self.current_run_id,
-                        step_number=self.step_count,
-                        from_screen_id=from_screen_id,
-                        to_screen_id=to_screen_id,
-                        action_description=action_description,
-                        ai_suggestion_json=ai_suggestion_json,
-                        mapped_action_json=mapped_action_json,
-                        execution_success=success,
-                        error_message=error_message,
-                        ai_response_time=ai_decision_time * 1000.0,  # Convert to ms
-                        total_tokens=token_count if token_count else None,
-                        ai_input_prompt=ai_input_prompt,
-                        element_find_time_ms=element_find_time_ms
-                    )
+                    with self.step_profiler.span('persistence'):
+                        self.db_manager.insert_step_log(
+                            run_id=self.current_run_id,
+                            step_number=self.step_count,
+                            from_screen_id=from_screen_id,
+                            to_screen_id=to_screen_id,
+                            action_description=action_description,
+                            ai_suggestion_json=ai_suggestion_json,
+                            mapped_action_json=mapped_action_json,
+                            execution_success=success,
+                            error_message=error_message,
+                            ai_response_time=ai_decision_time * 1000.0,  # Convert to ms
+                            total_tokens=token_count if token_count else None,
+                            ai_input_prompt=ai_input_prompt,
+                            element_find_time_ms=element_find_time_ms
+                        )
                     logger.debug(f"Logged step {self.step_count} to database")
                 except Exception as e:
                     logger.error(f"Error logging step to database: {e}", exc_info=True)
@@ -780,9 +965,17 @@ class CrawlerLoop:
             else:
                 self.last_action_feedback = "Action execution failed"
                 logger.warning(f"Action execution failed: {action_str}")
+            if scroll_feedback:
+                self.last_action_feedback = scroll_feedback
+            escaped_package = self.app_context_watchdog.escaped_package if self.app_context_watchdog else None
+            if success and escaped_package:
+                # Seen by the watchdog during this step; the context is restored before the next one
+                self.last_action_feedback = (f"Action left the app (foreground is now {escaped_package}); "
+                                             f"avoid actions that open other apps")
             
             # Wait after action
-            time.sleep(self.wait_after_action)
+            with self.step_profiler.span('sleep'):
+                time.sleep(self.wait_after_action)
             
             return True
             
@@ -790,6 +983,164 @@ class CrawlerLoop:
             logger.error(f"Error in crawler step: {e}", exc_info=True)
             self.last_action_feedback = f"Step error: {str(e)}"
             return True  # Continue despite error
+        finally:
+            self._record_step_timeseries()
+    
+    def _record_step_timeseries(self):
+        """Store the spans, coverage and phase breakdown of the step that just ended (once per step)."""
+        if self._step_started_at is None:
+            return
+        started_ms = (self._step_started_at - self._run_started_at) * 1000.0
+        self._step_started_at = None
+        span_totals = self.step_profiler.totals(top_level_only=True)
+        total_ms = self.step_profiler.finish_step()
+        phase_ms: Dict[str, float] = {}
+        for span_name, duration_ms in span_totals.items():
+            phase = TIMESERIES_PHASE_OF_SPAN.get(span_name)
+            if phase:
+                phase_ms[phase] = phase_ms.get(phase, 0.0) + duration_ms
+        phase_ms['other'] = max(0.0, total_ms - sum(phase_ms.values()))
+        if self.db_manager and self.current_run_id:
+            if self.persist_step_spans:
+                self.db_manager.insert_step_spans(
+                    self.current_run_id, self.step_count, started_ms, total_ms, encode_spans(self.step_profiler.spans)
+                )
+            self.db_manager.insert_timeseries_point(
+                self.current_run_id, self.step_count, started_ms + total_ms, phase_ms
+            )
+    
+    def _create_simulated_assistant(self, source_db: str) -> AgentAssistant:
+        """AgentAssistant on a recorded session: no device, Appium server or model is used."""
+        from domain.agent_assistant import Tools
+        from domain.model_adapters import SimulatedAdapter
+        from infrastructure.simulated_driver import SimulatedDriver, load_recorded_session
+        
+        run_id = int(self.config.get('SIMULATOR_RUN_ID') or 0) or None
+        session = load_recorded_session(source_db, run_id)
+        adapter = SimulatedAdapter(
+            session.actions,
+            latency_ms=float(self.config.get('SIMULATOR_MODEL_LATENCY_MS') or 0),
+            jitter_ms=float(self.config.get('SIMULATOR_MODEL_JITTER_MS') or 0),
+        )
+        logger.info(f"Simulating {session.app_package} from {source_db}: {len(session.screens)} screens, "
+                    f"{len(session.actions)} recorded actions")
+        return AgentAssistant(self.config, tools=Tools(driver=SimulatedDriver(self.config, session)),
+                              model_adapter=adapter)
+    
+    def _create_replay_session(self, source_db: str) -> Optional[ReplaySession]:
+        """Load the recorded run to replay; the crawl falls back to AI decisions if it cannot be read."""
+        from config.numeric_constants import REPLAY_RESYNC_LOOKAHEAD
+        
+        run_id = int(self.config.get('REPLAY_RUN_ID') or 0) or None
+        try:
+            plan = load_replay_plan(source_db, run_id)
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"⚠️ Cannot replay {source_db}: {e}. Crawling with AI decisions")
+            return None
+        threshold = self.config.get('VISUAL_SIMILARITY_THRESHOLD')
+        session = ReplaySession(plan, int(threshold) if threshold is not None else 0, REPLAY_RESYNC_LOOKAHEAD)
+        logger.info(f"Replaying {len(session.steps)} recorded steps of run {session.source_run_id} from {source_db}")
+        return session
+    
+    def _plan_form_macro(self, xml_context: str) -> Optional[Dict[str, Any]]:
+        """Form-fill macro for the current screen when MACRO_FORM_FIELD_VALUES matches its fields.
+
+        Returns:
+            Macro action dict, or None when no values are configured, the screen is not a form
+            or this form was already filled in this run
+        """
+        field_values = self.config.get('MACRO_FORM_FIELD_VALUES')
+        if not field_values or not isinstance(field_values, dict) or not xml_context:
+            return None
+        from config.numeric_constants import MACRO_MAX_STEPS
+        plan = plan_form_fill(xml_context, field_values,
+                              max_steps=int(self.config.get('MACRO_MAX_STEPS') or MACRO_MAX_STEPS))
+        if not plan:
+            return None
+        form_key = tuple(step['target_identifier'] for step in plan['steps'] if step['action'] == 'input')
+        if form_key in self._planned_forms:
+            return None
+        self._planned_forms.add(form_key)
+        return plan
+    
+    def _record_scroll_outcome(self, action_type: str, action_data: Dict[str, Any],
+                               before_xml: str, after_xml: Optional[str],
+                               before_hash: str, after_hash: Optional[str]) -> Optional[str]:
+        """Detect a scroll that did not move or reached the end of its list.
+        
+        Returns:
+            Feedback for the next AI decision, or None when the scroll revealed new content
+        """
+        self.gesture_stats.scrolls += 1
+        container_data = action_data.get('scroll_container')
+        if not container_data:
+            return None
+        self.gesture_stats.container_scrolls += 1
+        container = ScrollContainer.from_dict(container_data)
+        if after_xml and container_moved(before_xml, after_xml, container) is False:
+            self.gesture_stats.no_movement_detected += 1
+            self._exhausted_scrolls.add((before_hash, action_type))
+            logger.info(f"{action_type} did not move '{container.label}'")
+            return (f"'{action_type}' did not move '{container.label}': it is already at its end in that direction. "
+                    f"Do not {action_type} again on this screen")
+        if action_data.get('can_scroll_more') is False:
+            self.gesture_stats.end_of_list_detected += 1
+            self._exhausted_scrolls.add((after_hash or before_hash, action_type))
+            logger.info(f"{action_type} reached the end of '{container.label}'")
+            return (f"'{action_type}' reached the end of '{container.label}'; scrolling further in that direction "
+                    f"will not reveal new content")
+        return None
+    
+    def _save_runtime_metrics(self):
+        """Store session recovery, ADB capture, scroll outcome, context watchdog, step phase, replay and simulation stats in run_meta."""
+        if not (self.db_manager and self.current_run_id):
+            return
+        driver = getattr(getattr(self.agent_assistant, 'tools', None), 'driver', None)
+        try:
+            import json
+            stats = driver.get_session_recovery_stats() if hasattr(driver, 'get_session_recovery_stats') else {}
+            capture_stats = driver.get_capture_stats() if hasattr(driver, 'get_capture_stats') else {}
+            gesture_stats = {}
+            if self.gesture_stats.scrolls or self.gesture_stats.scroll_steps_saved:
+                gesture_stats = self.gesture_stats.to_dict()
+            watchdog_stats = self.app_context_watchdog.get_stats() if self.app_context_watchdog else {}
+            phase_stats = self.db_manager.get_step_phase_summary(self.current_run_id) if self.persist_step_spans else {}
+            replay_stats = self.replay_session.get_stats() if self.replay_session else {}
+            simulation_stats = driver.get_simulation_stats() if hasattr(driver, 'get_simulation_stats') else {}
+            if replay_stats:
+                logger.info(f"Replay: {replay_stats['replayed_steps']} steps replayed "
+                            f"({replay_stats['verified_steps']} verified, {replay_stats['diverged_steps']} diverged), "
+                            f"{replay_stats['ai_steps']} AI steps, {replay_stats['ai_calls_avoided']} AI calls avoided; "
+                            f"{replay_stats['steps_per_minute']} steps/min vs {replay_stats['source_steps_per_minute']} "
+                            f"in the recorded run")
+            if phase_stats:
+                logger.info("Step phases (mean / p95 ms per step): " + ", ".join(
+                    f"{name} {values['mean_ms']:.0f}/{values['p95_ms']:.0f}" for name, values in phase_stats.items()
+                ))
+            if not (stats or capture_stats or gesture_stats or watchdog_stats or phase_stats or replay_stats
+                    or simulation_stats):
+                return
+            meta_json = self.db_manager.get_run_meta(self.current_run_id)
+            meta = json.loads(meta_json) if meta_json else {}
+            if stats:
+                meta['session_recovery'] = stats
+            if capture_stats:
+                meta['screen_capture'] = capture_stats
+            if gesture_stats:
+                meta['gestures'] = gesture_stats
+            if watchdog_stats:
+                meta['app_context_watchdog'] = watchdog_stats
+            if phase_stats:
+                meta['step_phases'] = phase_stats
+            if replay_stats:
+                meta['replay'] = replay_stats
+            if simulation_stats:
+                meta['simulation'] = simulation_stats
+            self.db_manager.update_run_meta(self.current_run_id, json.dumps(meta))
+            if stats.get('recoveries'):
+                logger.info(f"Session recoveries this run: {stats}")
+        except Exception as e:
+            logger.warning(f"Could not save run metrics: {e}")
     
     def run(self, max_steps: Optional[int] = None):
         """Run the main crawler loop.
@@ -873,6 +1224,7 @@ class CrawlerLoop:
                 try:
                     from datetime import datetime
                     end_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    self._save_runtime_metrics()
                     self.db_manager.update_run_status(self.current_run_id, "COMPLETED", end_time)
                     logger.debug(f"Updated run {self.current_run_id} status to COMPLETED")
                 except Exception as e:
@@ -897,6 +1249,7 @@ class CrawlerLoop:
                 try:
                     from datetime import datetime
                     end_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    self._save_runtime_metrics()
                     self.db_manager.update_run_status(self.current_run_id, "INTERRUPTED", end_time)
                 except Exception as e:
                     logger.error(f"Error updating run status: {e}")
@@ -913,6 +1266,7 @@ class CrawlerLoop:
                 try:
                     from datetime import datetime
                     end_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    self._save_runtime_metrics()
                     self.db_manager.update_run_status(self.current_run_id, "FAILED", end_time)
                 except Exception as e:
                     logger.error(f"Error updating run status: {e}")
@@ -989,6 +1343,13 @@ class CrawlerLoop:
                 except Exception as e:
                     logger.warning(f"Error terminating app at crawl loop end: {e}")
             
+            if self.app_context_watchdog:
+                self.app_context_watchdog.stop()
+            
+            # Close shared exploration store
+            if self.shared_exploration_store:
+                self.shared_exploration_store.close()
+            
             # Disconnect driver
             if self.agent_assistant and self.agent_assistant.tools.driver:
                 try:
@@ -1,5 +1,4 @@
 import os
-import io
 import uuid
 import time
 import json
@@ -7,7 +6,6 @@ import logging
 import re
 from datetime import datetime, timezone
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
-from PIL import Image
 from pydantic import BaseModel, ValidationError, validator
 
 # MCP client exceptions removed
@@ -19,21 +17,21 @@ from langgraph.checkpoint.memory import MemorySaver
 
 # Always use absolute import for model_adapters
 from domain.model_adapters import create_model_adapter, Session
+from domain.context_builder import ContextBuilder
+from domain.element_table import ElementTable, LocalElementIndex
+from domain.gesture_engine import find_scroll_container
+from domain.image_payload import ImagePayloadPreparer, ImagePrepSettings, PreparedImage
+from domain.macro_actions import normalize_macro_steps, run_macro
 from domain.provider_utils import get_provider_api_key, get_provider_config_key, validate_provider_config
+from infrastructure import step_profiler
 from config.numeric_constants import (
     DEFAULT_AI_PROVIDER,
     DEFAULT_MODEL_TEMP,
     DEFAULT_MAX_TOKENS,
-    IMAGE_MAX_WIDTH_DEFAULT,
-    IMAGE_DEFAULT_QUALITY,
-    IMAGE_DEFAULT_FORMAT,
-    IMAGE_CROP_TOP_PCT_DEFAULT,
-    IMAGE_CROP_BOTTOM_PCT_DEFAULT,
-    IMAGE_BG_COLOR,
-    IMAGE_SHARPEN_RADIUS,
-    IMAGE_SHARPEN_PERCENT,
-    IMAGE_SHARPEN_THRESHOLD,
+    GESTURE_SCROLL_PERCENT,
     LONG_PRESS_MIN_DURATION_MS,
+    MACRO_MAX_STEPS,
+    MACRO_STEP_PAUSE_MS,
     AI_LOG_FILENAME,
 )
 from config.urls import ServiceURLs
@@ -86,6 +84,7 @@ class ActionData(BaseModel):
     input_text: Optional[str] = None
     reasoning: str
     focus_influence: List[str]
+    steps: Optional[List[Dict[str, Any]]] = None
 
     @validator("target_identifier")
     def clean_target_identifier(cls, value):
@@ -116,7 +115,8 @@ class AgentAssistant:
                 safety_settings_override: Optional[Dict] = None,
                 agent_tools=None,
                 ui_callback=None,
-                tools=None):  # Added tools parameter
+                tools=None,  # Added tools parameter
+                model_adapter=None):  # Ready adapter; skips provider setup (offline simulator)
         if tools is None:
             app_config = Config()
             from infrastructure.appium_driver import AppiumDriver
@@ -125,6 +125,7 @@ class AgentAssistant:
         self.tools = tools
         self.cfg = app_config
         self.response_cache: Dict[str, Tuple[Dict[str, Any], float, int]] = {}
+        self._image_preparer = ImagePayloadPreparer()
         self.agent_tools = agent_tools  # May be None initially and set later
         self.ui_callback = ui_callback  # Callback for UI updates
         logging.debug("AI response cache initialized.")
@@ -136,19 +137,25 @@ class AgentAssistant:
         # Adapter provider override (for routing purposes without changing UI label)
         self._adapter_provider_override: Optional[str] = None
 
-        # Get the appropriate API key based on the provider using provider-agnostic utility
-        is_valid, error_msg = validate_provider_config(self.cfg, self.ai_provider, ServiceURLs.OLLAMA)
-        if not is_valid:
-            raise ValueError(error_msg or f"Unsupported AI provider: {self.ai_provider}")
-        
-        self.api_key = get_provider_api_key(self.cfg, self.ai_provider, ServiceURLs.OLLAMA)
-        if not self.api_key:
-            # This should not happen if validation passed, but add safety check
-            config_key = get_provider_config_key(self.ai_provider) or "API_KEY"
-            raise ValueError(f"{config_key} is not set in the provided application configuration.")
-
-        # Use DEFAULT_MODEL_TYPE directly as a provider-specific model identifier
-        model_id = model_alias_override or self.cfg.DEFAULT_MODEL_TYPE
+        self.model_adapter = model_adapter
+        if model_adapter is not None:
+            # An injected adapter needs no provider key or model selection
+            self.api_key = None
+            model_id = model_alias_override or model_adapter.model_info.get('model_name')
+        else:
+            # Get the appropriate API key based on the provider using provider-agnostic utility
+            is_valid, error_msg = validate_provider_config(self.cfg, self.ai_provider, ServiceURLs.OLLAMA)
+            if not is_valid:
+                raise ValueError(error_msg or f"Unsupported AI provider: {self.ai_provider}")
+            
+            self.api_key = get_provider_api_key(self.cfg, self.ai_provider, ServiceURLs.OLLAMA)
+            if not self.api_key:
+                # This should not happen if validation passed, but add safety check
+                config_key = get_provider_config_key(self.ai_provider) or "API_KEY"
+                raise ValueError(f"{config_key} is not set in the provided application configuration.")
+
+            # Use DEFAULT_MODEL_TYPE directly as a provider-specific model identifier
+            model_id = model_alias_override or self.cfg.DEFAULT_MODEL_TYPE
         if not model_id or str(model_id).strip() in ["", "No model selected"]:
             raise ValueError("No model selected. Please choose a model in AI Settings (Default Model Type).")
 
@@ -237,9 +244,10 @@ class AgentAssistant:
                 # Extract and log only the dynamic parts (everything after the static prompt)
                 # The static prompt starts with "You are an AI agent..." and ends before "Current screen XML:"
                 # We'll log everything from "Current screen XML:" onwards
-                if "Current screen XML:" in prompt_text:
+                screen_marker = next((m for m in ("Current screen XML:", "Current screen elements") if m in prompt_text), None)
+                if screen_marker:
                     # Find where the dynamic part starts
-                    dynamic_start = prompt_text.find("Current screen XML:")
+                    dynamic_start = prompt_text.find(screen_marker)
                     dynamic_part = prompt_text[dynamic_start:]
                     self.ai_interaction_readable_logger.info(dynamic_part)
                 else:
@@ -276,12 +284,19 @@ class AgentAssistant:
                 logging.debug(f"🖼️  SENDING IMAGE TO AI: No (ENABLE_IMAGE_CONTEXT=False)")
 
             try:
-                response_text, metadata = self.model_adapter.generate_response(
-                    prompt=prompt_text,
-                    image=prepared_image,
-                    image_format=self.cfg.get('IMAGE_FORMAT', None),
-                    image_quality=self.cfg.get('IMAGE_QUALITY', None)
-                )
+                with step_profiler.span('model_call'):
+                    response_text, metadata = self.model_adapter.generate_response(
+                        prompt=prompt_text,
+                        image=prepared_image,
+                        image_format=self.cfg.get('IMAGE_FORMAT', None),
+                        image_quality=self.cfg.get('IMAGE_QUALITY', None)
+                    )
+                self._last_response_metadata = metadata
+                
+                # Calibrate the token estimator from real provider counts (text-only prompts)
+                token_count = (metadata or {}).get("token_count") or {}
+                if prepared_image is None and not token_count.get("estimated"):
+                    self.context_builder.counter.calibrate(prompt_text, token_count.get("prompt"))
                 
                 # Log the AI response
                 if self.ai_interaction_readable_logger:
@@ -354,7 +369,17 @@ class AgentAssistant:
             # Build dynamic parts separately for logging
             dynamic_parts = []
             
+            # Budgeted sections are reserved in place and filled once every fixed part is known
+            list_sections: Dict[str, Tuple[str, List[str], bool]] = {}
+            section_slots: Dict[str, Tuple[int, int]] = {}
+            
+            def reserve_slot(name: str) -> None:
+                section_slots[name] = (len(prompt_parts), len(dynamic_parts))
+                prompt_parts.append("")
+                dynamic_parts.append("")
+            
             # Add context information
+            xml_string = ""
             if context.get("xml_context"):
                 # XML is already simplified in _get_next_action_langchain, so use it directly
                 xml_string = context['xml_context']
@@ -363,10 +388,8 @@ class AgentAssistant:
                 if not isinstance(xml_string, str):
                     xml_string = str(xml_string)
                 
-                # Use the simplified XML directly (no need to simplify again)
-                xml_part = f"\n\nCurrent screen XML:\n{xml_string}"
-                prompt_parts.append(xml_part)
-                dynamic_parts.append(xml_part)
+                # XML gets the token budget left over after all other sections
+                reserve_slot("xml")
             
             # Add stuck detection warning if applicable
             if context.get("is_stuck"):
@@ -470,9 +493,9 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
                         detail_str = f" ({', '.join(details)})" if details else ""
                         history_lines.append(f"- Step {step_num}: {action_desc} → {status}{detail_str}")
                     
-                    actions_part = "\n".join(history_lines)
-                    prompt_parts.append(actions_part)
-                    dynamic_parts.append(actions_part)
+                    # Most recent actions are kept first when the budget is tight
+                    list_sections["action_history"] = (history_lines[0], history_lines[1:], True)
+                    reserve_slot("action_history")
             
             # Format visited screens information
             if context.get("visited_screens"):
@@ -485,9 +508,8 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
                         visit_count = screen.get('visit_count', 0)
                         screens_lines.append(f"- Screen #{screen_id} ({activity}): visited {visit_count} time{'s' if visit_count != 1 else ''}")
                     
-                    screens_part = "\n".join(screens_lines)
-                    prompt_parts.append(screens_part)
-                    dynamic_parts.append(screens_part)
+                    list_sections["visited_screens"] = (screens_lines[0], screens_lines[1:], False)
+                    reserve_slot("visited_screens")
             
             # Format current screen actions (if revisiting)
             if context.get("current_screen_actions") and len(context['current_screen_actions']) > 0:
@@ -515,9 +537,8 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
                     detail_str = f" ({', '.join(details)})" if details else ""
                     actions_lines.append(f"- {action_desc} → {status}{detail_str}")
                 
-                current_actions_part = "\n".join(actions_lines)
-                prompt_parts.append(current_actions_part)
-                dynamic_parts.append(current_actions_part)
+                list_sections["current_screen_actions"] = (actions_lines[0], actions_lines[1:], True)
+                reserve_slot("current_screen_actions")
             
             if context.get("last_action_feedback"):
                 feedback_part = f"\n\nLast action feedback: {context['last_action_feedback']}"
@@ -533,42 +554,89 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
             prompt_parts.append(closing_part)
             dynamic_parts.append(closing_part)
             
+            # Fit the budgeted sections into what the fixed parts leave of the provider's token budget
+            screen_format = context.get("screen_encoding", "xml")
+            if screen_format == "element_table":
+                xml_header = ("\n\nCurrent screen elements (set target_identifier to the element's #index, "
+                              "e.g. \"#3\"; bounds are x1,y1,x2,y2; flags: c=clickable l=long-clickable "
+                              "s=scrollable k=checkable x=checked f=focused p=password e=editable):\n")
+            else:
+                xml_header = "\n\nCurrent screen XML:\n"
+            fitted = self.context_builder.build(
+                fixed_parts=[part for part in prompt_parts if part] + [xml_header],
+                list_sections=list_sections,
+                xml_string=xml_string,
+                tried_actions=[a.get('action_description', '') for a in (context.get('current_screen_actions') or [])],
+                prefer_navigation=bool(context.get("is_stuck")),
+                screen_format=screen_format
+            )
+            for name, (prompt_index, dynamic_index) in section_slots.items():
+                section_text = fitted.get(name, "")
+                if name == "xml" and section_text:
+                    section_text = f"{xml_header}{section_text}"
+                elif section_text:
+                    section_text = f"\n\n{section_text.lstrip()}"
+                prompt_parts[prompt_index] = section_text
+                dynamic_parts[dynamic_index] = section_text
+            context['_context_budget_stats'] = self.context_builder.last_stats
+            
             # Store dynamic parts in context for logging
-            context['_dynamic_prompt_parts'] = "\n".join(dynamic_parts)
+            context['_dynamic_prompt_parts'] = "\n".join(part for part in dynamic_parts if part)
             
             # Store the full prompt in context for database storage
-            full_prompt = "\n".join(prompt_parts)
+            full_prompt = "\n".join(part for part in prompt_parts if part)
             context['_full_ai_input_prompt'] = full_prompt
             
             return full_prompt
         
-        # Create chain: format prompt -> LLM -> parse JSON
-        def parse_json_output(llm_output: str) -> Dict[str, Any]:
-            """Parse JSON from LLM output."""
-            try:
-                # Try direct JSON parse
-                return json.loads(llm_output)
-            except json.JSONDecodeError:
-                # Try to extract JSON from markdown code blocks or text
-                json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', llm_output, re.DOTALL)
-                if json_match:
-                    return json.loads(json_match.group(1))
-                # Try to find JSON object in text
-                json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', llm_output, re.DOTALL)
-                if json_match:
-                    return json.loads(json_match.group())
-                logging.warning(f"Could not parse JSON from LLM output: {llm_output[:200]}")
-                return {}
-        
         # Chain: format prompt -> LLM -> parse JSON
-        chain = RunnableLambda(format_prompt_with_context) | llm_wrapper | RunnableLambda(parse_json_output)
+        chain = (RunnableLambda(step_profiler.profiled('prompt_build', format_prompt_with_context))
+                 | llm_wrapper
+                 | RunnableLambda(step_profiler.profiled('parse', self._parse_llm_json)))
         return chain
 
+    @staticmethod
+    def _parse_llm_json(llm_output: str) -> Dict[str, Any]:
+        """Parse JSON from LLM output."""
+        try:
+            # Try direct JSON parse
+            return json.loads(llm_output)
+        except json.JSONDecodeError:
+            # Try to extract JSON from markdown code blocks or text
+            json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', llm_output, re.DOTALL)
+            if json_match:
+                return json.loads(json_match.group(1))
+            # Try to find JSON object in text
+            json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', llm_output, re.DOTALL)
+            if json_match:
+                return json.loads(json_match.group())
+            logging.warning(f"Could not parse JSON from LLM output: {llm_output[:200]}")
+            return {}
+
+    @classmethod
+    def _is_valid_action_response(cls, llm_output: str) -> bool:
+        """Whether a raw model response parses into a valid ActionData (used by the router)."""
+        try:
+            parsed = cls._parse_llm_json(llm_output)
+            if not parsed:
+                return False
+            ActionData.model_validate(parsed)
+            return True
+        except Exception:
+            return False
+
     def _init_langchain_components(self):
         """Initialize LangChain components for orchestration."""
         try:
             logging.debug("Initializing LangChain components for AI orchestration")
 
+            # Token budget for the dynamic prompt sections of the active provider
+            self.context_builder = ContextBuilder.for_provider(self.cfg, self.ai_provider)
+            self._last_response_metadata = None
+            self._current_element_table = None
+            self._current_page_source = None
+            self._local_element_index = None
+            
             # Create the LLM wrapper
             self.langchain_llm = self._create_langchain_llm_wrapper()
 
@@ -648,8 +716,8 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
                 logging.error("Invalid bounding box format for long_press")
                 return False
         else:
-            # Prefer element-based long press via driver
-            return self.tools.driver.long_press(target_id or "", duration_ms)
+            # Driver prefers bbox coordinates (e.g. resolved locally) over an element lookup
+            return self.tools.driver.long_press(target_id or "", duration_ms, bbox)
     
     def _execute_double_tap_action(self, action_data: Dict[str, Any]) -> bool:
         """Execute double tap action with proper argument handling."""
@@ -703,6 +771,26 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
         
         return self.tools.driver.flick(direction.lower())
     
+    def _execute_scroll_action(self, direction: str, action_data: Dict[str, Any]) -> bool:
+        """Scroll the container found in this step's page source, falling back to a full-screen swipe.
+
+        Records ``scroll_container`` and, when the device reports it, ``can_scroll_more`` in
+        ``action_data`` for the crawler's end-of-list handling.
+        """
+        container = None
+        page_source = getattr(self, '_current_page_source', None)
+        if page_source and self.cfg.get('USE_GESTURE_ENGINE', True):
+            container = find_scroll_container(page_source, direction, action_data.get("target_identifier"))
+        if container is None:
+            return self.tools.driver.scroll(direction)
+        
+        action_data['scroll_container'] = container.to_dict()
+        can_scroll_more = self.tools.driver.scroll_gesture(container.bounds, direction, GESTURE_SCROLL_PERCENT)
+        if can_scroll_more is None:
+            return self.tools.driver.scroll(direction, bounds=container.bounds)
+        action_data['can_scroll_more'] = can_scroll_more
+        return True
+    
     def _execute_reset_app_action(self, action_data: Dict[str, Any]) -> bool:
         """Execute reset app action."""
         # reset_app doesn't need any parameters
@@ -713,17 +801,18 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
         self.action_dispatch_map = {
             "click": self._execute_click_action,
             "input": self._execute_input_action,
-            "scroll_down": lambda action_data: self.tools.driver.scroll("down"),
-            "scroll_up": lambda action_data: self.tools.driver.scroll("up"),
-            "swipe_left": lambda action_data: self.tools.driver.scroll("left"),
-            "swipe_right": lambda action_data: self.tools.driver.scroll("right"),
+            "scroll_down": lambda action_data: self._execute_scroll_action("down", action_data),
+            "scroll_up": lambda action_data: self._execute_scroll_action("up", action_data),
+            "swipe_left": lambda action_data: self._execute_scroll_action("left", action_data),
+            "swipe_right": lambda action_data: self._execute_scroll_action("right", action_data),
             "back": self.tools.driver.press_back,
             "long_press": self._execute_long_press_action,
             "double_tap": self._execute_double_tap_action,
             "clear_text": self._execute_clear_text_action,
             "replace_text": self._execute_replace_text_action,
             "flick": self._execute_flick_action,
-            "reset_app": self._execute_reset_app_action
+            "reset_app": self._execute_reset_app_action,
+            "macro": self._execute_macro_action
         }
     
     def _normalize_action_type(self, action_type: str, action_data: Dict[str, Any]) -> str:
@@ -769,6 +858,108 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
         # Return original if no mapping found
         return action_type
     
+    # Actions executed by tapping at the element's centre, so bounds from the page source are enough
+    _LOCALLY_RESOLVED_ACTIONS = ("click", "double_tap", "long_press")
+
+    @staticmethod
+    def _has_valid_bbox(bbox: Any) -> bool:
+        if not isinstance(bbox, dict):
+            return False
+        top_left = bbox.get("top_left") or []
+        bottom_right = bbox.get("bottom_right") or []
+        return len(top_left) == 2 and len(bottom_right) == 2
+
+    def prepare_screen_context(self, page_source: Optional[str], build_element_table: bool = False) -> None:
+        """Set the screen that ``execute_action`` resolves targets and scroll containers against.
+
+        Must be called with the live page source before every executed action, whether the
+        action came from the AI or from a recorded run.
+
+        Args:
+            page_source: Raw page source of the current screen
+            build_element_table: Number the screen's elements so ``#N`` references resolve
+        """
+        self._current_page_source = page_source or None
+        self._local_element_index = None
+        self._current_element_table = None
+        if build_element_table and page_source:
+            element_table = ElementTable.from_xml(page_source)
+            if len(element_table):
+                self._current_element_table = element_table
+            else:
+                logging.debug("Element table is empty, falling back to XML encoding")
+
+    def _resolve_target_locally(self, action_data: Dict[str, Any]) -> None:
+        """Fill in the target's bounds from the captured page source instead of a server-side find.
+
+        Sets ``action_data['element_resolution']`` to ``'local'`` on a hit or ``'server'`` when
+        the driver will have to look the element up through Appium.
+        """
+        if self._has_valid_bbox(action_data.get("target_bounding_box")):
+            action_data['element_resolution'] = 'bbox'
+            return
+        target_id = action_data.get("target_identifier")
+        page_source = getattr(self, '_current_page_source', None)
+        if not target_id or not page_source or not self.cfg.get('USE_LOCAL_ELEMENT_RESOLVER', True):
+            action_data['element_resolution'] = 'server'
+            return
+        index = getattr(self, '_local_element_index', None)
+        if index is None:
+            # Built lazily: most steps resolve through the element table or an AI bbox
+            index = LocalElementIndex.from_xml(page_source)
+            self._local_element_index = index
+        entry = index.find(target_id)
+        if entry is None:
+            action_data['element_resolution'] = 'server'
+            logging.debug(f"Local resolver miss for '{target_id}', falling back to Appium lookup")
+            return
+        action_data['target_bounding_box'] = entry.to_bbox()
+        action_data['element_resolution'] = 'local'
+        logging.debug(f"Resolved '{target_id}' locally -> {entry.bounds}")
+
+    def _resolve_action_target(self, action_type: str, action_data: Dict[str, Any]) -> None:
+        """Resolve the action's target to bounds from this step's screen data where possible."""
+        # Resolve element-table index references ("#3") to identifier and exact bounds locally
+        element_table = getattr(self, '_current_element_table', None)
+        if element_table is not None and element_table.resolve_action(action_data):
+            action_data['element_resolution'] = 'element_table'
+            logging.debug(f"Resolved element #{action_data.get('element_index')} -> {action_data.get('target_identifier')}")
+        elif action_type in self._LOCALLY_RESOLVED_ACTIONS:
+            self._resolve_target_locally(action_data)
+
+    def _execute_macro_action(self, action_data: Dict[str, Any]) -> bool:
+        """Execute a macro's steps back to back without capturing state in between.
+        
+        Consecutive taps with known bounds go out as one W3C actions payload; other
+        steps run through their normal handlers. Execution stops at the first failing
+        step. Per-step outcomes are stored in ``action_data['macro_results']``.
+        """
+        steps = normalize_macro_steps(
+            action_data.get("steps"),
+            int(self.cfg.get('MACRO_MAX_STEPS', MACRO_MAX_STEPS)),
+        )
+        if not steps:
+            logging.error("Cannot execute macro: no valid steps")
+            return False
+        pause_ms = int(self.cfg.get('MACRO_STEP_PAUSE_MS', MACRO_STEP_PAUSE_MS))
+        
+        for step in steps:
+            self._resolve_action_target(step["action"], step)
+        
+        def _execute_step(step: Dict[str, Any]) -> bool:
+            handler = self.action_dispatch_map[step["action"]]
+            return handler() if step["action"] == "back" else handler(step)
+        
+        results = run_macro(
+            steps,
+            _execute_step,
+            lambda bboxes: self.tools.driver.tap_sequence(bboxes, pause_ms),
+            pause_ms,
+        )
+        action_data['steps'] = steps
+        action_data['macro_results'] = results
+        return len(results) == len(steps) and all(result["success"] for result in results)
+
     def execute_action(self, action_data: Dict[str, Any]) -> bool:
         """Execute an action based on the action_data dictionary.
         
@@ -792,6 +983,9 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
                 logging.error("Cannot execute action: No action type specified")
                 return False
             
+            with step_profiler.span('target_resolution'):
+                self._resolve_action_target(action_type, action_data)
+            
             # Map generic actions to specific ones if needed
             action_type = self._normalize_action_type(action_type, action_data)
             
@@ -806,10 +1000,11 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
             try:
                 logging.debug(f"Executing action: {action_type}")
                 # Some handlers expect action_data, others don't (like press_back, reset_app)
-                if action_type in ["back", "reset_app"]:
-                    result = handler()
-                else:
-                    result = handler(action_data)
+                with step_profiler.span('execute'):
+                    if action_type in ["back", "reset_app"]:
+                        result = handler()
+                    else:
+                        result = handler(action_data)
                 
                 if result:
                     logging.debug(f"[OK] Successfully executed action: {action_type}")
@@ -828,6 +1023,11 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
     def _initialize_model(self, model_config, safety_settings_override):
         """Initialize the AI model with appropriate settings using the adapter."""
         try:
+            if self.model_adapter is not None:
+                self.model_adapter.initialize(model_config, safety_settings_override)
+                logging.debug(f"AI Assistant using injected adapter: {self.model_adapter.model_info}")
+                return
+            
             # Check if the required dependencies are installed for the chosen provider
             from domain.model_adapters import check_dependencies
             adapter_provider = self._adapter_provider_override or self.ai_provider
@@ -841,13 +1041,18 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
             if not self.actual_model_name:
                 raise ValueError("Model name must be provided.")
                     
-            # Create model adapter
+            # Create model adapter with the configured timeout/retry/limit policy
+            from domain.provider_transport import ProviderTransport
             self.model_adapter = create_model_adapter(
                 provider=adapter_provider,
                 api_key=self.api_key,
-                model_name=self.actual_model_name
+                model_name=self.actual_model_name,
+                transport=ProviderTransport.from_config(self.cfg, adapter_provider)
             )
             
+            if self.cfg.get('AI_ROUTING_ENABLED', False):
+                self.model_adapter = self._create_routing_adapter(adapter_provider, self.model_adapter)
+            
             # Set up safety settings
             safety_settings = safety_settings_override or self.cfg.get('AI_SAFETY_SETTINGS', None)
             
@@ -862,6 +1067,53 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
             logging.error(f"Failed to initialize AI model: {e}", exc_info=True)
             raise
 
+    def _create_routing_adapter(self, primary_provider: str, primary_adapter):
+        """Wrap the primary adapter in a RoutingAdapter with the configured secondary backend.
+        
+        Returns the primary adapter unchanged if no usable secondary backend is configured.
+        """
+        from domain.model_adapters import RoutingAdapter
+        from domain.provider_transport import ProviderTransport
+        from config.numeric_constants import AI_ROUTING_TIMEOUT_SECONDS, AI_ROUTING_MIN_SAMPLES
+
+        secondary_provider = (self.cfg.get('AI_ROUTING_SECONDARY_PROVIDER', None) or '').lower()
+        secondary_model = self.cfg.get('AI_ROUTING_SECONDARY_MODEL', None)
+        if not secondary_provider or not secondary_model:
+            logging.warning("⚠️ AI routing enabled but AI_ROUTING_SECONDARY_PROVIDER/MODEL not set; using primary only")
+            return primary_adapter
+
+        is_valid, error_msg = validate_provider_config(self.cfg, secondary_provider, ServiceURLs.OLLAMA)
+        if not is_valid:
+            logging.warning(f"⚠️ AI routing secondary provider unusable ({error_msg}); using primary only")
+            return primary_adapter
+        secondary_adapter = create_model_adapter(
+            provider=secondary_provider,
+            api_key=get_provider_api_key(self.cfg, secondary_provider, ServiceURLs.OLLAMA),
+            model_name=str(secondary_model),
+            transport=ProviderTransport.from_config(self.cfg, secondary_provider)
+        )
+
+        latency_store = None
+        latency_db_path = getattr(self.cfg, 'AI_ROUTING_LATENCY_DB_PATH', None)
+        if latency_db_path:
+            from infrastructure.provider_latency_store import ProviderLatencyStore
+            latency_store = ProviderLatencyStore(latency_db_path)
+
+        backends = [
+            (f"{primary_provider}:{self.actual_model_name}", primary_adapter),
+            (f"{secondary_provider}:{secondary_model}", secondary_adapter),
+        ]
+        logging.debug(f"AI routing enabled: {[label for label, _ in backends]}")
+        return RoutingAdapter(
+            backends=backends,
+            mode=self.cfg.get('AI_ROUTING_MODE', RoutingAdapter.MODE_RACE),
+            timeout_s=float(self.cfg.get('AI_ROUTING_TIMEOUT_SECONDS', AI_ROUTING_TIMEOUT_SECONDS)),
+            validator=self._is_valid_action_response,
+            latency_store=latency_store,
+            app_package=self.cfg.get('APP_PACKAGE', None),
+            min_samples_for_stagger=int(self.cfg.get('AI_ROUTING_MIN_SAMPLES', AI_ROUTING_MIN_SAMPLES))
+        )
+
     def _setup_ai_interaction_logger(self, force_recreate: bool = False):
         """Initializes only the human-readable logger (JSONL removed).
         
@@ -966,114 +1218,26 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
                 logger.addHandler(logging.NullHandler())
 
 
-    def _prepare_image_part(self, screenshot_bytes: Optional[bytes]) -> Optional[Image.Image]:
-        """Prepare an image for the agent with config-driven preprocessing before model encoding.
+    def _prepare_image_part(self, screenshot_bytes: Optional[bytes],
+                            cache_key: Optional[str] = None) -> Optional[PreparedImage]:
+        """Prepare the screenshot as an encoded image payload for the agent.
+
+        Cropping, resizing, sharpening and encoding happen once in the provider's
+        format (see ``ImagePayloadPreparer``); adapters send the bytes as is.
 
-        Steps:
-        - Decode screenshot bytes to PIL Image
-        - Optional: Crop status/nav bars using configured percentages
-        - Resize down to configured max width (no upscaling), preserve aspect ratio
-        - Convert to RGB for consistent compression downstream
-        - Apply mild sharpening to preserve text clarity
-        - Return processed PIL Image (model adapters will handle provider-specific encoding)
+        Args:
+            screenshot_bytes: Captured screenshot
+            cache_key: Screen identity (composite hash) used to reuse the payload of a revisited screen
         """
         if screenshot_bytes is None:
             return None
             
         try:
-            img = Image.open(io.BytesIO(screenshot_bytes))
-            original_size = len(screenshot_bytes)
-            
-            # Get AI provider for provider-specific optimizations
+            from config.app_config import AI_PROVIDER_CAPABILITIES
             ai_provider = self.cfg.get('AI_PROVIDER', DEFAULT_AI_PROVIDER).lower()
-            
-            # Get provider capabilities from config
-            try:
-                from config.app_config import AI_PROVIDER_CAPABILITIES
-            except ImportError:
-                from config.app_config import AI_PROVIDER_CAPABILITIES
-            
             capabilities = AI_PROVIDER_CAPABILITIES.get(ai_provider, AI_PROVIDER_CAPABILITIES.get(DEFAULT_AI_PROVIDER, {}))
-            
-            # Resolve preprocessing settings (global overrides take precedence)
-            max_width = self.cfg.get('IMAGE_MAX_WIDTH', None) or capabilities.get('image_max_width', IMAGE_MAX_WIDTH_DEFAULT)
-            quality = self.cfg.get('IMAGE_QUALITY', None) or capabilities.get('image_quality', IMAGE_DEFAULT_QUALITY)
-            image_format = self.cfg.get('IMAGE_FORMAT', None) or capabilities.get('image_format', IMAGE_DEFAULT_FORMAT)
-            crop_bars = self.cfg.get('IMAGE_CROP_BARS', True)
-            crop_top_pct = float(self.cfg.get('IMAGE_CROP_TOP_PERCENT', IMAGE_CROP_TOP_PCT_DEFAULT) or 0.0)
-            crop_bottom_pct = float(self.cfg.get('IMAGE_CROP_BOTTOM_PERCENT', IMAGE_CROP_BOTTOM_PCT_DEFAULT) or 0.0)
-            
-            logging.debug(
-                f"Image preprocessing settings -> provider: {ai_provider}, max_width: {max_width}, "
-                f"quality: {quality}, format: {image_format}, crop_bars: {crop_bars}, "
-                f"top_pct: {crop_top_pct}, bottom_pct: {crop_bottom_pct}"
-            )
-
-            # Optional: crop status bar and bottom nav/keyboard areas before resizing
-            if crop_bars and (crop_top_pct > 0 or crop_bottom_pct > 0):
-                try:
-                    h = img.height
-                    crop_top_px = int(max(0, min(1.0, crop_top_pct)) * h)
-                    crop_bottom_px = int(max(0, min(1.0, crop_bottom_pct)) * h)
-                    # Ensure we don't invert or over-crop
-                    upper = crop_top_px
-                    lower = max(upper + 1, h - crop_bottom_px)
-                    if lower > upper:
-                        img = img.crop((0, upper, img.width, lower))
-                        logging.debug(f"Cropped bars: top {crop_top_px}px, bottom {crop_bottom_px}px -> new size {img.size}")
-                except Exception as crop_err:
-                    logging.warning(f"Failed to crop bars: {crop_err}")
-            
-            # Resize if necessary (maintain aspect ratio)
-            if img.width > max_width:
-                scale = max_width / img.width
-                new_height = int(img.height * scale)
-                img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
-                logging.debug(f"Resized screenshot from {img.size} to fit max width {max_width}px")
-            
-            # Convert to RGB if necessary (for JPEG compatibility and better compression)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                # Create white background for transparent images
-                if img.mode == 'RGBA':
-                    background = Image.new('RGB', img.size, IMAGE_BG_COLOR)
-
-                    background.paste(img, mask=img.split()[-1])  # Use alpha channel as mask
-                    img = background
-                else:
-                    img = img.convert('RGB')
-                logging.debug("Converted image to RGB format for optimal compression")
-            
-            # Apply sharpening to maintain text clarity after compression
-            from PIL import ImageFilter
-
-            # Mild sharpening to preserve text readability
-            img = img.filter(ImageFilter.UnsharpMask(radius=IMAGE_SHARPEN_RADIUS, percent=IMAGE_SHARPEN_PERCENT, threshold=IMAGE_SHARPEN_THRESHOLD))
-            
-            # Note: We return the processed PIL Image. Encoding (format/quality) is handled by model adapters.
-            # Still, estimate potential savings for logging by encoding briefly to measure size.
-            try:
-                compressed_buffer = io.BytesIO()
-                if image_format.upper() == IMAGE_DEFAULT_FORMAT:
-                    img.save(
-                        compressed_buffer,
-                        format=IMAGE_DEFAULT_FORMAT,
-                        quality=quality,
-                        optimize=True,
-                        progressive=True,
-                        subsampling='4:2:0'
-                    )
-                else:
-                    img.save(compressed_buffer, format=image_format, optimize=True)
-                compressed_size = compressed_buffer.tell()
-                compression_ratio = original_size / compressed_size if compressed_size > 0 else 1
-                logging.debug(
-                    f"Preprocessed image size estimate: {original_size} -> {compressed_size} bytes "
-                    f"({compression_ratio:.1f}x). Final encoding will be done by adapter."
-                )
-            except Exception as est_err:
-                logging.debug(f"Could not estimate compressed size: {est_err}")
-            
-            return img
+            settings = ImagePrepSettings.from_config(self.cfg, capabilities)
+            return self._image_preparer.prepare(screenshot_bytes, settings, cache_key=cache_key or None)
             
         except Exception as e:
             logging.error(f"Failed to prepare image part for AI: {e}", exc_info=True)
@@ -1143,22 +1307,33 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
             elif not isinstance(xml_string_raw, str):
                 xml_string_raw = str(xml_string_raw)
             
-            # Clean and simplify XML before sending to AI to remove unnecessary attributes
-            # Original XML is unlimited, simplified XML is limited to 15000 chars
-            xml_string_simplified = xml_string_raw
-            if xml_string_raw:
-                try:
-                    from config.numeric_constants import XML_SNIPPET_MAX_LEN_DEFAULT
-                    xml_string_simplified = simplify_xml_for_ai(
-                        xml_string=xml_string_raw,
-                        max_len=XML_SNIPPET_MAX_LEN_DEFAULT,  # Simplified XML limited to default max length
-                        provider=self.ai_provider,
-                        prune_noninteractive=True
-                    )
-                    logging.debug(f"XML simplified: {len(xml_string_raw)} -> {len(xml_string_simplified)} chars (provider: {self.ai_provider})")
-                except Exception as e:
-                    logging.warning(f"⚠️ XML simplification failed, using original: {e}")
-                    xml_string_simplified = xml_string_raw
+            with step_profiler.span('xml_simplify'):
+                screen_encoding = str(self.cfg.get('PROMPT_SCREEN_ENCODING', 'xml') or 'xml').lower()
+                self.prepare_screen_context(xml_string_raw, build_element_table=screen_encoding == 'element_table')
+                if self._current_element_table is not None:
+                    context['screen_encoding'] = 'element_table'
+            
+                # Clean and simplify XML before sending to AI to remove unnecessary attributes.
+                # The context builder trims it to the token budget by element rank, so the
+                # character clip only applies when there is no builder
+                xml_string_simplified = xml_string_raw
+                if self._current_element_table is not None:
+                    xml_string_simplified = self._current_element_table.to_prompt()
+                    logging.debug(f"Element table: {len(self._current_element_table)} rows, {len(xml_string_raw)} -> {len(xml_string_simplified)} chars")
+                elif xml_string_raw:
+                    try:
+                        from config.numeric_constants import XML_SNIPPET_MAX_LEN_DEFAULT
+                        xml_string_simplified = simplify_xml_for_ai(
+                            xml_string=xml_string_raw,
+                            max_len=XML_SNIPPET_MAX_LEN_DEFAULT,
+                            provider=self.ai_provider,
+                            prune_noninteractive=True,
+                            truncate=getattr(self, 'context_builder', None) is None
+                        )
+                        logging.debug(f"XML simplified: {len(xml_string_raw)} -> {len(xml_string_simplified)} chars (provider: {self.ai_provider})")
+                    except Exception as e:
+                        logging.warning(f"⚠️ XML simplification failed, using original: {e}")
+                        xml_string_simplified = xml_string_raw
             
             # Update context with simplified XML (format_prompt_with_context will use this)
             context['xml_context'] = xml_string_simplified
@@ -1184,7 +1359,8 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
                         model_name = self.actual_model_name if hasattr(self, 'actual_model_name') else self.model_alias
                         if provider_strategy.supports_image_context(self.cfg, model_name):
                             # Prepare the image using existing method
-                            prepared_image = self._prepare_image_part(screenshot_bytes)
+                            with step_profiler.span('image_prep'):
+                                prepared_image = self._prepare_image_part(screenshot_bytes, cache_key=current_composite_hash)
                             if prepared_image:
                                 self._current_prepared_image = prepared_image
                                 logging.debug(f"🖼️  IMAGE CONTEXT: Prepared screenshot (size: {prepared_image.size[0]}x{prepared_image.size[1]}) - will be sent to AI model")
@@ -1226,6 +1402,7 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
                 self.ai_interaction_readable_logger.info("")
 
             # Run the decision chain
+            self._last_response_metadata = None
             try:
                 chain_result = self.action_decision_chain.run(context=context)
             finally:
@@ -1250,11 +1427,18 @@ In your reasoning, explicitly state: "I am navigating away from this screen to b
                 logging.warning("Chain returned empty result")
                 return None
             
-            validated_data = self._validate_and_clean_action_data(chain_result)
+            with step_profiler.span('parse'):
+                validated_data = self._validate_and_clean_action_data(chain_result)
+            
+            # Token usage as reported by the adapter (confidence is still a placeholder)
+            token_count = (self._last_response_metadata or {}).get("token_count") or {}
+            try:
+                total_tokens = int(token_count.get("total") or 0)
+            except (TypeError, ValueError):
+                total_tokens = 0
             
-            # Return with metadata (confidence and token count are placeholders for now)
             # Include the AI input prompt for database storage
-            return validated_data, 0.0, 0, ai_input_prompt
+            return validated_data, 0.0, total_tokens, ai_input_prompt
             
         except ValidationError as e:
             # Clear prepared image on error
@@ -4,10 +4,15 @@ import json
 import logging
 import os
 import sqlite3
+from collections import Counter
 from datetime import datetime
 from html import escape
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from config.numeric_constants import REPORT_STEPS_PER_CHUNK
+from domain.pdf_report import ChunkedPdfWriter, ThumbnailCache, render_timeseries_chart
+from infrastructure import run_metrics_store, run_timeseries_store
 
 logger = logging.getLogger(__name__)
 if not logger.handlers:
@@ -21,6 +26,72 @@ except ImportError:
     pisa = None
 
 
+_STEP_DETAILS_QUERY = """
+SELECT sl.*,
+       s_from.screenshot_path AS from_screenshot_path, s_from.activity_name AS from_activity_name, s_from.composite_hash AS from_hash,
+       s_to.screenshot_path AS to_screenshot_path, s_to.activity_name AS to_activity_name, s_to.composite_hash AS to_hash
+FROM steps_log sl
+LEFT JOIN screens s_from ON sl.from_screen_id = s_from.screen_id
+LEFT JOIN screens s_to ON sl.to_screen_id = s_to.screen_id
+WHERE sl.run_id = ? ORDER BY sl.step_number ASC
+"""
+
+_REPORT_HTML_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Run Analysis Report</title>
+    <style>
+        @page { 
+            size: a4 portrait; 
+            margin: 0.6in; 
+        }
+        body { font-family: Helvetica, Arial, sans-serif; margin: 0; font-size: 9pt; line-height: 1.25; }
+        h1 { font-size: 16pt; text-align: center; margin-top:0; margin-bottom: 12px; } 
+        h2 { font-size: 12pt; margin-top: 18px; border-bottom: 1px solid #ccc; padding-bottom: 2px; margin-bottom: 8px;} 
+        h3 { font-size: 11pt; margin-top: 10px; margin-bottom: 6px; color: #222; background-color: #e9e9e9; padding: 4px 6px; border-radius: 3px;}
+        h4 { font-size: 9.5pt; margin-top: 8px; margin-bottom: 3px; color: #333; font-weight: bold; border-bottom: 1px dotted #ddd; padding-bottom: 2px;} 
+
+        .summary-table-container { page-break-after: always; }
+        .summary-table { border-collapse: collapse; width: 100%; margin-bottom: 20px; font-size: 8.5pt; }
+        .summary-table th { background-color: #e9e9e9; text-align: left; padding: 6px; border: 1px solid #ccc; }
+        .summary-table td { padding: 5px; border: 1px solid #ddd; }
+        .summary-table td:first-child { font-weight: bold; width: 40%; }
+        .timeseries-container { page-break-after: always; }
+        .timeseries-container img { width: 100%; }
+
+        p.feature-item { margin: 4px 0 6px 5px; } 
+        strong.feature-title { font-weight: bold; color: #111; display: block; margin-bottom: 1px;} 
+
+        .step-container { 
+            margin-bottom: 12px; 
+            padding: 8px; 
+            border: 1px solid #c8c8c8; 
+            background-color: #fcfcfc;
+            page-break-inside: avoid !important;
+        }
+        .step-text-content { margin-bottom: 10px; }
+        .step-screenshots-container { 
+            display: -pdf-flex-box; 
+            -pdf-flex-direction: row; 
+            -pdf-justify-content: space-around; 
+            gap: 8px; 
+            margin-top: 8px;
+            border-top: 1px solid #eee;
+            padding-top: 8px;
+        }
+        .step-screenshots-container > div { -pdf-flex: 1; text-align: center; padding: 0 4px; }
+        .step-screenshots-container img.screenshot { max-width: 95%; max-height: 240px; width: auto; height: auto; border: 1px solid #bbb; margin-top: 2px; margin-bottom: 4px; display: inline-block; }
+        .screenshot-warning { color: red; font-size: 7pt; }
+        pre { white-space: pre-wrap; word-wrap: break-word; background-color: #f0f0f0; border: 1px solid #ccc; padding: 5px; font-size: 7.5pt; max-height: 100px; overflow: hidden; margin-left: 5px; margin-bottom: 5px; }
+        hr { border: 0; border-top: 1px solid #ddd; margin: 12px 0; } 
+        .to-screen-section-na { margin-left: 5px; font-style: italic; }
+    </style>
+</head>
+<body>
+"""
+
+
 class RunAnalyzer:
     def __init__(self, db_path: str, output_data_dir: str, app_package_for_run: Optional[str] = None):
         self.db_path = db_path
@@ -130,10 +201,63 @@ class RunAnalyzer:
         logger.warning(f"Screenshot path '{db_screenshot_path}' could not be reliably resolved to an existing absolute path. PDF generation might fail for this image.")
         return None
     
-    def _calculate_summary_metrics(self, run_id: int, run_data: sqlite3.Row, steps: List[sqlite3.Row]) -> Dict[str, Any]:
+    def _summary_totals(self, run_id: int, steps: Optional[List[sqlite3.Row]] = None) -> Dict[str, Any]:
+        """Counts and sums behind the summary metrics.
+
+        Read from the run's ``run_metrics`` row when it covers every logged step; otherwise
+        aggregated from ``steps`` (fetched when not given).
+        """
+        if self.conn:
+            materialized = run_metrics_store.get_run_metrics(self.conn, run_id)
+            if materialized is not None:
+                logged = self.conn.execute("SELECT COUNT(*) FROM steps_log WHERE run_id = ?", (run_id,)).fetchone()[0]
+                if materialized['steps'] == logged:
+                    return materialized
+                logger.info(f"run_metrics for run {run_id} covers {materialized['steps']} of {logged} steps; "
+                            f"aggregating steps (run 'analysis backfill-run-metrics' to rebuild it)")
+        if steps is None:
+            steps = self._fetch_step_summary_rows(run_id)
+
+        unique_screen_ids = {s['from_screen_id'] for s in steps if s['from_screen_id']} | {s['to_screen_id'] for s in steps if s['to_screen_id']}
+        unique_activities = 0
+        if self.conn and unique_screen_ids:
+            placeholders = ','.join('?' for _ in unique_screen_ids)
+            query = f"SELECT COUNT(DISTINCT activity_name) FROM screens WHERE screen_id IN ({placeholders})"
+            unique_activities = self.conn.execute(query, list(unique_screen_ids)).fetchone()[0]
+
+        action_counts: Counter = Counter()
+        for s in steps:
+            if s['ai_suggestion_json']:
+                try:
+                    action = json.loads(s['ai_suggestion_json']).get('action')
+                except (ValueError, AttributeError):
+                    continue
+                if action:
+                    action_counts[action] += 1
+
+        ai_times = [s['ai_response_time_ms'] for s in steps if s['ai_response_time_ms'] is not None]
+        find_times = [s['element_find_time_ms'] for s in steps if 'element_find_time_ms' in s.keys() and s['element_find_time_ms'] is not None]
+        return {
+            'steps': len(steps),
+            'unique_screens': len(unique_screen_ids),
+            'unique_transitions': len({(s['from_screen_id'], s['to_screen_id'], s['action_description']) for s in steps}),
+            'unique_activities': unique_activities,
+            'action_counts': dict(action_counts),
+            'total_tokens': sum(s['total_tokens'] for s in steps if s['total_tokens']),
+            'ai_time_sum_ms': sum(ai_times),
+            'ai_time_count': len(ai_times),
+            'element_find_sum_ms': sum(find_times),
+            'element_find_count': len(find_times),
+            'stuck_steps': sum(1 for s in steps if s['from_screen_id'] == s['to_screen_id']),
+            'execution_failures': sum(1 for s in steps if not s['execution_success']),
+        }
+
+    def _calculate_summary_metrics(self, run_id: int, run_data: sqlite3.Row,
+                                   steps: Optional[List[sqlite3.Row]] = None) -> Dict[str, Any]:
         """Calculates all the summary metrics for a given run."""
         metrics = {}
-        total_steps = len(steps)
+        totals = self._summary_totals(run_id, steps)
+        total_steps = totals['steps']
         
         # General Run Info
         if run_data['start_time'] and run_data['end_time']:
@@ -148,24 +272,10 @@ class RunAnalyzer:
         metrics['Total Steps'] = total_steps
         
         # Coverage Metrics
-        unique_screen_ids = {s['from_screen_id'] for s in steps if s['from_screen_id']} | {s['to_screen_id'] for s in steps if s['to_screen_id']}
-        metrics['Unique Screens Discovered'] = len(unique_screen_ids)
-        
-        unique_transitions = {(s['from_screen_id'], s['to_screen_id'], s['action_description']) for s in steps}
-        metrics['Unique Transitions'] = len(unique_transitions)
-        
-        if self.conn and unique_screen_ids:
-            cursor = self.conn.cursor()
-            placeholders = ','.join('?' for _ in unique_screen_ids)
-            query = f"SELECT COUNT(DISTINCT activity_name) FROM screens WHERE screen_id IN ({placeholders})"
-            cursor.execute(query, list(unique_screen_ids))
-            metrics['Activity Coverage'] = cursor.fetchone()[0]
-        else:
-            metrics['Activity Coverage'] = "N/A"
-
-        action_types = [json.loads(s['ai_suggestion_json']).get('action') for s in steps if s['ai_suggestion_json']]
-        action_distribution = {action: action_types.count(action) for action in set(action_types) if action}
-        metrics['Action Distribution'] = ", ".join([f"{k}: {v}" for k, v in action_distribution.items()])
+        metrics['Unique Screens Discovered'] = totals['unique_screens']
+        metrics['Unique Transitions'] = totals['unique_transitions']
+        metrics['Activity Coverage'] = totals['unique_activities'] if totals['unique_screens'] else "N/A"
+        metrics['Action Distribution'] = ", ".join([f"{k}: {v}" for k, v in totals['action_counts'].items()])
 
         # Efficiency Metrics
         if metrics['Unique Screens Discovered'] > 0:
@@ -173,37 +283,78 @@ class RunAnalyzer:
         else:
             metrics['Steps per New Screen'] = "N/A"
             
-        total_tokens = sum(s['total_tokens'] for s in steps if s['total_tokens'])
+        total_tokens = totals['total_tokens']
         metrics['Total Token Usage'] = f"{total_tokens:,}" if total_tokens else "N/A"
         
-        valid_response_times = [s['ai_response_time_ms'] for s in steps if s['ai_response_time_ms'] is not None]
-        if valid_response_times:
-            avg_time = sum(valid_response_times) / len(valid_response_times)
+        if totals['ai_time_count']:
+            avg_time = totals['ai_time_sum_ms'] / totals['ai_time_count']
             metrics['Avg AI Response Time'] = f"{avg_time:.0f} ms"
+            p95 = run_metrics_store.histogram_percentile(totals.get('ai_time_histogram') or [], 0.95)
+            if p95 is not None:
+                metrics['Avg AI Response Time'] += f" (95% within {p95:.0f} ms)"
         else:
             metrics['Avg AI Response Time'] = "N/A"
         
-        valid_element_find_times = [s['element_find_time_ms'] for s in steps if 'element_find_time_ms' in s.keys() and s['element_find_time_ms'] is not None]
-        if valid_element_find_times:
-            avg_element_time = sum(valid_element_find_times) / len(valid_element_find_times)
+        if totals['element_find_count']:
+            avg_element_time = totals['element_find_sum_ms'] / totals['element_find_count']
             metrics['Avg Element Find Time'] = f"{avg_element_time:.0f} ms"
         else:
             metrics['Avg Element Find Time'] = "N/A"
             
         # Robustness Metrics
-        stuck_steps = sum(1 for s in steps if s['from_screen_id'] == s['to_screen_id'])
-        metrics['Stuck Steps (No-Op)'] = stuck_steps
+        metrics['Stuck Steps (No-Op)'] = totals['stuck_steps']
         
-        exec_failures = sum(1 for s in steps if not s['execution_success'])
+        exec_failures = totals['execution_failures']
         metrics['Execution Failures'] = exec_failures
         
         if total_steps > 0:
             metrics['Action Success Rate'] = f"{(1 - (exec_failures / total_steps)) * 100:.1f}%"
         else:
             metrics['Action Success Rate'] = "N/A"
+        
+        run_meta = self._fetch_run_meta(run_id)
+        gestures = run_meta.get('gestures') or {}
+        if gestures:
+            metrics['Scroll Steps Saved'] = (
+                f"{gestures.get('scroll_steps_saved', 0)} "
+                f"({gestures.get('end_of_list_detected', 0)} end-of-list, "
+                f"{gestures.get('no_movement_detected', 0)} no-movement detections)"
+            )
+        else:
+            metrics['Scroll Steps Saved'] = "N/A"
+        
+        recovery = run_meta.get('session_recovery') or {}
+        metrics['Session Recoveries'] = recovery.get('recoveries', 0) if recovery else "N/A"
+        if recovery.get('avg_recovery_ms') is not None:
+            metrics['Avg Session Recovery Time'] = (
+                f"{recovery['avg_recovery_ms']:.0f} ms (max {recovery['max_recovery_ms']:.0f} ms, "
+                f"{recovery.get('reattach', 0)} re-attach / {recovery.get('full', 0)} full)"
+            )
+        else:
+            metrics['Avg Session Recovery Time'] = "N/A"
             
         return metrics
 
+    def _fetch_run_meta(self, run_id: int) -> Dict[str, Any]:
+        """Latest run_meta JSON for a run, or an empty dict."""
+        if not self.conn:
+            return {}
+        try:
+            row = self.conn.execute(
+                "SELECT meta_json FROM run_meta WHERE run_id = ? ORDER BY timestamp DESC, meta_id DESC LIMIT 1",
+                (run_id,),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.debug(f"Could not read run_meta for run {run_id}: {e}")
+            return {}
+        if not row or not row[0]:
+            return {}
+        try:
+            meta = json.loads(row[0])
+        except (TypeError, ValueError):
+            return {}
+        return meta if isinstance(meta, dict) else {}
+
     def _generate_summary_table_html(self, metrics: Dict[str, Any]) -> str:
         """Generates an HTML table from the metrics dictionary."""
         
@@ -227,11 +378,14 @@ class RunAnalyzer:
                 <tr><td>Avg. AI Response Time</td><td>{Avg AI Response Time}</td></tr>
                 <tr><td>Avg. Element Find Time</td><td>{Avg Element Find Time}</td></tr>
                 <tr><td>Total Token Usage</td><td>{Total Token Usage}</td></tr>
+                <tr><td>Scroll Steps Saved</td><td>{Scroll Steps Saved}</td></tr>
                 
                 <tr><th colspan="2">Robustness</th></tr>
                 <tr><td>Action Success Rate</td><td>{Action Success Rate}</td></tr>
                 <tr><td>Execution Failures</td><td>{Execution Failures}</td></tr>
                 <tr><td>Stuck Steps (No-Op)</td><td>{Stuck Steps (No-Op)}</td></tr>
+                <tr><td>Session Recoveries</td><td>{Session Recoveries}</td></tr>
+                <tr><td>Avg. Session Recovery Time</td><td>{Avg Session Recovery Time}</td></tr>
             </table>
         </div>
         """
@@ -239,15 +393,76 @@ class RunAnalyzer:
         return html.format(**{k: metrics.get(k, 'N/A') for k in [
             'Total Duration', 'Final Status', 'Total Steps', 'Unique Screens Discovered',
             'Unique Transitions', 'Activity Coverage', 'Action Distribution', 'Steps per New Screen',
-            'Avg AI Response Time', 'Avg Element Find Time', 'Total Token Usage', 'Action Success Rate', 'Execution Failures', 'Stuck Steps (No-Op)'
+            'Avg AI Response Time', 'Avg Element Find Time', 'Total Token Usage', 'Scroll Steps Saved', 'Action Success Rate', 'Execution Failures', 'Stuck Steps (No-Op)',
+            'Session Recoveries', 'Avg Session Recovery Time'
         ]})
 
-    def _fetch_run_and_steps_data(self, run_id: int) -> Tuple[Optional[sqlite3.Row], Optional[List[sqlite3.Row]]]:
+    def _generate_timeseries_html(self, run_id: int, chart_dir: str) -> str:
+        """Coverage chart and phase breakdown of a run, or an empty string without steps."""
+        if not self.conn:
+            return ""
+        try:
+            series = run_timeseries_store.get_run_timeseries(self.conn, run_id)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Could not read the time series of run {run_id}: {e}")
+            return ""
+        if not series:
+            return ""
+        html = ['<div class="timeseries-container"><h2>Coverage and Time Breakdown</h2>']
+        chart_path = os.path.join(chart_dir, f"run{run_id}_timeseries.png")
+        if render_timeseries_chart(series, run_timeseries_store.TIMESERIES_PHASES, chart_path):
+            html.append(f'<img src="{escape(chart_path)}" alt="Coverage and step time chart">')
+        last = series[-1]
+        elapsed_min = (last.get('elapsed_ms') or 0.0) / 60000.0
+        if elapsed_min > 0:
+            html.append(f"<p>{last['unique_screens']} screens and {last['unique_activities']} activities in "
+                        f"{elapsed_min:.1f} min ({last['unique_screens'] / elapsed_min:.1f} new screens per minute).</p>")
+        totals = run_timeseries_store.summarize_phases(series)
+        grand_total = sum(totals.values())
+        if grand_total > 0:
+            html.append('<table class="summary-table"><tr><th>Phase</th><th>Total</th><th>Share</th><th>Mean per Step</th></tr>')
+            for phase in run_timeseries_store.TIMESERIES_PHASES:
+                if phase in totals:
+                    html.append(f"<tr><td>{phase}</td><td>{totals[phase] / 1000.0:.1f} s</td>"
+                                f"<td>{totals[phase] / grand_total:.1%}</td><td>{totals[phase] / len(series):.0f} ms</td></tr>")
+            html.append("</table>")
+        html.append("</div>")
+        return "".join(html)
+
+    def get_run_timeseries(self, run_id: int) -> Dict[str, Any]:
+        """
+        Per-step coverage and phase timings of a run.
+
+        Args:
+            run_id: The ID of the run
+
+        Returns:
+            Dictionary containing:
+            - success: bool indicating if operation was successful
+            - series: list of rows with run_timeseries_store.TIMESERIES_FIELDS
+            - error: optional error message
+        """
+        result: Dict[str, Any] = {"success": False, "series": [], "error": None}
+        if not self._fetch_run_data(run_id):
+            result["error"] = f"Run ID {run_id} not found. No time series available."
+            self._close_db_connection()
+            return result
+        try:
+            result["series"] = run_timeseries_store.get_run_timeseries(self.conn, run_id)
+            result["success"] = True
+        except sqlite3.Error as e:
+            result["error"] = f"Error reading the time series of run {run_id}: {e}"
+            logger.error(result["error"])
+        finally:
+            self._close_db_connection()
+        return result
+
+    def _fetch_run_data(self, run_id: int) -> Optional[sqlite3.Row]:
         if not self.conn:
             logger.error(f"No database connection to fetch data for run {run_id}.")
             self._connect_db()
             if not self.conn:
-                return None, None
+                return None
         
         cursor = self.conn.cursor()
         try:
@@ -255,26 +470,21 @@ class RunAnalyzer:
             run_data = cursor.fetchone()
         except sqlite3.Error as e:
             logger.error(f"Error fetching run data for run_id {run_id}: {e}")
-            return None, None
-
-        if not run_data:
-            return None, None
+            return None
 
-        if not self.app_package_for_run and run_data['app_package']:
+        if run_data and not self.app_package_for_run and run_data['app_package']:
             self.app_package_for_run = run_data['app_package']
             logger.info(f"Set app_package_for_run to '{self.app_package_for_run}' from run data for run ID {run_id}.")
+        return run_data
+
+    def _fetch_run_and_steps_data(self, run_id: int) -> Tuple[Optional[sqlite3.Row], Optional[List[sqlite3.Row]]]:
+        run_data = self._fetch_run_data(run_id)
+        if not run_data:
+            return None, None
         
-        query = """
-        SELECT sl.*,
-               s_from.screenshot_path AS from_screenshot_path, s_from.activity_name AS from_activity_name, s_from.composite_hash AS from_hash,
-               s_to.screenshot_path AS to_screenshot_path, s_to.activity_name AS to_activity_name, s_to.composite_hash AS to_hash
-        FROM steps_log sl
-        LEFT JOIN screens s_from ON sl.from_screen_id = s_from.screen_id
-        LEFT JOIN screens s_to ON sl.to_screen_id = s_to.screen_id
-        WHERE sl.run_id = ? ORDER BY sl.step_number ASC
-        """
+        cursor = self.conn.cursor()
         try:
-            cursor.execute(query, (run_id,))
+            cursor.execute(_STEP_DETAILS_QUERY, (run_id,))
             steps = cursor.fetchall()
         except sqlite3.Error as e:
             logger.error(f"Error fetching steps for run_id {run_id}: {e}")
@@ -297,10 +507,117 @@ class RunAnalyzer:
             logger.error(f"Error encoding image {image_path} to base64: {e}", exc_info=True)
             return None
 
+    def _fetch_step_summary_rows(self, run_id: int) -> List[sqlite3.Row]:
+        """Steps of a run with only the columns the summary metrics use (no prompts or screenshots)."""
+        if not self.conn:
+            return []
+        try:
+            return self.conn.execute(
+                """
+                SELECT step_log_id, step_number, from_screen_id, to_screen_id, action_description,
+                       ai_suggestion_json, execution_success, ai_response_time_ms, total_tokens, element_find_time_ms
+                FROM steps_log WHERE run_id = ? ORDER BY step_number ASC
+                """,
+                (run_id,),
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error fetching step summaries for run_id {run_id}: {e}")
+            return []
+
+    def _iter_step_rows(self, run_id: int, batch_size: int) -> Iterator[List[sqlite3.Row]]:
+        """Full step rows joined with their FROM/TO screens, ``batch_size`` at a time."""
+        if not self.conn:
+            return
+        cursor = self.conn.cursor()
+        cursor.execute(_STEP_DETAILS_QUERY, (run_id,))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+
+    def _render_step_html(self, step: sqlite3.Row, image_src: Callable[[str], Optional[str]]) -> str:
+        """HTML section for one step; ``image_src`` maps a screenshot path to the ``<img>`` source."""
+        parts: List[str] = []
+        parts.append(f"<div class='step-container'><h3>Step {step['step_number']} (Log ID: {step['step_log_id']})</h3>")
+        
+        parts.append("<div class='step-text-content'>")
+
+        parts.append(f"<h4>FROM SCREEN</h4>")
+        parts.append(f"<p class='feature-item'><strong class='feature-title'>Activity:</strong>{escape(step['from_activity_name'] or 'N/A')}</p>")
+
+        parts.append(f"<h4>AI INPUT PROMPT</h4>")
+        if 'ai_input_prompt' in step.keys() and step['ai_input_prompt']:
+            # Truncate very long prompts for display
+            prompt_text = step['ai_input_prompt']
+            if len(prompt_text) > 2000:
+                prompt_text = prompt_text[:2000] + "\n\n... (truncated, full prompt available in database)"
+            parts.append(f"<pre style='max-height: 200px; overflow: auto;'>{escape(prompt_text)}</pre>")
+        else:
+            parts.append(f"<p class='feature-item'><em>AI input prompt not available</em></p>")
+
+        parts.append(f"<h4>AI OUTPUT</h4>")
+        ai_sugg_text_html, ai_reas_text_html, ai_response_time_html = "N/A", "N/A", ""
+        
+        if 'ai_response_time_ms' in step.keys() and step['ai_response_time_ms'] is not None:
+            ai_response_time_html = f"<p class='feature-item'><strong class='feature-title'>AI Decision Time:</strong>{step['ai_response_time_ms']/1000:.2f} seconds</p>"
+        
+        if 'element_find_time_ms' in step.keys() and step['element_find_time_ms'] is not None:
+            element_find_time_html = f"<p class='feature-item'><strong class='feature-title'>Element Find Time:</strong>{step['element_find_time_ms']/1000:.2f} seconds</p>"
+            ai_response_time_html += element_find_time_html
+
+        if step['ai_suggestion_json']:
+            try:
+                sugg_data = json.loads(step['ai_suggestion_json'])
+                act_src_dict = sugg_data.get('action_to_perform') or sugg_data
+                if act_src_dict and isinstance(act_src_dict, dict):
+                    act_t = act_src_dict.get('action', 'N/A')
+                    tgt_id = act_src_dict.get('target_identifier', 'N/A')
+                    in_txt = act_src_dict.get('input_text')
+                    rsng = act_src_dict.get('reasoning', "N/A")
+                    ai_reas_text_html = escape(rsng)
+                    ai_sugg_text_html = f"Action: {escape(act_t)}"
+                    if tgt_id != 'N/A': ai_sugg_text_html += f" on '{escape(str(tgt_id))}'"
+                    if in_txt: ai_sugg_text_html += f" | Input: '{escape(in_txt)}'"
+            except (json.JSONDecodeError, AttributeError):
+                ai_sugg_text_html = f"Error parsing JSON: {escape(step['ai_suggestion_json'])}"
+        parts.append(f"<p class='feature-item'><strong class='feature-title'>Suggested:</strong>{ai_sugg_text_html}</p>")
+        parts.append(ai_response_time_html)
+        parts.append(f"<p class='feature-item'><strong class='feature-title'>Reasoning:</strong></p><pre>{ai_reas_text_html}</pre>")
+        
+        parts.append(f"<h4>CRAWLER ACTION EXECUTED</h4>")
+        parts.append(f"<p class='feature-item'><strong class='feature-title'>High-Level:</strong>{escape(step['action_description'] or 'N/A')}</p>")
+        
+        status_color = "#28a745" if step['execution_success'] else "#dc3545"
+        parts.append(f"<p class='feature-item'><strong class='feature-title'>Execution Status:</strong><span style='color: {status_color}; font-weight: bold;'>{'Success' if step['execution_success'] else 'Failed'}</span></p>")
+        
+        if not step['execution_success'] and step['error_message']:
+            parts.append(f"<p class='feature-item'><strong class='feature-title'>Error Message:</strong><span style='color: #dc3545;'>{escape(step['error_message'])}</span></p>")
+        
+        parts.append("</div>")
+
+        parts.append("<div class='step-screenshots-container'>")
+        if full_from_ss_path := self._get_screenshot_full_path(step['from_screenshot_path']):
+            if from_src := image_src(full_from_ss_path):
+                parts.append(f"<div><p><strong>FROM Screen:</strong></p><img src='{escape(from_src)}' class='screenshot'></div>")
+        
+        if step['to_screen_id'] is not None:
+            if full_to_ss_path := self._get_screenshot_full_path(step['to_screenshot_path']):
+                if to_src := image_src(full_to_ss_path):
+                    parts.append(f"<div><p><strong>TO Screen:</strong></p><img src='{escape(to_src)}' class='screenshot'></div>")
+
+        parts.append("</div></div>")
+        return "".join(parts)
+
     def analyze_run_to_pdf(self, run_id: int, pdf_filepath: str) -> Dict[str, Any]:
         """
         Generate PDF report for a run.
         
+        Steps are converted REPORT_STEPS_PER_CHUNK at a time into partial PDFs that are
+        concatenated at the end. Each screenshot is referenced through a downscaled
+        thumbnail cached in ``report_thumbnails`` next to the PDF, so memory does not
+        grow with the number of steps.
+        
         Args:
             run_id: The ID of the run to analyze
             pdf_filepath: Path where the PDF should be saved
@@ -324,7 +641,7 @@ class RunAnalyzer:
             self._close_db_connection()
             return result
 
-        run_data, steps = self._fetch_run_and_steps_data(run_id)
+        run_data = self._fetch_run_data(run_id)
 
         if not run_data:
             error_msg = f"Run ID {run_id} not found. PDF will not be generated."
@@ -333,184 +650,63 @@ class RunAnalyzer:
             self._close_db_connection()
             return result
 
-        steps = steps or []
-
-        metrics_data = self._calculate_summary_metrics(run_id, run_data, steps)
-        summary_table_html = self._generate_summary_table_html(metrics_data)
-        
-        html_parts = ["""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <title>Run Analysis Report</title>
-            <style>
-                @page { 
-                    size: a4 portrait; 
-                    margin: 0.6in; 
-                }
-                body { font-family: Helvetica, Arial, sans-serif; margin: 0; font-size: 9pt; line-height: 1.25; }
-                h1 { font-size: 16pt; text-align: center; margin-top:0; margin-bottom: 12px; } 
-                h2 { font-size: 12pt; margin-top: 18px; border-bottom: 1px solid #ccc; padding-bottom: 2px; margin-bottom: 8px;} 
-                h3 { font-size: 11pt; margin-top: 10px; margin-bottom: 6px; color: #222; background-color: #e9e9e9; padding: 4px 6px; border-radius: 3px;}
-                h4 { font-size: 9.5pt; margin-top: 8px; margin-bottom: 3px; color: #333; font-weight: bold; border-bottom: 1px dotted #ddd; padding-bottom: 2px;} 
-                
-                .summary-table-container { page-break-after: always; }
-                .summary-table { border-collapse: collapse; width: 100%; margin-bottom: 20px; font-size: 8.5pt; }
-                .summary-table th { background-color: #e9e9e9; text-align: left; padding: 6px; border: 1px solid #ccc; }
-                .summary-table td { padding: 5px; border: 1px solid #ddd; }
-                .summary-table td:first-child { font-weight: bold; width: 40%; }
-                
-                p.feature-item { margin: 4px 0 6px 5px; } 
-                strong.feature-title { font-weight: bold; color: #111; display: block; margin-bottom: 1px;} 
-                
-                .step-container { 
-                    margin-bottom: 12px; 
-                    padding: 8px; 
-                    border: 1px solid #c8c8c8; 
-                    background-color: #fcfcfc;
-                    page-break-inside: avoid !important;
-                }
-                .step-text-content { margin-bottom: 10px; }
-                .step-screenshots-container { 
-                    display: -pdf-flex-box; 
-                    -pdf-flex-direction: row; 
-                    -pdf-justify-content: space-around; 
-                    gap: 8px; 
-                    margin-top: 8px;
-                    border-top: 1px solid #eee;
-                    padding-top: 8px;
-                }
-                .step-screenshots-container > div { -pdf-flex: 1; text-align: center; padding: 0 4px; }
-                .step-screenshots-container img.screenshot { max-width: 95%; max-height: 240px; width: auto; height: auto; border: 1px solid #bbb; margin-top: 2px; margin-bottom: 4px; display: inline-block; }
-                .screenshot-warning { color: red; font-size: 7pt; }
-                pre { white-space: pre-wrap; word-wrap: break-word; background-color: #f0f0f0; border: 1px solid #ccc; padding: 5px; font-size: 7.5pt; max-height: 100px; overflow: hidden; margin-left: 5px; margin-bottom: 5px; }
-                hr { border: 0; border-top: 1px solid #ddd; margin: 12px 0; } 
-                .to-screen-section-na { margin-left: 5px; font-style: italic; }
-            </style>
-        </head>
-        <body>
-        """]
-
-        html_parts.append(summary_table_html)
-        html_parts.append(f"<h1>Run Analysis Report - Run ID: {run_id} (App: {escape(str(run_data['app_package']))})</h1>")
-        
-        if not steps:
-            html_parts.append("<p>No steps found for this run.</p>")
-        else:
-            html_parts.append("<h2>Step Details</h2>")
-            for i, step in enumerate(steps):
-                html_parts.append(f"<div class='step-container'><h3>Step {step['step_number']} (Log ID: {step['step_log_id']})</h3>")
-                
-                html_parts.append("<div class='step-text-content'>")
-
-                html_parts.append(f"<h4>FROM SCREEN</h4>")
-                html_parts.append(f"<p class='feature-item'><strong class='feature-title'>Activity:</strong>{escape(step['from_activity_name'] or 'N/A')}</p>")
-
-                html_parts.append(f"<h4>AI INPUT PROMPT</h4>")
-                if 'ai_input_prompt' in step.keys() and step['ai_input_prompt']:
-                    # Truncate very long prompts for display
-                    prompt_text = step['ai_input_prompt']
-                    if len(prompt_text) > 2000:
-                        prompt_text = prompt_text[:2000] + "\n\n... (truncated, full prompt available in database)"
-                    html_parts.append(f"<pre style='max-height: 200px; overflow: auto;'>{escape(prompt_text)}</pre>")
-                else:
-                    html_parts.append(f"<p class='feature-item'><em>AI input prompt not available</em></p>")
-
-                html_parts.append(f"<h4>AI OUTPUT</h4>")
-                ai_sugg_text_html, ai_reas_text_html, ai_response_time_html = "N/A", "N/A", ""
-                
-                if 'ai_response_time_ms' in step.keys() and step['ai_response_time_ms'] is not None:
-                    ai_response_time_html = f"<p class='feature-item'><strong class='feature-title'>AI Decision Time:</strong>{step['ai_response_time_ms']/1000:.2f} seconds</p>"
-                
-                if 'element_find_time_ms' in step.keys() and step['element_find_time_ms'] is not None:
-                    element_find_time_html = f"<p class='feature-item'><strong class='feature-title'>Element Find Time:</strong>{step['element_find_time_ms']/1000:.2f} seconds</p>"
-                    ai_response_time_html += element_find_time_html
-
-                if step['ai_suggestion_json']:
-                    try:
-                        sugg_data = json.loads(step['ai_suggestion_json'])
-                        act_src_dict = sugg_data.get('action_to_perform') or sugg_data
-                        if act_src_dict and isinstance(act_src_dict, dict):
-                            act_t = act_src_dict.get('action', 'N/A')
-                            tgt_id = act_src_dict.get('target_identifier', 'N/A')
-                            in_txt = act_src_dict.get('input_text')
-                            rsng = act_src_dict.get('reasoning', "N/A")
-                            ai_reas_text_html = escape(rsng)
-                            ai_sugg_text_html = f"Action: {escape(act_t)}"
-                            if tgt_id != 'N/A': ai_sugg_text_html += f" on '{escape(str(tgt_id))}'"
-                            if in_txt: ai_sugg_text_html += f" | Input: '{escape(in_txt)}'"
-                    except (json.JSONDecodeError, AttributeError):
-                        ai_sugg_text_html = f"Error parsing JSON: {escape(step['ai_suggestion_json'])}"
-                html_parts.append(f"<p class='feature-item'><strong class='feature-title'>Suggested:</strong>{ai_sugg_text_html}</p>")
-                html_parts.append(ai_response_time_html)
-                html_parts.append(f"<p class='feature-item'><strong class='feature-title'>Reasoning:</strong></p><pre>{ai_reas_text_html}</pre>")
-                
-                html_parts.append(f"<h4>CRAWLER ACTION EXECUTED</h4>")
-                html_parts.append(f"<p class='feature-item'><strong class='feature-title'>High-Level:</strong>{escape(step['action_description'] or 'N/A')}</p>")
-                
-                status_color = "#28a745" if step['execution_success'] else "#dc3545"
-                html_parts.append(f"<p class='feature-item'><strong class='feature-title'>Execution Status:</strong><span style='color: {status_color}; font-weight: bold;'>{'Success' if step['execution_success'] else 'Failed'}</span></p>")
-                
-                if not step['execution_success'] and step['error_message']:
-                    html_parts.append(f"<p class='feature-item'><strong class='feature-title'>Error Message:</strong><span style='color: #dc3545;'>{escape(step['error_message'])}</span></p>")
-                
-                html_parts.append("</div>")
+        metrics_data = self._calculate_summary_metrics(run_id, run_data)
+        total_steps = metrics_data['Total Steps']
 
-                html_parts.append("<div class='step-screenshots-container'>")
-                if full_from_ss_path := self._get_screenshot_full_path(step['from_screenshot_path']):
-                    if base64_image := self._image_to_base64(full_from_ss_path):
-                        html_parts.append(f"<div><p><strong>FROM Screen:</strong></p><img src='{base64_image}' class='screenshot'></div>")
-                
-                if step['to_screen_id'] is not None:
-                    if full_to_ss_path := self._get_screenshot_full_path(step['to_screenshot_path']):
-                        if base64_image_to := self._image_to_base64(full_to_ss_path):
-                            html_parts.append(f"<div><p><strong>TO Screen:</strong></p><img src='{base64_image_to}' class='screenshot'></div>")
-
-                html_parts.append("</div></div>")
-                if i < len(steps) - 1: html_parts.append("<hr>")
-        
-        html_parts.append("</body></html>")
-        full_html = "".join(html_parts)
-
-        # --- MODIFIED: More robust PDF generation block ---
+        thumbnails = ThumbnailCache(os.path.join(os.path.dirname(os.path.abspath(pdf_filepath)), "report_thumbnails"))
+        writer = ChunkedPdfWriter(pdf_filepath, _REPORT_HTML_HEAD)
         try:
-            with open(pdf_filepath, "wb") as f_pdf:
-                if pisa:
-                    # pisa.CreatePDF returns a pisaDocument status object
-                    pisa_status = pisa.CreatePDF(full_html, dest=f_pdf, encoding='utf-8')
-                    
-                    # Check if the status object was created and if it has a non-zero error code
-                    if pisa_status and not pisa_status.err: # type: ignore
-                        logger.info(f"Successfully generated PDF report: {pdf_filepath}")
-                        result["success"] = True
-                        result["pdf_path"] = pdf_filepath
-                    else:
-                        error_code = getattr(pisa_status, 'err', -1) # Safely get error code
-                        error_msg = f"Error generating PDF. Error code: {error_code}"
-                        logger.error(error_msg)
-                        result["error"] = error_msg
-                else:
-                    error_msg = "xhtml2pdf is not available."
-                    logger.error(error_msg)
-                    result["error"] = error_msg
+            sections = [
+                self._generate_summary_table_html(metrics_data),
+                self._generate_timeseries_html(run_id, thumbnails.cache_dir),
+                f"<h1>Run Analysis Report - Run ID: {run_id} (App: {escape(str(run_data['app_package']))})</h1>",
+            ]
+            if not total_steps:
+                sections.append("<p>No steps found for this run.</p>")
+            else:
+                sections.append("<h2>Step Details</h2>")
+                rendered = 0
+                for rows in self._iter_step_rows(run_id, REPORT_STEPS_PER_CHUNK):
+                    for step in rows:
+                        sections.append(self._render_step_html(step, thumbnails.get))
+                        rendered += 1
+                        if rendered < total_steps:
+                            sections.append("<hr>")
+                    if not writer.add_chunk(sections):
+                        break
+                    sections = []
+            if sections:
+                writer.add_chunk(sections)
+
+            if writer.finish():
+                logger.info(f"Successfully generated PDF report: {pdf_filepath} ({total_steps} steps, "
+                            f"{len(writer.parts)} parts, {thumbnails.created} thumbnails created, "
+                            f"{thumbnails.reused} reused)")
+                result["success"] = True
+                result["pdf_path"] = pdf_filepath
+            else:
+                result["error"] = writer.error
+                if writer.failed_html:
+                    self._save_debug_html(pdf_filepath, writer.failed_html)
         except Exception as e:
             error_msg = f"Unexpected error during PDF generation: {e}"
             logger.error(error_msg, exc_info=True)
             result["error"] = error_msg
-            # Try to save debug HTML even on unexpected errors
-            html_debug_filepath = os.path.splitext(pdf_filepath)[0] + "_debug.html"
-            try:
-                with open(html_debug_filepath, "w", encoding="utf-8") as f_html:
-                    f_html.write(full_html)
-                logger.info(f"Saved HTML content for debugging to: {html_debug_filepath}")
-            except Exception as e_debug:
-                logger.error(f"Failed to save debug HTML file: {e_debug}")
+            writer.discard()
         finally:
             self._close_db_connection()
             
         return result
 
+    def _save_debug_html(self, pdf_filepath: str, html: str) -> None:
+        html_debug_filepath = os.path.splitext(pdf_filepath)[0] + "_debug.html"
+        try:
+            with open(html_debug_filepath, "w", encoding="utf-8") as f_html:
+                f_html.write(html)
+            logger.info(f"Saved HTML content for debugging to: {html_debug_filepath}")
+        except Exception as e_debug:
+            logger.error(f"Failed to save debug HTML file: {e_debug}")
+
     def get_run_summary(self, run_id: int) -> Dict[str, Any]:
         """
         Compute summary metrics for a run and return them as structured data.
@@ -534,7 +730,7 @@ class RunAnalyzer:
             "error": None
         }
         
-        run_data, steps = self._fetch_run_and_steps_data(run_id)
+        run_data = self._fetch_run_data(run_id)
 
         if not run_data:
             error_msg = f"Run ID {run_id} not found. No summary available."
@@ -543,8 +739,7 @@ class RunAnalyzer:
             self._close_db_connection()
             return result
 
-        steps = steps or []
-        metrics_data = self._calculate_summary_metrics(run_id, run_data, steps)
+        metrics_data = self._calculate_summary_metrics(run_id, run_data)
         
         # Structure the run information
         result["run_info"] = {
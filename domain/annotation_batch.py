@@ -0,0 +1,304 @@
+"""
+Offline batch annotation of crawl screenshots.
+
+``collect_annotation_jobs`` streams a run's steps from the session database
+with their screen's screenshot path (one joined query) and groups the
+action bounding boxes by screenshot. ``annotate_screenshots`` then renders
+one image per screenshot in a process pool: the screenshot is decoded once
+and all of its boxes are drawn in a single pass.
+
+Re-runs are incremental. Each output's fingerprint (screenshot size and
+mtime, boxes, drawing style) is kept in ``annotation_index.json`` in the
+output directory, and outputs whose fingerprint is unchanged are skipped.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ANNOTATION_INDEX_FILENAME = "annotation_index.json"
+
+# Bumped when the drawing changes so existing outputs are re-rendered
+_RENDER_VERSION = 1
+
+_STEPS_WITH_SCREENSHOTS_QUERY = """
+SELECT sl.step_log_id, sl.run_id, sl.step_number, s.screenshot_path, sl.mapped_action_json, sl.ai_suggestion_json
+FROM steps_log sl
+LEFT JOIN screens s ON s.screen_id = COALESCE(sl.from_screen_id, sl.to_screen_id)
+WHERE (? IS NULL OR sl.run_id = ?)
+ORDER BY sl.run_id, sl.step_number, sl.step_log_id
+"""
+
+
+@dataclass
+class AnnotationStyle:
+    """How boxes are drawn."""
+    color: str = "red"
+    border_color: str = "black"
+    line_thickness: int = 3
+    border_size: int = 1
+    labels: bool = True
+
+
+@dataclass
+class ScreenshotJob:
+    """One screenshot and every box to draw on it."""
+    screenshot_path: str
+    out_path: str
+    # (run_id, step_number, action_type, bbox)
+    boxes: List[Tuple[int, int, str, Dict[str, Any]]] = field(default_factory=list)
+    fingerprint: str = ""
+
+
+def is_normalized_bbox(bbox: Dict[str, Any]) -> bool:
+    try:
+        y1, x1 = bbox["top_left"]
+        y2, x2 = bbox["bottom_right"]
+        return all(0.0 <= v <= 1.0 for v in [y1, x1, y2, x2])
+    except Exception:
+        return False
+
+
+def bbox_to_pixels(bbox: Dict[str, Any], img_w: int, img_h: int) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Convert standardized bbox dict {top_left:[y1,x1], bottom_right:[y2,x2]} to pixel coords.
+    Handles normalized (0..1) and absolute pixels. Returns (x1,y1,x2,y2) or None if invalid.
+    """
+    try:
+        y1, x1 = bbox["top_left"]
+        y2, x2 = bbox["bottom_right"]
+        scale_x, scale_y = (img_w, img_h) if is_normalized_bbox(bbox) else (1, 1)
+        xs = sorted(max(0, min(img_w - 1, int(round(x * scale_x)))) for x in (x1, x2))
+        ys = sorted(max(0, min(img_h - 1, int(round(y * scale_y)))) for y in (y1, y2))
+        if xs[0] == xs[1] or ys[0] == ys[1]:
+            return None
+        return (xs[0], ys[0], xs[1], ys[1])
+    except Exception:
+        return None
+
+
+def extract_bbox(action_json: Optional[str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Target bounding box and action type of a mapped action or AI suggestion JSON."""
+    if not action_json:
+        return None, None
+    try:
+        data = json.loads(action_json)
+    except (TypeError, ValueError):
+        return None, None
+    if not isinstance(data, dict):
+        return None, None
+    bbox = data.get("target_bounding_box")
+    if isinstance(bbox, dict) and "top_left" in bbox and "bottom_right" in bbox:
+        return bbox, data.get("action_type") or data.get("type") or data.get("action")
+    return None, None
+
+
+def _resolve_screenshot(path: Optional[str], screens_dir: Optional[str]) -> Optional[str]:
+    if path and os.path.isfile(path):
+        return path
+    if path and screens_dir:
+        # Sessions moved after the crawl: look the file up by name in the screenshots directory
+        candidate = os.path.join(screens_dir, os.path.basename(path))
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def _fingerprint(job: ScreenshotJob, style: AnnotationStyle) -> str:
+    stat = os.stat(job.screenshot_path)
+    payload = json.dumps([_RENDER_VERSION, stat.st_size, stat.st_mtime_ns, job.boxes, asdict(style)],
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def collect_annotation_jobs(db_path: str, out_dir: str, style: AnnotationStyle,
+                            run_id: Optional[int] = None, screens_dir: Optional[str] = None,
+                            limit: int = 0, output_prefix: str = "annotated_") -> Tuple[List[ScreenshotJob], int]:
+    """Group the boxes of a run's steps (all runs if ``run_id`` is None) by screenshot.
+
+    Args:
+        limit: Stop after this many boxes (0 = no limit)
+
+    Returns:
+        (jobs, skipped) where skipped counts steps without a box or a readable screenshot
+    """
+    jobs: Dict[str, ScreenshotJob] = {}
+    skipped = boxes = 0
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        for _, step_run_id, step_number, path, mapped_json, ai_json in conn.execute(
+                _STEPS_WITH_SCREENSHOTS_QUERY, (run_id, run_id)):
+            if limit and boxes >= limit:
+                break
+            # Prefer mapped_action_json (post-validated), fallback to ai_suggestion_json
+            bbox, action_type = extract_bbox(mapped_json)
+            if bbox is None:
+                bbox, action_type = extract_bbox(ai_json)
+            screenshot_path = _resolve_screenshot(path, screens_dir) if bbox is not None else None
+            if screenshot_path is None:
+                skipped += 1
+                continue
+            job = jobs.get(screenshot_path)
+            if job is None:
+                name_root = os.path.splitext(os.path.basename(screenshot_path))[0]
+                job = jobs[screenshot_path] = ScreenshotJob(
+                    screenshot_path, os.path.join(out_dir, f"{output_prefix}{name_root}.png"))
+            job.boxes.append((step_run_id, step_number, action_type or "action", bbox))
+            boxes += 1
+    finally:
+        conn.close()
+    for job in jobs.values():
+        job.fingerprint = _fingerprint(job, style)
+    return list(jobs.values()), skipped
+
+
+def render_screenshot(job: ScreenshotJob, style: AnnotationStyle) -> Dict[str, Any]:
+    """Draw all boxes of one screenshot (runs in a worker process)."""
+    from PIL import Image, ImageDraw
+
+    start = time.perf_counter()
+    drawn = 0
+    try:
+        with Image.open(job.screenshot_path) as source:
+            img = source.convert("RGB")
+        draw = ImageDraw.Draw(img)
+        for _, step_number, _, bbox in job.boxes:
+            box = bbox_to_pixels(bbox, img.width, img.height)
+            if box is None:
+                continue
+            if style.border_size > 0:
+                draw.rectangle(box, outline=style.border_color, width=style.line_thickness + 2 * style.border_size)
+            draw.rectangle(box, outline=style.color, width=style.line_thickness)
+            if style.labels:
+                label_xy = (box[0] + style.line_thickness + 2, box[1] + style.line_thickness + 1)
+                label_box = draw.textbbox(label_xy, str(step_number))
+                draw.rectangle(label_box, fill=style.border_color)
+                draw.text(label_xy, str(step_number), fill=style.color)
+            drawn += 1
+        if not drawn:
+            return {"status": "skipped", "error": "No drawable boxes", "boxes": 0,
+                    "seconds": round(time.perf_counter() - start, 3)}
+        os.makedirs(os.path.dirname(job.out_path), exist_ok=True)
+        tmp_path = f"{job.out_path}.tmp"
+        img.save(tmp_path, format="PNG")
+        os.replace(tmp_path, job.out_path)
+        error = None
+    except Exception as e:
+        error = str(e)
+    return {"status": "failed" if error else "annotated", "error": error, "boxes": drawn,
+            "seconds": round(time.perf_counter() - start, 3)}
+
+
+def _load_index(index_path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            entries = json.load(f).get("screenshots", [])
+    except (OSError, ValueError, AttributeError):
+        return {}
+    return {entry.get("out_path"): entry for entry in entries if isinstance(entry, dict)}
+
+
+def write_gallery(out_dir: str, entries: List[Dict[str, Any]]) -> None:
+    """index.html listing the annotated images with the steps drawn on each."""
+    html = [
+        "<!DOCTYPE html>",
+        "<html><head><meta charset='utf-8'><title>Annotated Screenshots</title>",
+        "<style>body{font-family:Arial,sans-serif} .grid{display:flex;flex-wrap:wrap;gap:12px} .item{width:48%} img{max-width:100%;height:auto;border:1px solid #ccc}</style>",
+        "</head><body>",
+        f"<h1>Annotated Screenshots ({len(entries)})</h1>",
+        "<div class='grid'>",
+    ]
+    for entry in sorted(entries, key=lambda item: item["out_path"]):
+        name = os.path.basename(entry["out_path"])
+        steps = ", ".join(f"{box[1]} ({box[2]})" for box in entry["boxes"])
+        html.append(f"<div class='item'><h3>{name}</h3><p>Steps: {steps}</p><img src='{name}' alt='{name}' loading='lazy'/></div>")
+    html += ["</div>", "</body></html>"]
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write("\n".join(html))
+
+
+def annotate_screenshots(jobs: List[ScreenshotJob], out_dir: str, style: AnnotationStyle, workers: int = 1,
+                         force: bool = False,
+                         on_progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """Render outdated screenshots in parallel, then rewrite the index and the gallery.
+
+    Args:
+        jobs: Screenshots to annotate
+        out_dir: Output directory (holds the images, annotation_index.json and index.html)
+        style: Drawing style
+        workers: Worker processes
+        force: Render every screenshot even if its output is up to date
+        on_progress: Called with (done, total) after each rendered screenshot
+
+    Returns:
+        Summary with counts, wall time and one entry per screenshot
+    """
+    index_path = os.path.join(out_dir, ANNOTATION_INDEX_FILENAME)
+    previous = _load_index(index_path)
+    entries: Dict[str, Dict[str, Any]] = {}
+    pending: List[ScreenshotJob] = []
+    for job in jobs:
+        entry = asdict(job)
+        old = previous.get(job.out_path)
+        if (not force and old and old.get("fingerprint") == job.fingerprint
+                and old.get("status") in ("annotated", "up_to_date") and os.path.exists(job.out_path)):
+            entry.update(status="up_to_date", error=None, boxes_drawn=old.get("boxes_drawn"), seconds=0.0)
+        else:
+            pending.append(job)
+        entries[job.out_path] = entry
+
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    if pending:
+        workers = max(1, min(int(workers), len(pending)))
+        logger.info(f"Annotating {len(pending)} screenshots with {workers} workers "
+                    f"({len(jobs) - len(pending)} up to date)")
+
+        def record(job: ScreenshotJob, outcome: Dict[str, Any], done: int) -> None:
+            if outcome["status"] == "failed":
+                logger.error(f"🔴 Annotating {job.screenshot_path} failed: {outcome['error']}")
+            entries[job.out_path].update(status=outcome["status"], error=outcome["error"],
+                                         boxes_drawn=outcome["boxes"], seconds=outcome["seconds"])
+            if on_progress:
+                on_progress(done, len(pending))
+
+        if workers == 1:
+            for done, job in enumerate(pending, start=1):
+                record(job, render_screenshot(job, style), done)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(render_screenshot, job, style): job for job in pending}
+                for done, future in enumerate(as_completed(futures), start=1):
+                    try:
+                        outcome = future.result()
+                    except Exception as e:  # Worker process died
+                        outcome = {"status": "failed", "error": str(e), "boxes": 0, "seconds": 0.0}
+                    record(futures[future], outcome, done)
+
+    screenshots = list(entries.values())
+    summary = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "workers": workers,
+        "wall_seconds": round(time.perf_counter() - start, 2),
+        "total": len(screenshots),
+        "annotated": sum(1 for entry in screenshots if entry["status"] == "annotated"),
+        "up_to_date": sum(1 for entry in screenshots if entry["status"] == "up_to_date"),
+        "skipped": sum(1 for entry in screenshots if entry["status"] == "skipped"),
+        "failed": sum(1 for entry in screenshots if entry["status"] == "failed"),
+        "screenshots": screenshots,
+    }
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    os.replace(tmp_path, index_path)
+    write_gallery(out_dir, [entry for entry in screenshots if entry["status"] in ("annotated", "up_to_date")])
+    return summary
@@ -107,8 +107,7 @@ class AppContextManager:
                 time.sleep(additional_wait)
             
             # Verify launch
-            last_pkg = self.driver.get_current_package()
-            current_activity = self.driver.get_current_activity()
+            last_pkg, current_activity = self.driver.get_current_app_context() or (None, None)
 
             if last_pkg == target_pkg:
                 self.logger.info(f"Successfully launched target app on attempt {attempt + 1}: {target_pkg}/{current_activity}")
@@ -126,21 +125,14 @@ class AppContextManager:
         Attempts recovery by pressing back or relaunching the target app if out of context.
         Returns True if in expected context, False otherwise after recovery attempts.
         """
-        # Check if driver is connected by trying to get current package
-        try:
-            test_package = self.driver.get_current_package()
-        except Exception:
-            self.logger.error("Driver not connected, cannot ensure app context.")
-            self.consecutive_context_failures += 1
-            return False
-
-        # Add retry mechanism for context detection
+        # Add retry mechanism for context detection; the first attempt may reuse the
+        # step's memoized probe, retries always query the device again
         max_context_retries = 2
         context = None
         
         for retry in range(max_context_retries + 1):
             try:
-                context = self.driver.get_current_app_context()
+                context = self.driver.get_current_app_context(refresh=retry > 0)
                 if context and context[0] is not None:
                     break
             except Exception as e:
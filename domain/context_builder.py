@@ -0,0 +1,312 @@
+"""
+Token-budgeted prompt context for action decisions.
+
+The decision prompt is made of a fixed part (instructions, schema, action list)
+and several dynamic sections: screen XML, recent actions, visited screens and
+actions already tried on the current screen. ``ContextBuilder`` fits those
+sections into a per-provider token budget:
+
+- tokens are counted with ``tiktoken`` when it is installed, otherwise with a
+  characters-per-token estimator that is calibrated from the real prompt token
+  counts reported by the provider;
+- list sections keep their most relevant lines (newest history first);
+- screen XML gets whatever budget remains; if it does not fit, interactive
+  elements are ranked (clickable, identifiable, not yet tried, navigation when
+  stuck) and only the best ones are kept, instead of cutting the XML string.
+"""
+
+import logging
+import re
+import threading
+import xml.etree.ElementTree as std_etree
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config.numeric_constants import (
+    AI_CONTEXT_CHARS_PER_TOKEN_DEFAULT,
+    AI_CONTEXT_RESPONSE_RESERVE_TOKENS,
+    AI_CONTEXT_TOKEN_BUDGET_DEFAULT,
+)
+
+# Share of the dynamic budget each list section may use at most; XML gets the rest
+SECTION_SHARES = {
+    "current_screen_actions": 0.15,
+    "action_history": 0.15,
+    "visited_screens": 0.10,
+}
+
+_NAVIGATION_PATTERN = re.compile(r"nav|tab|menu|back|home|drawer|toolbar|up\b", re.IGNORECASE)
+
+
+class TokenCounter:
+    """Counts tokens with tiktoken if available, else with a calibrated chars-per-token ratio."""
+
+    # Weight of a new observation in the running chars-per-token average
+    CALIBRATION_ALPHA = 0.2
+
+    def __init__(self, chars_per_token: float = AI_CONTEXT_CHARS_PER_TOKEN_DEFAULT):
+        self.chars_per_token = float(chars_per_token)
+        self._encoding = None
+        self._lock = threading.Lock()
+        try:
+            import tiktoken
+            self._encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            self._encoding = None
+
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+
+    def count(self, text: Optional[str]) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            try:
+                return len(self._encoding.encode(text, disallowed_special=()))
+            except Exception:
+                pass
+        return int(len(text) / self.chars_per_token) + 1
+
+    def calibrate(self, text: str, actual_tokens: Optional[int]) -> None:
+        """Adjust the estimator using the provider's real prompt token count for ``text``."""
+        if self._encoding is not None or not text or not actual_tokens or actual_tokens <= 0:
+            return
+        observed = len(text) / float(actual_tokens)
+        # Ignore implausible ratios (e.g. counts that include an image)
+        if not 1.0 <= observed <= 8.0:
+            return
+        with self._lock:
+            self.chars_per_token += self.CALIBRATION_ALPHA * (observed - self.chars_per_token)
+
+
+def fit_lines(header: str, lines: Sequence[str], max_tokens: int, counter: TokenCounter,
+              keep_last: bool = False) -> Tuple[str, int]:
+    """Join ``header`` and as many ``lines`` as fit into ``max_tokens``.
+
+    Args:
+        header: Section header, always kept if any line fits
+        lines: Candidate lines in display order
+        max_tokens: Token budget for the whole section
+        counter: Token counter
+        keep_last: Prefer the last lines (e.g. most recent actions) instead of the first
+
+    Returns:
+        Tuple of (section text or "", number of lines dropped)
+    """
+    if not lines:
+        return "", 0
+    used = counter.count(header)
+    if used >= max_tokens:
+        return "", len(lines)
+    ordered = list(reversed(lines)) if keep_last else list(lines)
+    kept: List[str] = []
+    for line in ordered:
+        cost = counter.count(line) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    if not kept:
+        return "", len(lines)
+    if keep_last:
+        kept.reverse()
+    dropped = len(lines) - len(kept)
+    if dropped:
+        note = f"- ... {dropped} more omitted"
+        if keep_last:
+            kept.insert(0, note)
+        else:
+            kept.append(note)
+    return "\n".join([header] + kept), dropped
+
+
+def _element_label_parts(element) -> List[str]:
+    parts = []
+    resource_id = element.attrib.get("resource-id", "")
+    if resource_id:
+        parts.append(resource_id.split("/")[-1])
+    for attr in ("text", "content-desc"):
+        value = element.attrib.get(attr, "")
+        if value:
+            parts.append(value)
+    return parts
+
+
+def score_element(element, tried_text: str = "", prefer_navigation: bool = False) -> float:
+    """Relevance score of one UI element for the next decision."""
+    attrib = element.attrib
+    score = 0.0
+    if attrib.get("clickable") == "true" or attrib.get("long-clickable") == "true":
+        score += 3.0
+    tag_or_class = (attrib.get("class") or element.tag or "")
+    if "EditText" in tag_or_class:
+        score += 2.0
+    if attrib.get("checkable") == "true":
+        score += 1.0
+    if attrib.get("scrollable") == "true":
+        score += 1.0
+    labels = _element_label_parts(element)
+    if attrib.get("resource-id"):
+        score += 1.0
+    if attrib.get("text") or attrib.get("content-desc"):
+        score += 1.0
+    if tried_text and any(
+        label and re.search(r"(?<!\w)" + re.escape(label.lower()) + r"(?!\w)", tried_text) for label in labels
+    ):
+        score -= 2.5
+    if prefer_navigation and any(_NAVIGATION_PATTERN.search(label) for label in labels):
+        score += 2.0
+    return score
+
+
+def _is_candidate(element) -> bool:
+    attrib = element.attrib
+    return any(attrib.get(flag) == "true" for flag in ("clickable", "long-clickable", "checkable", "focusable", "scrollable")) \
+        or bool(attrib.get("resource-id") or attrib.get("text") or attrib.get("content-desc"))
+
+
+def _flat_element_xml(element) -> str:
+    attrs = " ".join(
+        f'{name}="{_escape_attr(value)}"' for name, value in element.attrib.items()
+    )
+    return f"<{element.tag} {attrs}/>" if attrs else f"<{element.tag}/>"
+
+
+def _escape_attr(value: str) -> str:
+    return (str(value).replace("&", "&amp;").replace('"', "&quot;")
+            .replace("<", "&lt;").replace(">", "&gt;"))
+
+
+def fit_xml_to_budget(xml_string: str, max_tokens: int, counter: TokenCounter,
+                      tried_actions: Iterable[str] = (), prefer_navigation: bool = False) -> Tuple[str, Dict[str, int]]:
+    """Fit (already simplified) screen XML into ``max_tokens``.
+
+    XML that fits is returned unchanged. Otherwise the candidate elements are ranked
+    with :func:`score_element` and the best ones are emitted flat, in document order.
+
+    Returns:
+        Tuple of (xml text, stats dict with total/kept element counts)
+    """
+    stats = {"elements_total": 0, "elements_kept": 0}
+    if not xml_string or counter.count(xml_string) <= max_tokens:
+        return xml_string, stats
+
+    try:
+        root = std_etree.fromstring(xml_string.encode("utf-8"))
+    except std_etree.ParseError:
+        # Unparseable (e.g. already truncated): cut at an element boundary by estimated length
+        max_chars = int(max(0, max_tokens) * counter.chars_per_token)
+        cut = xml_string.rfind(">", 0, max_chars)
+        return (xml_string[:cut + 1] if cut != -1 else xml_string[:max_chars]) + "\n... (truncated)", stats
+
+    tried_text = " ".join(tried_actions).lower()
+    candidates = []
+    for order, element in enumerate(root.iter()):
+        if element is root or not _is_candidate(element):
+            continue
+        candidates.append((order, element))
+    stats["elements_total"] = len(candidates)
+
+    ranked = sorted(
+        candidates,
+        key=lambda item: (-score_element(item[1], tried_text, prefer_navigation), item[0])
+    )
+    wrapper_open = f"<{root.tag}>"
+    wrapper_close = f"</{root.tag}>"
+    used = counter.count(wrapper_open) + counter.count(wrapper_close) + 8
+    kept: List[Tuple[int, str]] = []
+    for order, element in ranked:
+        line = _flat_element_xml(element)
+        cost = counter.count(line)
+        if used + cost > max_tokens:
+            continue
+        kept.append((order, line))
+        used += cost
+    kept.sort(key=lambda item: item[0])
+    stats["elements_kept"] = len(kept)
+    dropped = stats["elements_total"] - stats["elements_kept"]
+    body = "".join(line for _, line in kept)
+    note = f"<!-- {dropped} lower-ranked elements omitted to fit token budget -->" if dropped else ""
+    return f"{wrapper_open}{body}{note}{wrapper_close}", stats
+
+
+class ContextBuilder:
+    """Allocates a provider's token budget across the dynamic prompt sections."""
+
+    def __init__(self, budget_tokens: int = AI_CONTEXT_TOKEN_BUDGET_DEFAULT,
+                 response_reserve_tokens: int = AI_CONTEXT_RESPONSE_RESERVE_TOKENS,
+                 counter: Optional[TokenCounter] = None):
+        self.budget_tokens = int(budget_tokens)
+        self.response_reserve_tokens = int(response_reserve_tokens)
+        self.counter = counter or TokenCounter()
+        self.last_stats: Dict[str, Any] = {}
+
+    @classmethod
+    def for_provider(cls, config: Any, provider: str, counter: Optional[TokenCounter] = None) -> "ContextBuilder":
+        """Budget from AI_CONTEXT_TOKEN_BUDGET if set, else the provider's ``context_token_budget`` capability."""
+        budget = None
+        try:
+            budget = config.get("AI_CONTEXT_TOKEN_BUDGET", None)
+        except Exception:
+            budget = None
+        if not budget:
+            try:
+                from config.app_config import AI_PROVIDER_CAPABILITIES
+                budget = AI_PROVIDER_CAPABILITIES.get(provider, {}).get("context_token_budget")
+            except Exception:
+                budget = None
+        return cls(budget_tokens=int(budget or AI_CONTEXT_TOKEN_BUDGET_DEFAULT), counter=counter)
+
+    def available_tokens(self, fixed_parts: Iterable[str]) -> int:
+        """Budget left for dynamic sections after fixed text and the response reserve."""
+        fixed = sum(self.counter.count(part) for part in fixed_parts if part)
+        return max(0, self.budget_tokens - self.response_reserve_tokens - fixed)
+
+    def build(self, fixed_parts: Sequence[str], list_sections: Dict[str, Tuple[str, List[str], bool]],
+              xml_string: str, tried_actions: Iterable[str] = (), prefer_navigation: bool = False,
+              screen_format: str = "xml") -> Dict[str, str]:
+        """Fit all dynamic sections.
+
+        Args:
+            fixed_parts: Text that is always sent (instructions, stuck warning, feedback, closing line)
+            list_sections: name -> (header, lines, keep_last); names are keys of SECTION_SHARES
+            xml_string: Simplified screen XML
+            tried_actions: Action descriptions already tried on this screen (ranked lower)
+            prefer_navigation: Rank navigation elements higher (stuck recovery)
+            screen_format: "xml", or "element_table" for a header row plus one row per element
+
+        Returns:
+            Dict of section name -> fitted text (empty string if nothing fit); XML under "xml"
+        """
+        available = self.available_tokens(fixed_parts)
+        result: Dict[str, str] = {}
+        stats: Dict[str, Any] = {"budget": self.budget_tokens, "available": available, "dropped_lines": {}}
+        remaining = available
+        for name, share in SECTION_SHARES.items():
+            if name not in list_sections:
+                continue
+            header, lines, keep_last = list_sections[name]
+            text, dropped = fit_lines(header, lines, int(available * share), self.counter, keep_last=keep_last)
+            result[name] = text
+            if dropped:
+                stats["dropped_lines"][name] = dropped
+            remaining -= self.counter.count(text)
+
+        if screen_format == "element_table" and xml_string:
+            table_lines = xml_string.split("\n")
+            xml_text, dropped = fit_lines(table_lines[0], table_lines[1:], max(0, remaining), self.counter)
+            xml_stats = {"elements_total": len(table_lines) - 1, "elements_kept": len(table_lines) - 1 - dropped}
+        else:
+            xml_text, xml_stats = fit_xml_to_budget(
+                xml_string, max(0, remaining), self.counter, tried_actions, prefer_navigation
+            )
+        result["xml"] = xml_text
+        stats.update(xml_stats)
+        stats["xml_tokens"] = self.counter.count(xml_text)
+        if xml_stats.get("elements_total") and xml_stats["elements_kept"] < xml_stats["elements_total"]:
+            logging.debug(
+                f"Context budget: kept {xml_stats['elements_kept']}/{xml_stats['elements_total']} "
+                f"ranked elements ({stats['xml_tokens']} tokens of {remaining} available)"
+            )
+        self.last_stats = stats
+        return result
@@ -0,0 +1,268 @@
+"""
+Compact element-table encoding of a screen for the decision prompt.
+
+Instead of (simplified) XML, the prompt can carry one numbered row per relevant
+element::
+
+    #|id|class|text|desc|bounds|flags
+    3|btn_login|Button|Log in||40,1200,680,1320|c
+
+The model answers with ``"target_identifier": "#3"`` and ``resolve_action``
+turns that back into the element's exact bounds and resource-id, so the action
+can be executed by coordinates without another Appium element lookup.
+"""
+
+import logging
+import re
+import xml.etree.ElementTree as std_etree
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.numeric_constants import (
+    ELEMENT_TABLE_BOUNDS_QUANTUM_PX,
+    ELEMENT_TABLE_TEXT_MAX_LEN,
+)
+
+ELEMENT_TABLE_HEADER = "#|id|class|text|desc|bounds|flags"
+
+# Flags column: one letter per true attribute
+_FLAG_LETTERS = (
+    ("clickable", "c"),
+    ("long-clickable", "l"),
+    ("scrollable", "s"),
+    ("checkable", "k"),
+    ("checked", "x"),
+    ("focused", "f"),
+    ("password", "p"),
+)
+
+_BOUNDS_PATTERN = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+# String references need an explicit prefix so a bare number the model meant as text ("3", "2024") is not a row
+_INDEX_REFERENCE_PATTERN = re.compile(r"^\s*(?:#|e|idx:?|index:?)\s*\[?(\d+)\]?\s*$", re.IGNORECASE)
+
+
+def parse_bounds(bounds: Optional[str]) -> Optional[Tuple[int, int, int, int]]:
+    """Parse an Android bounds string ``[x1,y1][x2,y2]`` into (x1, y1, x2, y2)."""
+    if not bounds:
+        return None
+    match = _BOUNDS_PATTERN.search(bounds)
+    if not match:
+        return None
+    return tuple(int(value) for value in match.groups())
+
+
+@dataclass
+class ElementTableEntry:
+    index: int
+    resource_id: str
+    class_name: str
+    text: str
+    content_desc: str
+    bounds: Optional[Tuple[int, int, int, int]]
+    flags: str
+
+    @property
+    def id_suffix(self) -> str:
+        return self.resource_id.split("/")[-1] if self.resource_id else ""
+
+    @property
+    def class_suffix(self) -> str:
+        return self.class_name.split(".")[-1] if self.class_name else ""
+
+    @property
+    def identifier(self) -> str:
+        """Best identifier for logs, action history and server-side fallback lookups."""
+        return self.resource_id or self.content_desc or self.text or f"#{self.index}"
+
+    def to_bbox(self) -> Optional[Dict[str, List[int]]]:
+        """Bounding box in the action format used by the driver (``[y, x]`` pairs)."""
+        if not self.bounds:
+            return None
+        x1, y1, x2, y2 = self.bounds
+        return {"top_left": [y1, x1], "bottom_right": [y2, x2]}
+
+    def to_row(self, quantum: int = ELEMENT_TABLE_BOUNDS_QUANTUM_PX,
+               text_max_len: int = ELEMENT_TABLE_TEXT_MAX_LEN) -> str:
+        bounds = ""
+        if self.bounds:
+            q = max(1, int(quantum))
+            bounds = ",".join(str(int(round(v / q)) * q) for v in self.bounds)
+        return "|".join((
+            str(self.index),
+            _cell(self.id_suffix, text_max_len),
+            _cell(self.class_suffix, text_max_len),
+            _cell(self.text, text_max_len),
+            _cell(self.content_desc, text_max_len),
+            bounds,
+            self.flags,
+        ))
+
+
+def _cell(value: str, max_len: int) -> str:
+    value = " ".join(str(value or "").split()).replace("|", "/")
+    return value if len(value) <= max_len else value[:max_len - 1] + "…"
+
+
+def _is_relevant(attrib: Dict[str, str]) -> bool:
+    if any(attrib.get(flag) == "true" for flag in ("clickable", "long-clickable", "scrollable", "checkable")):
+        return True
+    if "EditText" in (attrib.get("class") or ""):
+        return True
+    return bool(attrib.get("text") or attrib.get("content-desc"))
+
+
+class ElementTable:
+    """Numbered table of the relevant elements on one screen."""
+
+    def __init__(self, entries: List[ElementTableEntry]):
+        self.entries = entries
+        self._by_index = {entry.index: entry for entry in entries}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def from_xml(cls, xml_string: str) -> "ElementTable":
+        """Build the table from a raw page source (elements in document order, numbered from 1)."""
+        if not xml_string:
+            return cls([])
+        try:
+            root = std_etree.fromstring(xml_string.encode("utf-8"))
+        except std_etree.ParseError as e:
+            logging.warning(f"⚠️ Could not parse page source for element table: {e}")
+            return cls([])
+
+        entries: List[ElementTableEntry] = []
+        for element in root.iter():
+            attrib = element.attrib
+            if not attrib or not _is_relevant(attrib):
+                continue
+            bounds = parse_bounds(attrib.get("bounds"))
+            if bounds and (bounds[2] <= bounds[0] or bounds[3] <= bounds[1]):
+                # Zero-area elements are not actionable
+                continue
+            class_name = attrib.get("class") or element.tag
+            flags = "".join(letter for attr, letter in _FLAG_LETTERS if attrib.get(attr) == "true")
+            if "EditText" in class_name:
+                flags += "e"
+            entries.append(ElementTableEntry(
+                index=len(entries) + 1,
+                resource_id=attrib.get("resource-id", ""),
+                class_name=class_name,
+                text=attrib.get("text", ""),
+                content_desc=attrib.get("content-desc", ""),
+                bounds=bounds,
+                flags=flags,
+            ))
+        return cls(entries)
+
+    def rows(self) -> List[str]:
+        return [entry.to_row() for entry in self.entries]
+
+    def to_prompt(self) -> str:
+        return "\n".join([ELEMENT_TABLE_HEADER] + self.rows())
+
+    def get(self, reference: Any) -> Optional[ElementTableEntry]:
+        """Look up an entry by an index reference such as ``"#12"``, ``"e12"`` or ``12``."""
+        if isinstance(reference, int) and not isinstance(reference, bool):
+            return self._by_index.get(reference)
+        if not isinstance(reference, str):
+            return None
+        match = _INDEX_REFERENCE_PATTERN.match(reference)
+        if not match:
+            return None
+        return self._by_index.get(int(match.group(1)))
+
+    def resolve_action(self, action_data: Dict[str, Any]) -> bool:
+        """Rewrite an index reference in ``action_data`` to the element's identifier and bounds.
+
+        Returns:
+            True if the target was an index reference that resolved to an entry
+        """
+        entry = self.get(action_data.get("target_identifier"))
+        if entry is None:
+            return False
+        action_data["element_index"] = entry.index
+        action_data["target_identifier"] = entry.identifier
+        bbox = entry.to_bbox()
+        if bbox:
+            # The table's exact bounds are authoritative over anything the model echoed back
+            action_data["target_bounding_box"] = bbox
+        return True
+
+
+class LocalElementIndex:
+    """Identifier lookup over a captured page source, used instead of server-side element finds.
+
+    The AI's ``target_identifier`` is matched against resource-id (full or suffix),
+    content-desc and text. When several elements match, clickable and then larger
+    elements win; a non-clickable label is still a valid target because a tap at its
+    centre lands on the clickable container around it.
+    """
+
+    def __init__(self, entries: List[ElementTableEntry], clickable: Dict[int, bool]):
+        self._clickable = clickable
+        self._by_key: Dict[str, List[ElementTableEntry]] = {}
+        for entry in entries:
+            keys = set()
+            if entry.resource_id:
+                keys.add(entry.resource_id)
+                keys.add(entry.id_suffix)
+            for value in (entry.content_desc, entry.text):
+                if value:
+                    keys.add(value.strip())
+                    keys.add(value.strip().lower())
+            for key in keys:
+                if key:
+                    self._by_key.setdefault(key, []).append(entry)
+
+    @classmethod
+    def from_xml(cls, xml_string: str) -> "LocalElementIndex":
+        """Index every element with an identifier and non-zero bounds (unparseable XML gives an empty index)."""
+        entries: List[ElementTableEntry] = []
+        clickable: Dict[int, bool] = {}
+        if xml_string:
+            try:
+                root = std_etree.fromstring(xml_string.encode("utf-8"))
+            except std_etree.ParseError as e:
+                logging.debug(f"Local element index unavailable, page source not parseable: {e}")
+                root = None
+            if root is not None:
+                for element in root.iter():
+                    attrib = element.attrib
+                    if not (attrib.get("resource-id") or attrib.get("content-desc") or attrib.get("text")):
+                        continue
+                    bounds = parse_bounds(attrib.get("bounds"))
+                    if not bounds or bounds[2] <= bounds[0] or bounds[3] <= bounds[1]:
+                        continue
+                    entry = ElementTableEntry(
+                        index=len(entries) + 1,
+                        resource_id=attrib.get("resource-id", ""),
+                        class_name=attrib.get("class") or element.tag,
+                        text=attrib.get("text", ""),
+                        content_desc=attrib.get("content-desc", ""),
+                        bounds=bounds,
+                        flags="",
+                    )
+                    clickable[entry.index] = attrib.get("clickable") == "true" or attrib.get("long-clickable") == "true"
+                    entries.append(entry)
+        return cls(entries, clickable)
+
+    def find(self, target_identifier: Optional[str]) -> Optional[ElementTableEntry]:
+        """Return the best element for an identifier, or None if the local index has no match."""
+        if not target_identifier or not isinstance(target_identifier, str):
+            return None
+        target = target_identifier.strip()
+        candidates = (
+            self._by_key.get(target)
+            or self._by_key.get(target.split("/")[-1] if "/" in target else target)
+            or self._by_key.get(target.lower())
+        )
+        if not candidates:
+            return None
+
+        def _rank(entry: ElementTableEntry):
+            x1, y1, x2, y2 = entry.bounds
+            return (not self._clickable.get(entry.index, False), -((x2 - x1) * (y2 - y1)), entry.index)
+
+        return min(candidates, key=_rank)
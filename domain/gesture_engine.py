@@ -0,0 +1,160 @@
+"""
+Container-aware scrolling and end-of-list detection.
+
+A scroll action is aimed at the scrollable container on the captured page source
+instead of at 60% of the whole screen. ``AgentAssistant`` sends it as UiAutomator2's
+``mobile: scrollGesture``, which reports whether the container can scroll further. When
+that command is not available, the driver swipes inside the container bounds.
+
+After the step, ``container_moved`` compares the container's children before and
+after the gesture. A scroll that revealed nothing, or that reached the end, becomes
+step feedback, and the crawler skips the same scroll on the same screen.
+"""
+
+import logging
+import xml.etree.ElementTree as std_etree
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from domain.element_table import parse_bounds
+
+# Scroll actions -> finger direction used by AppiumDriver.scroll
+SCROLL_ACTIONS = {
+    "scroll_down": "down",
+    "scroll_up": "up",
+    "swipe_left": "left",
+    "swipe_right": "right",
+}
+
+_HORIZONTAL_CLASS_HINTS = ("HorizontalScrollView", "ViewPager", "TabLayout")
+
+
+@dataclass
+class ScrollContainer:
+    """Scrollable element a scroll action is aimed at."""
+    bounds: Tuple[int, int, int, int]
+    resource_id: str
+    class_name: str
+
+    @property
+    def label(self) -> str:
+        return self.resource_id.split("/")[-1] if self.resource_id else self.class_name.split(".")[-1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ScrollContainer":
+        return cls(tuple(data["bounds"]), data.get("resource_id", ""), data.get("class_name", ""))
+
+
+@dataclass
+class GestureStats:
+    """Scroll outcomes for one run."""
+    scrolls: int = 0
+    container_scrolls: int = 0
+    end_of_list_detected: int = 0
+    no_movement_detected: int = 0
+    scroll_steps_saved: int = 0  # Scrolls skipped because the screen was known to be at the end
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def _parse(xml_string: Optional[str]) -> Optional[std_etree.Element]:
+    if not xml_string:
+        return None
+    try:
+        return std_etree.fromstring(xml_string.encode("utf-8"))
+    except std_etree.ParseError as e:
+        logging.debug(f"Gesture engine could not parse page source: {e}")
+        return None
+
+
+def _is_horizontal(class_name: str) -> bool:
+    return any(hint in class_name for hint in _HORIZONTAL_CLASS_HINTS)
+
+
+def _scrollables(root: std_etree.Element) -> List[Tuple[std_etree.Element, Tuple[int, int, int, int]]]:
+    found = []
+    for element in root.iter():
+        if element.attrib.get("scrollable") != "true":
+            continue
+        bounds = parse_bounds(element.attrib.get("bounds"))
+        if bounds and bounds[2] > bounds[0] and bounds[3] > bounds[1]:
+            found.append((element, bounds))
+    return found
+
+
+def find_scroll_container(xml_string: Optional[str], direction: str,
+                          target_identifier: Optional[str] = None) -> Optional[ScrollContainer]:
+    """Pick the scrollable container for a scroll in ``direction``.
+
+    A container named by ``target_identifier`` (resource-id, its suffix or content-desc)
+    wins; otherwise the largest container whose orientation fits the direction, then
+    the largest of any orientation.
+    """
+    root = _parse(xml_string)
+    if root is None:
+        return None
+    candidates = _scrollables(root)
+    if not candidates:
+        return None
+
+    def _container(element, bounds) -> ScrollContainer:
+        return ScrollContainer(bounds, element.attrib.get("resource-id", ""),
+                               element.attrib.get("class") or element.tag)
+
+    if target_identifier and isinstance(target_identifier, str):
+        target = target_identifier.strip()
+        for element, bounds in candidates:
+            resource_id = element.attrib.get("resource-id", "")
+            if target and target in (resource_id, resource_id.split("/")[-1], element.attrib.get("content-desc")):
+                return _container(element, bounds)
+
+    horizontal = direction in ("left", "right")
+
+    def _area(item) -> int:
+        x1, y1, x2, y2 = item[1]
+        return (x2 - x1) * (y2 - y1)
+
+    fitting = [item for item in candidates
+               if _is_horizontal(item[0].attrib.get("class") or item[0].tag) == horizontal]
+    element, bounds = max(fitting or candidates, key=_area)
+    return _container(element, bounds)
+
+
+def _locate(root: std_etree.Element, container: ScrollContainer) -> Optional[std_etree.Element]:
+    same_class = [(element, bounds) for element, bounds in _scrollables(root)
+                  if (element.attrib.get("class") or element.tag) == container.class_name
+                  and element.attrib.get("resource-id", "") == container.resource_id]
+    for element, bounds in same_class:
+        if bounds == container.bounds:
+            return element
+    # A collapsing toolbar can resize the container between captures
+    return same_class[0][0] if len(same_class) == 1 else None
+
+
+def content_signature(xml_string: Optional[str], container: ScrollContainer) -> Optional[Tuple]:
+    """Identity and position of everything inside the container, or None if it is not on the screen."""
+    root = _parse(xml_string)
+    if root is None:
+        return None
+    element = _locate(root, container)
+    if element is None:
+        return None
+    return tuple(
+        (child.attrib.get("resource-id", ""), child.attrib.get("text", ""),
+         child.attrib.get("content-desc", ""), child.attrib.get("bounds", ""))
+        for child in element.iter() if child is not element
+    )
+
+
+def container_moved(before_xml: Optional[str], after_xml: Optional[str],
+                    container: ScrollContainer) -> Optional[bool]:
+    """Whether the container's content changed; None when either capture lacks the container."""
+    before = content_signature(before_xml, container)
+    after = content_signature(after_xml, container)
+    if before is None or after is None:
+        return None
+    return before != after
@@ -0,0 +1,170 @@
+"""
+Screenshot -> AI image payload, encoded once.
+
+``ImagePayloadPreparer.prepare`` runs the preprocessing chain (crop bars, resize,
+RGB, sharpen) on the shared screenshot decode and encodes the result once in the
+provider's format. Adapters send ``PreparedImage.data`` as is instead of
+re-encoding a PIL image. Payloads are cached by screen identity (the composite
+hash), so a revisited screen reuses its encoded image.
+"""
+
+import io
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image, ImageFilter
+
+from config.numeric_constants import (
+    IMAGE_BG_COLOR,
+    IMAGE_CROP_BOTTOM_PCT_DEFAULT,
+    IMAGE_CROP_TOP_PCT_DEFAULT,
+    IMAGE_DEFAULT_FORMAT,
+    IMAGE_DEFAULT_QUALITY,
+    IMAGE_MAX_WIDTH_DEFAULT,
+    IMAGE_PAYLOAD_CACHE_SIZE,
+    IMAGE_SHARPEN_PERCENT,
+    IMAGE_SHARPEN_RADIUS,
+    IMAGE_SHARPEN_THRESHOLD,
+)
+from utils.screen_image import get_decoded_screenshot
+
+
+@dataclass(frozen=True)
+class ImagePrepSettings:
+    """Preprocessing and encoding settings for one provider."""
+    max_width: int = IMAGE_MAX_WIDTH_DEFAULT
+    quality: int = IMAGE_DEFAULT_QUALITY
+    image_format: str = IMAGE_DEFAULT_FORMAT
+    crop_bars: bool = True
+    crop_top_pct: float = IMAGE_CROP_TOP_PCT_DEFAULT
+    crop_bottom_pct: float = IMAGE_CROP_BOTTOM_PCT_DEFAULT
+
+    @classmethod
+    def from_config(cls, cfg: Any, capabilities: Dict[str, Any]) -> 'ImagePrepSettings':
+        """Resolve settings from provider capabilities, with global config overrides taking precedence."""
+        return cls(
+            max_width=int(cfg.get('IMAGE_MAX_WIDTH', None) or capabilities.get('image_max_width', IMAGE_MAX_WIDTH_DEFAULT)),
+            quality=int(cfg.get('IMAGE_QUALITY', None) or capabilities.get('image_quality', IMAGE_DEFAULT_QUALITY)),
+            image_format=str(cfg.get('IMAGE_FORMAT', None) or capabilities.get('image_format', IMAGE_DEFAULT_FORMAT)).upper(),
+            crop_bars=bool(cfg.get('IMAGE_CROP_BARS', True)),
+            crop_top_pct=float(cfg.get('IMAGE_CROP_TOP_PERCENT', IMAGE_CROP_TOP_PCT_DEFAULT) or 0.0),
+            crop_bottom_pct=float(cfg.get('IMAGE_CROP_BOTTOM_PERCENT', IMAGE_CROP_BOTTOM_PCT_DEFAULT) or 0.0),
+        )
+
+
+@dataclass
+class PreparedImage:
+    """Encoded image ready to send, with the timings of the stages that produced it."""
+    data: bytes
+    image_format: str
+    size: Tuple[int, int]
+    source_size: int
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    cache_hit: bool = False
+
+    @property
+    def mime_type(self) -> str:
+        return f"image/{self.image_format.lower()}"
+
+    def to_pil(self) -> Image.Image:
+        """Decode the payload, for callers that need a PIL image."""
+        return Image.open(io.BytesIO(self.data))
+
+
+def encode_image(image: Image.Image, image_format: str, quality: int) -> bytes:
+    """Encode a PIL image with the settings used for AI payloads."""
+    image_format = image_format.upper()
+    if image_format in ('JPEG', 'WEBP') and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    if image_format == 'JPEG':
+        image.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True, subsampling='4:2:0')
+    elif image_format == 'WEBP':
+        image.save(buffer, format='WEBP', quality=quality)
+    else:
+        image.save(buffer, format=image_format, optimize=True)
+    return buffer.getvalue()
+
+
+class ImagePayloadPreparer:
+    """Prepares and caches encoded AI images."""
+
+    def __init__(self, cache_size: int = IMAGE_PAYLOAD_CACHE_SIZE):
+        self.cache_size = max(0, int(cache_size))
+        self._cache: "OrderedDict[Tuple[str, ImagePrepSettings], PreparedImage]" = OrderedDict()
+
+    def prepare(self, screenshot_bytes: bytes, settings: ImagePrepSettings,
+                cache_key: Optional[str] = None) -> PreparedImage:
+        """Preprocess and encode a screenshot.
+
+        Args:
+            screenshot_bytes: Captured PNG bytes
+            settings: Provider settings
+            cache_key: Screen identity (composite hash); when given, a cached payload
+                for the same screen and settings is returned without any image work
+
+        Returns:
+            PreparedImage with per-stage timings (decode, crop, resize, convert, sharpen, encode)
+        """
+        key = (cache_key, settings) if cache_key and self.cache_size else None
+        if key is not None and key in self._cache:
+            self._cache.move_to_end(key)
+            cached = self._cache[key]
+            return PreparedImage(cached.data, cached.image_format, cached.size, len(screenshot_bytes),
+                                 dict(cached.timings_ms), cache_hit=True)
+
+        timings: Dict[str, float] = {}
+        stage_start = time.perf_counter()
+
+        def _lap(stage: str) -> None:
+            nonlocal stage_start
+            now = time.perf_counter()
+            timings[stage] = (now - stage_start) * 1000
+            stage_start = now
+
+        img = get_decoded_screenshot(screenshot_bytes).image
+        _lap('decode')
+
+        if settings.crop_bars and (settings.crop_top_pct > 0 or settings.crop_bottom_pct > 0):
+            h = img.height
+            upper = int(max(0.0, min(1.0, settings.crop_top_pct)) * h)
+            lower = max(upper + 1, h - int(max(0.0, min(1.0, settings.crop_bottom_pct)) * h))
+            img = img.crop((0, upper, img.width, lower))
+        _lap('crop')
+
+        if img.width > settings.max_width:
+            new_height = int(img.height * settings.max_width / img.width)
+            img = img.resize((settings.max_width, new_height), Image.Resampling.LANCZOS)
+        _lap('resize')
+
+        if img.mode == 'RGBA':
+            # White background for transparent pixels
+            background = Image.new('RGB', img.size, IMAGE_BG_COLOR)
+            background.paste(img, mask=img.split()[-1])
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+        _lap('convert')
+
+        # Mild sharpening keeps text readable after downscaling and compression
+        img = img.filter(ImageFilter.UnsharpMask(
+            radius=IMAGE_SHARPEN_RADIUS, percent=IMAGE_SHARPEN_PERCENT, threshold=IMAGE_SHARPEN_THRESHOLD))
+        _lap('sharpen')
+
+        data = encode_image(img, settings.image_format, settings.quality)
+        _lap('encode')
+
+        prepared = PreparedImage(data, settings.image_format, img.size, len(screenshot_bytes), timings)
+        logging.debug(
+            f"Prepared AI image {img.size[0]}x{img.size[1]} {settings.image_format}: "
+            f"{len(screenshot_bytes)} -> {len(data)} bytes in {sum(timings.values()):.1f} ms "
+            f"({', '.join(f'{stage} {ms:.1f}' for stage, ms in timings.items())})"
+        )
+        if key is not None:
+            self._cache[key] = prepared
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return prepared
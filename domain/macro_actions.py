@@ -0,0 +1,191 @@
+"""
+Macro actions: several simple steps on one screen executed as a single crawler step.
+
+A macro is an ordinary action dict with ``"action": "macro"`` and a ``steps`` list::
+
+    {"action": "macro", "target_identifier": "login form",
+     "steps": [{"action": "input", "target_identifier": "email", "input_text": "a@b.c"},
+               {"action": "input", "target_identifier": "password", "input_text": "secret"},
+               {"action": "click", "target_identifier": "btn_login"}],
+     "reasoning": "..."}
+
+The model can emit one directly, or ``plan_form_fill`` builds one deterministically
+from the page source; the crawler loop uses it instead of an AI call on form screens
+whose fields match ``MACRO_FORM_FIELD_VALUES``. ``AgentAssistant`` runs the steps back to back and only the
+state after the last step is captured by the crawler loop; consecutive coordinate
+taps are sent as one W3C actions payload.
+"""
+
+import logging
+import re
+import time
+import xml.etree.ElementTree as std_etree
+from typing import Any, Callable, Dict, List, Optional
+
+from config.numeric_constants import MACRO_MAX_STEPS
+from domain.element_table import parse_bounds
+
+MACRO_ACTION = "macro"
+
+# Step actions a macro may contain. "back" leaves the screen, so it can only be the last
+# step; reset_app is never part of a macro
+MACRO_STEP_ACTIONS = (
+    "click", "input", "long_press", "double_tap", "clear_text", "replace_text",
+    "scroll_down", "scroll_up", "swipe_left", "swipe_right",
+)
+MACRO_TERMINAL_ACTIONS = ("back",)
+
+
+def normalize_macro_steps(raw_steps: Any, max_steps: int = MACRO_MAX_STEPS) -> List[Dict[str, Any]]:
+    """Validate and clean the ``steps`` of a macro action.
+
+    Steps with an unknown action or without a target (where one is needed) are
+    dropped; a terminal action keeps its place but ends the list.
+
+    Returns:
+        List of step dicts, at most ``max_steps`` long
+    """
+    if not isinstance(raw_steps, list):
+        return []
+    steps: List[Dict[str, Any]] = []
+    for raw in raw_steps:
+        if not isinstance(raw, dict):
+            continue
+        action = str(raw.get("action", "")).lower().strip()
+        if action not in MACRO_STEP_ACTIONS and action not in MACRO_TERMINAL_ACTIONS:
+            logging.debug(f"Dropping unsupported macro step action: {action!r}")
+            continue
+        step = {key: value for key, value in raw.items() if key != "steps"}
+        step["action"] = action
+        needs_target = action in ("click", "input", "long_press", "double_tap", "clear_text", "replace_text")
+        if needs_target and not step.get("target_identifier") and not step.get("target_bounding_box"):
+            logging.debug(f"Dropping macro step without target: {step}")
+            continue
+        steps.append(step)
+        if action in MACRO_TERMINAL_ACTIONS or len(steps) >= max_steps:
+            break
+    return steps
+
+
+def is_coordinate_tap(step: Dict[str, Any]) -> bool:
+    """Whether a step is a plain tap whose bounds are already known."""
+    if step.get("action") != "click":
+        return False
+    bbox = step.get("target_bounding_box")
+    if not isinstance(bbox, dict):
+        return False
+    return len(bbox.get("top_left") or []) == 2 and len(bbox.get("bottom_right") or []) == 2
+
+
+def group_steps(steps: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Split steps into runs: consecutive coordinate taps form one group, anything else stands alone."""
+    groups: List[List[Dict[str, Any]]] = []
+    for step in steps:
+        if is_coordinate_tap(step) and groups and all(is_coordinate_tap(s) for s in groups[-1]):
+            groups[-1].append(step)
+        else:
+            groups.append([step])
+    return groups
+
+
+def run_macro(steps: List[Dict[str, Any]],
+              execute_step: Callable[[Dict[str, Any]], bool],
+              tap_batch: Callable[[List[Dict[str, Any]]], bool],
+              pause_ms: int) -> List[Dict[str, Any]]:
+    """Run macro steps back to back, stopping at the first failure.
+
+    Args:
+        steps: Normalized (and target-resolved) steps
+        execute_step: Runs one step through its regular action handler
+        tap_batch: Sends a run of coordinate taps as one gesture payload (bounding boxes)
+        pause_ms: Settle time between batches
+
+    Returns:
+        One ``{"action", "target_identifier", "success"}`` entry per attempted step
+    """
+    results: List[Dict[str, Any]] = []
+    for group_index, group in enumerate(group_steps(steps)):
+        if group_index:
+            time.sleep(pause_ms / 1000.0)
+        if len(group) > 1:
+            ok = bool(tap_batch([step["target_bounding_box"] for step in group]))
+        else:
+            ok = bool(execute_step(group[0]))
+        results.extend(
+            {"action": step["action"], "target_identifier": step.get("target_identifier"), "success": ok}
+            for step in group
+        )
+        if not ok:
+            logging.warning(f"Macro stopped after {len(results)}/{len(steps)} steps: {group[-1]['action']} failed")
+            break
+    return results
+
+
+_SUBMIT_PATTERN = re.compile(r"\b(sign ?in|log ?in|submit|continue|next|register|sign ?up|save|done|ok)\b", re.IGNORECASE)
+
+
+def _field_keys(attrib: Dict[str, str]) -> str:
+    resource_id = attrib.get("resource-id", "")
+    parts = [resource_id.split("/")[-1], attrib.get("hint", ""), attrib.get("content-desc", ""), attrib.get("text", "")]
+    return " ".join(part for part in parts if part).lower()
+
+
+def plan_form_fill(xml_string: str, field_values: Dict[str, str],
+                   submit: bool = True, max_steps: int = MACRO_MAX_STEPS) -> Optional[Dict[str, Any]]:
+    """Build a macro that fills every recognised editable field and optionally taps submit.
+
+    Args:
+        xml_string: Page source of the current screen
+        field_values: Keyword -> value, e.g. ``{"email": "a@b.c", "password": "x"}``; a field
+            matches when the keyword occurs in its resource-id suffix, hint, content-desc or text
+        submit: Append a click on the first button labelled like submit/login/next
+        max_steps: Upper bound on the number of steps
+
+    Returns:
+        Macro action dict, or None when fewer than two fields matched (a single input is an
+        ordinary step)
+    """
+    try:
+        root = std_etree.fromstring(xml_string.encode("utf-8"))
+    except (std_etree.ParseError, AttributeError) as e:
+        logging.debug(f"Form planner could not parse page source: {e}")
+        return None
+
+    keywords = [(key.lower(), value) for key, value in field_values.items() if key]
+    steps: List[Dict[str, Any]] = []
+    submit_step: Optional[Dict[str, Any]] = None
+    for element in root.iter():
+        attrib = element.attrib
+        class_name = attrib.get("class") or element.tag
+        if "EditText" in class_name:
+            identifier = attrib.get("resource-id") or attrib.get("content-desc") or attrib.get("text")
+            if not identifier:
+                continue
+            keys = _field_keys(attrib)
+            for keyword, value in keywords:
+                if keyword in keys:
+                    steps.append({"action": "input", "target_identifier": identifier, "input_text": value})
+                    break
+        elif submit and submit_step is None and attrib.get("clickable") == "true":
+            label = " ".join(filter(None, (attrib.get("text"), attrib.get("content-desc"),
+                                           attrib.get("resource-id", "").split("/")[-1].replace("_", " "))))
+            bounds = parse_bounds(attrib.get("bounds"))
+            if label and bounds and _SUBMIT_PATTERN.search(label):
+                x1, y1, x2, y2 = bounds
+                submit_step = {
+                    "action": "click",
+                    "target_identifier": attrib.get("resource-id") or attrib.get("text") or attrib.get("content-desc"),
+                    "target_bounding_box": {"top_left": [y1, x1], "bottom_right": [y2, x2]},
+                }
+
+    if len(steps) < 2:
+        return None
+    if submit_step is not None:
+        steps.append(submit_step)
+    steps = steps[:max_steps]
+    return {
+        "action": MACRO_ACTION,
+        "target_identifier": "form",
+        "steps": steps,
+        "reasoning": f"Fill {sum(1 for s in steps if s['action'] == 'input')} form fields in one step",
+    }
@@ -35,10 +35,10 @@ discovery and metadata management, see:
 - domain/providers/openrouter_provider.py: OpenRouter model discovery, caching, and metadata
 """
 
-import io
 import json
 import logging
 import os
+import random
 import re
 import time
 from abc import ABC, abstractmethod
@@ -46,6 +46,12 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 
 from PIL import Image
 
+from domain.image_payload import PreparedImage, encode_image
+from domain.provider_transport import ProviderTransport
+
+# Adapters accept an already encoded payload (the crawler's path) or a PIL image
+ImageInput = Union[Image.Image, PreparedImage]
+
 # ------ Abstract Model Adapter Interface ------
 
 class ModelAdapter(ABC):
@@ -59,7 +65,7 @@ class ModelAdapter(ABC):
     @abstractmethod
     def generate_response(self, 
                         prompt: str, 
-                        image: Optional[Image.Image] = None,
+                        image: Optional[ImageInput] = None,
                          **kwargs) -> Tuple[str, Dict[str, Any]]:
         """Generate a response from the model based on the prompt and optional image."""
         pass
@@ -76,11 +82,12 @@ class ModelAdapter(ABC):
 class GeminiAdapter(ModelAdapter):
     """Adapter for Google's Gemini models."""
     
-    def __init__(self, api_key: str, model_name: str):
+    def __init__(self, api_key: str, model_name: str, transport: Optional[ProviderTransport] = None):
         self.api_key = api_key
         self.original_model_name = model_name
         self.model_name = self._normalize_model_name(model_name)
         self.model = None
+        self.transport = transport or ProviderTransport("gemini")
         self._model_info = {
             "provider": "Google",
             "model_family": "Gemini",
@@ -257,7 +264,7 @@ class GeminiAdapter(ModelAdapter):
     
     def generate_response(self, 
                         prompt: str, 
-                        image: Optional[Image.Image] = None,
+                        image: Optional[ImageInput] = None,
                          **kwargs) -> Tuple[str, Dict[str, Any]]:
         """Generate a response from Gemini."""
         if not self.model:
@@ -270,15 +277,22 @@ class GeminiAdapter(ModelAdapter):
             content_parts = []
             
             # Add image if provided
-            if image:
+            if isinstance(image, PreparedImage):
+                # Inline blob: the bytes are sent as encoded
+                content_parts.append({"mime_type": image.mime_type, "data": image.data})
+            elif image:
                 # Gemini handles PIL images directly
                 content_parts.append(image)
                 
             # Add text prompt
             content_parts.append(prompt)
             
-            # Generate response
-            response = self.model.generate_content(content_parts)
+            # Generate response (retries, limits and timeout handled by the transport)
+            response = self.transport.call(
+                self.model.generate_content,
+                content_parts,
+                request_options={"timeout": self.transport.policy.timeout_s}
+            )
             
             # Get response text
             response_text = response.text if hasattr(response, 'text') else str(response)
@@ -291,21 +305,23 @@ class GeminiAdapter(ModelAdapter):
                 "provider": "Google Gemini"
             }
             
-            # Try to get token usage if available
-            try:
-                prompt_token_count = getattr(response, 'usage_metadata', {}).get('prompt_token_count', 0)
-                response_token_count = getattr(response, 'usage_metadata', {}).get('candidates_token_count', 0)
+            # Try to get token usage if available (usage_metadata is a proto message, not a dict)
+            usage = getattr(response, 'usage_metadata', None)
+            prompt_token_count = getattr(usage, 'prompt_token_count', None) if usage is not None else None
+            if prompt_token_count:
+                response_token_count = getattr(usage, 'candidates_token_count', 0) or 0
                 metadata["token_count"] = {
                     "prompt": prompt_token_count,
                     "response": response_token_count,
-                    "total": prompt_token_count + response_token_count
+                    "total": getattr(usage, 'total_token_count', 0) or (prompt_token_count + response_token_count)
                 }
-            except:
+            else:
                 # If token count not available, make an estimate
                 metadata["token_count"] = {
                     "prompt": len(prompt) // 4,  # Rough estimate
                     "response": len(response_text) // 4,  # Rough estimate
-                    "total": (len(prompt) + len(response_text)) // 4  # Rough estimate
+                    "total": (len(prompt) + len(response_text)) // 4,  # Rough estimate
+                    "estimated": True
                 }
             
             return response_text, metadata
@@ -328,10 +344,11 @@ class GeminiAdapter(ModelAdapter):
 class OpenRouterAdapter(ModelAdapter):
     """Adapter for OpenRouter's models (OpenAI-compatible API)."""
     
-    def __init__(self, api_key: str, model_name: str):
+    def __init__(self, api_key: str, model_name: str, transport: Optional[ProviderTransport] = None):
         self.api_key = api_key
         self.model_name = model_name
         self.client = None
+        self.transport = transport or ProviderTransport("openrouter")
         self._model_info = {
             "provider": "OpenRouter",
             "model_family": "OpenRouter",
@@ -346,7 +363,18 @@ class OpenRouterAdapter(ModelAdapter):
             
             # Initialize client (OpenRouter uses OpenAI-compatible API)
             from config.urls import ServiceURLs
-            self.client = OpenAI(api_key=self.api_key, base_url=ServiceURLs.get_openrouter_api_url())
+            base_url = ServiceURLs.get_openrouter_api_url()
+            client_kwargs = {
+                "api_key": self.api_key,
+                "base_url": base_url,
+                "timeout": self.transport.policy.timeout_s,
+                # Retries are handled by the transport so Retry-After and the shared limits apply
+                "max_retries": 0,
+            }
+            http_client = self.transport.http_client(base_url)
+            if http_client is not None:
+                client_kwargs["http_client"] = http_client
+            self.client = OpenAI(**client_kwargs)
             
             # Store generation parameters
             self.generation_params = model_config.get('generation_config', {})
@@ -363,7 +391,7 @@ class OpenRouterAdapter(ModelAdapter):
     
     def generate_response(self, 
                          prompt: str, 
-                         image: Optional[Image.Image] = None,
+                         image: Optional[ImageInput] = None,
                          **kwargs) -> Tuple[str, Dict[str, Any]]:
         """Generate a response from OpenRouter."""
         if not self.client:
@@ -391,19 +419,12 @@ class OpenRouterAdapter(ModelAdapter):
                 image_format = kwargs.get('image_format', None) or capabilities.get('image_format', 'JPEG')
                 image_quality = kwargs.get('image_quality', None) or capabilities.get('image_quality', 65)
                 
-                # Convert PIL Image to bytes with optimized settings
-                image_byte_arr = io.BytesIO()
-                # Ensure compatible color mode for certain formats
-                try:
-                    if image_format.upper() in ('JPEG', 'WEBP') and image.mode not in ('RGB'):
-                        image = image.convert('RGB')
-                except Exception:
-                    pass
-                if image_format.upper() == 'JPEG':
-                    image.save(image_byte_arr, format='JPEG', quality=image_quality, optimize=True, progressive=True, subsampling='4:2:0')
+                if isinstance(image, PreparedImage):
+                    # Already encoded once by the image preparation stage
+                    image_format = image.image_format
+                    image_bytes = image.data
                 else:
-                    image.save(image_byte_arr, format=image_format, optimize=True)
-                image_bytes = image_byte_arr.getvalue()
+                    image_bytes = encode_image(image, image_format, image_quality)
                 
                 payload_max_kb = capabilities.get('payload_max_size_kb', 150)
                 payload_max_bytes = payload_max_kb * 1024
@@ -427,7 +448,7 @@ class OpenRouterAdapter(ModelAdapter):
                         "type": "image_url",
                         "image_url": {"url": f"data:image/{image_format.lower()};base64,{image_b64}"}
                     })
-                    logging.debug(f"Added compressed image to OpenRouter payload ({image_format}, {image_quality}% quality, base64 size: {len(image_b64)} chars)")
+                    logging.debug(f"Added compressed image to OpenRouter payload ({image_format}, base64 size: {len(image_b64)} chars)")
             
             # Add text prompt
             user_message["content"].append({
@@ -469,7 +490,7 @@ class OpenRouterAdapter(ModelAdapter):
 
             response = None
             try:
-                response = _create_completion(self.model_name)
+                response = self.transport.call(_create_completion, self.model_name)
             except Exception as e_req:
                 # Handle common OpenRouter 404 when a model alias/id is unavailable
                 err_str = str(e_req)
@@ -503,7 +524,8 @@ class OpenRouterAdapter(ModelAdapter):
                 metadata["token_count"] = {
                     "prompt": len(prompt) // 4,
                     "response": len(response_text) // 4,
-                    "total": (len(prompt) + len(response_text)) // 4
+                    "total": (len(prompt) + len(response_text)) // 4,
+                    "estimated": True
                 }
             
             return response_text, metadata
@@ -523,12 +545,15 @@ class OpenRouterAdapter(ModelAdapter):
 class OllamaAdapter(ModelAdapter):
     """Adapter for Ollama local models."""
     
-    def __init__(self, api_key: str, model_name: str):
+    def __init__(self, api_key: str, model_name: str, transport: Optional[ProviderTransport] = None):
         # Extract the actual model name from display name (remove "(local)" and vision indicator)
         self.display_name = model_name
         self.model_name = self._extract_model_name(model_name)
         self.base_url = api_key  # For Ollama, api_key parameter contains the base URL
         self.vision_supported = False  # Will be set during initialization
+        self.transport = transport or ProviderTransport("ollama")
+        self.client = None
+        self._model_verified = False
         self._model_info = {
             "provider": "Ollama",
             "model_family": "Local LLM",
@@ -591,6 +616,9 @@ class OllamaAdapter(ModelAdapter):
                 # Set the base URL using environment variable (Ollama SDK method)
                 os.environ['OLLAMA_HOST'] = self.base_url
             
+            # One client per adapter keeps the HTTP connection to the Ollama server alive
+            self.client = ollama.Client(host=self.base_url or None, timeout=self.transport.policy.timeout_s)
+            
             # Store generation parameters
             self.generation_params = model_config.get('generation_config', {})
             
@@ -599,7 +627,7 @@ class OllamaAdapter(ModelAdapter):
             
             # Test connection to Ollama
             try:
-                ollama.list()
+                self.client.list()
                 logging.debug(f"Ollama connection successful. Using model: {self.model_name}")
                 if self.vision_supported:
                     logging.debug(f"Model {self.model_name} supports vision capabilities")
@@ -620,7 +648,7 @@ class OllamaAdapter(ModelAdapter):
     
     def generate_response(self, 
                          prompt: str, 
-                         image: Optional[Image.Image] = None,
+                         image: Optional[ImageInput] = None,
                          **kwargs) -> Tuple[str, Dict[str, Any]]:
         """Generate a response from Ollama."""
         try:
@@ -630,50 +658,55 @@ class OllamaAdapter(ModelAdapter):
             import ollama
             start_time = time.time()
             
-            # Check if model is available before attempting to use it
+            if self.client is None:
+                self.client = ollama.Client(host=self.base_url or None, timeout=self.transport.policy.timeout_s)
+            
+            # Check if model is available before attempting to use it (once per adapter)
             available_model_names = []
-            try:
-                available_models = ollama.list()
+            if not self._model_verified:
+                try:
+                    available_models = self.client.list()
                 
-                # Process Ollama API response format
-                for model_obj in available_models.models:
-                    # Extract model name from the model object
-                    if hasattr(model_obj, 'model'):
-                        model_name = model_obj.model
-                        if model_name and isinstance(model_name, str):
-                            available_model_names.append(model_name)
+                    # Process Ollama API response format
+                    for model_obj in available_models.models:
+                        # Extract model name from the model object
+                        if hasattr(model_obj, 'model'):
+                            model_name = model_obj.model
+                            if model_name and isinstance(model_name, str):
+                                available_model_names.append(model_name)
                 
-                # Check if our model is in the list
-                if self.model_name not in available_model_names:
-                    # Build clean error message with available models and commands
-                    if available_model_names:
-                        models_list = "\n  - " + "\n  - ".join(available_model_names)
-                        error_msg = (
-                            f"Model '{self.model_name}' not found.\n"
-                            f"Available models:{models_list}\n\n"
-                            f"To select a model, run:\n"
-                            f"  python run_cli.py ollama select-model <index_or_name>\n\n"
-                            f"To install a new model, run:\n"
-                            f"  ollama pull {self.model_name}"
-                        )
+                    # Check if our model is in the list
+                    if self.model_name not in available_model_names:
+                        # Build clean error message with available models and commands
+                        if available_model_names:
+                            models_list = "\n  - " + "\n  - ".join(available_model_names)
+                            error_msg = (
+                                f"Model '{self.model_name}' not found.\n"
+                                f"Available models:{models_list}\n\n"
+                                f"To select a model, run:\n"
+                                f"  python run_cli.py ollama select-model <index_or_name>\n\n"
+                                f"To install a new model, run:\n"
+                                f"  ollama pull {self.model_name}"
+                            )
+                        else:
+                            error_msg = (
+                                f"Model '{self.model_name}' not found. No models available.\n\n"
+                                f"To install a model, run:\n"
+                                f"  ollama pull {self.model_name}\n\n"
+                                f"Then select it with:\n"
+                                f"  python run_cli.py ollama select-model {self.model_name}"
+                            )
+                        raise ValueError(error_msg)
                     else:
-                        error_msg = (
-                            f"Model '{self.model_name}' not found. No models available.\n\n"
-                            f"To install a model, run:\n"
-                            f"  ollama pull {self.model_name}\n\n"
-                            f"Then select it with:\n"
-                            f"  python run_cli.py ollama select-model {self.model_name}"
-                        )
-                    raise ValueError(error_msg)
-                else:
-                    logging.debug(f"✅ Verified model '{self.model_name}' is available in Ollama")
-            except ValueError:
-                # Re-raise ValueError (model not found) without modification
-                raise
-            except Exception as list_error:
-                # If we can't list models, store available_model_names as empty for later error handling
-                logging.debug(f"Could not verify model availability: {list_error}")
-                available_model_names = []
+                        self._model_verified = True
+                        logging.debug(f"✅ Verified model '{self.model_name}' is available in Ollama")
+                except ValueError:
+                    # Re-raise ValueError (model not found) without modification
+                    raise
+                except Exception as list_error:
+                    # If we can't list models, store available_model_names as empty for later error handling
+                    logging.debug(f"Could not verify model availability: {list_error}")
+                    available_model_names = []
             
             # Prepare messages and images
             messages = []
@@ -688,8 +721,12 @@ class OllamaAdapter(ModelAdapter):
                     # For Ollama, we can work directly with the PIL Image object
                     # The Ollama SDK supports passing PIL images directly in some versions
                     # If not supported, we'll use the raw image data
-                    images.append(image)
-                    logging.debug(f"Added image to Ollama request (format: {image.format}, size: {image.size})")
+                    if isinstance(image, PreparedImage):
+                        images.append(image.data)
+                        logging.debug(f"Added image to Ollama request (format: {image.image_format}, size: {image.size})")
+                    else:
+                        images.append(image)
+                        logging.debug(f"Added image to Ollama request (format: {image.format}, size: {image.size})")
                 except Exception as img_error:
                     logging.error(f"Error processing image for Ollama: {img_error}", exc_info=True)
                     raise ValueError(f"Failed to process image for Ollama: {img_error}")
@@ -711,7 +748,8 @@ class OllamaAdapter(ModelAdapter):
                 try:
                     # Using chat method with images in the message as shown in Ollama docs
                     # https://ollama.com/blog/vision-models
-                    response = ollama.chat(
+                    response = self.transport.call(
+                        self.client.chat,
                         model=self.model_name,
                         messages=[
                             {
@@ -738,7 +776,7 @@ class OllamaAdapter(ModelAdapter):
                         # Get available models if we don't have them yet
                         if not available_model_names:
                             try:
-                                available_models = ollama.list()
+                                available_models = self.client.list()
                                 for model_obj in available_models.models:
                                     if hasattr(model_obj, 'model'):
                                         model_name = model_obj.model
@@ -775,7 +813,8 @@ class OllamaAdapter(ModelAdapter):
                 logging.debug("Using Ollama chat API (text-only)")
                 try:
                     # Use chat API for text-only models
-                    response = ollama.chat(
+                    response = self.transport.call(
+                        self.client.chat,
                         model=self.model_name,
                         messages=messages,
                         options={
@@ -796,7 +835,7 @@ class OllamaAdapter(ModelAdapter):
                         # Get available models if we don't have them yet
                         if not available_model_names:
                             try:
-                                available_models = ollama.list()
+                                available_models = self.client.list()
                                 for model_obj in available_models.models:
                                     if hasattr(model_obj, 'model'):
                                         model_name = model_obj.model
@@ -844,13 +883,23 @@ class OllamaAdapter(ModelAdapter):
                 "provider": "Ollama"
             }
             
-            # Ollama doesn't provide token counts in the same way
-            # Make an estimate
-            metadata["token_count"] = {
-                "prompt": len(prompt) // 4,  # Rough estimate
-                "response": len(response_text) // 4,  # Rough estimate
-                "total": (len(prompt) + len(response_text)) // 4  # Rough estimate
-            }
+            # Ollama reports evaluated token counts on the chat response
+            prompt_eval_count = getattr(response, 'prompt_eval_count', None)
+            eval_count = getattr(response, 'eval_count', None)
+            if prompt_eval_count:
+                metadata["token_count"] = {
+                    "prompt": prompt_eval_count,
+                    "response": eval_count or 0,
+                    "total": prompt_eval_count + (eval_count or 0)
+                }
+            else:
+                # Make an estimate
+                metadata["token_count"] = {
+                    "prompt": len(prompt) // 4,  # Rough estimate
+                    "response": len(response_text) // 4,  # Rough estimate
+                    "total": (len(prompt) + len(response_text)) // 4,  # Rough estimate
+                    "estimated": True
+                }
             
             return response_text, metadata
             
@@ -868,6 +917,323 @@ class OllamaAdapter(ModelAdapter):
         return self._model_info
 
 
+# ------ Routing Adapter ------
+
+class RoutingAdapter(ModelAdapter):
+    """Adapter that sends a decision to several backends and uses the first valid answer.
+
+    In ``race`` mode all backends are called concurrently (the backup may be started
+    after the preferred backend's learned p75 latency); in ``fallback`` mode they are
+    tried one after the other with a per-backend timeout. Every finished call is
+    recorded in a per-app latency histogram, which also decides the backend order.
+    """
+
+    MODE_RACE = "race"
+    MODE_FALLBACK = "fallback"
+
+    def __init__(self,
+                 backends: List[Tuple[str, ModelAdapter]],
+                 mode: str = MODE_RACE,
+                 timeout_s: float = 30.0,
+                 validator: Optional[Any] = None,
+                 latency_store: Optional[Any] = None,
+                 app_package: Optional[str] = None,
+                 min_samples_for_stagger: int = 20):
+        if not backends:
+            raise ValueError("RoutingAdapter requires at least one backend")
+        self.backends = list(backends)
+        self.mode = mode if mode in (self.MODE_RACE, self.MODE_FALLBACK) else self.MODE_RACE
+        self.timeout_s = float(timeout_s)
+        # validator(response_text) -> bool; by default any non-empty text is accepted
+        self.validator = validator
+        self.latency_store = latency_store
+        self.app_package = app_package or ""
+        self.min_samples_for_stagger = int(min_samples_for_stagger)
+        self._executor = None
+        self._model_info = {
+            "provider": "Router",
+            "model_family": "Routing",
+            "model_name": " | ".join(label for label, _ in self.backends),
+            "mode": self.mode,
+        }
+
+    def initialize(self, model_config: Dict[str, Any], safety_settings: Optional[Dict] = None) -> None:
+        """Initialize every backend; backends that fail to initialize are dropped."""
+        import concurrent.futures
+
+        ready = []
+        for label, adapter in self.backends:
+            try:
+                adapter.initialize(model_config, safety_settings)
+                ready.append((label, adapter))
+            except Exception as e:
+                logging.warning(f"⚠️ Routing backend '{label}' unavailable, skipping: {e}")
+        if not ready:
+            raise ValueError("No routing backend could be initialized")
+        self.backends = ready
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(4, len(ready) * 4), thread_name_prefix="ai-router"
+        )
+        logging.debug(f"Routing adapter initialized ({self.mode}): {[label for label, _ in ready]}")
+
+    def _is_valid(self, response_text: Optional[str]) -> bool:
+        if not response_text or not str(response_text).strip():
+            return False
+        if self.validator is None:
+            return True
+        try:
+            return bool(self.validator(response_text))
+        except Exception:
+            return False
+
+    def _record(self, label: str, latency_ms: Optional[float], success: bool, won: bool = False) -> None:
+        if self.latency_store is not None:
+            self.latency_store.record(self.app_package, label, latency_ms, success, won)
+
+    def _ordered_backends(self) -> List[Tuple[str, ModelAdapter]]:
+        """Order backends by learned median latency for this app, penalising failures."""
+        if self.latency_store is None or len(self.backends) < 2:
+            return list(self.backends)
+
+        def score(index_and_backend):
+            index, (label, _) = index_and_backend
+            p50 = self.latency_store.percentile(self.app_package, label, 0.5)
+            outcomes = self.latency_store.get_outcomes(self.app_package, label)
+            total = outcomes["successes"] + outcomes["failures"]
+            if p50 is None or total < self.min_samples_for_stagger:
+                # Not enough data yet: keep configured order
+                return (0, index)
+            failure_rate = outcomes["failures"] / total
+            return (1, p50 * (1.0 + 4.0 * failure_rate))
+
+        ordered = sorted(enumerate(self.backends), key=score)
+        return [backend for _, backend in ordered]
+
+    def _stagger_delay_s(self, preferred_label: str) -> float:
+        """Seconds to wait before starting backups: the preferred backend's learned p75."""
+        if self.latency_store is None:
+            return 0.0
+        outcomes = self.latency_store.get_outcomes(self.app_package, preferred_label)
+        if outcomes["successes"] < self.min_samples_for_stagger:
+            return 0.0
+        p75 = self.latency_store.percentile(self.app_package, preferred_label, 0.75)
+        return (p75 or 0.0) / 1000.0
+
+    def _call_backend(self, label: str, adapter: ModelAdapter, prompt: str, image, kwargs):
+        start = time.time()
+        response_text, metadata = adapter.generate_response(prompt=prompt, image=image, **kwargs)
+        return label, response_text, metadata, (time.time() - start) * 1000.0
+
+    def _finish(self, label: str, response_text: str, metadata: Dict[str, Any],
+                attempted: List[str], start_time: float) -> Tuple[str, Dict[str, Any]]:
+        metadata = dict(metadata or {})
+        metadata["routed_backend"] = label
+        metadata["routing"] = {
+            "mode": self.mode,
+            "attempted": attempted,
+            "total_time": time.time() - start_time,
+        }
+        logging.debug(f"Routing: '{label}' answered first ({self.mode}, attempted {attempted})")
+        return response_text, metadata
+
+    def generate_response(self,
+                          prompt: str,
+                          image: Optional[ImageInput] = None,
+                          **kwargs) -> Tuple[str, Dict[str, Any]]:
+        """Return the first valid response from the configured backends."""
+        if self._executor is None:
+            raise ValueError("Routing adapter not initialized")
+        if self.mode == self.MODE_FALLBACK:
+            return self._generate_fallback(prompt, image, kwargs)
+        return self._generate_race(prompt, image, kwargs)
+
+    def _generate_fallback(self, prompt: str, image, kwargs) -> Tuple[str, Dict[str, Any]]:
+        import concurrent.futures
+
+        start_time = time.time()
+        attempted: List[str] = []
+        last_error: Optional[BaseException] = None
+        for label, adapter in self._ordered_backends():
+            attempted.append(label)
+            future = self._executor.submit(self._call_backend, label, adapter, prompt, image, kwargs)
+            try:
+                _, response_text, metadata, latency_ms = future.result(timeout=self.timeout_s)
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                logging.warning(f"⚠️ Routing backend '{label}' timed out after {self.timeout_s:.1f}s; falling back")
+                self._record(label, None, False)
+                continue
+            except Exception as e:
+                last_error = e
+                logging.warning(f"⚠️ Routing backend '{label}' failed: {e}; falling back")
+                self._record(label, None, False)
+                continue
+            if self._is_valid(response_text):
+                self._record(label, latency_ms, True, won=True)
+                return self._finish(label, response_text, metadata, attempted, start_time)
+            logging.warning(f"⚠️ Routing backend '{label}' returned an unusable decision; falling back")
+            self._record(label, latency_ms, False)
+        if last_error is not None:
+            raise last_error
+        raise ValueError(f"No routing backend produced a valid decision (tried {attempted})")
+
+    def _generate_race(self, prompt: str, image, kwargs) -> Tuple[str, Dict[str, Any]]:
+        import concurrent.futures
+
+        start_time = time.time()
+        ordered = self._ordered_backends()
+        preferred_label, preferred_adapter = ordered[0]
+        attempted = [preferred_label]
+        futures = {
+            self._executor.submit(self._call_backend, preferred_label, preferred_adapter, prompt, image, kwargs):
+                preferred_label
+        }
+        backups = ordered[1:]
+        winner_state: Dict[str, Any] = {}
+        stagger_s = min(self._stagger_delay_s(preferred_label), self.timeout_s)
+        if stagger_s > 0:
+            done, _ = concurrent.futures.wait(futures, timeout=stagger_s)
+            if done:
+                result = self._take_valid(done, futures, winner_state)
+                if result is not None:
+                    return self._finish(*result, attempted, start_time)
+        for label, adapter in backups:
+            attempted.append(label)
+            futures[self._executor.submit(self._call_backend, label, adapter, prompt, image, kwargs)] = label
+
+        pending = {future for future in futures if future not in winner_state.get("seen", set())}
+        deadline = start_time + self.timeout_s
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, timeout=max(0.0, deadline - time.time()),
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            if not done:
+                break
+            result = self._take_valid(done, futures, winner_state)
+            if result is not None:
+                for loser in pending:
+                    # A loser already running on a worker thread cannot be interrupted; its
+                    # result is discarded but its latency is still recorded when it finishes
+                    if not loser.cancel():
+                        loser.add_done_callback(self._record_loser(futures[loser]))
+                return self._finish(*result, attempted, start_time)
+
+        for future in pending:
+            future.cancel()
+            self._record(futures[future], None, False)
+        last_error = winner_state.get("last_error")
+        if last_error is not None:
+            raise last_error
+        raise ValueError(f"No routing backend produced a valid decision within {self.timeout_s:.1f}s")
+
+    def _take_valid(self, done, futures, state: Dict[str, Any]):
+        """Return (label, text, metadata) for the first valid finished future, recording every outcome."""
+        winner = None
+        for future in done:
+            label = futures[future]
+            seen = state.setdefault("seen", set())
+            if future in seen:
+                continue
+            seen.add(future)
+            try:
+                _, response_text, metadata, latency_ms = future.result()
+            except Exception as e:
+                logging.warning(f"⚠️ Routing backend '{label}' failed: {e}")
+                state["last_error"] = e
+                self._record(label, None, False)
+                continue
+            valid = self._is_valid(response_text)
+            self._record(label, latency_ms, valid, won=valid and winner is None)
+            if valid and winner is None:
+                winner = (label, response_text, metadata)
+            elif not valid:
+                logging.warning(f"⚠️ Routing backend '{label}' returned an unusable decision")
+        return winner
+
+    def _record_loser(self, label: str):
+        def _callback(future):
+            try:
+                _, response_text, _, latency_ms = future.result()
+                self._record(label, latency_ms, self._is_valid(response_text))
+            except Exception:
+                self._record(label, None, False)
+        return _callback
+
+    @property
+    def model_info(self) -> Dict[str, Any]:
+        """Return information about the routed models."""
+        return self._model_info
+
+
+# ------ Simulated Adapter (offline benchmarking) ------
+
+class SimulatedAdapter(ModelAdapter):
+    """Deterministic stand-in for a model, answering with the actions of a recorded run.
+
+    Each call sleeps for the configured latency (plus seeded jitter) and returns,
+    as JSON, the next recorded action whose target appears in the prompt, cycling
+    through the candidates; with no candidate it answers ``back``.
+    """
+
+    def __init__(self, actions: List[Dict[str, Any]], latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, seed: int = 0):
+        # One answer per (action, target): repeats of a recorded step add nothing
+        unique = {}
+        for action in actions:
+            unique.setdefault((action.get("action"), action.get("target_identifier") or ""), action)
+        self.actions = list(unique.values())
+        self.latency_ms = max(0.0, float(latency_ms))
+        self.jitter_ms = max(0.0, float(jitter_ms))
+        self._random = random.Random(seed)
+        self._calls = 0
+        self._model_info = {
+            "provider": "Simulated",
+            "model_family": "Recorded run",
+            "model_name": "simulated",
+            "latency_ms": self.latency_ms,
+        }
+
+    def initialize(self, model_config: Dict[str, Any], safety_settings: Optional[Dict] = None) -> None:
+        logging.debug(f"Simulated adapter initialized with {len(self.actions)} recorded actions")
+
+    def generate_response(self,
+                          prompt: str,
+                          image: Optional[ImageInput] = None,
+                          **kwargs) -> Tuple[str, Dict[str, Any]]:
+        """Return the next recorded action that fits the prompt after the simulated latency."""
+        start_time = time.time()
+        delay_ms = self.latency_ms + (self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000.0)
+
+        candidates = [action for action in self.actions
+                      if action.get("target_identifier") and action["target_identifier"] in prompt]
+        if candidates:
+            action = candidates[self._calls % len(candidates)]
+        else:
+            action = {"action": "back", "target_identifier": "", "reasoning": "No recorded action fits this screen",
+                      "focus_influence": []}
+        self._calls += 1
+        response_text = json.dumps(action)
+        metadata = {
+            "processing_time": time.time() - start_time,
+            "model": "simulated",
+            "provider": "Simulated",
+            "token_count": {
+                "prompt": len(prompt) // 4,
+                "response": len(response_text) // 4,
+                "total": (len(prompt) + len(response_text)) // 4,
+                "estimated": True
+            }
+        }
+        return response_text, metadata
+
+    @property
+    def model_info(self) -> Dict[str, Any]:
+        return self._model_info
+
+
 # ------ Factory Function ------
 
 def check_dependencies(provider: str) -> tuple[bool, str]:
@@ -879,13 +1245,15 @@ def check_dependencies(provider: str) -> tuple[bool, str]:
         return strategy.check_dependencies()
     return True, ""  # Default case
 
-def create_model_adapter(provider: str, api_key: str, model_name: str) -> ModelAdapter:
+def create_model_adapter(provider: str, api_key: str, model_name: str,
+                         transport: Optional[ProviderTransport] = None) -> ModelAdapter:
     """Factory function to create the appropriate model adapter.
     
     Args:
         provider: AI provider name (gemini, openrouter, ollama)
         api_key: API key or URL for the provider
         model_name: Model name/identifier to use
+        transport: Optional transport (retry/limit/hedging policy); defaults per provider
         
     Returns:
         ModelAdapter instance
@@ -917,10 +1285,10 @@ def create_model_adapter(provider: str, api_key: str, model_name: str) -> ModelA
     
     # Map provider enum to adapter class
     if provider_enum == AIProvider.GEMINI:
-        return GeminiAdapter(api_key, model_name)
+        return GeminiAdapter(api_key, model_name, transport)
     elif provider_enum == AIProvider.OPENROUTER:
-        return OpenRouterAdapter(api_key, model_name)
+        return OpenRouterAdapter(api_key, model_name, transport)
     elif provider_enum == AIProvider.OLLAMA:
-        return OllamaAdapter(api_key, model_name)
+        return OllamaAdapter(api_key, model_name, transport)
     else:
         raise ValueError(f"Unsupported model provider: {provider}")
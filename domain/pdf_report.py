@@ -0,0 +1,254 @@
+"""
+Chunked PDF rendering for run reports.
+
+``RunAnalyzer.analyze_run_to_pdf`` used to build one HTML string with every
+screenshot base64-inlined (once per appearance) and convert it in a single
+``pisa.CreatePDF`` call, so memory grew with the run length. Here:
+
+- ``ThumbnailCache`` writes one downscaled JPEG per screenshot into a cache
+  directory next to the report and hands out its path; xhtml2pdf loads the file
+  itself, and reports of later runs reuse thumbnails that are still current
+- ``ChunkedPdfWriter`` converts the report a few steps at a time into partial
+  PDFs and concatenates them with pypdf at the end
+- ``render_timeseries_chart`` draws the run's coverage growth and per-step
+  phase times as a PNG for the summary page
+
+Without pypdf the writer keeps the sections and converts them in one pass.
+"""
+
+import hashlib
+import logging
+import math
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence
+
+from PIL import Image, ImageDraw, ImageFont
+
+from config.numeric_constants import (
+    REPORT_CHART_HEIGHT,
+    REPORT_CHART_MAX_BARS,
+    REPORT_CHART_WIDTH,
+    REPORT_THUMBNAIL_MAX_WIDTH,
+    REPORT_THUMBNAIL_QUALITY,
+)
+
+try:
+    from xhtml2pdf import pisa
+except ImportError:
+    pisa = None
+
+try:
+    from pypdf import PdfWriter
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PdfWriter = None
+    PYPDF_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class ThumbnailCache:
+    """Downscaled JPEG copies of screenshots, made once per screenshot file."""
+
+    def __init__(self, cache_dir: str, max_width: int = REPORT_THUMBNAIL_MAX_WIDTH,
+                 quality: int = REPORT_THUMBNAIL_QUALITY):
+        self.cache_dir = cache_dir
+        self.max_width = max_width
+        self.quality = quality
+        self.created = 0
+        self.reused = 0
+        self._paths: Dict[str, Optional[str]] = {}
+
+    def get(self, image_path: str) -> Optional[str]:
+        """Path of the thumbnail for ``image_path``; the original path if it cannot be made, None if missing."""
+        if image_path in self._paths:
+            return self._paths[image_path]
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            logger.warning(f"Screenshot not found for report: {image_path}")
+            self._paths[image_path] = None
+            return None
+        key = f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}|{self.max_width}|{self.quality}"
+        thumbnail_path = os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + ".jpg")
+        if os.path.exists(thumbnail_path):
+            self.reused += 1
+        else:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with Image.open(image_path) as img:
+                    img.draft('RGB', (self.max_width, self.max_width * 4))
+                    if img.width > self.max_width:
+                        img = img.resize((self.max_width, max(1, int(img.height * self.max_width / img.width))),
+                                         Image.Resampling.BILINEAR)
+                    # Written under a temporary name: batch workers can share a cache directory
+                    tmp_path = f"{thumbnail_path}.{os.getpid()}.tmp"
+                    img.convert('RGB').save(tmp_path, format='JPEG', quality=self.quality, optimize=True)
+                os.replace(tmp_path, thumbnail_path)
+                self.created += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Could not create report thumbnail for {image_path}: {e}")
+                thumbnail_path = os.path.abspath(image_path)
+        self._paths[image_path] = thumbnail_path
+        return thumbnail_path
+
+
+class ChunkedPdfWriter:
+    """Converts HTML sections to PDF a chunk at a time and concatenates the parts."""
+
+    def __init__(self, pdf_filepath: str, html_head: str):
+        """
+        Args:
+            pdf_filepath: Final PDF path
+            html_head: Document start (doctype, style, ``<body>``) repeated at the top of every part
+        """
+        self.pdf_filepath = pdf_filepath
+        self.html_head = html_head
+        self.parts: List[str] = []
+        self.error: Optional[str] = None
+        self.failed_html: Optional[str] = None  # HTML of the part that failed, kept for debugging
+        self._pending: List[str] = []
+        self._work_dir: Optional[str] = None
+
+    def add_chunk(self, sections: List[str]) -> bool:
+        """Render ``sections`` into the next partial PDF. Returns False after the first failure."""
+        if self.error:
+            return False
+        if not PYPDF_AVAILABLE:
+            self._pending.extend(sections)
+            return True
+        if self._work_dir is None:
+            self._work_dir = tempfile.mkdtemp(prefix="report_parts_", dir=os.path.dirname(os.path.abspath(self.pdf_filepath)))
+        part_path = os.path.join(self._work_dir, f"part_{len(self.parts):05d}.pdf")
+        if self._convert(self.html_head + "".join(sections) + "</body></html>", part_path):
+            self.parts.append(part_path)
+            return True
+        return False
+
+    def finish(self) -> bool:
+        """Write the final PDF and remove the partial files."""
+        try:
+            if self.error:
+                return False
+            if not PYPDF_AVAILABLE:
+                logger.info("pypdf is not installed; rendering the report in a single pass")
+                return self._convert(self.html_head + "".join(self._pending) + "</body></html>", self.pdf_filepath)
+            writer = PdfWriter()
+            for part_path in self.parts:
+                writer.append(part_path)
+            with open(self.pdf_filepath, "wb") as f_pdf:
+                writer.write(f_pdf)
+            writer.close()
+            return True
+        except Exception as e:
+            self.error = f"Error concatenating report parts: {e}"
+            logger.error(self.error, exc_info=True)
+            return False
+        finally:
+            self.discard()
+
+    def discard(self) -> None:
+        self._pending = []
+        if self._work_dir:
+            shutil.rmtree(self._work_dir, ignore_errors=True)
+            self._work_dir = None
+
+    def _convert(self, html: str, path: str) -> bool:
+        if pisa is None:
+            self.error = "xhtml2pdf is not available."
+            return False
+        with open(path, "wb") as f_pdf:
+            status = pisa.CreatePDF(html, dest=f_pdf, encoding='utf-8')
+        if status and not status.err:  # type: ignore
+            return True
+        self.error = f"Error generating PDF. Error code: {getattr(status, 'err', -1)}"
+        logger.error(self.error)
+        self.failed_html = html
+        return False
+
+
+_CHART_COLORS = {
+    "unique_screens": (31, 119, 180), "unique_activities": (255, 127, 14),
+    "capture": (44, 160, 44), "hashing": (148, 103, 189), "db": (140, 86, 75), "ai": (214, 39, 40),
+    "element_find": (23, 190, 207), "wait": (188, 189, 34), "other": (160, 160, 160),
+}
+
+
+def render_timeseries_chart(series: List[Dict[str, Any]], phases: Sequence[str], png_path: str,
+                            width: int = REPORT_CHART_WIDTH, height: int = REPORT_CHART_HEIGHT) -> bool:
+    """Draw cumulative unique screens/activities and stacked per-step phase times.
+
+    Args:
+        series: Time series rows (``step_number``, ``unique_screens``, ``unique_activities``, ``<phase>_ms``)
+        phases: Phase names, stacked bottom to top
+        png_path: Output PNG path
+
+    Returns:
+        True if the chart was written
+    """
+    if not series:
+        return False
+    try:
+        img = Image.new("RGB", (width, height), (255, 255, 255))
+        draw = ImageDraw.Draw(img)
+        font = ImageFont.load_default()
+        margin_left, margin_right, gap = 90, 20, 70
+        panel_height = (height - 3 * gap) // 2
+        plot_width = width - margin_left - margin_right
+        steps = len(series)
+
+        # Coverage lines
+        top = gap
+        max_count = max(max(point.get("unique_screens") or 0, point.get("unique_activities") or 0) for point in series) or 1
+        draw.text((margin_left, top - 45), "Coverage over steps", fill=(0, 0, 0), font=font)
+        draw.rectangle((margin_left, top, margin_left + plot_width, top + panel_height), outline=(180, 180, 180))
+        draw.text((10, top), str(max_count), fill=(0, 0, 0), font=font)
+        draw.text((10, top + panel_height - 10), "0", fill=(0, 0, 0), font=font)
+        for legend_index, key in enumerate(("unique_screens", "unique_activities")):
+            points = [(margin_left + plot_width * index / max(1, steps - 1),
+                       top + panel_height - panel_height * (point.get(key) or 0) / max_count)
+                      for index, point in enumerate(series)]
+            if len(points) > 1:
+                draw.line(points, fill=_CHART_COLORS[key], width=3)
+            legend_x = margin_left + 200 + legend_index * 180
+            draw.rectangle((legend_x, top - 42, legend_x + 12, top - 30), fill=_CHART_COLORS[key])
+            draw.text((legend_x + 18, top - 42), key.replace("_", " "), fill=(0, 0, 0), font=font)
+
+        # Stacked phase bars, steps merged into bins when there are more than REPORT_CHART_MAX_BARS
+        top = 2 * gap + panel_height
+        per_bin = max(1, math.ceil(steps / REPORT_CHART_MAX_BARS))
+        bins = [series[start:start + per_bin] for start in range(0, steps, per_bin)]
+        bin_values = [[sum(point.get(f"{phase}_ms") or 0.0 for point in chunk) / len(chunk) for phase in phases]
+                      for chunk in bins]
+        max_total = max(sum(values) for values in bin_values) or 1.0
+        label = "Step time by phase (s)" + (f", mean of {per_bin} steps per bar" if per_bin > 1 else "")
+        draw.text((margin_left, top - 45), label, fill=(0, 0, 0), font=font)
+        draw.rectangle((margin_left, top, margin_left + plot_width, top + panel_height), outline=(180, 180, 180))
+        draw.text((10, top), f"{max_total / 1000.0:.1f}", fill=(0, 0, 0), font=font)
+        draw.text((10, top + panel_height - 10), "0", fill=(0, 0, 0), font=font)
+        bar_width = plot_width / len(bins)
+        for index, values in enumerate(bin_values):
+            x0 = margin_left + index * bar_width
+            y = top + panel_height
+            for phase, value in zip(phases, values):
+                bar_height = panel_height * value / max_total
+                if bar_height > 0:
+                    draw.rectangle((x0, y - bar_height, x0 + max(1.0, bar_width - 1), y), fill=_CHART_COLORS.get(phase, (90, 90, 90)))
+                y -= bar_height
+        for legend_index, phase in enumerate(phases):
+            legend_x = margin_left + 250 + legend_index * 120
+            draw.rectangle((legend_x, top - 42, legend_x + 12, top - 30), fill=_CHART_COLORS.get(phase, (90, 90, 90)))
+            draw.text((legend_x + 18, top - 42), phase, fill=(0, 0, 0), font=font)
+        draw.text((margin_left, height - gap + 10),
+                  f"step {series[0]['step_number']}", fill=(0, 0, 0), font=font)
+        draw.text((margin_left + plot_width - 80, height - gap + 10),
+                  f"step {series[-1]['step_number']}", fill=(0, 0, 0), font=font)
+
+        os.makedirs(os.path.dirname(os.path.abspath(png_path)), exist_ok=True)
+        img.save(png_path, format="PNG", optimize=True)
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Could not render time series chart: {e}")
+        return False
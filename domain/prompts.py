@@ -15,7 +15,18 @@ JSON_OUTPUT_SCHEMA = {
         },
         "input_text": {"type": ["string", "null"]},
         "reasoning": {"type": "string"},
-        "focus_influence": {"type": "array", "items": {"type": "string"}}
+        "focus_influence": {"type": "array", "items": {"type": "string"}},
+        "steps": {
+            "type": ["array", "null"],
+            "items": {
+                "type": "object",
+                "properties": {
+                    "action": {"type": "string"},
+                    "target_identifier": {"type": "string"},
+                    "input_text": {"type": ["string", "null"]}
+                }
+            }
+        }
     },
     "required": ["action", "target_identifier", "reasoning"]
 }
@@ -35,7 +46,8 @@ _DEFAULT_AVAILABLE_ACTIONS = {
     "clear_text": "Clear all text from the target input element.",
     "replace_text": "Replace existing text in the target input element with new text.",
     "flick": "Perform a fast flick gesture in the specified direction (faster than scroll for quick navigation).",
-    "reset_app": "Reset the app to its initial state (clears app data and restarts)."
+    "reset_app": "Reset the app to its initial state (clears app data and restarts).",
+    "macro": "Perform several steps on the current screen at once (e.g. fill a form): put them in 'steps' as a list of {action, target_identifier, input_text} using click, input or scroll actions."
 }
 
 def get_available_actions(config: Optional[Any] = None) -> Dict[str, str]:
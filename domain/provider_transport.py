@@ -0,0 +1,418 @@
+"""
+Transport layer shared by the AI model adapters.
+
+Wraps the blocking provider SDK calls with:
+- a timeout policy and keep-alive HTTP connection pools shared per provider,
+- jittered exponential backoff that honours ``Retry-After`` on 429/5xx responses,
+- per-provider concurrency and request-rate limits (optionally shared across
+  crawler processes through a small SQLite file so several devices can use one key),
+- optional hedged requests: if the first attempt has not answered after a delay,
+  a second identical request is started and whichever finishes first wins.
+
+``ProviderTransport.call`` runs in the calling thread; ``call_async`` exposes the
+same behaviour to asyncio code.
+"""
+
+import asyncio
+import concurrent.futures
+import email.utils
+import functools
+import logging
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config.numeric_constants import (
+    AI_HEDGE_AFTER_SECONDS,
+    AI_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    AI_MAX_CONCURRENT_REQUESTS,
+    AI_MAX_RETRIES,
+    AI_REQUEST_TIMEOUT_SECONDS,
+    AI_REQUESTS_PER_MINUTE,
+    AI_RETRY_BASE_DELAY_SECONDS,
+    AI_RETRY_MAX_DELAY_SECONDS,
+    DB_CONNECT_TIMEOUT,
+)
+
+# Status codes worth retrying: request timeout, conflict, too early, rate limited and server errors
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+# Exception class names (from requests, httpx, openai, google-api-core, ollama) that signal transient failures
+_RETRYABLE_ERROR_NAMES = (
+    "Timeout", "TimedOut", "ConnectError", "ConnectionError", "RemoteProtocolError",
+    "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded", "InternalServerError",
+    "RateLimitError", "APIConnectionError", "APITimeoutError",
+)
+
+
+@dataclass
+class TransportPolicy:
+    """Timeout, retry, limit and hedging settings for one provider."""
+    timeout_s: float = AI_REQUEST_TIMEOUT_SECONDS
+    max_retries: int = AI_MAX_RETRIES
+    retry_base_delay_s: float = AI_RETRY_BASE_DELAY_SECONDS
+    retry_max_delay_s: float = AI_RETRY_MAX_DELAY_SECONDS
+    max_concurrency: int = AI_MAX_CONCURRENT_REQUESTS
+    requests_per_minute: float = AI_REQUESTS_PER_MINUTE
+    hedge_after_s: float = AI_HEDGE_AFTER_SECONDS
+    max_keepalive_connections: int = AI_HTTP_MAX_KEEPALIVE_CONNECTIONS
+    rate_limit_db_path: Optional[str] = None
+
+    @classmethod
+    def from_config(cls, config: Any) -> "TransportPolicy":
+        """Build a policy from the application config, falling back to the defaults."""
+        def _num(key: str, default, cast):
+            try:
+                value = config.get(key, default) if config is not None else default
+                return cast(value) if value is not None else default
+            except (TypeError, ValueError):
+                return default
+
+        rate_limit_db_path = None
+        if config is not None:
+            try:
+                rate_limit_db_path = getattr(config, "AI_RATE_LIMIT_DB_PATH", None)
+            except Exception:
+                rate_limit_db_path = None
+
+        return cls(
+            timeout_s=_num("AI_REQUEST_TIMEOUT_SECONDS", AI_REQUEST_TIMEOUT_SECONDS, float),
+            max_retries=_num("AI_MAX_RETRIES", AI_MAX_RETRIES, int),
+            retry_base_delay_s=_num("AI_RETRY_BASE_DELAY_SECONDS", AI_RETRY_BASE_DELAY_SECONDS, float),
+            retry_max_delay_s=_num("AI_RETRY_MAX_DELAY_SECONDS", AI_RETRY_MAX_DELAY_SECONDS, float),
+            max_concurrency=_num("AI_MAX_CONCURRENT_REQUESTS", AI_MAX_CONCURRENT_REQUESTS, int),
+            requests_per_minute=_num("AI_REQUESTS_PER_MINUTE", AI_REQUESTS_PER_MINUTE, float),
+            hedge_after_s=_num("AI_HEDGE_AFTER_SECONDS", AI_HEDGE_AFTER_SECONDS, float),
+            max_keepalive_connections=_num(
+                "AI_HTTP_MAX_KEEPALIVE_CONNECTIONS", AI_HTTP_MAX_KEEPALIVE_CONNECTIONS, int
+            ),
+            rate_limit_db_path=rate_limit_db_path,
+        )
+
+
+def _status_code_of(exc: BaseException) -> Optional[int]:
+    """Extract an HTTP status code from the assorted SDK exception shapes."""
+    for candidate in (
+        getattr(exc, "status_code", None),
+        getattr(exc, "status", None),
+        getattr(exc, "code", None),
+        getattr(getattr(exc, "response", None), "status_code", None),
+    ):
+        if callable(candidate):
+            try:
+                candidate = candidate()
+            except Exception:
+                continue
+        if isinstance(candidate, int):
+            return candidate
+        if isinstance(candidate, str) and candidate.isdigit():
+            return int(candidate)
+    return None
+
+
+def _retry_after_of(exc: BaseException) -> Optional[float]:
+    """Return the server-requested wait in seconds, if the error carries one."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or getattr(exc, "headers", None)
+    if not headers:
+        return None
+    try:
+        retry_after_ms = headers.get("retry-after-ms") or headers.get("Retry-After-Ms")
+        if retry_after_ms:
+            return max(0.0, float(retry_after_ms) / 1000.0)
+        retry_after = headers.get("retry-after") or headers.get("Retry-After")
+    except Exception:
+        return None
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def classify_error(exc: BaseException) -> Tuple[bool, Optional[float]]:
+    """Decide whether an error is transient.
+
+    Args:
+        exc: The exception raised by the provider call.
+
+    Returns:
+        Tuple of (retryable, retry_after_seconds).
+    """
+    status = _status_code_of(exc)
+    if status is not None and 100 <= status < 600:
+        return status in RETRYABLE_STATUS_CODES, _retry_after_of(exc)
+    if isinstance(exc, (TimeoutError, ConnectionError, concurrent.futures.TimeoutError)):
+        return True, None
+    name = type(exc).__name__
+    return any(marker in name for marker in _RETRYABLE_ERROR_NAMES), _retry_after_of(exc)
+
+
+def compute_backoff(attempt: int, policy: TransportPolicy, retry_after: Optional[float] = None,
+                    rng: Optional[random.Random] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+    rng = rng or random
+    ceiling = min(policy.retry_max_delay_s, policy.retry_base_delay_s * (2 ** attempt))
+    delay = rng.uniform(0, ceiling)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, policy.retry_max_delay_s))
+    return delay
+
+
+class ProviderLimiter:
+    """Concurrency cap plus request spacing for one provider.
+
+    Request spacing is enforced in-process by default. When a state database path
+    is given, the next free request slot is stored in SQLite so every crawler
+    process using the same path (and thus the same API key) shares one budget.
+    """
+
+    def __init__(self, provider: str, max_concurrency: int, requests_per_minute: float,
+                 state_db_path: Optional[str] = None):
+        self.provider = provider
+        self.max_concurrency = max(1, int(max_concurrency or 1))
+        self.requests_per_minute = float(requests_per_minute or 0)
+        self.state_db_path = state_db_path
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    @property
+    def interval_s(self) -> float:
+        return 60.0 / self.requests_per_minute if self.requests_per_minute > 0 else 0.0
+
+    def _reserve_slot_local(self) -> float:
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval_s
+            return slot - now
+
+    def _reserve_slot_shared(self) -> float:
+        conn = sqlite3.connect(self.state_db_path, timeout=DB_CONNECT_TIMEOUT, isolation_level=None)
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS provider_rate_limits (provider TEXT PRIMARY KEY, next_slot REAL NOT NULL)"
+            )
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT next_slot FROM provider_rate_limits WHERE provider = ?", (self.provider,)
+            ).fetchone()
+            now = time.time()
+            slot = max(now, row[0] if row else 0.0)
+            conn.execute(
+                "INSERT OR REPLACE INTO provider_rate_limits (provider, next_slot) VALUES (?, ?)",
+                (self.provider, slot + self.interval_s),
+            )
+            conn.execute("COMMIT")
+            return slot - now
+        finally:
+            conn.close()
+
+    def wait_for_slot(self) -> float:
+        """Block until this process may send the next request. Returns the time waited."""
+        if self.interval_s <= 0:
+            return 0.0
+        wait_s = 0.0
+        if self.state_db_path:
+            try:
+                wait_s = self._reserve_slot_shared()
+            except sqlite3.Error as e:
+                logging.warning(f"⚠️ Shared AI rate limit state unavailable ({e}); using in-process limit")
+                wait_s = self._reserve_slot_local()
+        else:
+            wait_s = self._reserve_slot_local()
+        if wait_s > 0:
+            time.sleep(wait_s)
+        return wait_s
+
+    def acquire(self) -> None:
+        self._semaphore.acquire()
+
+    def try_acquire(self) -> bool:
+        return self._semaphore.acquire(blocking=False)
+
+    def release(self) -> None:
+        self._semaphore.release()
+
+    @contextmanager
+    def slot(self):
+        """Hold one concurrency slot for the duration of a request."""
+        self._semaphore.acquire()
+        try:
+            self.wait_for_slot()
+            yield
+        finally:
+            self._semaphore.release()
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_http_clients: Dict[Tuple[str, str], Any] = {}
+_registry_lock = threading.Lock()
+_hedge_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+
+def get_provider_limiter(provider: str, policy: TransportPolicy) -> ProviderLimiter:
+    """Return the process-wide limiter for a provider, creating it on first use."""
+    with _registry_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limiter = ProviderLimiter(
+                provider, policy.max_concurrency, policy.requests_per_minute, policy.rate_limit_db_path
+            )
+            _limiters[provider] = limiter
+        return limiter
+
+
+def get_shared_http_client(provider: str, base_url: str, policy: TransportPolicy):
+    """Return a keep-alive ``httpx.Client`` shared by all adapters of a provider.
+
+    Returns None when httpx is not installed, in which case the SDK's own client is used.
+    """
+    try:
+        import httpx
+    except ImportError:
+        return None
+    key = (provider, base_url or "")
+    with _registry_lock:
+        client = _http_clients.get(key)
+        if client is None or getattr(client, "is_closed", False):
+            client = httpx.Client(
+                timeout=httpx.Timeout(policy.timeout_s, connect=min(10.0, policy.timeout_s)),
+                limits=httpx.Limits(
+                    max_connections=max(policy.max_concurrency * 2, policy.max_keepalive_connections),
+                    max_keepalive_connections=policy.max_keepalive_connections,
+                ),
+            )
+            _http_clients[key] = client
+        return client
+
+
+def _get_hedge_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _hedge_executor
+    with _registry_lock:
+        if _hedge_executor is None:
+            _hedge_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=8, thread_name_prefix="ai-hedge"
+            )
+        return _hedge_executor
+
+
+class ProviderTransport:
+    """Runs provider calls under the retry, limit and hedging policy of one provider."""
+
+    def __init__(self, provider: str, policy: Optional[TransportPolicy] = None):
+        self.provider = provider
+        self.policy = policy or TransportPolicy()
+        self.limiter = get_provider_limiter(provider, self.policy)
+        self.stats = {"calls": 0, "attempts": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "failures": 0}
+        # One transport is shared by the crawler thread and the hedge workers
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Any, provider: str) -> "ProviderTransport":
+        return cls(provider, TransportPolicy.from_config(config))
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def http_client(self, base_url: str = ""):
+        return get_shared_http_client(self.provider, base_url, self.policy)
+
+    def _attempt(self, fn: Callable, args, kwargs):
+        if self.policy.hedge_after_s <= 0:
+            with self.limiter.slot():
+                return fn(*args, **kwargs)
+        return self._hedged_attempt(fn, args, kwargs)
+
+    def _hedged_attempt(self, fn: Callable, args, kwargs):
+        executor = _get_hedge_executor()
+
+        def _run():
+            self.limiter.wait_for_slot()
+            return fn(*args, **kwargs)
+
+        def _submit_holding_slot() -> concurrent.futures.Future:
+            # The slot is released when the future finishes or is cancelled while still queued
+            # (a cancelled future never runs, so releasing inside _run would leak the slot)
+            try:
+                future = executor.submit(_run)
+            except BaseException:
+                self.limiter.release()
+                raise
+            future.add_done_callback(lambda _: self.limiter.release())
+            return future
+
+        self.limiter.acquire()
+        futures = [_submit_holding_slot()]
+        done, _ = concurrent.futures.wait(futures, timeout=self.policy.hedge_after_s)
+        if not done and self.limiter.try_acquire():
+            # Only hedge when a concurrency slot is free, so hedging never starves other workers
+            self._count("hedges")
+            logging.debug(f"Hedging {self.provider} request after {self.policy.hedge_after_s:.1f}s")
+            futures.append(_submit_holding_slot())
+
+        pending = set(futures)
+        last_error: Optional[BaseException] = None
+        deadline = time.time() + self.policy.timeout_s
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, timeout=max(0.0, deadline - time.time()),
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is not futures[0]:
+                        self._count("hedge_wins")
+                    for loser in pending:
+                        # Threads cannot be interrupted; a running loser finishes and is discarded
+                        loser.cancel()
+                    return future.result()
+                last_error = future.exception()
+        if last_error is not None:
+            raise last_error
+        raise TimeoutError(f"{self.provider} request timed out after {self.policy.timeout_s:.1f}s")
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Call ``fn(*args, **kwargs)`` with limits, retries and optional hedging.
+
+        Non-retryable errors (e.g. 400/401/404) are raised immediately; transient errors
+        are retried up to ``policy.max_retries`` times before the last error is raised.
+        """
+        self._count("calls")
+        attempt = 0
+        while True:
+            self._count("attempts")
+            try:
+                return self._attempt(fn, args, kwargs)
+            except Exception as e:
+                retryable, retry_after = classify_error(e)
+                if not retryable or attempt >= self.policy.max_retries:
+                    self._count("failures")
+                    raise
+                delay = compute_backoff(attempt, self.policy, retry_after)
+                attempt += 1
+                self._count("retries")
+                logging.warning(
+                    f"⚠️ Transient {self.provider} error ({type(e).__name__}: {str(e)[:120]}); "
+                    f"retry {attempt}/{self.policy.max_retries} in {delay:.2f}s"
+                )
+                time.sleep(delay)
+
+    async def call_async(self, fn: Callable, *args, **kwargs):
+        """Awaitable variant of :meth:`call`; the blocking SDK call runs in the default executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.call, fn, *args, **kwargs))
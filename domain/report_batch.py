@@ -0,0 +1,175 @@
+"""
+Batch report generation across sessions.
+
+``discover_report_jobs`` finds every session database under the output root
+(``**/*_crawl_data.db``, as ``tools/generate_paper_tables.py`` does) and lists
+one job per run. ``generate_reports`` renders the jobs in a process pool and
+skips runs whose report is up to date. A report is up to date when its PDF
+exists and the fingerprint of the run's rows (run, steps, run_meta, time series) matches
+the one recorded in the index at the last render. The index is a JSON file
+with one entry per run and is rewritten after every batch.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from utils.paths import SessionPathManager
+
+logger = logging.getLogger(__name__)
+
+REPORT_INDEX_FILENAME = "report_index.json"
+
+
+@dataclass
+class ReportJob:
+    """One run to render."""
+    db_path: str
+    run_id: int
+    app_package: str
+    session_dir: str
+    pdf_path: str
+    fingerprint: str
+
+
+def run_fingerprint(conn: sqlite3.Connection, run_id: int) -> str:
+    """Hash of everything a run's report is built from."""
+    digest = hashlib.sha256()
+    for query in (
+        "SELECT * FROM runs WHERE run_id = ?",
+        "SELECT * FROM steps_log WHERE run_id = ? ORDER BY step_number",
+        "SELECT * FROM run_meta WHERE run_id = ? ORDER BY meta_id",
+        "SELECT * FROM run_timeseries WHERE run_id = ? ORDER BY step_number",
+    ):
+        try:
+            for row in conn.execute(query, (run_id,)):
+                digest.update(repr(tuple(row)).encode('utf-8'))
+        except sqlite3.Error:
+            digest.update(b'-')  # Table missing in an old database
+        digest.update(b'|')
+    return digest.hexdigest()
+
+
+def discover_report_jobs(output_root: Path, pdf_output_name: Optional[str] = None) -> List[ReportJob]:
+    """List every run of every session database under ``output_root``."""
+    jobs: List[ReportJob] = []
+    for db_path in sorted(output_root.glob("**/*_crawl_data.db")):
+        # Sessions keep their database in {session_dir}/database/
+        session_dir = db_path.parent.parent
+        reports_dir = SessionPathManager.get_reports_dir(str(session_dir))
+        try:
+            conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Skipping {db_path}: {e}")
+            continue
+        try:
+            runs = conn.execute("SELECT run_id, app_package FROM runs ORDER BY run_id").fetchall()
+            for run_id, app_package in runs:
+                name = f"run{run_id}_{Path(pdf_output_name).name if pdf_output_name else 'analysis.pdf'}"
+                pdf_path = SessionPathManager.get_pdf_report_path(reports_dir, app_package, name)
+                jobs.append(ReportJob(str(db_path), run_id, app_package, str(session_dir), str(pdf_path),
+                                      run_fingerprint(conn, run_id)))
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Skipping {db_path}: {e}")
+        finally:
+            conn.close()
+    return jobs
+
+
+def render_report(job: ReportJob, output_data_dir: str) -> Dict[str, Any]:
+    """Render one report (runs in a worker process)."""
+    from domain.analysis_viewer import RunAnalyzer
+
+    start = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(job.pdf_path), exist_ok=True)
+        analyzer = RunAnalyzer(job.db_path, output_data_dir, job.app_package)
+        result = analyzer.analyze_run_to_pdf(job.run_id, job.pdf_path)
+        error = None if result.get("success") else result.get("error") or "Unknown error generating PDF"
+    except Exception as e:
+        error = str(e)
+    return {"status": "failed" if error else "generated", "error": error,
+            "seconds": round(time.perf_counter() - start, 2)}
+
+
+def _load_index(index_path: Path) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            entries = json.load(f).get("reports", [])
+    except (OSError, ValueError, AttributeError):
+        return {}
+    return {f"{entry.get('db_path')}#{entry.get('run_id')}": entry for entry in entries if isinstance(entry, dict)}
+
+
+def generate_reports(jobs: List[ReportJob], output_data_dir: str, index_path: Path,
+                     workers: int = 1, force: bool = False) -> Dict[str, Any]:
+    """Render outdated reports in parallel and rewrite the index.
+
+    Args:
+        jobs: Runs to report on
+        output_data_dir: Output root passed to RunAnalyzer for screenshot lookup
+        index_path: JSON index to read previous fingerprints from and write the summary to
+        workers: Worker processes
+        force: Render every run even if its report is up to date
+
+    Returns:
+        Summary with counts, wall time and one entry per run
+    """
+    previous = _load_index(index_path)
+    entries: Dict[str, Dict[str, Any]] = {}
+    pending: List[ReportJob] = []
+    for job in jobs:
+        key = f"{job.db_path}#{job.run_id}"
+        entry = asdict(job)
+        old = previous.get(key)
+        if (not force and old and old.get("fingerprint") == job.fingerprint
+                and old.get("status") in ("generated", "up_to_date") and os.path.exists(job.pdf_path)):
+            entry.update(status="up_to_date", error=None, seconds=0.0,
+                         generated_at=old.get("generated_at"))
+        else:
+            pending.append(job)
+        entries[key] = entry
+
+    start = time.perf_counter()
+    if pending:
+        workers = max(1, min(int(workers), len(pending)))
+        logger.info(f"Rendering {len(pending)} reports with {workers} workers "
+                    f"({len(jobs) - len(pending)} up to date)")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(render_report, job, output_data_dir): job for job in pending}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    outcome = future.result()
+                except Exception as e:  # Worker process died
+                    outcome = {"status": "failed", "error": str(e), "seconds": 0.0}
+                if outcome["status"] == "failed":
+                    logger.error(f"🔴 Report for run {job.run_id} of {job.db_path} failed: {outcome['error']}")
+                entries[f"{job.db_path}#{job.run_id}"].update(
+                    outcome, generated_at=datetime.now().isoformat(timespec="seconds"))
+
+    reports = list(entries.values())
+    summary = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "workers": workers,
+        "wall_seconds": round(time.perf_counter() - start, 2),
+        "total": len(reports),
+        "generated": sum(1 for entry in reports if entry["status"] == "generated"),
+        "up_to_date": sum(1 for entry in reports if entry["status"] == "up_to_date"),
+        "failed": sum(1 for entry in reports if entry["status"] == "failed"),
+        "reports": reports,
+    }
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    os.replace(tmp_path, index_path)
+    return summary
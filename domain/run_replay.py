@@ -0,0 +1,212 @@
+"""
+Replay of a previous run's actions without model calls.
+
+``load_replay_plan`` reads the successful steps of a source run (any session
+database of the same app build): the action as the AI suggested it and the
+fingerprints (composite and visual hash) of the screens before and after.
+
+During a crawl, ``ReplaySession.next_step`` is asked for an action before
+the AI. It returns the recorded step when the current screen matches that
+step's source screen, by exact composite hash or by visual hash distance
+within the screen deduplication threshold. When the app has changed and the
+screen does not match, the next few recorded steps are searched for one that
+starts on this screen (resync); if none does, the crawler asks the AI for
+this step. ``record_outcome`` checks that the reached screen matches the
+recorded one and counts divergences.
+"""
+
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReplayStep:
+    """One recorded action and the screens it went from and to."""
+    step_number: int
+    action: Dict[str, Any]
+    from_hash: str
+    from_visual_hash: str
+    to_hash: Optional[str]
+    to_visual_hash: Optional[str]
+    ai_response_time_ms: float
+
+    def live_action(self) -> Dict[str, Any]:
+        """Copy of the recorded action to execute on the live screen.
+
+        Recorded bounds belong to the recorded screen, so they are dropped wherever the
+        target has an identifier (or ``#N`` reference) to resolve on the current one; taps
+        recorded by coordinates only are kept as they are.
+        """
+        action = json.loads(json.dumps(self.action))
+        for target in [action] + [step for step in action.get("steps") or [] if isinstance(step, dict)]:
+            if target.get("target_identifier"):
+                target.pop("target_bounding_box", None)
+        return action
+
+
+def _visual_part(composite_hash: Optional[str]) -> Optional[str]:
+    # Composite hashes are "{xml_hash}_{visual_hash}"
+    return composite_hash.rsplit("_", 1)[-1] if composite_hash else None
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def load_replay_plan(db_path: str, run_id: Optional[int] = None) -> Dict[str, Any]:
+    """Recorded steps of a run (the latest run when ``run_id`` is None) and its crawl speed.
+
+    Only successful steps with a suggested action and a known source screen are kept.
+
+    Returns:
+        Dict with run_id, steps (list of ReplayStep), source_steps and source_steps_per_minute
+
+    Raises:
+        sqlite3.Error: If the database cannot be read
+        ValueError: If the database has no such run
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        if run_id is None:
+            row = conn.execute("SELECT run_id FROM runs ORDER BY run_id DESC LIMIT 1").fetchone()
+        else:
+            row = conn.execute("SELECT run_id FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if not row:
+            raise ValueError(f"No run {run_id} in {db_path}" if run_id is not None else f"No runs in {db_path}")
+        run_id = row[0]
+        start_time, end_time = conn.execute("SELECT start_time, end_time FROM runs WHERE run_id = ?",
+                                            (run_id,)).fetchone()
+        rows = conn.execute(
+            """
+            SELECT sl.step_number, sl.ai_suggestion_json, sl.execution_success, sl.ai_response_time_ms,
+                   s_from.composite_hash, s_from.visual_hash, s_to.composite_hash, s_to.visual_hash
+            FROM steps_log sl
+            LEFT JOIN screens s_from ON s_from.screen_id = sl.from_screen_id
+            LEFT JOIN screens s_to ON s_to.screen_id = sl.to_screen_id
+            WHERE sl.run_id = ?
+            ORDER BY sl.step_number
+            """,
+            (run_id,),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    steps: List[ReplayStep] = []
+    for step_number, suggestion_json, success, ai_ms, from_hash, from_visual, to_hash, to_visual in rows:
+        if not success or not suggestion_json or not from_hash:
+            continue
+        try:
+            action = json.loads(suggestion_json)
+        except ValueError:
+            continue
+        if not isinstance(action, dict) or not action.get("action"):
+            continue
+        steps.append(ReplayStep(step_number, action, from_hash, from_visual or _visual_part(from_hash),
+                                to_hash, to_visual or _visual_part(to_hash), float(ai_ms or 0.0)))
+
+    started, ended = _parse_time(start_time), _parse_time(end_time)
+    minutes = (ended - started).total_seconds() / 60.0 if started and ended and ended > started else None
+    return {
+        "run_id": run_id,
+        "steps": steps,
+        "source_steps": len(rows),
+        "source_steps_per_minute": round(len(rows) / minutes, 2) if minutes else None,
+    }
+
+
+class ReplaySession:
+    """Hands out recorded actions while the app follows the recorded run."""
+
+    def __init__(self, plan: Dict[str, Any], similarity_threshold: int, resync_lookahead: int):
+        """
+        Args:
+            plan: Result of ``load_replay_plan``
+            similarity_threshold: Max visual hash distance for two screens to match (VISUAL_SIMILARITY_THRESHOLD)
+            resync_lookahead: Recorded steps searched for the current screen after a mismatch
+        """
+        self.source_run_id = plan["run_id"]
+        self.steps: List[ReplayStep] = plan["steps"]
+        self.source_steps = plan["source_steps"]
+        self.source_steps_per_minute = plan["source_steps_per_minute"]
+        self.similarity_threshold = similarity_threshold
+        self.resync_lookahead = resync_lookahead
+        self._cursor = 0
+        self._started_at: Optional[float] = None
+        self.replayed = 0
+        self.verified = 0
+        self.diverged = 0
+        self.resyncs = 0
+        self.ai_steps = 0
+        self.ai_time_avoided_ms = 0.0
+
+    @property
+    def exhausted(self) -> bool:
+        return self._cursor >= len(self.steps)
+
+    def _matches(self, composite_hash: str, expected_hash: Optional[str], expected_visual: Optional[str]) -> bool:
+        if not expected_hash:
+            return False
+        if composite_hash == expected_hash:
+            return True
+        visual = _visual_part(composite_hash)
+        if self.similarity_threshold < 0 or not visual or not expected_visual:
+            return False
+        import utils.utils as utils
+        return utils.visual_hash_distance(visual, expected_visual) <= self.similarity_threshold
+
+    def next_step(self, composite_hash: Optional[str]) -> Optional[ReplayStep]:
+        """Recorded step to execute on the current screen, or None to ask the AI."""
+        if self._started_at is None:
+            self._started_at = time.perf_counter()
+        if composite_hash and not self.exhausted:
+            window = self.steps[self._cursor:self._cursor + 1 + self.resync_lookahead]
+            for offset, step in enumerate(window):
+                if self._matches(composite_hash, step.from_hash, step.from_visual_hash):
+                    if offset:
+                        self.resyncs += 1
+                        logger.info(f"Replay resynced at recorded step {step.step_number} "
+                                    f"(skipped {offset} recorded steps)")
+                    self._cursor += offset + 1
+                    self.replayed += 1
+                    self.ai_time_avoided_ms += step.ai_response_time_ms
+                    return step
+        self.ai_steps += 1
+        return None
+
+    def record_outcome(self, step: ReplayStep, reached_hash: Optional[str], success: bool) -> bool:
+        """Check the screen a replayed action reached against the recording; returns True on a match."""
+        if success and (not step.to_hash or (reached_hash and
+                                             self._matches(reached_hash, step.to_hash, step.to_visual_hash))):
+            self.verified += 1
+            return True
+        self.diverged += 1
+        logger.info(f"⚠️ Replay diverged at recorded step {step.step_number}: "
+                    f"{'action failed' if not success else 'reached a different screen'}")
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        minutes = (time.perf_counter() - self._started_at) / 60.0 if self._started_at else 0.0
+        steps = self.replayed + self.ai_steps
+        return {
+            "source_run_id": self.source_run_id,
+            "recorded_steps": len(self.steps),
+            "replayed_steps": self.replayed,
+            "verified_steps": self.verified,
+            "diverged_steps": self.diverged,
+            "resyncs": self.resyncs,
+            "ai_steps": self.ai_steps,
+            "ai_calls_avoided": self.replayed,
+            "ai_time_avoided_ms": round(self.ai_time_avoided_ms, 1),
+            "steps_per_minute": round(steps / minutes, 2) if minutes > 0 else None,
+            "source_steps_per_minute": self.source_steps_per_minute,
+        }
@@ -17,6 +17,7 @@ from config.app_config import Config
 
 if TYPE_CHECKING:
     from infrastructure.appium_driver import AppiumDriver
+    from infrastructure.shared_exploration_store import SharedExplorationStore
 
 class ScreenRepresentation:
     """Minimal representation of a discovered screen state."""
@@ -53,11 +54,15 @@ class ScreenStateManager:
     Manages screen states, visit counts, and action history for the current crawl run.
     Interacts with DatabaseManager for persistence and AppiumDriver for state capture.
     Uses the centralized Config object for settings.
+    When a SharedExplorationStore is provided, screen IDs are allocated by the shared
+    store and screens discovered by other workers are merged into the local cache.
     """
-    def __init__(self, db_manager: DatabaseManager, driver: 'AppiumDriver', app_config: Config):
+    def __init__(self, db_manager: DatabaseManager, driver: 'AppiumDriver', app_config: Config,
+                 shared_store: Optional['SharedExplorationStore'] = None):
         self.db_manager = db_manager
         self.driver = driver
         self.cfg = app_config
+        self.shared_store = shared_store
 
         required_cfg_attrs = [
             'STABILITY_WAIT', 'VISUAL_SIMILARITY_THRESHOLD',
@@ -80,6 +85,11 @@ class ScreenStateManager:
         self.current_run_visit_counts: Dict[str, int] = {}
         self.current_run_action_history: Dict[str, List[str]] = {}
         self._next_screen_db_id_counter: int = 1
+        self._last_shared_screen_id: int = 0
+        # IDs of screens known from the shared store but not yet written to the local DB
+        self._shared_only_screen_ids: Set[int] = set()
+        # Screens numbered locally while the shared store was unreachable, not yet registered there
+        self._unshared_screens: Dict[int, ScreenRepresentation] = {}
         logging.debug("ScreenStateManager initialized.")
 
     def initialize_for_run(self, run_id: int, app_package: str, start_activity: str):
@@ -91,6 +101,9 @@ class ScreenStateManager:
         self.current_run_latest_step_number = 0 # Reset for the run
 
         self._load_all_known_screens_from_db()
+        self._last_shared_screen_id = 0
+        self._unshared_screens.clear()
+        self._sync_shared_screens()
         logging.debug(f"ScreenStateManager initialized for Run ID: {run_id}. Known screens: {len(self.known_screens_cache)}. Visit counts/history reset for this run. Latest step set to 0.")
 
     def _load_all_known_screens_from_db(self):
@@ -136,14 +149,63 @@ class ScreenStateManager:
         logging.debug(f"Loaded {len(self.known_screens_cache)} known screens. Next screen DB ID: {self._next_screen_db_id_counter}")
 
 
+    def _sync_shared_screens(self):
+        """Merge screens discovered by other workers into the local cache."""
+        if not self.shared_store:
+            return
+        self._register_unshared_screens()
+        for row in self.shared_store.get_screens_since(self._last_shared_screen_id):
+            self._last_shared_screen_id = max(self._last_shared_screen_id, row['screen_id'])
+            if row['composite_hash'] in self.known_screens_cache:
+                continue
+            screen = ScreenRepresentation(
+                screen_id=row['screen_id'], composite_hash=row['composite_hash'],
+                xml_hash=row['xml_hash'] or "", visual_hash=row['visual_hash'] or "",
+                screenshot_path=row['screenshot_path'], activity_name=row['activity_name']
+            )
+            self.known_screens_cache[screen.composite_hash] = screen
+            self._shared_only_screen_ids.add(screen.id)
+            self._next_screen_db_id_counter = max(self._next_screen_db_id_counter, screen.id + 1)
+            logging.debug(f"Merged shared screen ID {screen.id} (first seen by worker {row['first_seen_worker']})")
+
+    def _register_unshared_screens(self):
+        """Claim locally numbered screens in the shared store once it is reachable again."""
+        for screen_id, screen in list(self._unshared_screens.items()):
+            allocation = self.shared_store.allocate_screen_id(
+                screen.composite_hash, xml_hash=screen.xml_hash, visual_hash=screen.visual_hash,
+                activity_name=screen.activity_name, screenshot_path=screen.screenshot_path,
+                screen_id=screen_id
+            )
+            if allocation is None:
+                return
+            del self._unshared_screens[screen_id]
+            if allocation[0] != screen_id:
+                logging.error(f"🔴 Local screen ID {screen_id} registered in the shared store as {allocation[0]}. Another worker claimed the ID first.")
+
+    def _persist_shared_screen_locally(self, screen: ScreenRepresentation, run_id: int, step_number: int):
+        """Write a screen known only from the shared store to the local DB so steps can reference it."""
+        if screen.id not in self._shared_only_screen_ids:
+            return
+        db_id = self.db_manager.insert_screen(
+            composite_hash=screen.composite_hash, xml_hash=screen.xml_hash,
+            visual_hash=screen.visual_hash, screenshot_path=screen.screenshot_path,
+            activity_name=screen.activity_name, xml_content=screen.xml_content,
+            run_id=run_id, step_number=step_number, screen_id=screen.id
+        )
+        if db_id is not None:
+            self._shared_only_screen_ids.discard(screen.id)
+            if db_id != screen.id:
+                logging.error(f"Shared screen ID {screen.id} stored locally as {db_id}. Local DB already had a conflicting screen.")
+
     def _get_current_raw_state_from_driver(self) -> Optional[Tuple[bytes, str, str, str]]:
         stability_wait = float(self.cfg.STABILITY_WAIT) # type: ignore
         if stability_wait > 0: time.sleep(stability_wait)
         try:
             screenshot_bytes = self.driver.get_screenshot_bytes()
             page_source = self.driver.get_page_source() or ""
-            current_package = self.driver.get_current_package() or "UnknownPackage"
-            current_activity = self.driver.get_current_activity() or "UnknownActivity"
+            current_package, current_activity = self.driver.get_current_app_context() or (None, None)
+            current_package = current_package or "UnknownPackage"
+            current_activity = current_activity or "UnknownActivity"
             if not screenshot_bytes: logging.error("Failed to get screenshot (None)."); return None
             return screenshot_bytes, page_source, current_package, current_activity
         except Exception as e:
@@ -177,6 +239,7 @@ class ScreenStateManager:
     def process_and_record_state(self, candidate_screen: ScreenRepresentation, run_id: int, step_number: int, increment_visit_count: bool = True) -> Tuple[ScreenRepresentation, Dict[str, Any]]:
         final_screen_to_use: Optional[ScreenRepresentation] = None
         is_new_discovery_for_system = False
+        self._sync_shared_screens()
 
         if candidate_screen.composite_hash in self.known_screens_cache:
             final_screen_to_use = self.known_screens_cache[candidate_screen.composite_hash]
@@ -198,6 +261,19 @@ class ScreenStateManager:
             else:
                 is_new_discovery_for_system = True
                 candidate_screen.id = self._next_screen_db_id_counter
+                shared_allocation = None
+                if self.shared_store:
+                    shared_allocation = self.shared_store.allocate_screen_id(
+                        candidate_screen.composite_hash, xml_hash=candidate_screen.xml_hash,
+                        visual_hash=candidate_screen.visual_hash, activity_name=candidate_screen.activity_name
+                    )
+                    if shared_allocation:
+                        candidate_screen.id, is_new_discovery_for_system = shared_allocation
+                    else:
+                        # Keep local IDs clear of those other workers already took; the screen is
+                        # registered under this ID on the next successful sync.
+                        self._sync_shared_screens()
+                        candidate_screen.id = self._next_screen_db_id_counter
 
                 ss_filename = f"screen_{candidate_screen.id}_{candidate_screen.visual_hash[:8]}.png"
                 screenshots_dir = str(self.cfg.SCREENSHOTS_DIR)
@@ -214,11 +290,15 @@ class ScreenStateManager:
                     logging.error(f"Failed to save screenshot {candidate_screen.screenshot_path}: {e}", exc_info=True)
                     candidate_screen.screenshot_path = None
 
+                if shared_allocation and is_new_discovery_for_system and candidate_screen.screenshot_path:
+                    self.shared_store.set_screenshot_path(candidate_screen.id, candidate_screen.screenshot_path)
+
                 db_id = self.db_manager.insert_screen(
                     composite_hash=candidate_screen.composite_hash, xml_hash=candidate_screen.xml_hash,
                     visual_hash=candidate_screen.visual_hash, screenshot_path=candidate_screen.screenshot_path,
                     activity_name=candidate_screen.activity_name, xml_content=candidate_screen.xml_content,
-                    run_id=run_id, step_number=step_number # This step_number is first_seen_step_number
+                    run_id=run_id, step_number=step_number, # This step_number is first_seen_step_number
+                    screen_id=candidate_screen.id if self.shared_store else None
                 )
                 if db_id is None or db_id != candidate_screen.id :
                     logging.error(f"Failed to insert new screen into DB or ID mismatch. Expected: {candidate_screen.id}, Got from DB: {db_id}")
@@ -227,6 +307,8 @@ class ScreenStateManager:
                     candidate_screen.id = db_id
 
                 self.known_screens_cache[candidate_screen.composite_hash] = candidate_screen
+                if self.shared_store and not shared_allocation:
+                    self._unshared_screens[candidate_screen.id] = candidate_screen
                 self._next_screen_db_id_counter = max(self._next_screen_db_id_counter, candidate_screen.id + 1)
                 logging.debug(f"Recorded new screen to DB & cache: ID {candidate_screen.id} (Hash: {candidate_screen.composite_hash})")
                 final_screen_to_use = candidate_screen
@@ -239,6 +321,7 @@ class ScreenStateManager:
                 self._next_screen_db_id_counter += 1
                 logging.warning(f"Assigned emergency ID {final_screen_to_use.id} to fallback screen.")
 
+        self._persist_shared_screen_locally(final_screen_to_use, run_id, step_number)
 
         hash_for_visit_count = final_screen_to_use.composite_hash
         # Get current visit count before potentially incrementing
@@ -249,6 +332,8 @@ class ScreenStateManager:
             self.current_run_visit_counts[hash_for_visit_count] = current_visit_count + 1
             # Use the incremented count for visit_info
             visit_count_for_info = current_visit_count + 1
+            if self.shared_store:
+                self.shared_store.record_visit(hash_for_visit_count)
         else:
             # Use the current count (before incrementing) for visit_info
             visit_count_for_info = current_visit_count
@@ -261,6 +346,8 @@ class ScreenStateManager:
             "visit_count_this_run": visit_count_for_info,
             "previous_actions_on_this_state": historical_actions
         }
+        if self.shared_store:
+            visit_info["visit_count_all_workers"] = self.shared_store.get_visit_count(hash_for_visit_count)
         logging.debug(f"Processed state for hash {hash_for_visit_count}: ID {final_screen_to_use.id}, NewSystemDiscovery={is_new_discovery_for_system}, RunVisits={visit_info['visit_count_this_run']}")
         return final_screen_to_use, visit_info
 
@@ -1,4 +1,3 @@
-import json  # For annotations.json
 import logging
 import os
 from io import BytesIO
@@ -9,6 +8,7 @@ from PIL import Image, ImageDraw  # Added ImageDraw
 if TYPE_CHECKING:
     from infrastructure.appium_driver import AppiumDriver
 from config.app_config import Config
+from infrastructure.annotation_store import AnnotationStore
 try:
     import utils.utils as utils
 except ImportError:
@@ -30,10 +30,12 @@ class ScreenshotAnnotator:
         # Config class should have already created this, but an extra check is fine.
         if self.cfg.SCREENSHOTS_DIR: # Check if the path is not None or empty
              os.makedirs(str(self.cfg.SCREENSHOTS_DIR), exist_ok=True)
-             self.master_annotation_file_path = os.path.join(str(self.cfg.SCREENSHOTS_DIR), "annotations.json")
+             self.annotation_store = AnnotationStore(str(self.cfg.SCREENSHOTS_DIR))
+             self.master_annotation_file_path = self.annotation_store.legacy_path
         else: # Should not happen if config is correctly loaded and SCREENSHOTS_DIR is mandatory
             self.logger.critical("SCREENSHOTS_DIR is not configured properly. Master annotation file path cannot be set.")
             # Potentially raise an error or set a flag indicating this annotator is partially non-functional
+            self.annotation_store = None
             self.master_annotation_file_path = None # Or some other indicator of a problem
 
         if not self.master_annotation_file_path:
@@ -203,26 +205,29 @@ class ScreenshotAnnotator:
             self.logger.debug(f"No UI elements data provided for {original_screenshot_filename}. Skipping update to master annotation file.")
             return
 
-        master_annotations = {}
         try:
-            if os.path.exists(self.master_annotation_file_path):
-                with open(self.master_annotation_file_path, 'r', encoding='utf-8') as f:
-                    master_annotations = json.load(f)
-        except json.JSONDecodeError:
-            self.logger.error(f"Error decoding existing master annotation file: {self.master_annotation_file_path}. Will overwrite with new data for this screenshot.", exc_info=True)
-            master_annotations = {}
-        except Exception as e:
-            self.logger.error(f"Error loading master annotation file {self.master_annotation_file_path}: {e}. Proceeding with new/overwritten data.", exc_info=True)
-            master_annotations = {}
-
-        master_annotations[os.path.basename(original_screenshot_filename)] = all_ui_elements_data
-        
+            # Appended to annotations.jsonl; export_master_annotation_file() writes annotations.json
+            self.annotation_store.append(os.path.basename(original_screenshot_filename), all_ui_elements_data)
+            self.logger.debug(f"Recorded {len(all_ui_elements_data)} annotated elements for {original_screenshot_filename}: {self.annotation_store.log_path}")
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.error(f"Failed to append to annotation log {self.annotation_store.log_path}: {e}", exc_info=True)
+
+    def export_master_annotation_file(self, compact: bool = True) -> Optional[str]:
+        """Write the master annotation file (legacy JSON format) from the annotation log.
+
+        Args:
+            compact: Empty the log once its entries are in the master file
+
+        Returns:
+            Path of the master annotation file, or None on failure
+        """
+        if not self.annotation_store:
+            self.logger.error("Master annotation file path is not set. Cannot export.")
+            return None
         try:
-            # SCREENSHOTS_DIR (raw) existence is checked/created in __init__ or by Config class
-            with open(self.master_annotation_file_path, 'w', encoding='utf-8') as f:
-                json.dump(master_annotations, f, indent=4, ensure_ascii=False)
-            self.logger.info(f"Updated master annotation file with {len(all_ui_elements_data)} elements for {original_screenshot_filename}: {self.master_annotation_file_path}")
-        except IOError as e:
+            count = self.annotation_store.compact() if compact else self.annotation_store.export()
+            self.logger.info(f"Wrote master annotation file with {count} screenshots: {self.master_annotation_file_path}")
+            return self.master_annotation_file_path
+        except OSError as e:
             self.logger.error(f"Failed to write master annotation file {self.master_annotation_file_path}: {e}", exc_info=True)
-        except Exception as e: # Catch any other unexpected error
-            self.logger.error(f"Unexpected error writing master annotation file {self.master_annotation_file_path}: {e}", exc_info=True)
+            return None
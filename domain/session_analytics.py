@@ -0,0 +1,203 @@
+"""
+Cross-session step analytics on columnar data.
+
+``load_step_columns`` reads ``steps_log`` from many session databases in a
+process pool. The JSON fields used by aggregate metrics are extracted once,
+with SQLite's ``json_extract`` where available, into typed columns:
+
+- ``ai_action``: the suggested action, from ``action`` or ``action_to_perform.action``
+- ``mapped_type``: the ``type`` of the mapped action
+
+Columns are NumPy arrays when NumPy is installed and plain lists otherwise.
+The aggregate functions accept either.
+"""
+
+import json
+import logging
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_STEP_COLUMNS = ("run_id", "step_number", "from_screen_id", "to_screen_id", "execution_success",
+                 "ai_action", "mapped_type", "ai_response_time_ms", "total_tokens")
+
+_STEPS_QUERY_JSON1 = """
+SELECT run_id, step_number, COALESCE(from_screen_id, -1), COALESCE(to_screen_id, -1),
+       COALESCE(execution_success, 0) != 0,
+       CASE WHEN json_valid(ai_suggestion_json)
+            THEN COALESCE(json_extract(ai_suggestion_json, '$.action'),
+                          json_extract(ai_suggestion_json, '$.action_to_perform.action')) END,
+       CASE WHEN json_valid(mapped_action_json) THEN json_extract(mapped_action_json, '$.type') END,
+       ai_response_time_ms, COALESCE(total_tokens, 0)
+FROM steps_log ORDER BY run_id, step_number
+"""
+
+_STEPS_QUERY_RAW = """
+SELECT run_id, step_number, COALESCE(from_screen_id, -1), COALESCE(to_screen_id, -1),
+       COALESCE(execution_success, 0) != 0,
+       ai_suggestion_json, mapped_action_json, ai_response_time_ms, COALESCE(total_tokens, 0)
+FROM steps_log ORDER BY run_id, step_number
+"""
+
+_INT_COLUMNS = ("db_index", "run_id", "step_number", "from_screen_id", "to_screen_id", "total_tokens")
+
+
+@dataclass
+class StepColumns:
+    """Steps of many databases, one array per field, ordered by database, run and step."""
+    db_paths: List[str] = field(default_factory=list)
+    db_index: Sequence[int] = field(default_factory=list)
+    run_id: Sequence[int] = field(default_factory=list)
+    step_number: Sequence[int] = field(default_factory=list)
+    from_screen_id: Sequence[int] = field(default_factory=list)
+    to_screen_id: Sequence[int] = field(default_factory=list)
+    execution_success: Sequence[bool] = field(default_factory=list)
+    ai_action: Sequence[Optional[str]] = field(default_factory=list)
+    mapped_type: Sequence[Optional[str]] = field(default_factory=list)
+    ai_response_time_ms: Sequence[float] = field(default_factory=list)  # NaN when missing
+    total_tokens: Sequence[int] = field(default_factory=list)  # 0 when missing
+
+    def __len__(self) -> int:
+        return len(self.step_number)
+
+
+def _json_field(text: Optional[str], *paths: Sequence[str]) -> Optional[str]:
+    if not text:
+        return None
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        return None
+    for path in paths:
+        value: Any = data
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if value is not None:
+            return value if isinstance(value, str) else str(value)
+    return None
+
+
+def extract_steps(db_path: str) -> Dict[str, list]:
+    """Read one database's steps into column lists (runs in a worker process).
+
+    Screen ids are -1 for NULL so the integer columns stay typed arrays.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        try:
+            rows = conn.execute(_STEPS_QUERY_JSON1).fetchall()
+            raw_json = False
+        except sqlite3.OperationalError:  # SQLite built without JSON1
+            rows = conn.execute(_STEPS_QUERY_RAW).fetchall()
+            raw_json = True
+    finally:
+        conn.close()
+    columns = {name: list(values) for name, values in zip(_STEP_COLUMNS, zip(*rows))} if rows else \
+        {name: [] for name in _STEP_COLUMNS}
+    if raw_json:
+        columns["ai_action"] = [_json_field(text, ("action",), ("action_to_perform", "action"))
+                                for text in columns["ai_action"]]
+        columns["mapped_type"] = [_json_field(text, ("type",)) for text in columns["mapped_type"]]
+    columns["execution_success"] = [bool(value) for value in columns["execution_success"]]
+    columns["ai_response_time_ms"] = [float("nan") if value is None else float(value)
+                                      for value in columns["ai_response_time_ms"]]
+    return columns
+
+
+def find_session_databases(output_dir: Path) -> List[Path]:
+    return sorted(output_dir.glob("**/*_crawl_data.db"))
+
+
+def load_step_columns(db_paths: Sequence[Path], workers: int = 1) -> StepColumns:
+    """Extract and concatenate the steps of ``db_paths``; unreadable databases are skipped with a warning."""
+    paths = [str(path) for path in db_paths]
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+            futures = [pool.submit(extract_steps, path) for path in paths]
+            results = []
+            for path, future in zip(paths, futures):
+                try:
+                    results.append(future.result())
+                except sqlite3.Error as e:
+                    logger.warning(f"⚠️ Could not read {path}: {e}")
+                    results.append(None)
+    else:
+        results = []
+        for path in paths:
+            try:
+                results.append(extract_steps(path))
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Could not read {path}: {e}")
+                results.append(None)
+
+    merged: Dict[str, list] = {"db_index": []}
+    for index, columns in enumerate(results):
+        if columns is None:
+            continue
+        merged["db_index"].extend([index] * len(columns["step_number"]))
+        for name, values in columns.items():
+            merged.setdefault(name, []).extend(values)
+
+    steps = StepColumns(db_paths=paths)
+    for name, values in merged.items():
+        if NUMPY_AVAILABLE:
+            if name in _INT_COLUMNS:
+                values = np.asarray(values, dtype=np.int64)
+            elif name == "execution_success":
+                values = np.asarray(values, dtype=bool)
+            elif name == "ai_response_time_ms":
+                values = np.asarray(values, dtype=np.float64)
+            else:
+                values = np.asarray(values, dtype=object)
+        setattr(steps, name, values)
+    return steps
+
+
+def identifier_mapping_counts(steps: StepColumns) -> Dict[str, int]:
+    """Suggested clicks and how many of them were mapped to an element click."""
+    if NUMPY_AVAILABLE and isinstance(steps.ai_action, np.ndarray):
+        clicks = steps.ai_action == "click"
+        return {"targeted_clicks": int(clicks.sum()),
+                "identifier_successes": int((clicks & (steps.mapped_type == "click")).sum())}
+    targeted = mapped = 0
+    for action, mapped_type in zip(steps.ai_action, steps.mapped_type):
+        if action == "click":
+            targeted += 1
+            mapped += mapped_type == "click"
+    return {"targeted_clicks": targeted, "identifier_successes": mapped}
+
+
+def self_correction_counts(steps: StepColumns) -> Dict[str, int]:
+    """No-op steps (successful action, same screen) and how many were followed by a different action.
+
+    A correction is counted when the next step of the same run suggests another action.
+    """
+    if len(steps) == 0:
+        return {"stuck_events": 0, "corrections": 0}
+    if NUMPY_AVAILABLE and isinstance(steps.from_screen_id, np.ndarray):
+        stuck = (steps.from_screen_id == steps.to_screen_id) & steps.execution_success
+        same_run = (steps.db_index[1:] == steps.db_index[:-1]) & (steps.run_id[1:] == steps.run_id[:-1])
+        changed = steps.ai_action[1:] != steps.ai_action[:-1]
+        return {"stuck_events": int(stuck.sum()), "corrections": int((stuck[:-1] & same_run & changed).sum())}
+    stuck_events = corrections = 0
+    previous = None
+    for row in zip(steps.db_index, steps.run_id, steps.from_screen_id, steps.to_screen_id,
+                   steps.execution_success, steps.ai_action):
+        db_index, run_id, from_id, to_id, success, action = row
+        if previous is not None and previous[0] == (db_index, run_id) and previous[1] and previous[2] != action:
+            corrections += 1
+        is_stuck = from_id == to_id and success
+        stuck_events += is_stuck
+        previous = ((db_index, run_id), is_stuck, action)
+    return {"stuck_events": stuck_events, "corrections": corrections}
@@ -0,0 +1,208 @@
+"""
+Direct ADB capture backend for screenshots and UI dumps.
+
+Through Appium a screenshot is PNG-encoded on the device, base64-encoded by the
+UiAutomator2 server, wrapped in JSON by the Appium server and decoded again by the
+crawler. This backend reads the PNG bytes straight from ``screencap -p`` over ADB:
+
+- persistent mode keeps one ``adb shell`` open and frames each capture by its byte
+  size, so no process is spawned per screenshot
+- otherwise (or when the shell breaks) every capture is one ``adb exec-out`` call
+
+Every failure returns None and the caller falls back to Appium; after
+``max_failures`` consecutive failures the backend disables itself for the session.
+``adb_path`` may point at a fake adb shim for testing without a device.
+"""
+
+import logging
+import subprocess
+import threading
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Device-side scratch file for persistent-shell captures (screencap cannot write its size first)
+_DEVICE_CAPTURE_PATH = '/data/local/tmp/.crawler_capture.png'
+_UI_DUMP_TRAILER = 'UI hierchary dumped to'  # sic, uiautomator's own spelling
+
+
+class AdbCaptureBackend:
+    """Screenshots (and optionally UI dumps) read directly over ADB for one device."""
+
+    def __init__(
+        self,
+        udid: Optional[str],
+        adb_path: str = 'adb',
+        timeout_s: float = 10.0,
+        persistent_shell: bool = True,
+        max_failures: int = 3
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            udid: Device serial passed to ``adb -s`` (None uses adb's only device)
+            adb_path: adb executable, or a shim that implements the same commands
+            timeout_s: Per-capture timeout in seconds
+            persistent_shell: Keep one ``adb shell`` open for screenshots
+            max_failures: Consecutive failures after which the backend disables itself
+        """
+        self.udid = udid
+        self.adb_path = adb_path
+        self.timeout_s = float(timeout_s)
+        self.persistent_shell = persistent_shell
+        self.max_failures = max(1, int(max_failures))
+        self.enabled = True
+        self.captures = 0
+        self.failures = 0
+        self._consecutive_failures = 0
+        self._shell: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def _base_command(self) -> List[str]:
+        command = [self.adb_path]
+        if self.udid:
+            command.extend(['-s', self.udid])
+        return command
+
+    def capture_screenshot(self) -> Optional[bytes]:
+        """Capture the screen as PNG bytes, or None if the capture failed."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            data = None
+            if self.persistent_shell:
+                data = self._capture_via_shell()
+            if data is None:
+                data = self._capture_via_exec_out()
+            return self._record(data, 'screenshot')
+
+    def dump_ui(self) -> Optional[str]:
+        """Dump the view hierarchy with ``uiautomator dump``, or None on failure.
+
+        ``uiautomator dump`` competes with the UiAutomator2 server for the device's
+        UiAutomation connection and can stall or kill the Appium session on some
+        Android versions, so callers enable it explicitly.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            output = self._run_exec_out(['uiautomator', 'dump', '/dev/tty'])
+            xml = None
+            if output:
+                text = output.decode('utf-8', errors='replace')
+                end = text.rfind('</hierarchy>')
+                start = text.find('<?xml')
+                if end != -1 and _UI_DUMP_TRAILER in text[end:]:
+                    xml = text[max(start, 0):end + len('</hierarchy>')]
+                else:
+                    # No trailer: the dump failed or was cut off (e.g. "ERROR: could not get idle state")
+                    logger.debug(f'uiautomator dump incomplete: {text.strip()[-200:]!r}')
+            elif output is not None:
+                logger.debug('uiautomator dump returned no output')
+            return self._record(xml, 'UI dump')
+
+    def close(self) -> None:
+        """Terminate the persistent shell."""
+        with self._lock:
+            self._close_shell()
+
+    def _record(self, result, what: str):
+        if result is not None:
+            self.captures += 1
+            self._consecutive_failures = 0
+            return result
+        self.failures += 1
+        self._consecutive_failures += 1
+        if self._consecutive_failures >= self.max_failures:
+            self.enabled = False
+            self._close_shell()
+            logger.warning(f'⚠️ ADB {what} failed {self._consecutive_failures} times in a row; '
+                           f'using Appium for the rest of the session')
+        return None
+
+    def _run_exec_out(self, args: List[str]) -> Optional[bytes]:
+        try:
+            result = subprocess.run(
+                self._base_command() + ['exec-out'] + args,
+                capture_output=True,
+                timeout=self.timeout_s,
+                check=False
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.debug(f'adb exec-out {" ".join(args)} failed: {e}')
+            return None
+        if result.returncode != 0:
+            logger.debug(f'adb exec-out {" ".join(args)} exited {result.returncode}: '
+                         f'{result.stderr.decode("utf-8", errors="replace").strip()}')
+            return None
+        return result.stdout
+
+    def _capture_via_exec_out(self) -> Optional[bytes]:
+        data = self._run_exec_out(['screencap', '-p'])
+        if data is None or not data.startswith(PNG_SIGNATURE):
+            if data is not None:
+                logger.debug(f'adb screencap returned {len(data)} bytes without a PNG signature')
+            return None
+        return data
+
+    def _ensure_shell(self) -> Optional[subprocess.Popen]:
+        if self._shell is not None and self._shell.poll() is None:
+            return self._shell
+        try:
+            # -T: no pty, so the PNG bytes are not subject to newline translation
+            self._shell = subprocess.Popen(
+                self._base_command() + ['shell', '-T'],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError as e:
+            logger.debug(f'Could not start persistent adb shell: {e}')
+            self.persistent_shell = False
+            self._shell = None
+        return self._shell
+
+    def _capture_via_shell(self) -> Optional[bytes]:
+        shell = self._ensure_shell()
+        if shell is None:
+            return None
+        command = (
+            f'screencap -p {_DEVICE_CAPTURE_PATH} && stat -c %s {_DEVICE_CAPTURE_PATH} '
+            f'&& cat {_DEVICE_CAPTURE_PATH} || echo -1\n'
+        )
+        result: List[Optional[bytes]] = [None]
+
+        def _exchange():
+            try:
+                shell.stdin.write(command.encode('ascii'))
+                shell.stdin.flush()
+                size = int(shell.stdout.readline().strip() or -1)
+                if size > 0:
+                    result[0] = shell.stdout.read(size)
+            except (OSError, ValueError) as e:
+                logger.debug(f'Persistent adb shell exchange failed: {e}')
+
+        # The pipe reads block, so the exchange runs in a worker that the timeout can abandon
+        worker = threading.Thread(target=_exchange, daemon=True)
+        worker.start()
+        worker.join(self.timeout_s)
+        data = result[0]
+        if worker.is_alive() or data is None or not data.startswith(PNG_SIGNATURE):
+            # The stream position is unknown now; restart the shell on the next capture
+            logger.debug('Persistent adb shell capture failed, falling back to exec-out')
+            self._close_shell()
+            return None
+        return data
+
+    def _close_shell(self) -> None:
+        if self._shell is None:
+            return
+        try:
+            self._shell.kill()
+            self._shell.wait(timeout=2)
+        except Exception as e:
+            logger.debug(f'Error closing persistent adb shell: {e}')
+        self._shell = None
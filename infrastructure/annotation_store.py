@@ -0,0 +1,118 @@
+"""
+Append-only store for the master screenshot annotations.
+
+The master annotation file (``annotations.json`` in the screenshots
+directory) maps screenshot file names to their UI element data. Rewriting
+that file for every screenshot costs O(N²) I/O over a run, and a crash
+during a rewrite can corrupt it. Instead, each update is appended as one
+JSON line to ``annotations.jsonl``:
+
+    {"screenshot": "screen_12.png", "elements": [...]}
+
+The last line for a screenshot wins. ``export`` merges an existing legacy
+file with the log and writes the legacy JSON format atomically. ``compact``
+does the same into the legacy file and then empties the log.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ANNOTATION_LOG_FILENAME = "annotations.jsonl"
+LEGACY_ANNOTATION_FILENAME = "annotations.json"
+
+
+class AnnotationStore:
+    """JSON Lines log of screenshot annotations, with export to the legacy JSON file."""
+
+    def __init__(self, directory: str, fsync: bool = False):
+        """
+        Args:
+            directory: Screenshots directory holding the log and the legacy file
+            fsync: Force every appended line to disk (slower, survives power loss)
+        """
+        self.directory = directory
+        self.log_path = os.path.join(directory, ANNOTATION_LOG_FILENAME)
+        self.legacy_path = os.path.join(directory, LEGACY_ANNOTATION_FILENAME)
+        self.fsync = fsync
+        self._file = None
+
+    def append(self, screenshot_name: str, elements: List[Dict[str, Any]]) -> None:
+        """Append the annotations of one screenshot (replaces earlier entries for the same name)."""
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._file = open(self.log_path, "a", encoding="utf-8")
+            if self._file.tell() > 0 and not self._ends_with_newline():
+                self._file.write("\n")  # A crash cut the last line; start a new one
+        self._file.write(json.dumps({"screenshot": screenshot_name, "elements": elements}, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.log_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def load(self) -> Dict[str, List[Dict[str, Any]]]:
+        """All annotations: the legacy file, overlaid with the log in append order.
+
+        A line cut short by a crash is skipped with a warning; the lines before it are kept.
+        """
+        annotations: Dict[str, List[Dict[str, Any]]] = {}
+        if os.path.exists(self.legacy_path):
+            try:
+                with open(self.legacy_path, "r", encoding="utf-8") as f:
+                    annotations = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Ignoring unreadable annotation file {self.legacy_path}: {e}")
+                annotations = {}
+        if not os.path.exists(self.log_path):
+            return annotations
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    annotations[entry["screenshot"]] = entry["elements"]
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"⚠️ Skipping unreadable line {line_number} of {self.log_path}")
+        return annotations
+
+    def export(self, output_path: Optional[str] = None) -> int:
+        """Write all annotations in the legacy format (``indent=4``) and return the screenshot count.
+
+        The file is written next to its destination and renamed into place, so
+        readers never see a partial file.
+        """
+        output_path = output_path or self.legacy_path
+        annotations = self.load()
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(output_dir, exist_ok=True)
+        tmp_path = f"{output_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(annotations, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, output_path)
+        return len(annotations)
+
+    def compact(self) -> int:
+        """Fold the log into the legacy file and empty the log; returns the screenshot count.
+
+        Replaying the log again after a crash between the two steps is harmless.
+        """
+        self.close()
+        count = self.export(self.legacy_path)
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+        return count
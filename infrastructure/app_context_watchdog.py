@@ -0,0 +1,172 @@
+"""
+Background watch on the foreground app.
+
+``AppContextManager.ensure_in_app`` used to run at the start of every step, with
+probes, retries and sleeps, even when nothing had changed. The watchdog polls the
+foreground package from a daemon thread with ``adb shell dumpsys window``. It goes
+straight to adb, so it never queues behind crawler commands on the Appium session.
+An escape to a package outside the allowed set is flagged as soon as it is seen.
+
+The crawler then pays for the synchronous check only when the flag is set or
+the watchdog has not probed since the last action ended (or not recently), and
+it can report an escape caused by the
+step's own action before the next step starts.
+"""
+
+import logging
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from infrastructure.appium_helper import parse_foreground_component
+
+logger = logging.getLogger(__name__)
+
+
+def adb_foreground_probe(adb_path: str, udid: Optional[str], timeout_s: float = 5.0) -> Callable[[], Optional[str]]:
+    """Build a probe that returns the foreground package via ``adb shell dumpsys window``.
+
+    The probe returns None when adb fails or the output has no focus line.
+    """
+    command = [adb_path] + (['-s', udid] if udid else []) + ['shell', 'dumpsys', 'window']
+
+    def _probe() -> Optional[str]:
+        try:
+            result = subprocess.run(command, capture_output=True, text=True, timeout=timeout_s, check=False)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.debug(f'Foreground probe failed: {e}')
+            return None
+        if result.returncode != 0:
+            return None
+        return parse_foreground_component(result.stdout).package
+
+    return _probe
+
+
+class AppContextWatchdog:
+    """Polls the foreground package and flags escapes from the allowed packages."""
+
+    def __init__(
+        self,
+        probe: Callable[[], Optional[str]],
+        allowed_packages: Iterable[str],
+        interval_s: float,
+        max_failures: int = 3
+    ):
+        """
+        Initialize the watchdog.
+
+        Args:
+            probe: Returns the current foreground package, or None when unknown
+            allowed_packages: Target package plus allowed external packages
+            interval_s: Seconds between probes
+            max_failures: Consecutive failed probes after which the watchdog stops and
+                the crawler goes back to checking synchronously every step
+        """
+        self.probe = probe
+        self.allowed_packages = set(allowed_packages)
+        self.interval_s = float(interval_s)
+        self.max_failures = max(1, int(max_failures))
+        self.last_package: Optional[str] = None
+        self.last_probe_at: float = 0.0  # Start of the last successful probe
+        self.last_action_at: float = 0.0
+        self.escaped_package: Optional[str] = None
+        self.escaped_at: float = 0.0
+        self.probes = 0
+        self.escapes_detected = 0
+        self.checks_skipped = 0
+        self.available = True
+        self._consecutive_failures = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='app-context-watchdog', daemon=True)
+        self._thread.start()
+        logger.debug(f'App context watchdog started (interval {self.interval_s:.1f}s)')
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_s + 5.0)
+            self._thread = None
+
+    def _run(self) -> None:
+        while self.available and not self._stop_event.wait(self.interval_s):
+            self.check_once()
+
+    def check_once(self) -> Optional[str]:
+        """Probe once and update the escape flag.
+
+        Returns:
+            The foreground package, or None when the probe failed
+        """
+        with self._lock:
+            generation = self._generation
+        started = time.time()
+        package = self.probe()
+        now = time.time()
+        with self._lock:
+            self.probes += 1
+            if package is None:
+                self._consecutive_failures += 1
+                if self._consecutive_failures >= self.max_failures and self.available:
+                    self.available = False
+                    logger.warning(f'⚠️ App context watchdog disabled after {self._consecutive_failures} failed probes; '
+                                   f'checking the app context every step instead')
+                return None
+            self._consecutive_failures = 0
+            if generation != self._generation:
+                # A recovery ran while this probe was in flight; its result predates it
+                return package
+            self.last_package = package
+            self.last_probe_at = started
+            if package not in self.allowed_packages and self.escaped_package is None:
+                self.escaped_package = package
+                self.escaped_at = now
+                self.escapes_detected += 1
+                logger.info(f'App context watchdog: left the app, now in {package}')
+        return package
+
+    def needs_check(self) -> bool:
+        """Whether the crawler must run the synchronous context check this step.
+
+        True when an escape is flagged, the watchdog is unavailable, or its last
+        successful probe started before the last action ended or is older than two
+        intervals. A probe from before the action cannot have seen where it led.
+        """
+        with self._lock:
+            fresh = (self.last_probe_at > self.last_action_at
+                     and time.time() - self.last_probe_at <= 2 * self.interval_s)
+            if self.available and fresh and self.escaped_package is None:
+                self.checks_skipped += 1
+                return False
+            return True
+
+    def note_action(self) -> None:
+        """Record that an action just ended; earlier probes no longer describe the foreground."""
+        with self._lock:
+            self.last_action_at = time.time()
+
+    def acknowledge(self) -> None:
+        """Clear the escape flag after the crawler verified or restored the context.
+
+        The verification counts as a fresh probe; results of probes started before it are discarded.
+        """
+        with self._lock:
+            self._generation += 1
+            self.escaped_package = None
+            self.last_probe_at = time.time()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            'probes': self.probes,
+            'escapes_detected': self.escapes_detected,
+            'checks_skipped': self.checks_skipped,
+        }
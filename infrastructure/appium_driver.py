@@ -7,9 +7,10 @@ Provides a high-level interface for Appium operations using AppiumHelper.
 import base64
 import logging
 import time
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from config.app_config import Config
+from config.numeric_constants import GESTURE_SCROLL_INSET_RATIO
 from infrastructure.appium_helper import AppiumHelper
 from infrastructure.device_detection import (
     detect_all_devices,
@@ -22,7 +23,9 @@ from infrastructure.capability_builder import (
     build_android_capabilities,
     AppiumCapabilities,
 )
+from infrastructure.adb_capture import AdbCaptureBackend
 from infrastructure.appium_error_handler import AppiumError, validate_coordinates
+from infrastructure.session_health_monitor import SessionHealthMonitor
 
 logger = logging.getLogger(__name__)
 
@@ -41,10 +44,18 @@ class AppiumDriver:
         self.helper: Optional[AppiumHelper] = None
         self._session_initialized = False
         self._session_info: Optional[Dict[str, Any]] = None
+        self._health_monitor: Optional[SessionHealthMonitor] = None
+        self._adb_capture: Optional[AdbCaptureBackend] = None
         logger.debug("AppiumDriver initialized.")
     
     def disconnect(self):
         """Disconnect Appium helper and close session."""
+        if self._health_monitor:
+            self._health_monitor.stop()
+            self._health_monitor = None
+        if self._adb_capture:
+            self._adb_capture.close()
+            self._adb_capture = None
         if self.helper:
             try:
                 if self._session_initialized:
@@ -68,12 +79,15 @@ class AppiumDriver:
             max_retries = self.cfg.get('APPIUM_MAX_RETRIES', 3)
             retry_delay = self.cfg.get('APPIUM_RETRY_DELAY', 1.0)
             implicit_wait = self.cfg.get('APPIUM_IMPLICIT_WAIT', 5000)
+            foreground_context_max_age = self.cfg.get('APPIUM_FOREGROUND_CONTEXT_MAX_AGE', 2.0)
             
             self.helper = AppiumHelper(
                 max_retries=max_retries,
                 retry_delay=retry_delay,
-                implicit_wait=implicit_wait
+                implicit_wait=implicit_wait,
+                foreground_context_max_age=foreground_context_max_age
             )
+            self.helper.fast_reattach = bool(self.cfg.get('APPIUM_FAST_REATTACH', True))
         return True
     
     def initialize_session(
@@ -211,6 +225,21 @@ class AppiumDriver:
             
             logger.debug(f"[OK] Appium session initialized: {session_state.session_id}")
             logger.debug(f"Session data: {self._session_info}")
+            
+            # Probe the session in the background so a crash is recovered between steps
+            health_check_interval = float(self.cfg.get('APPIUM_SESSION_HEALTH_CHECK_INTERVAL', 0) or 0)
+            if health_check_interval > 0 and self._health_monitor is None:
+                self._health_monitor = SessionHealthMonitor(self.helper, health_check_interval)
+                self._health_monitor.start()
+            
+            # Optional direct ADB capture; Appium remains the fallback
+            if self.cfg.get('ADB_CAPTURE_ENABLED', False) and self._adb_capture is None:
+                self._adb_capture = AdbCaptureBackend(
+                    selected_device.id,
+                    adb_path=self.cfg.get('ADB_CAPTURE_ADB_PATH', 'adb') or 'adb',
+                    timeout_s=float(self.cfg.get('ADB_CAPTURE_TIMEOUT', 10.0)),
+                    persistent_shell=bool(self.cfg.get('ADB_CAPTURE_PERSISTENT_SHELL', True)),
+                )
             return True
             
         except AppiumError as e:
@@ -236,11 +265,29 @@ class AppiumDriver:
             self._session_initialized = False
             return False
     
+    def get_device_udid(self) -> Optional[str]:
+        """UDID of the device the session runs on (None before a session is initialized)."""
+        return (self._session_info or {}).get('udid')
+    
+    def get_session_recovery_stats(self) -> Dict[str, Any]:
+        """Session recovery counts and timings for the run summary."""
+        if not self.helper:
+            return {}
+        stats = self.helper.get_recovery_stats()
+        if self._health_monitor:
+            stats['health_probes'] = self._health_monitor.probes
+        return stats
+    
     def get_page_source(self) -> Optional[str]:
         """Get page source."""
         if not self._ensure_helper():
             return None
         
+        if self._adb_capture and self.cfg.get('ADB_UI_DUMP_ENABLED', False):
+            xml = self._adb_capture.dump_ui()
+            if xml:
+                return xml
+        
         try:
             return self.helper.get_page_source()
         except Exception as e:
@@ -262,6 +309,27 @@ class AppiumDriver:
             logger.error(f"Error getting screenshot: {e}")
             return None
     
+    def get_screenshot_bytes(self) -> Optional[bytes]:
+        """Get the screenshot as PNG bytes, over ADB when enabled and through Appium otherwise."""
+        if self._adb_capture:
+            data = self._adb_capture.capture_screenshot()
+            if data:
+                return data
+        screenshot_base64 = self.get_screenshot_as_base64()
+        if not screenshot_base64:
+            return None
+        return base64.b64decode(screenshot_base64)
+    
+    def get_capture_stats(self) -> Dict[str, Any]:
+        """ADB capture counts (empty when the ADB backend is not in use)."""
+        if not self._adb_capture:
+            return {}
+        return {
+            'adb_captures': self._adb_capture.captures,
+            'adb_failures': self._adb_capture.failures,
+            'adb_enabled': self._adb_capture.enabled,
+        }
+    
     def tap(
         self,
         target_identifier: Optional[str],
@@ -314,6 +382,40 @@ class AppiumDriver:
             logger.error(f"Error during tap: {e}")
             return False
     
+    def tap_sequence(self, bboxes: List[Dict[str, Any]], gap_ms: int = 150) -> bool:
+        """
+        Tap the centres of several bounding boxes in one W3C actions request.
+        
+        Args:
+            bboxes: Bounding boxes with 'top_left' and 'bottom_right' ([y, x] pairs)
+            gap_ms: Pause between taps in milliseconds
+            
+        Returns:
+            True if the batch was performed
+        """
+        if not self._ensure_helper():
+            return False
+        
+        try:
+            window_size = self.helper.get_window_size()
+            points = []
+            for bbox in bboxes:
+                top_left = bbox["top_left"]
+                bottom_right = bbox["bottom_right"]
+                coords = validate_coordinates(
+                    (top_left[1] + bottom_right[1]) / 2,
+                    (top_left[0] + bottom_right[0]) / 2,
+                    window_size['width'],
+                    window_size['height']
+                )
+                points.append((coords['x'], coords['y']))
+            self.helper.perform_w3c_tap_sequence(points, gap_ms / 1000.0)
+            logger.debug(f"Tapped {len(points)} points in one W3C actions payload")
+            return True
+        except Exception as e:
+            logger.error(f"Error during tap_sequence: {e}")
+            return False
+    
     def input_text(self, target_identifier: str, text: str) -> bool:
         """Input text into element."""
         if not self._ensure_helper():
@@ -325,12 +427,14 @@ class AppiumDriver:
             logger.error(f"Error during input_text: {e}")
             return False
     
-    def scroll(self, direction: str) -> bool:
+    def scroll(self, direction: str, bounds: Optional[Tuple[int, int, int, int]] = None) -> bool:
         """
         Scroll in specified direction.
         
         Args:
             direction: Scroll direction ('up', 'down', 'left', 'right')
+            bounds: Scrollable container (x1, y1, x2, y2); the swipe stays inside it.
+                Without bounds the swipe spans 60% of the screen.
             
         Returns:
             True if scroll successful
@@ -339,13 +443,17 @@ class AppiumDriver:
             return False
         
         try:
+            direction_lower = direction.lower()
+            if bounds is not None:
+                start_x, start_y, end_x, end_y = self._container_swipe_points(bounds, direction_lower)
+                return self._perform_swipe(direction, start_x, start_y, end_x, end_y)
+            
             # Get window size
             window_size = self.helper.get_window_size()
             width = window_size['width']
             height = window_size['height']
             
             # Calculate scroll coordinates based on direction
-            direction_lower = direction.lower()
             if direction_lower == 'up':
                 start_x, start_y = width / 2, height * 0.2
                 end_x, end_y = width / 2, height * 0.8
@@ -362,7 +470,34 @@ class AppiumDriver:
                 logger.error(f"Invalid scroll direction: {direction}")
                 return False
             
-            # Perform swipe for scrolling
+            return self._perform_swipe(direction, start_x, start_y, end_x, end_y)
+            
+        except Exception as e:
+            logger.error(f"Error during scroll: {e}")
+            return False
+    
+    @staticmethod
+    def _container_swipe_points(
+        bounds: Tuple[int, int, int, int],
+        direction: str
+    ) -> Tuple[float, float, float, float]:
+        """Swipe start/end inside a container, inset from its edges so it starts on the list content."""
+        x1, y1, x2, y2 = bounds
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        dx, dy = (x2 - x1) * GESTURE_SCROLL_INSET_RATIO, (y2 - y1) * GESTURE_SCROLL_INSET_RATIO
+        if direction == 'down':
+            return cx, y2 - dy, cx, y1 + dy
+        if direction == 'up':
+            return cx, y1 + dy, cx, y2 - dy
+        if direction == 'left':
+            return x2 - dx, cy, x1 + dx, cy
+        if direction == 'right':
+            return x1 + dx, cy, x2 - dx, cy
+        raise ValueError(f"Invalid scroll direction: {direction}")
+    
+    def _perform_swipe(self, direction: str, start_x: float, start_y: float, end_x: float, end_y: float) -> bool:
+        """Swipe for scrolling (held before release so the list does not fling)."""
+        try:
             driver = self.helper.get_driver()
             if driver:
                 from selenium.webdriver.common.action_chains import ActionChains
@@ -390,13 +525,61 @@ class AppiumDriver:
             logger.error(f"Error during scroll: {e}")
             return False
     
-    def long_press(self, target_identifier: str, duration: int) -> bool:
+    def scroll_gesture(
+        self,
+        bounds: Tuple[int, int, int, int],
+        direction: str,
+        percent: float
+    ) -> Optional[bool]:
+        """
+        Scroll a container with UiAutomator2's ``mobile: scrollGesture``.
+        
+        Args:
+            bounds: Container bounds (x1, y1, x2, y2)
+            direction: Finger direction as in ``scroll`` ('down' reveals content below)
+            percent: Share of the container to scroll
+            
+        Returns:
+            Whether the container can scroll further in that direction, or None when
+            the command is unavailable (callers fall back to ``scroll``)
+        """
+        if not self._ensure_helper():
+            return None
+        driver = self.helper.get_driver()
+        if not driver:
+            return None
+        # scrollGesture names the direction the content is revealed from; for horizontal
+        # swipes that is opposite to the finger
+        content_direction = {'down': 'down', 'up': 'up', 'left': 'right', 'right': 'left'}.get(direction.lower())
+        if content_direction is None:
+            logger.error(f"Invalid scroll direction: {direction}")
+            return None
+        x1, y1, x2, y2 = bounds
+        try:
+            can_scroll_more = driver.execute_script('mobile: scrollGesture', {
+                'left': x1, 'top': y1, 'width': x2 - x1, 'height': y2 - y1,
+                'direction': content_direction, 'percent': percent,
+            })
+            self.helper.last_command_at = time.time()
+            logger.debug(f"scrollGesture {content_direction} in {bounds}: canScrollMore={can_scroll_more}")
+            return bool(can_scroll_more)
+        except Exception as e:
+            logger.debug(f"mobile: scrollGesture unavailable ({e}), using a swipe")
+            return None
+    
+    def long_press(
+        self,
+        target_identifier: str,
+        duration: int,
+        bbox: Optional[Dict[str, Any]] = None
+    ) -> bool:
         """
-        Long press element.
+        Long press element or coordinates.
         
         Args:
             target_identifier: Element identifier
             duration: Press duration in milliseconds
+            bbox: Bounding box with 'top_left' and 'bottom_right' (preferred over element lookup)
             
         Returns:
             True if successful
@@ -405,9 +588,23 @@ class AppiumDriver:
             return False
         
         try:
-            # Find element and get its center
-            element = self.helper.find_element(target_identifier, strategy='id')
-            x, y = self.helper._get_element_center(element)
+            x = y = None
+            if bbox and isinstance(bbox, dict):
+                top_left = bbox.get("top_left", [])
+                bottom_right = bbox.get("bottom_right", [])
+                if len(top_left) == 2 and len(bottom_right) == 2:
+                    window_size = self.helper.get_window_size()
+                    coords = validate_coordinates(
+                        (top_left[1] + bottom_right[1]) / 2,
+                        (top_left[0] + bottom_right[0]) / 2,
+                        window_size['width'],
+                        window_size['height']
+                    )
+                    x, y = coords['x'], coords['y']
+            if x is None:
+                # Find element and get its center
+                element = self.helper.find_element(target_identifier, strategy='id')
+                x, y = self.helper._get_element_center(element)
             
             # Perform long press using W3C Actions with longer duration
             driver = self.helper.get_driver()
@@ -446,6 +643,7 @@ class AppiumDriver:
             driver = self.helper.get_driver()
             if driver:
                 driver.back()
+                self.helper.invalidate_foreground_context()
                 logger.debug("[OK] Back press succeeded")
                 return True
             return False
@@ -463,6 +661,7 @@ class AppiumDriver:
             if driver:
                 # Use Appium's press_keycode for Android HOME key (3)
                 driver.press_keycode(3)
+                self.helper.invalidate_foreground_context()
                 logger.debug("Home button pressed")
                 return True
             return False
@@ -588,11 +787,26 @@ class AppiumDriver:
             logger.error(f"Error getting current activity: {e}")
             return None
     
-    def get_current_app_context(self) -> Optional[Tuple[Optional[str], Optional[str]]]:
-        """Get current app context (package, activity)."""
-        package = self.get_current_package()
-        activity = self.get_current_activity()
-        return package, activity
+    def get_current_app_context(self, refresh: bool = False) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """Get current app context (package, activity) from a single foreground probe.
+        
+        Args:
+            refresh: Probe the device even if a recent result is memoized
+        """
+        if not self._ensure_helper():
+            return None
+        
+        try:
+            context = self.helper.get_foreground_context(refresh=refresh)
+            return context.package, context.activity
+        except Exception as e:
+            logger.warning(f"Error getting current app context: {e}")
+            return None
+    
+    def invalidate_foreground_context(self) -> None:
+        """Drop the memoized package/activity probe after an action that may change the UI."""
+        if self.helper:
+            self.helper.invalidate_foreground_context()
     
     def terminate_app(self, package_name: str) -> bool:
         """Terminate app."""
@@ -603,6 +817,7 @@ class AppiumDriver:
             driver = self.helper.get_driver()
             if driver:
                 driver.terminate_app(package_name)
+                self.helper.invalidate_foreground_context()
                 logger.debug(f"Terminated app: {package_name}")
                 return True
             return False
@@ -619,6 +834,7 @@ class AppiumDriver:
             driver = self.helper.get_driver()
             if driver:
                 driver.launch_app()
+                self.helper.invalidate_foreground_context()
                 logger.debug("App launched")
                 return True
             return False
@@ -877,6 +1093,7 @@ class AppiumDriver:
             driver = self.helper.get_driver()
             if driver:
                 driver.reset()
+                self.helper.invalidate_foreground_context()
                 logger.debug("App reset to initial state")
                 return True
             return False
@@ -7,6 +7,7 @@ Provides W3C WebDriver client with session management and error recovery using A
 import logging
 import re
 import subprocess
+import threading
 import time
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Literal
@@ -36,8 +37,9 @@ from infrastructure.appium_error_handler import (
     validate_coordinates,
     with_retry_sync,
 )
-from infrastructure.capability_builder import AppiumCapabilities
+from infrastructure.capability_builder import AppiumCapabilities, build_reattach_capabilities
 from infrastructure.device_detection import Platform, DeviceInfo
+from infrastructure import step_profiler
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +73,59 @@ class SessionState:
     action_history: List[ActionHistory] = field(default_factory=list)
 
 
+@dataclass
+class RecoveryEvent:
+    """One session recovery attempt sequence."""
+    trigger: str  # 'command' (a call failed) or 'health_check' (background probe)
+    mode: Optional[str]  # 'reattach', 'full', or None when every attempt failed
+    success: bool
+    duration_ms: float
+    timestamp: float
+
+
+@dataclass
+class DeviceProfile:
+    """Device metrics cached for the lifetime of a session.
+    
+    Window size is cleared when the page source reports a new rotation and the whole
+    profile is rebuilt when the session is (re)initialized.
+    """
+    platform: Optional[Platform] = None
+    width: int = 0
+    height: int = 0
+    density: Optional[int] = None
+    rotation: Optional[int] = None
+    
+    @property
+    def has_window_size(self) -> bool:
+        return self.width > 0 and self.height > 0
+
+
+@dataclass
+class ForegroundContext:
+    """Foreground package and activity captured by one probe."""
+    package: Optional[str] = None
+    activity: Optional[str] = None
+    captured_at: float = 0.0
+
+
+# "mCurrentFocus=Window{4f2 u0 com.example/com.example.MainActivity}" and
+# "mFocusedApp=ActivityRecord{9a1 u0 com.example/.MainActivity t12}"
+_FOCUS_COMPONENT_PATTERN = re.compile(r'(mCurrentFocus|mFocusedApp)=\S*\{[^}]*?\s([\w.]+)/([\w.$]+)')
+
+
+def parse_foreground_component(dumpsys_output: str) -> ForegroundContext:
+    """Extract package/activity from ``dumpsys window`` focus lines (mCurrentFocus preferred)."""
+    found: Dict[str, ForegroundContext] = {}
+    for match in _FOCUS_COMPONENT_PATTERN.finditer(dumpsys_output or ''):
+        found.setdefault(match.group(1), ForegroundContext(match.group(2), match.group(3)))
+    return found.get('mCurrentFocus') or found.get('mFocusedApp') or ForegroundContext()
+
+
+# Root element of a UiAutomator2 page source: <hierarchy ... rotation="0" width=... height=...>
+_HIERARCHY_ROTATION_PATTERN = re.compile(r'<hierarchy\b[^>]*?\brotation="(\d+)"')
+
+
 class AppiumHelper:
     """Core Appium helper for session management and device interaction."""
     
@@ -78,7 +133,8 @@ class AppiumHelper:
         self,
         max_retries: int = 3,
         retry_delay: float = 1.0,
-        implicit_wait: int = 5000
+        implicit_wait: int = 5000,
+        foreground_context_max_age: float = 2.0
     ):
         """
         Initialize AppiumHelper.
@@ -87,6 +143,7 @@ class AppiumHelper:
             max_retries: Maximum retry attempts for operations
             retry_delay: Delay between retries in seconds
             implicit_wait: Implicit wait timeout in milliseconds
+            foreground_context_max_age: Seconds a foreground package/activity probe is reused
         """
         self.driver: Optional[webdriver.Remote] = None
         self.last_capabilities: Optional[AppiumCapabilities] = None
@@ -103,6 +160,20 @@ class AppiumHelper:
         self.allowed_external_packages: List[str] = []
         self.consecutive_context_failures: int = 0
         self.max_consecutive_context_failures: int = 3
+        
+        # Session-scoped device metrics (window size, platform, density)
+        self.device_profile: Optional[DeviceProfile] = None
+        
+        # Memoized foreground probe, shared by package/activity lookups until the UI changes
+        self.foreground_context_max_age = foreground_context_max_age
+        self._foreground_context: Optional[ForegroundContext] = None
+        self._shell_probe_available = True
+        
+        # Session recovery: serialized across the main thread and the health monitor
+        self.fast_reattach = True
+        self.recovery_events: List[RecoveryEvent] = []
+        self._recovery_lock = threading.Lock()
+        self.last_command_at: float = 0.0
     
     def initialize_driver(
         self,
@@ -194,6 +265,9 @@ class AppiumHelper:
             # Apply performance-optimizing driver settings
             self._apply_performance_settings()
             
+            # Cache device metrics once per session instead of querying them on every action
+            self._load_device_profile()
+            
             duration = (time.time() - start_time) * 1000
             session_id = self.driver.session_id
             
@@ -242,6 +316,49 @@ class AppiumHelper:
             # Non-critical - log warning but don't fail
             logger.warning(f'Failed to apply performance settings: {error}')
     
+    def _load_device_profile(self) -> None:
+        """Populate the device profile for a freshly initialized session."""
+        platform_name = (self.last_capabilities or {}).get('platformName', '') or ''
+        profile = DeviceProfile(platform='android' if 'android' in platform_name.lower() else None)
+        try:
+            size = self.driver.get_window_size()
+            profile.width, profile.height = int(size['width']), int(size['height'])
+        except Exception as error:
+            logger.debug(f'Window size not cached at session start: {error}')
+        if profile.platform == 'android':
+            try:
+                profile.density = int(self.driver.get_display_density())
+            except Exception as error:
+                logger.debug(f'Display density unavailable: {error}')
+        self.device_profile = profile
+        logger.debug(
+            f'Device profile: platform={profile.platform}, size={profile.width}x{profile.height}, '
+            f'density={profile.density}'
+        )
+    
+    def get_device_profile(self) -> Optional[DeviceProfile]:
+        """Get the cached device profile of the current session."""
+        return self.device_profile
+    
+    def invalidate_device_profile(self) -> None:
+        """Drop cached window size (e.g. after rotation); it is re-read on next use."""
+        if self.device_profile is not None:
+            self.device_profile.width = 0
+            self.device_profile.height = 0
+    
+    def _observe_rotation(self, page_source: Optional[str]) -> None:
+        """Invalidate the cached window size when the page source reports a rotation change."""
+        if self.device_profile is None or not page_source:
+            return
+        match = _HIERARCHY_ROTATION_PATTERN.search(page_source, 0, 512)
+        if not match:
+            return
+        rotation = int(match.group(1))
+        if self.device_profile.rotation is not None and rotation != self.device_profile.rotation:
+            logger.debug(f'Rotation changed {self.device_profile.rotation} -> {rotation}, refreshing window size')
+            self.invalidate_device_profile()
+        self.device_profile.rotation = rotation
+    
     def validate_session(self) -> bool:
         """
         Validate if current session is still active.
@@ -254,7 +371,7 @@ class AppiumHelper:
         
         try:
             # Try to get page source to validate session
-            self.driver.page_source
+            self._observe_rotation(self.driver.page_source)
             return True
         except Exception as error:
             if is_session_terminated(error):
@@ -262,10 +379,18 @@ class AppiumHelper:
                 return self._attempt_session_recovery()
             return False
     
-    def _attempt_session_recovery(self) -> bool:
+    def _attempt_session_recovery(self, trigger: str = 'command') -> bool:
         """
         Attempt to recover from session termination.
         
+        A fast re-attach (no server install, no device initialization, app left on its
+        current screen) is tried first; full re-initialization is the fallback. Only one
+        thread recovers at a time, and a caller that waited on another thread's recovery
+        reuses the new session.
+        
+        Args:
+            trigger: What detected the failure ('command' or 'health_check')
+        
         Returns:
             True if recovery successful, False otherwise
         """
@@ -273,40 +398,86 @@ class AppiumHelper:
             logger.error('Cannot recover session: missing capabilities or URL')
             return False
         
-        for attempt in range(1, self.max_retries + 1):
-            try:
-                logger.info(f'Session recovery attempt {attempt}/{self.max_retries}')
-                
-                # Clean up existing session
-                if self.driver:
-                    try:
-                        self.driver.quit()
-                    except Exception:
-                        pass  # Ignore cleanup errors
-                    self.driver = None
-                
-                # Reinitialize session (preserve context config)
-                self.initialize_driver(
-                    self.last_capabilities,
-                    self.last_appium_url,
-                    {
-                        'targetPackage': self.target_package,
-                        'targetActivity': self.target_activity,
-                        'allowedExternalPackages': self.allowed_external_packages
-                    }
-                )
-                
-                logger.info('Session recovery successful')
+        failed_session_id = self.driver.session_id if self.driver else None
+        with self._recovery_lock:
+            if self.driver is not None and failed_session_id is not None and self.driver.session_id != failed_session_id:
+                logger.debug('Session was already recovered by another thread')
                 return True
-                
-            except Exception as error:
-                logger.error(f'Session recovery attempt {attempt} failed: {error}')
-                
-                if attempt < self.max_retries:
+            
+            start_time = time.time()
+            original_capabilities = self.last_capabilities
+            mode: Optional[str] = None
+            
+            if self.fast_reattach:
+                logger.info('Session recovery: fast re-attach')
+                if self._reinitialize_session(build_reattach_capabilities(original_capabilities)):
+                    mode = 'reattach'
+                # Later recoveries and close/reopen cycles start from the original capabilities
+                self.last_capabilities = original_capabilities
+            
+            attempt = 0
+            while mode is None and attempt < self.max_retries:
+                attempt += 1
+                logger.info(f'Session recovery attempt {attempt}/{self.max_retries}')
+                if self._reinitialize_session(original_capabilities):
+                    mode = 'full'
+                elif attempt < self.max_retries:
                     time.sleep(self.retry_delay * attempt)
-        
-        logger.error('Session recovery failed after all attempts')
-        return False
+            
+            duration_ms = (time.time() - start_time) * 1000
+            self.recovery_events.append(RecoveryEvent(
+                trigger=trigger, mode=mode, success=mode is not None,
+                duration_ms=duration_ms, timestamp=start_time,
+            ))
+            if mode is None:
+                logger.error('Session recovery failed after all attempts')
+                return False
+            logger.info(f'Session recovery successful ({mode}) in {duration_ms:.0f}ms')
+            return True
+    
+    def recover_session(self, trigger: str = 'command') -> bool:
+        """Public entry point for session recovery (see _attempt_session_recovery)."""
+        return self._attempt_session_recovery(trigger)
+    
+    def _reinitialize_session(self, capabilities: AppiumCapabilities) -> bool:
+        """Drop the current session and create a new one with the given capabilities."""
+        # Clean up existing session
+        if self.driver:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass  # Ignore cleanup errors
+            self.driver = None
+        self._foreground_context = None
+        try:
+            # Reinitialize session (preserve context config)
+            self.initialize_driver(
+                capabilities,
+                self.last_appium_url,
+                {
+                    'targetPackage': self.target_package,
+                    'targetActivity': self.target_activity,
+                    'allowedExternalPackages': self.allowed_external_packages
+                }
+            )
+            return True
+        except Exception as error:
+            logger.error(f'Session re-initialization failed: {error}')
+            return False
+    
+    def get_recovery_stats(self) -> Dict[str, Any]:
+        """Summary of session recoveries for the run report."""
+        events = list(self.recovery_events)
+        durations = [event.duration_ms for event in events if event.success]
+        return {
+            'recoveries': len(events),
+            'successful': sum(1 for event in events if event.success),
+            'reattach': sum(1 for event in events if event.mode == 'reattach'),
+            'full': sum(1 for event in events if event.mode == 'full'),
+            'from_health_check': sum(1 for event in events if event.trigger == 'health_check'),
+            'avg_recovery_ms': sum(durations) / len(durations) if durations else None,
+            'max_recovery_ms': max(durations) if durations else None,
+        }
     
     def safe_execute(self, operation, error_message: str = 'Operation failed'):
         """
@@ -326,12 +497,14 @@ class AppiumHelper:
         if not self.validate_session():
             raise SessionNotFoundError('Session validation failed')
         
-        return with_retry_sync(
+        result = with_retry_sync(
             operation,
             self.max_retries,
             self.retry_delay,
             error_message
         )
+        self.last_command_at = time.time()
+        return result
     
     def _get_locator(self, selector: str, strategy: LocatorStrategy) -> tuple:
         """
@@ -530,7 +703,8 @@ class AppiumHelper:
                 logger.error(f'{error_msg}, duration={duration:.0f}ms')
                 raise ElementNotFoundError(error_msg) from error
         
-        return self.safe_execute(_find, f'Find element with {strategy}: {selector}')
+        with step_profiler.span('element_find'):
+            return self.safe_execute(_find, f'Find element with {strategy}: {selector}')
     
     def find_elements(
         self,
@@ -704,6 +878,31 @@ class AppiumHelper:
         actions.w3c_actions.pointer_action.pointer_up()
         actions.perform()
     
+    def perform_w3c_tap_sequence(self, points: List[tuple], gap_s: float = 0.15) -> None:
+        """
+        Perform several taps as one W3C Actions payload (a single server round trip).
+        
+        Args:
+            points: (x, y) coordinates, tapped in order
+            gap_s: Pause between taps in seconds
+        """
+        from selenium.webdriver.common.action_chains import ActionChains
+        from selenium.webdriver.common.actions import interaction
+        from selenium.webdriver.common.actions.action_builder import ActionBuilder
+        from selenium.webdriver.common.actions.pointer_input import PointerInput
+        
+        actions = ActionChains(self.driver)
+        actions.w3c_actions = ActionBuilder(self.driver, mouse=PointerInput(interaction.POINTER_TOUCH, "touch"))
+        pointer = actions.w3c_actions.pointer_action
+        for index, (x, y) in enumerate(points):
+            if index:
+                pointer.pause(gap_s)
+            pointer.move_to_location(x, y)
+            pointer.pointer_down()
+            pointer.pause(0.1)
+            pointer.pointer_up()
+        actions.perform()
+    
     def _get_element_center(self, element: WebElement) -> tuple[float, float]:
         """
         Get element center coordinates.
@@ -793,6 +992,8 @@ class AppiumHelper:
         Returns:
             Platform or None
         """
+        if self.device_profile is not None and self.device_profile.platform:
+            return self.device_profile.platform
         if self.last_capabilities:
             platform_name = self.last_capabilities.get('platformName', '').lower()
             if 'android' in platform_name:
@@ -816,6 +1017,8 @@ class AppiumHelper:
                 self.target_activity = None
                 self.allowed_external_packages = []
                 self.consecutive_context_failures = 0
+                self.device_profile = None
+                self._foreground_context = None
     
     def get_page_source(self) -> str:
         """
@@ -827,7 +1030,9 @@ class AppiumHelper:
         def _get():
             return self.driver.page_source
         
-        return self.safe_execute(_get, 'Get page source')
+        page_source = self.safe_execute(_get, 'Get page source')
+        self._observe_rotation(page_source)
+        return page_source
     
     def take_screenshot(self) -> str:
         """
@@ -843,16 +1048,23 @@ class AppiumHelper:
     
     def get_window_size(self) -> Dict[str, int]:
         """
-        Get window size.
+        Get window size, served from the session's device profile when cached.
         
         Returns:
             Dictionary with 'width' and 'height'
         """
+        profile = self.device_profile
+        if profile is not None and profile.has_window_size:
+            return {'width': profile.width, 'height': profile.height}
+        
         def _get():
             size = self.driver.get_window_size()
             return {'width': size['width'], 'height': size['height']}
         
-        return self.safe_execute(_get, 'Get window size')
+        size = self.safe_execute(_get, 'Get window size')
+        if profile is not None:
+            profile.width, profile.height = size['width'], size['height']
+        return size
     
     def get_driver(self) -> Optional[webdriver.Remote]:
         """
@@ -863,51 +1075,83 @@ class AppiumHelper:
         """
         return self.driver
     
-    def get_current_package(self) -> Optional[str]:
+    def invalidate_foreground_context(self) -> None:
+        """Forget the memoized foreground probe (call after anything that may change the UI)."""
+        self._foreground_context = None
+    
+    def get_foreground_context(self, refresh: bool = False) -> ForegroundContext:
         """
-        Get current package name (Android only).
+        Get foreground package and activity from a single probe (Android only).
         
-        Returns:
-            Package name or None
-        """
-        if not self.driver:
-            return None
+        The result is memoized until invalidate_foreground_context() is called or it is
+        older than foreground_context_max_age, so the package check, the pre-action
+        activity and the screen-state lookup of one step share the same probe.
         
-        try:
-            platform = self._get_current_platform()
-            if platform != 'android':
-                return None
-            
-            # Try Appium's get_current_package method
-            try:
-                package_name = self.driver.current_package
-                if package_name:
-                    return package_name
-            except Exception:
-                pass
+        Args:
+            refresh: Ignore the memoized value and probe the device again
             
-            # Fallback: use mobile: shell to get current package via dumpsys
+        Returns:
+            ForegroundContext; package/activity are None when they could not be read
+        """
+        cached = self._foreground_context
+        if (
+            not refresh
+            and cached is not None
+            and time.time() - cached.captured_at <= self.foreground_context_max_age
+        ):
+            return cached
+        
+        context = ForegroundContext()
+        if self.driver and self._get_current_platform() == 'android':
+            context = self._probe_foreground_context()
+        context.captured_at = time.time()
+        # Failed probes are not memoized so callers' retries hit the device again
+        self._foreground_context = context if context.package else None
+        return context
+    
+    def _probe_foreground_context(self) -> ForegroundContext:
+        """Read package and activity with one focus query, or the Appium endpoints if shell is unavailable."""
+        if self._shell_probe_available:
             try:
+                # Only the two focus lines come back over the wire instead of the full window dump
                 result = self.driver.execute_script(
                     'mobile: shell',
                     {
                         'command': 'dumpsys',
-                        'args': ['window', 'windows']
+                        'args': ['window', '|', 'grep', '-E', "'mCurrentFocus|mFocusedApp'"]
                     }
                 )
-                
-                # Parse package name from dumpsys output
-                if isinstance(result, str):
-                    focus_match = re.search(r'mCurrentFocus.*?(\w+\.\w+(?:\.\w+)*)', result)
-                    if focus_match and focus_match.group(1):
-                        return focus_match.group(1)
-            except Exception:
-                pass
-            
-            return None
+                if isinstance(result, dict):
+                    result = result.get('stdout', '')
+                context = parse_foreground_component(result if isinstance(result, str) else '')
+                if context.package:
+                    return context
+            except Exception as error:
+                # Typically the server runs without the adb_shell insecure feature
+                logger.debug(f'Foreground shell probe unavailable, using Appium endpoints: {error}')
+                self._shell_probe_available = False
+        
+        context = ForegroundContext()
+        try:
+            context.package = self.driver.current_package or None
         except Exception as error:
             logger.debug(f'Failed to get current package: {error}')
+        try:
+            context.activity = self.driver.current_activity or None
+        except Exception as error:
+            logger.debug(f'Failed to get current activity: {error}')
+        return context
+    
+    def get_current_package(self) -> Optional[str]:
+        """
+        Get current package name (Android only).
+        
+        Returns:
+            Package name or None
+        """
+        if not self.driver:
             return None
+        return self.get_foreground_context().package
     
     def get_current_activity(self) -> Optional[str]:
         """
@@ -918,42 +1162,7 @@ class AppiumHelper:
         """
         if not self.driver:
             return None
-        
-        try:
-            platform = self._get_current_platform()
-            if platform != 'android':
-                return None
-            
-            # Try Appium's get_current_activity method
-            try:
-                activity = self.driver.current_activity
-                if activity:
-                    return activity
-            except Exception:
-                pass
-            
-            # Fallback: use mobile: shell to get current activity via dumpsys
-            try:
-                result = self.driver.execute_script(
-                    'mobile: shell',
-                    {
-                        'command': 'dumpsys',
-                        'args': ['window', 'windows']
-                    }
-                )
-                
-                # Parse activity from dumpsys output
-                if isinstance(result, str):
-                    focus_match = re.search(r'mCurrentFocus.*?(\w+\.\w+(?:\/\w+\.\w+)*)', result)
-                    if focus_match and focus_match.group(1):
-                        return focus_match.group(1)
-            except Exception:
-                pass
-            
-            return None
-        except Exception as error:
-            logger.debug(f'Failed to get current activity: {error}')
-            return None
+        return self.get_foreground_context().activity
     
     def start_activity(
         self,
@@ -1057,6 +1266,8 @@ class AppiumHelper:
                         logger.error(f'All methods failed to start activity: {shell_error}')
                         return False
             
+            self.invalidate_foreground_context()
+            
             # Wait for app to load
             if wait_after_launch > 0:
                 logger.debug(f'Waiting {wait_after_launch}ms for app to fully load...')
@@ -1099,6 +1310,7 @@ class AppiumHelper:
         
         try:
             self.driver.activate_app(app_package)
+            self.invalidate_foreground_context()
             logger.info(f'Activated app: {app_package}')
             return True
         except Exception as error:
@@ -1211,6 +1423,7 @@ class AppiumHelper:
             time.sleep(1.0)
         except Exception as error:
             logger.debug(f'Failed to press back button during recovery: {error}')
+        self.invalidate_foreground_context()
         
         # Check if back button worked
         context_after_back = self.get_current_package()
@@ -143,6 +143,31 @@ def build_android_capabilities(
     return build_w3c_capabilities('android', device, android_caps)
 
 
+def build_reattach_capabilities(capabilities: AppiumCapabilities) -> AppiumCapabilities:
+    """
+    Derive capabilities for quickly re-attaching to a device after a session crash.
+    
+    The UiAutomator2 server APKs and device settings are still in place, so installation
+    and device initialization are skipped, and the app under test is left running on
+    its current screen instead of being relaunched.
+    
+    Args:
+        capabilities: Capabilities the original session was created with
+        
+    Returns:
+        New capabilities dictionary (the input is not modified)
+    """
+    reattach_caps = dict(capabilities)
+    reattach_caps.update({
+        'appium:skipServerInstallation': True,
+        'appium:skipDeviceInitialization': True,
+        'appium:noReset': True,
+        'appium:dontStopAppOnReset': True,
+        'appium:autoLaunch': False,
+    })
+    return reattach_caps
+
+
 def build_browser_capabilities(
     platform: Platform,
     browser_name: str = 'chrome',
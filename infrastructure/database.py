@@ -12,6 +12,8 @@ except ImportError:
     # Import Config only when needed to avoid circular import
     from config.app_config import Config
 
+from infrastructure import run_metrics_store, run_timeseries_store, step_spans_store
+
 class DatabaseManager:
     SCREENS_TABLE = "screens"
     TRANSITIONS_TABLE = "transitions"
@@ -266,6 +268,9 @@ class DatabaseManager:
             self._execute_sql(f"CREATE INDEX IF NOT EXISTS idx_transitions_from_screen_id ON {self.TRANSITIONS_TABLE}(from_screen_id);", commit=True)
             self._execute_sql(sql_create_run_meta, commit=True)
             self._execute_sql(f"CREATE INDEX IF NOT EXISTS idx_run_meta_run_id ON run_meta(run_id);", commit=True)
+            run_metrics_store.ensure_run_metrics_tables(self.conn)
+            run_timeseries_store.ensure_run_timeseries_table(self.conn)
+            step_spans_store.ensure_step_spans_table(self.conn)
             logging.debug("Database tables created/verified successfully.")
             return True
         except Exception as e:
@@ -301,12 +306,24 @@ class DatabaseManager:
 
     def insert_screen(self, composite_hash: str, xml_hash: str, visual_hash: str,
                       screenshot_path: Optional[str], activity_name: Optional[str],
-                      xml_content: Optional[str], run_id: int, step_number: int) -> Optional[int]:
+                      xml_content: Optional[str], run_id: int, step_number: int,
+                      screen_id: Optional[int] = None) -> Optional[int]:
         sql_check = f"SELECT screen_id FROM {self.SCREENS_TABLE} WHERE composite_hash = ?"
         existing = self._execute_sql(sql_check, (composite_hash,), fetch_one=True, commit=False)
         if existing:
             return existing[0]
 
+        # An explicit screen_id is used when IDs are allocated by the shared exploration store
+        if screen_id is not None:
+            sql_insert = f"""
+            INSERT INTO {self.SCREENS_TABLE}
+            (screen_id, composite_hash, xml_hash, visual_hash, screenshot_path, activity_name, xml_content, first_seen_run_id, first_seen_step_number)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """
+            params = (screen_id, composite_hash, xml_hash, visual_hash, screenshot_path, activity_name, xml_content, run_id, step_number)
+            inserted_id = self._execute_sql(sql_insert, params, commit=True)
+            return inserted_id if isinstance(inserted_id, int) else None
+
         sql_insert = f"""
         INSERT INTO {self.SCREENS_TABLE}
         (composite_hash, xml_hash, visual_hash, screenshot_path, activity_name, xml_content, first_seen_run_id, first_seen_step_number)
@@ -357,8 +374,69 @@ class DatabaseManager:
                   ai_suggestion_json, mapped_action_json, execution_success, error_message, ai_response_time, total_tokens,
                   ai_input_prompt, element_find_time_ms)
         step_log_id = self._execute_sql(sql, params, commit=True)
+        if isinstance(step_log_id, int):
+            self._record_step_metrics(run_id, from_screen_id, to_screen_id, action_description, ai_suggestion_json,
+                                      execution_success, ai_response_time, total_tokens, element_find_time_ms)
         return step_log_id if isinstance(step_log_id, int) else None
 
+    def _record_step_metrics(self, run_id: int, *step_fields: Any) -> None:
+        """Fold a logged step into run_metrics; a failure here never fails the step log."""
+        try:
+            run_metrics_store.record_step(self.conn, run_id, *step_fields)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ Could not update run_metrics for run {run_id}: {e}")
+            try:
+                self.conn.rollback()
+            except sqlite3.Error:
+                pass
+
+    def get_run_metrics(self, run_id: int) -> Optional[Dict[str, Any]]:
+        """Materialized summary metrics of a run (see infrastructure.run_metrics_store)."""
+        if not self.conn and not self.connect():
+            return None
+        return run_metrics_store.get_run_metrics(self.conn, run_id)
+
+    def insert_timeseries_point(self, run_id: int, step_number: int, elapsed_ms: float,
+                                phase_ms: Dict[str, float]) -> None:
+        """Store a step's coverage and phase timings (see infrastructure.run_timeseries_store)."""
+        if not self.conn and not self.connect():
+            return
+        try:
+            run_timeseries_store.record_point(self.conn, run_id, step_number, elapsed_ms, phase_ms)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ Could not record time series for run {run_id} step {step_number}: {e}")
+            try:
+                self.conn.rollback()
+            except sqlite3.Error:
+                pass
+
+    def get_run_timeseries(self, run_id: int) -> List[Dict[str, Any]]:
+        if not self.conn and not self.connect():
+            return []
+        return run_timeseries_store.get_run_timeseries(self.conn, run_id)
+
+    def insert_step_spans(self, run_id: int, step_number: int, started_ms: float, total_ms: float,
+                          spans: List[List[Any]]) -> None:
+        """Store a step's profiler spans (see infrastructure.step_spans_store)."""
+        if not self.conn and not self.connect():
+            return
+        try:
+            step_spans_store.record_step_spans(self.conn, run_id, step_number, started_ms, total_ms, spans)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ Could not record spans for run {run_id} step {step_number}: {e}")
+            try:
+                self.conn.rollback()
+            except sqlite3.Error:
+                pass
+
+    def get_step_phase_summary(self, run_id: int) -> Dict[str, Dict[str, float]]:
+        if not self.conn and not self.connect():
+            return {}
+        return step_spans_store.summarize_run_spans(self.conn, run_id)
+
     def get_steps_for_run(self, run_id: int) -> List[Tuple]:
         sql = "SELECT * FROM steps_log WHERE run_id = ? ORDER BY step_number ASC"
         result = self._execute_sql(sql, (run_id,), fetch_all=True, commit=False)
@@ -529,6 +607,10 @@ class DatabaseManager:
             self._execute_sql(f"DELETE FROM sqlite_sequence WHERE name='{self.SCREENS_TABLE}';", commit=True)
             self._execute_sql(f"DELETE FROM sqlite_sequence WHERE name='{self.TRANSITIONS_TABLE}';", commit=True)
             self._execute_sql(f"DELETE FROM sqlite_sequence WHERE name='steps_log';", commit=True)
+            run_metrics_store.clear_run_metrics(self.conn)
+            run_timeseries_store.clear_run_timeseries(self.conn)
+            step_spans_store.clear_step_spans(self.conn)
+            self.conn.commit()
             logging.debug("Screens, Transitions, and Steps Log tables cleared successfully.")
             return True
         except Exception as e:
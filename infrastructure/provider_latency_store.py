@@ -0,0 +1,173 @@
+# provider_latency_store.py
+"""
+Persisted per-app latency histograms for AI decision backends.
+
+The routing adapter records how long each backend (provider + model) took to
+produce a decision and whether the answer was usable. Latencies are kept as
+fixed-bucket histograms per app package so the router can learn, across runs,
+which backend to prefer for a given app and when to start the backup request.
+"""
+import bisect
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config.numeric_constants import DB_BUSY_TIMEOUT, DB_CONNECT_TIMEOUT
+
+# Upper bucket edges in milliseconds; the last bucket collects everything slower
+LATENCY_BUCKET_EDGES_MS = (
+    100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000,
+    7500, 10000, 15000, 20000, 30000, 60000,
+)
+OVERFLOW_BUCKET_MS = 120000
+
+
+class ProviderLatencyStore:
+    HISTOGRAM_TABLE = "backend_latency_histogram"
+    OUTCOMES_TABLE = "backend_outcomes"
+
+    def __init__(self, db_path: str,
+                 connect_timeout: float = DB_CONNECT_TIMEOUT,
+                 busy_timeout_ms: int = DB_BUSY_TIMEOUT):
+        if not db_path:
+            raise ValueError("ProviderLatencyStore: db_path must be provided.")
+        self.db_path = str(db_path)
+        self.connect_timeout = float(connect_timeout)
+        self.busy_timeout_ms = int(busy_timeout_ms)
+        # Backend calls finish on worker threads, so one guarded connection is shared
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is not None:
+            return self._conn
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=self.connect_timeout, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout_ms};")
+        conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {self.HISTOGRAM_TABLE} (
+            app_package TEXT NOT NULL,
+            backend TEXT NOT NULL,
+            bucket_ms INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (app_package, backend, bucket_ms)
+        )""")
+        conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {self.OUTCOMES_TABLE} (
+            app_package TEXT NOT NULL,
+            backend TEXT NOT NULL,
+            successes INTEGER NOT NULL DEFAULT 0,
+            failures INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL,
+            PRIMARY KEY (app_package, backend)
+        )""")
+        conn.commit()
+        self._conn = conn
+        return conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                finally:
+                    self._conn = None
+
+    @staticmethod
+    def bucket_for(latency_ms: float) -> int:
+        index = bisect.bisect_left(LATENCY_BUCKET_EDGES_MS, latency_ms)
+        if index >= len(LATENCY_BUCKET_EDGES_MS):
+            return OVERFLOW_BUCKET_MS
+        return LATENCY_BUCKET_EDGES_MS[index]
+
+    def record(self, app_package: str, backend: str, latency_ms: Optional[float],
+               success: bool, won: bool = False) -> None:
+        """Record one finished backend call.
+
+        Args:
+            app_package: App under test (histograms are kept per app)
+            backend: Backend label, e.g. "ollama:llama3.2-vision"
+            latency_ms: Wall-clock latency; None when the call never finished
+            success: Whether the backend produced a valid decision
+            won: Whether this answer was the one used for the step
+        """
+        app_package = app_package or ""
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                if latency_ms is not None and success:
+                    conn.execute(f"""
+                    INSERT INTO {self.HISTOGRAM_TABLE} (app_package, backend, bucket_ms, count)
+                    VALUES (?, ?, ?, 1)
+                    ON CONFLICT(app_package, backend, bucket_ms) DO UPDATE SET count = count + 1
+                    """, (app_package, backend, self.bucket_for(latency_ms)))
+                conn.execute(f"""
+                INSERT INTO {self.OUTCOMES_TABLE} (app_package, backend, successes, failures, wins, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(app_package, backend) DO UPDATE SET
+                    successes = successes + excluded.successes,
+                    failures = failures + excluded.failures,
+                    wins = wins + excluded.wins,
+                    updated_at = excluded.updated_at
+                """, (app_package, backend, 1 if success else 0, 0 if success else 1, 1 if won else 0, time.time()))
+                conn.commit()
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ Could not record latency for backend '{backend}': {e}")
+
+    def get_histogram(self, app_package: str, backend: str) -> Dict[int, int]:
+        try:
+            with self._lock:
+                rows = self._get_conn().execute(f"""
+                SELECT bucket_ms, count FROM {self.HISTOGRAM_TABLE}
+                WHERE app_package = ? AND backend = ? ORDER BY bucket_ms
+                """, (app_package or "", backend)).fetchall()
+            return {int(bucket): int(count) for bucket, count in rows}
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ Could not read latency histogram for backend '{backend}': {e}")
+            return {}
+
+    def percentile(self, app_package: str, backend: str, pct: float) -> Optional[float]:
+        """Return the bucket upper edge containing the given percentile (0-1), or None without data."""
+        histogram = self.get_histogram(app_package, backend)
+        total = sum(histogram.values())
+        if total == 0:
+            return None
+        threshold = pct * total
+        running = 0
+        for bucket in sorted(histogram):
+            running += histogram[bucket]
+            if running >= threshold:
+                return float(bucket)
+        return float(max(histogram))
+
+    def get_outcomes(self, app_package: str, backend: str) -> Dict[str, int]:
+        try:
+            with self._lock:
+                row = self._get_conn().execute(f"""
+                SELECT successes, failures, wins FROM {self.OUTCOMES_TABLE}
+                WHERE app_package = ? AND backend = ?
+                """, (app_package or "", backend)).fetchone()
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ Could not read outcomes for backend '{backend}': {e}")
+            row = None
+        if not row:
+            return {"successes": 0, "failures": 0, "wins": 0}
+        return {"successes": row[0], "failures": row[1], "wins": row[2]}
+
+    def summary(self, app_package: str, backends: List[str]) -> List[Dict[str, object]]:
+        """Per-backend p50/p90 latency and outcome counts for one app."""
+        result = []
+        for backend in backends:
+            entry: Dict[str, object] = {"backend": backend}
+            entry.update(self.get_outcomes(app_package, backend))
+            entry["p50_ms"] = self.percentile(app_package, backend, 0.5)
+            entry["p90_ms"] = self.percentile(app_package, backend, 0.9)
+            result.append(entry)
+        return result
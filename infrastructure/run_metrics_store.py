@@ -0,0 +1,211 @@
+"""
+Per-run summary metrics, maintained one step at a time.
+
+``record_step`` folds each step into a ``run_metrics`` row as it is logged.
+The row holds counts, sums, latency histograms and action counts. Distinct
+screens, activities and transitions are tracked in ``run_metric_members``, and
+an INSERT OR IGNORE there tells whether a member is new. Summaries then read one
+row instead of loading and decoding every step of the run.
+
+``backfill_run_metrics`` rebuilds the rows from ``steps_log``. Use it for
+databases written before the table existed.
+"""
+
+import json
+import logging
+import sqlite3
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional
+
+from config.numeric_constants import RUN_METRICS_LATENCY_BUCKETS_MS
+
+logger = logging.getLogger(__name__)
+
+RUN_METRICS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS run_metrics (
+    run_id INTEGER PRIMARY KEY,
+    steps INTEGER NOT NULL DEFAULT 0,
+    execution_failures INTEGER NOT NULL DEFAULT 0,
+    stuck_steps INTEGER NOT NULL DEFAULT 0,
+    total_tokens INTEGER NOT NULL DEFAULT 0,
+    ai_time_sum_ms REAL NOT NULL DEFAULT 0,
+    ai_time_count INTEGER NOT NULL DEFAULT 0,
+    element_find_sum_ms REAL NOT NULL DEFAULT 0,
+    element_find_count INTEGER NOT NULL DEFAULT 0,
+    unique_screens INTEGER NOT NULL DEFAULT 0,
+    unique_activities INTEGER NOT NULL DEFAULT 0,
+    unique_transitions INTEGER NOT NULL DEFAULT 0,
+    action_counts_json TEXT,
+    ai_time_histogram_json TEXT,
+    element_find_histogram_json TEXT,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (run_id) REFERENCES runs(run_id) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS run_metric_members (
+    run_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    member TEXT NOT NULL,
+    PRIMARY KEY (run_id, kind, member)
+) WITHOUT ROWID;
+"""
+
+_COUNTERS = ("steps", "execution_failures", "stuck_steps", "total_tokens", "ai_time_sum_ms", "ai_time_count",
+             "element_find_sum_ms", "element_find_count", "unique_screens", "unique_activities", "unique_transitions")
+
+
+def ensure_run_metrics_tables(conn: sqlite3.Connection) -> None:
+    conn.executescript(RUN_METRICS_SCHEMA)
+
+
+def latency_bucket(value_ms: float) -> int:
+    """Histogram bucket index for a latency; the last index is the overflow bucket."""
+    return bisect_left(RUN_METRICS_LATENCY_BUCKETS_MS, value_ms)
+
+
+def histogram_percentile(histogram: List[int], q: float) -> Optional[float]:
+    """Upper bound of the bucket holding quantile ``q`` (None when empty or in the overflow bucket)."""
+    total = sum(histogram)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= rank and count:
+            return float(RUN_METRICS_LATENCY_BUCKETS_MS[index]) if index < len(RUN_METRICS_LATENCY_BUCKETS_MS) else None
+    return None
+
+
+def _add_members(conn: sqlite3.Connection, run_id: int, kind: str, members: Iterable[str]) -> int:
+    cursor = conn.executemany(
+        "INSERT OR IGNORE INTO run_metric_members (run_id, kind, member) VALUES (?, ?, ?)",
+        [(run_id, kind, member) for member in members],
+    )
+    return max(0, cursor.rowcount)
+
+
+def record_step(conn: sqlite3.Connection, run_id: int, from_screen_id: Optional[int], to_screen_id: Optional[int],
+                action_description: Optional[str], ai_suggestion_json: Optional[str], execution_success: bool,
+                ai_response_time_ms: Optional[float], total_tokens: Optional[int],
+                element_find_time_ms: Optional[float]) -> None:
+    """Fold one step into the run's metrics. The caller commits."""
+    new_screens = _add_members(conn, run_id, "screen",
+                               {str(screen_id) for screen_id in (from_screen_id, to_screen_id) if screen_id})
+    new_activities = max(0, conn.execute(
+        """
+        INSERT OR IGNORE INTO run_metric_members (run_id, kind, member)
+        SELECT ?, 'activity', activity_name FROM screens
+        WHERE screen_id IN (?, ?) AND activity_name IS NOT NULL
+        """,
+        (run_id, from_screen_id, to_screen_id),
+    ).rowcount)
+    new_transitions = _add_members(conn, run_id, "transition",
+                                   [json.dumps([from_screen_id, to_screen_id, action_description])])
+
+    action = None
+    if ai_suggestion_json:
+        try:
+            suggestion = json.loads(ai_suggestion_json)
+            action = suggestion.get("action") if isinstance(suggestion, dict) else None
+        except ValueError:
+            pass
+
+    metrics = get_run_metrics(conn, run_id) or _empty_metrics()
+    metrics["steps"] += 1
+    metrics["execution_failures"] += 0 if execution_success else 1
+    metrics["stuck_steps"] += 1 if from_screen_id == to_screen_id else 0
+    metrics["total_tokens"] += total_tokens or 0
+    if ai_response_time_ms is not None:
+        metrics["ai_time_sum_ms"] += ai_response_time_ms
+        metrics["ai_time_count"] += 1
+        metrics["ai_time_histogram"][latency_bucket(ai_response_time_ms)] += 1
+    if element_find_time_ms is not None:
+        metrics["element_find_sum_ms"] += element_find_time_ms
+        metrics["element_find_count"] += 1
+        metrics["element_find_histogram"][latency_bucket(element_find_time_ms)] += 1
+    metrics["unique_screens"] += new_screens
+    metrics["unique_activities"] += new_activities
+    metrics["unique_transitions"] += new_transitions
+    if action:
+        metrics["action_counts"][action] = metrics["action_counts"].get(action, 0) + 1
+
+    conn.execute(
+        f"""
+        INSERT OR REPLACE INTO run_metrics
+        (run_id, {', '.join(_COUNTERS)}, action_counts_json, ai_time_histogram_json, element_find_histogram_json, updated_at)
+        VALUES (?, {', '.join('?' for _ in _COUNTERS)}, ?, ?, ?, CURRENT_TIMESTAMP)
+        """,
+        (run_id, *(metrics[name] for name in _COUNTERS), json.dumps(metrics["action_counts"]),
+         json.dumps(metrics["ai_time_histogram"]), json.dumps(metrics["element_find_histogram"])),
+    )
+
+
+def _empty_metrics() -> Dict[str, Any]:
+    metrics: Dict[str, Any] = {name: 0 for name in _COUNTERS}
+    metrics.update(action_counts={},
+                   ai_time_histogram=[0] * (len(RUN_METRICS_LATENCY_BUCKETS_MS) + 1),
+                   element_find_histogram=[0] * (len(RUN_METRICS_LATENCY_BUCKETS_MS) + 1))
+    return metrics
+
+
+def get_run_metrics(conn: sqlite3.Connection, run_id: int) -> Optional[Dict[str, Any]]:
+    """Materialized metrics of a run, or None when the run (or the table) has none."""
+    try:
+        row = conn.execute(
+            f"""
+            SELECT {', '.join(_COUNTERS)}, action_counts_json, ai_time_histogram_json, element_find_histogram_json
+            FROM run_metrics WHERE run_id = ?
+            """,
+            (run_id,),
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if row is None:
+        return None
+    metrics = _empty_metrics()
+    metrics.update(zip(_COUNTERS, row[:len(_COUNTERS)]))
+    action_json, ai_json, find_json = row[len(_COUNTERS):]
+    metrics["action_counts"] = json.loads(action_json) if action_json else {}
+    for key, raw in (("ai_time_histogram", ai_json), ("element_find_histogram", find_json)):
+        histogram = json.loads(raw) if raw else []
+        if len(histogram) == len(metrics[key]):
+            metrics[key] = histogram
+    return metrics
+
+
+def clear_run_metrics(conn: sqlite3.Connection, run_id: Optional[int] = None) -> None:
+    """Delete the metrics of one run, or of all runs. The caller commits."""
+    where, params = ("WHERE run_id = ?", (run_id,)) if run_id is not None else ("", ())
+    conn.execute(f"DELETE FROM run_metrics {where}", params)
+    conn.execute(f"DELETE FROM run_metric_members {where}", params)
+
+
+def backfill_run_metrics(conn: sqlite3.Connection, run_ids: Optional[Iterable[int]] = None) -> int:
+    """Rebuild run_metrics from steps_log for the given runs (default: every run).
+
+    Returns:
+        Number of runs rebuilt
+    """
+    ensure_run_metrics_tables(conn)
+    if run_ids is None:
+        run_ids = [row[0] for row in conn.execute("SELECT run_id FROM runs ORDER BY run_id")]
+    # Databases older than the element_find_time_ms column
+    step_columns = {row[1] for row in conn.execute("PRAGMA table_info(steps_log)")}
+    element_find_column = "element_find_time_ms" if "element_find_time_ms" in step_columns else "NULL"
+    rebuilt = 0
+    for run_id in run_ids:
+        clear_run_metrics(conn, run_id)
+        steps = conn.execute(
+            f"""
+            SELECT from_screen_id, to_screen_id, action_description, ai_suggestion_json, execution_success,
+                   ai_response_time_ms, total_tokens, {element_find_column}
+            FROM steps_log WHERE run_id = ? ORDER BY step_number
+            """,
+            (run_id,),
+        )
+        for step in steps.fetchall():
+            record_step(conn, run_id, *step)
+        conn.commit()
+        rebuilt += 1
+        logger.debug(f"Rebuilt run_metrics for run {run_id}")
+    return rebuilt
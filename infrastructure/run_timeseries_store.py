@@ -0,0 +1,132 @@
+"""
+Per-step time series of a run: coverage growth and where the step time went.
+
+``record_point`` writes one row per step, after the step has been logged.
+The row holds the run's elapsed time, the cumulative unique screens and
+activities (read from ``run_metrics``, which ``insert_step_log`` has just
+updated) and the wall time of the step split into phases.
+
+``get_run_timeseries`` returns the rows of a run. Runs recorded before the
+table existed get a series rebuilt from ``steps_log``. That series has only
+the AI and element find phases, and the timestamps only give elapsed time
+to the second.
+"""
+
+import logging
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Wall-time phases of a step, in the order they are stored and charted
+TIMESERIES_PHASES = ("capture", "hashing", "db", "ai", "element_find", "wait", "other")
+
+TIMESERIES_FIELDS = ("step_number", "elapsed_ms", "unique_screens", "unique_activities",
+                     *(f"{phase}_ms" for phase in TIMESERIES_PHASES))
+
+RUN_TIMESERIES_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS run_timeseries (
+    run_id INTEGER NOT NULL,
+    step_number INTEGER NOT NULL,
+    elapsed_ms REAL NOT NULL,
+    unique_screens INTEGER NOT NULL,
+    unique_activities INTEGER NOT NULL,
+    {', '.join(f'{phase}_ms REAL' for phase in TIMESERIES_PHASES)},
+    PRIMARY KEY (run_id, step_number)
+) WITHOUT ROWID;
+"""
+
+
+def ensure_run_timeseries_table(conn: sqlite3.Connection) -> None:
+    conn.executescript(RUN_TIMESERIES_SCHEMA)
+
+
+def record_point(conn: sqlite3.Connection, run_id: int, step_number: int, elapsed_ms: float,
+                 phase_ms: Mapping[str, float]) -> None:
+    """Store the time series row of a step. The caller commits.
+
+    Args:
+        elapsed_ms: Time since the run started, at the end of the step
+        phase_ms: Milliseconds per phase; unknown phase names are ignored
+    """
+    row = conn.execute("SELECT unique_screens, unique_activities FROM run_metrics WHERE run_id = ?",
+                       (run_id,)).fetchone()
+    unique_screens, unique_activities = row if row else (0, 0)
+    conn.execute(
+        f"""
+        INSERT OR REPLACE INTO run_timeseries (run_id, {', '.join(TIMESERIES_FIELDS)})
+        VALUES (?, {', '.join('?' for _ in TIMESERIES_FIELDS)})
+        """,
+        (run_id, step_number, round(elapsed_ms, 1), unique_screens, unique_activities,
+         *(round(phase_ms[phase], 1) if phase in phase_ms else None for phase in TIMESERIES_PHASES)),
+    )
+
+
+def get_run_timeseries(conn: sqlite3.Connection, run_id: int) -> List[Dict[str, Any]]:
+    """Time series rows of a run ordered by step, rebuilt from steps_log when none were recorded."""
+    try:
+        rows = conn.execute(
+            f"SELECT {', '.join(TIMESERIES_FIELDS)} FROM run_timeseries WHERE run_id = ? ORDER BY step_number",
+            (run_id,),
+        ).fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    if rows:
+        return [dict(zip(TIMESERIES_FIELDS, row)) for row in rows]
+    return _timeseries_from_steps(conn, run_id)
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def _timeseries_from_steps(conn: sqlite3.Connection, run_id: int) -> List[Dict[str, Any]]:
+    step_columns = {row[1] for row in conn.execute("PRAGMA table_info(steps_log)")}
+    element_find_column = "sl.element_find_time_ms" if "element_find_time_ms" in step_columns else "NULL"
+    steps = conn.execute(
+        f"""
+        SELECT sl.step_number, sl.timestamp, sl.from_screen_id, sl.to_screen_id,
+               s_from.activity_name, s_to.activity_name, sl.ai_response_time_ms, {element_find_column}
+        FROM steps_log sl
+        LEFT JOIN screens s_from ON sl.from_screen_id = s_from.screen_id
+        LEFT JOIN screens s_to ON sl.to_screen_id = s_to.screen_id
+        WHERE sl.run_id = ? ORDER BY sl.step_number
+        """,
+        (run_id,),
+    ).fetchall()
+    run_row = conn.execute("SELECT start_time FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+    start = _parse_timestamp(run_row[0]) if run_row else None
+    screens, activities = set(), set()
+    series = []
+    for step_number, timestamp, from_id, to_id, from_activity, to_activity, ai_ms, find_ms in steps:
+        screens.update(screen_id for screen_id in (from_id, to_id) if screen_id)
+        activities.update(activity for activity in (from_activity, to_activity) if activity)
+        logged_at = _parse_timestamp(timestamp)
+        start = start or logged_at
+        point = {field: None for field in TIMESERIES_FIELDS}
+        point.update(step_number=step_number, unique_screens=len(screens), unique_activities=len(activities),
+                     elapsed_ms=(logged_at - start).total_seconds() * 1000.0 if logged_at and start else None,
+                     ai_ms=ai_ms, element_find_ms=find_ms)
+        series.append(point)
+    return series
+
+
+def summarize_phases(series: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Total milliseconds per phase over a series (phases never recorded are left out)."""
+    totals: Dict[str, float] = {}
+    for point in series:
+        for phase in TIMESERIES_PHASES:
+            value = point.get(f"{phase}_ms")
+            if value is not None:
+                totals[phase] = totals.get(phase, 0.0) + value
+    return totals
+
+
+def clear_run_timeseries(conn: sqlite3.Connection, run_id: Optional[int] = None) -> None:
+    """Delete the series of one run, or of all runs. The caller commits."""
+    where, params = ("WHERE run_id = ?", (run_id,)) if run_id is not None else ("", ())
+    conn.execute(f"DELETE FROM run_timeseries {where}", params)
@@ -0,0 +1,83 @@
+"""
+Background health checks for the Appium session.
+
+A crashed UiAutomator2 session is normally only noticed when the next crawler
+command fails, so the recovery cost lands in the middle of a step. The monitor
+probes the session while the crawler is busy elsewhere (waiting for the AI,
+writing the database) and recovers it in the background, so the next command
+finds a live session.
+"""
+
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+
+from infrastructure.appium_error_handler import is_session_terminated
+
+if TYPE_CHECKING:
+    from infrastructure.appium_helper import AppiumHelper
+
+logger = logging.getLogger(__name__)
+
+
+class SessionHealthMonitor:
+    """Periodically probes an AppiumHelper's session and recovers it when it has died."""
+    
+    def __init__(self, helper: 'AppiumHelper', interval_s: float):
+        """
+        Initialize the monitor.
+        
+        Args:
+            helper: Helper owning the session
+            interval_s: Seconds between probes; a probe is skipped when a command
+                succeeded within the last interval (the session is evidently alive)
+        """
+        self.helper = helper
+        self.interval_s = float(interval_s)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.probes = 0
+        self.failures_detected = 0
+    
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='appium-session-health', daemon=True)
+        self._thread.start()
+        logger.debug(f'Session health monitor started (interval {self.interval_s:.0f}s)')
+    
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_s + 1.0)
+            self._thread = None
+    
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval_s):
+            if time.time() - self.helper.last_command_at < self.interval_s:
+                continue
+            self.check_once()
+    
+    def check_once(self) -> bool:
+        """Probe the session once, recovering it if it is gone.
+        
+        Returns:
+            True if the session is (now) usable
+        """
+        driver = self.helper.driver
+        if driver is None:
+            return False
+        self.probes += 1
+        try:
+            # Round trip to the UiAutomator2 server, not just the Appium process
+            driver.get_window_size()
+            return True
+        except Exception as error:
+            if not is_session_terminated(error):
+                logger.debug(f'Session health probe failed without session loss: {error}')
+                return True
+            self.failures_detected += 1
+            logger.warning(f'⚠️ Session health probe found a dead session, recovering in background: {error}')
+            return self.helper.recover_session(trigger='health_check')
@@ -0,0 +1,344 @@
+# shared_exploration_store.py
+"""
+Shared exploration state for several crawler processes working on the same app.
+
+Each crawler process keeps its own session database (see ``DatabaseManager``),
+but when several devices crawl the same APK they would otherwise discover the
+same screens independently. This store is a single SQLite file in WAL mode that
+all workers open concurrently. It provides:
+
+- Atomic screen-id allocation keyed by composite hash, so every worker uses the
+  same ID for the same screen.
+- Claimable frontier items (screen + action) with a lease, so two workers do not
+  execute the same action on the same screen at the same time.
+- Conflict-free visit counts: every worker only increments its own counter row
+  and totals are computed as the sum over workers.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config.numeric_constants import DB_BUSY_TIMEOUT, DB_CONNECT_TIMEOUT, FRONTIER_CLAIM_LEASE_SECONDS
+
+
+class SharedExplorationStore:
+    SCREENS_TABLE = "shared_screens"
+    VISITS_TABLE = "shared_visits"
+    FRONTIER_TABLE = "shared_frontier"
+
+    STATUS_CLAIMED = "claimed"
+    STATUS_DONE = "done"
+
+    def __init__(self, db_path: str, worker_id: str,
+                 lease_seconds: float = FRONTIER_CLAIM_LEASE_SECONDS,
+                 connect_timeout: float = DB_CONNECT_TIMEOUT,
+                 busy_timeout_ms: int = DB_BUSY_TIMEOUT):
+        if not db_path:
+            raise ValueError("SharedExplorationStore: db_path must be provided.")
+        if not worker_id:
+            raise ValueError("SharedExplorationStore: worker_id must be provided.")
+        self.db_path = str(db_path)
+        self.worker_id = str(worker_id)
+        self.lease_seconds = float(lease_seconds)
+        self.connect_timeout = float(connect_timeout)
+        self.busy_timeout_ms = int(busy_timeout_ms)
+        # One connection per thread; sqlite3 connections must not be shared across threads
+        self._local = threading.local()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        # isolation_level=None: we issue BEGIN IMMEDIATE ourselves so writers serialize on the file lock
+        conn = sqlite3.connect(self.db_path, timeout=self.connect_timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout_ms};")
+        self._local.conn = conn
+        return conn
+
+    def connect(self) -> bool:
+        """Open (or create) the shared store and make sure its schema exists.
+
+        Returns:
+            True if the store is usable, False otherwise
+        """
+        try:
+            conn = self._get_conn()
+            with self._transaction(conn):
+                conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.SCREENS_TABLE} (
+                    screen_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    composite_hash TEXT NOT NULL UNIQUE,
+                    xml_hash TEXT,
+                    visual_hash TEXT,
+                    activity_name TEXT,
+                    screenshot_path TEXT,
+                    first_seen_worker TEXT NOT NULL,
+                    first_seen_at REAL NOT NULL
+                );
+                """)
+                conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.VISITS_TABLE} (
+                    composite_hash TEXT NOT NULL,
+                    worker_id TEXT NOT NULL,
+                    visit_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (composite_hash, worker_id)
+                );
+                """)
+                conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.FRONTIER_TABLE} (
+                    composite_hash TEXT NOT NULL,
+                    action_description TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    claimed_by TEXT NOT NULL,
+                    claimed_at REAL NOT NULL,
+                    to_screen_id INTEGER,
+                    execution_success BOOLEAN,
+                    PRIMARY KEY (composite_hash, action_description)
+                );
+                """)
+            logging.debug(f"Shared exploration store ready: {self.db_path} (worker: {self.worker_id})")
+            return True
+        except sqlite3.Error as e:
+            logging.error(f"🔴 Could not open shared exploration store {self.db_path}: {e}", exc_info=True)
+            return False
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logging.warning(f"⚠️ Error closing shared exploration store: {e}")
+            finally:
+                self._local.conn = None
+
+    @contextmanager
+    def _transaction(self, conn: Optional[sqlite3.Connection] = None) -> Iterator[sqlite3.Connection]:
+        """Run a block inside BEGIN IMMEDIATE so concurrent writers are serialized."""
+        conn = conn or self._get_conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    # ---------- Screens ----------
+
+    def allocate_screen_id(self, composite_hash: str, xml_hash: Optional[str] = None,
+                           visual_hash: Optional[str] = None,
+                           activity_name: Optional[str] = None,
+                           screenshot_path: Optional[str] = None,
+                           screen_id: Optional[int] = None) -> Optional[Tuple[int, bool]]:
+        """Return the shared screen ID for a composite hash, allocating it if needed.
+
+        Args:
+            composite_hash: Composite (XML + visual) hash of the screen
+            xml_hash: XML hash of the screen
+            visual_hash: Visual hash, kept so other workers can do similarity matching
+            activity_name: Activity the screen was seen in
+            screenshot_path: Path of the screenshot saved by the discovering worker
+            screen_id: ID to claim for a new screen (one numbered locally while the store
+                was unreachable); if another screen holds it, a fresh ID is allocated
+
+        Returns:
+            Tuple of (screen_id, is_new) where is_new is True only for the worker that
+            allocated the ID, or None on error
+        """
+        columns = "composite_hash, xml_hash, visual_hash, activity_name, screenshot_path, first_seen_worker, first_seen_at"
+        values = (composite_hash, xml_hash, visual_hash, activity_name, screenshot_path, self.worker_id, time.time())
+        try:
+            with self._transaction() as conn:
+                cursor = None
+                if screen_id is not None:
+                    cursor = conn.execute(
+                        f"INSERT OR IGNORE INTO {self.SCREENS_TABLE} (screen_id, {columns}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (screen_id, *values)
+                    )
+                if cursor is None or cursor.rowcount != 1:
+                    cursor = conn.execute(
+                        f"INSERT OR IGNORE INTO {self.SCREENS_TABLE} ({columns}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        values
+                    )
+                is_new = cursor.rowcount == 1
+                row = conn.execute(
+                    f"SELECT screen_id FROM {self.SCREENS_TABLE} WHERE composite_hash = ?",
+                    (composite_hash,)
+                ).fetchone()
+            if not row:
+                return None
+            return int(row[0]), is_new
+        except sqlite3.Error as e:
+            logging.error(f"🔴 Shared screen-id allocation failed for {composite_hash}: {e}", exc_info=True)
+            return None
+
+    def set_screenshot_path(self, screen_id: int, screenshot_path: str) -> None:
+        """Record the discovering worker's screenshot of a screen (only if none is set yet)."""
+        try:
+            with self._transaction() as conn:
+                conn.execute(
+                    f"UPDATE {self.SCREENS_TABLE} SET screenshot_path = ? WHERE screen_id = ? AND screenshot_path IS NULL",
+                    (screenshot_path, screen_id)
+                )
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ Could not store shared screenshot path for screen {screen_id}: {e}")
+
+    def get_screens_since(self, last_screen_id: int) -> List[Dict[str, Any]]:
+        """Get screens allocated after ``last_screen_id`` (by any worker), ordered by ID."""
+        try:
+            rows = self._get_conn().execute(
+                f"""SELECT screen_id, composite_hash, xml_hash, visual_hash, activity_name, screenshot_path, first_seen_worker
+                FROM {self.SCREENS_TABLE} WHERE screen_id > ? ORDER BY screen_id ASC""",
+                (last_screen_id,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ Could not read shared screens: {e}")
+            return []
+        return [
+            {
+                'screen_id': row[0],
+                'composite_hash': row[1],
+                'xml_hash': row[2],
+                'visual_hash': row[3],
+                'activity_name': row[4],
+                'screenshot_path': row[5],
+                'first_seen_worker': row[6],
+            }
+            for row in rows
+        ]
+
+    def count_unique_screens(self) -> int:
+        try:
+            row = self._get_conn().execute(f"SELECT COUNT(*) FROM {self.SCREENS_TABLE}").fetchone()
+            return int(row[0]) if row else 0
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ Could not count shared screens: {e}")
+            return 0
+
+    # ---------- Visit counts ----------
+
+    def record_visit(self, composite_hash: str) -> None:
+        """Increment this worker's visit counter for a screen."""
+        try:
+            with self._transaction() as conn:
+                conn.execute(
+                    f"""INSERT INTO {self.VISITS_TABLE} (composite_hash, worker_id, visit_count) VALUES (?, ?, 1)
+                    ON CONFLICT(composite_hash, worker_id) DO UPDATE SET visit_count = visit_count + 1""",
+                    (composite_hash, self.worker_id)
+                )
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ Could not record shared visit for {composite_hash}: {e}")
+
+    def get_visit_count(self, composite_hash: str) -> int:
+        """Get the total visit count for a screen across all workers."""
+        try:
+            row = self._get_conn().execute(
+                f"SELECT COALESCE(SUM(visit_count), 0) FROM {self.VISITS_TABLE} WHERE composite_hash = ?",
+                (composite_hash,)
+            ).fetchone()
+            return int(row[0]) if row else 0
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ Could not read shared visit count for {composite_hash}: {e}")
+            return 0
+
+    # ---------- Frontier ----------
+
+    def claim_action(self, composite_hash: str, action_description: str) -> bool:
+        """Claim an action on a screen for this worker.
+
+        A claim fails only while another worker holds an unexpired lease on the same
+        action. Completed actions can be claimed again (e.g. to navigate through a
+        screen), and expired leases are taken over.
+
+        Returns:
+            True if this worker may execute the action, False if another worker is on it
+        """
+        now = time.time()
+        try:
+            with self._transaction() as conn:
+                row = conn.execute(
+                    f"SELECT status, claimed_by, claimed_at FROM {self.FRONTIER_TABLE} "
+                    f"WHERE composite_hash = ? AND action_description = ?",
+                    (composite_hash, action_description)
+                ).fetchone()
+                if row:
+                    status, claimed_by, claimed_at = row
+                    lease_active = (now - float(claimed_at)) < self.lease_seconds
+                    if status == self.STATUS_CLAIMED and claimed_by != self.worker_id and lease_active:
+                        return False
+                conn.execute(
+                    f"""INSERT INTO {self.FRONTIER_TABLE}
+                    (composite_hash, action_description, status, claimed_by, claimed_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(composite_hash, action_description) DO UPDATE SET
+                        status = excluded.status, claimed_by = excluded.claimed_by, claimed_at = excluded.claimed_at""",
+                    (composite_hash, action_description, self.STATUS_CLAIMED, self.worker_id, now)
+                )
+            return True
+        except sqlite3.Error as e:
+            # Never block the crawl because the shared store is unavailable
+            logging.warning(f"⚠️ Could not claim frontier item '{action_description}': {e}")
+            return True
+
+    def complete_action(self, composite_hash: str, action_description: str,
+                        to_screen_id: Optional[int], execution_success: bool) -> None:
+        """Mark a claimed action as done and record where it led."""
+        try:
+            with self._transaction() as conn:
+                conn.execute(
+                    f"""INSERT INTO {self.FRONTIER_TABLE}
+                    (composite_hash, action_description, status, claimed_by, claimed_at, to_screen_id, execution_success)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(composite_hash, action_description) DO UPDATE SET
+                        status = excluded.status, claimed_by = excluded.claimed_by, claimed_at = excluded.claimed_at,
+                        to_screen_id = excluded.to_screen_id, execution_success = excluded.execution_success""",
+                    (composite_hash, action_description, self.STATUS_DONE, self.worker_id, time.time(),
+                     to_screen_id, execution_success)
+                )
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ Could not complete frontier item '{action_description}': {e}")
+
+    def get_explored_actions(self, composite_hash: str, include_own: bool = False) -> List[Dict[str, Any]]:
+        """Get actions on a screen that other workers have claimed or completed.
+
+        Args:
+            composite_hash: Screen to query
+            include_own: Include this worker's own entries as well
+
+        Returns:
+            List of dicts with action_description, status, claimed_by, to_screen_id, execution_success
+        """
+        sql = (f"SELECT action_description, status, claimed_by, to_screen_id, execution_success "
+               f"FROM {self.FRONTIER_TABLE} WHERE composite_hash = ?")
+        params: Tuple[Any, ...] = (composite_hash,)
+        if not include_own:
+            sql += " AND claimed_by != ?"
+            params = (composite_hash, self.worker_id)
+        try:
+            rows = self._get_conn().execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ Could not read shared frontier for {composite_hash}: {e}")
+            return []
+        return [
+            {
+                'action_description': row[0],
+                'status': row[1],
+                'claimed_by': row[2],
+                'to_screen_id': row[3],
+                'execution_success': bool(row[4]) if row[4] is not None else None,
+            }
+            for row in rows
+        ]
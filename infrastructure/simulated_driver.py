@@ -0,0 +1,402 @@
+"""
+Offline driver that plays back a recorded session instead of a device.
+
+``load_recorded_session`` reads the screens (page source, screenshot file,
+activity) and the transitions between them from a session database: every
+logged step is an edge from its source screen, labelled with the action
+and its target, to the screen it reached.
+
+``SimulatedDriver`` implements the ``AppiumDriver`` surface used by the
+crawler on top of that graph. It starts on the first screen of the
+recorded run; an action moves to the recorded destination of the same
+action on the same target, else of the same action on this screen, else
+leaves the screen unchanged. Back without a recorded edge returns to the
+previous screen. Screens whose screenshot file is missing get a generated
+placeholder image. No device, Appium server or sleeps are involved, so the
+host-side pipeline can be run and measured on CI hardware.
+"""
+
+import base64
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SIMULATOR_DEVICE_ID = "simulator"
+LAUNCHER_PACKAGE = "com.android.launcher3"
+DEFAULT_WINDOW_SIZE = {"width": 1080, "height": 1920}
+
+# Driver gesture -> crawler action name, as recorded in ai_suggestion_json
+SCROLL_ACTION_OF_DIRECTION = {
+    "down": "scroll_down",
+    "up": "scroll_up",
+    "left": "swipe_left",
+    "right": "swipe_right",
+}
+
+
+@dataclass
+class RecordedScreen:
+    """A screen of the recorded session."""
+    screen_id: int
+    xml_content: str
+    screenshot_path: Optional[str]
+    activity_name: Optional[str]
+
+
+@dataclass
+class RecordedSession:
+    """Screens and action edges read from a session database."""
+    app_package: str
+    start_activity: str
+    start_screen_id: int
+    screens: Dict[int, RecordedScreen]
+    # (from_screen_id, action, target key) -> to_screen_id, first recorded edge wins
+    transitions: Dict[Tuple[int, str, str], int]
+    # Recorded suggestions, in step order (the answers of the simulated model)
+    actions: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _target_keys(action: Dict[str, Any]) -> List[str]:
+    """Keys an action is matched on: its identifier, then its bounding box, then any target."""
+    keys = []
+    target_id = action.get("target_identifier")
+    if target_id:
+        keys.append(f"id:{target_id}")
+    bbox = action.get("target_bounding_box")
+    if isinstance(bbox, dict) and bbox.get("top_left") and bbox.get("bottom_right"):
+        keys.append(f"bbox:{bbox['top_left']}:{bbox['bottom_right']}")
+    keys.append("*")
+    return keys
+
+
+def _resolve_screenshot_path(path: Optional[str], db_path: str) -> Optional[str]:
+    """Screenshot file of a screen; sessions moved since recording are looked up next to the DB."""
+    if not path:
+        return None
+    if os.path.isfile(path):
+        return path
+    # {session_dir}/database/{pkg}_crawl_data.db -> {session_dir}/screenshots/<name>
+    session_dir = os.path.dirname(os.path.dirname(os.path.abspath(db_path)))
+    candidate = os.path.join(session_dir, "screenshots", os.path.basename(path))
+    return candidate if os.path.isfile(candidate) else None
+
+
+def load_recorded_session(db_path: str, run_id: Optional[int] = None) -> RecordedSession:
+    """Read the screen graph of a session database.
+
+    Transitions come from every run in the database, so screens reached in
+    any run stay reachable; the start screen and app are those of ``run_id``
+    (the latest run when None).
+
+    Raises:
+        sqlite3.Error: If the database cannot be read
+        ValueError: If the run does not exist or has no steps on a known screen
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        if run_id is None:
+            row = conn.execute("SELECT run_id FROM runs ORDER BY run_id DESC LIMIT 1").fetchone()
+        else:
+            row = conn.execute("SELECT run_id FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if not row:
+            raise ValueError(f"No run {run_id} in {db_path}" if run_id is not None else f"No runs in {db_path}")
+        run_id = row[0]
+        app_package, start_activity = conn.execute(
+            "SELECT app_package, start_activity FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        start_row = conn.execute(
+            "SELECT from_screen_id FROM steps_log WHERE run_id = ? AND from_screen_id IS NOT NULL "
+            "ORDER BY step_number LIMIT 1",
+            (run_id,),
+        ).fetchone()
+        if not start_row:
+            raise ValueError(f"Run {run_id} in {db_path} has no steps on a recorded screen")
+        screen_rows = conn.execute(
+            "SELECT screen_id, xml_content, screenshot_path, activity_name FROM screens"
+        ).fetchall()
+        step_rows = conn.execute(
+            """
+            SELECT run_id, from_screen_id, to_screen_id, ai_suggestion_json
+            FROM steps_log
+            WHERE from_screen_id IS NOT NULL AND ai_suggestion_json IS NOT NULL
+            ORDER BY run_id, step_number
+            """
+        ).fetchall()
+    finally:
+        conn.close()
+
+    screens = {
+        screen_id: RecordedScreen(screen_id, xml or "", _resolve_screenshot_path(path, db_path), activity)
+        for screen_id, xml, path, activity in screen_rows
+    }
+    transitions: Dict[Tuple[int, str, str], int] = {}
+    actions: List[Dict[str, Any]] = []
+    for step_run_id, from_id, to_id, suggestion_json in step_rows:
+        try:
+            action = json.loads(suggestion_json)
+        except ValueError:
+            continue
+        if not isinstance(action, dict) or not action.get("action"):
+            continue
+        if step_run_id == run_id:
+            actions.append(action)
+        if to_id is None or to_id not in screens:
+            continue
+        for key in _target_keys(action):
+            transitions.setdefault((from_id, action["action"], key), to_id)
+
+    return RecordedSession(app_package, start_activity, start_row[0], screens, transitions, actions)
+
+
+def _placeholder_png(seed: int, size: int = 32, blocks: int = 4) -> bytes:
+    """Grey block pattern PNG standing in for a missing screenshot (stdlib only).
+
+    The pattern is seeded by the screen, so screens stay apart under the
+    visual hash deduplication.
+    """
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    rng = random.Random(seed)
+    shades = [[rng.randrange(256) for _ in range(blocks)] for _ in range(blocks)]
+    block = size // blocks
+    raw = b"".join(
+        b"\x00" + bytes(shades[y // block][x // block] for x in range(size)) for y in range(size)
+    )
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 0, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw))
+            + chunk(b"IEND", b""))
+
+
+class SimulatedDriver:
+    """``AppiumDriver`` stand-in that walks the screen graph of a recorded session."""
+
+    def __init__(self, app_config, session: RecordedSession):
+        """
+        Args:
+            app_config: Application configuration (receives the simulator's device info)
+            session: Result of ``load_recorded_session``
+        """
+        self.cfg = app_config
+        self.session = session
+        self._session_initialized = False
+        self._current_screen_id = session.start_screen_id
+        self._history: List[int] = []
+        self._in_app = False
+        self._window_size = self._read_window_size()
+        self._placeholders: Dict[int, bytes] = {}
+        self.actions_performed = 0
+        self.transitions_followed = 0
+        self.transitions_missed = 0
+        logger.debug(f"SimulatedDriver initialized with {len(session.screens)} screens "
+                     f"and {len(session.transitions)} transition keys.")
+
+    def _read_window_size(self) -> Dict[str, int]:
+        # The hierarchy root spans the screen: bounds="[0,0][1080,2400]"
+        start = self.session.screens.get(self.session.start_screen_id)
+        match = re.search(r'bounds="\[0,0\]\[(\d+),(\d+)\]"', start.xml_content if start else "")
+        if match:
+            return {"width": int(match.group(1)), "height": int(match.group(2))}
+        return dict(DEFAULT_WINDOW_SIZE)
+
+    @property
+    def current_screen(self) -> Optional[RecordedScreen]:
+        return self.session.screens.get(self._current_screen_id)
+
+    def _go_to(self, screen_id: int) -> None:
+        if screen_id != self._current_screen_id:
+            self._history.append(self._current_screen_id)
+            self._current_screen_id = screen_id
+
+    def _restart(self) -> None:
+        self._history.clear()
+        self._current_screen_id = self.session.start_screen_id
+        self._in_app = True
+
+    def _perform(self, action: str, target_identifier: Optional[str] = None,
+                 bbox: Optional[Dict[str, Any]] = None) -> bool:
+        """Follow the recorded edge of an action from the current screen."""
+        if not self._session_initialized:
+            return False
+        self.actions_performed += 1
+        keys = _target_keys({"target_identifier": target_identifier, "target_bounding_box": bbox})
+        for key in keys:
+            to_id = self.session.transitions.get((self._current_screen_id, action, key))
+            if to_id is not None:
+                self.transitions_followed += 1
+                self._go_to(to_id)
+                return True
+        self.transitions_missed += 1
+        if action == "back":
+            if self._history:
+                self._current_screen_id = self._history.pop()
+            else:
+                self._in_app = False  # Back from the first screen leaves the app
+        return True
+
+    # ------ Session ------
+
+    def initialize_session(
+        self,
+        app_package: Optional[str] = None,
+        app_activity: Optional[str] = None,
+        device_udid: Optional[str] = None,
+        platform_name: str = "Android"
+    ) -> bool:
+        """Start on the recorded run's first screen; no device is contacted."""
+        if app_package and app_package != self.session.app_package:
+            logger.warning(f"⚠️ Simulating {self.session.app_package}, not the configured {app_package}")
+        if hasattr(self.cfg, '_path_manager'):
+            self.cfg._path_manager.set_device_info(udid=SIMULATOR_DEVICE_ID, name=SIMULATOR_DEVICE_ID)
+        self._restart()
+        self._session_initialized = True
+        return True
+
+    def validate_session(self) -> bool:
+        return self._session_initialized
+
+    def disconnect(self):
+        self._session_initialized = False
+        logger.debug("SimulatedDriver disconnected.")
+
+    def get_device_udid(self) -> Optional[str]:
+        return SIMULATOR_DEVICE_ID if self._session_initialized else None
+
+    def get_session_recovery_stats(self) -> Dict[str, Any]:
+        return {}
+
+    def get_capture_stats(self) -> Dict[str, Any]:
+        return {}
+
+    def get_simulation_stats(self) -> Dict[str, Any]:
+        """Actions performed and how many of them followed a recorded edge."""
+        return {
+            "recorded_screens": len(self.session.screens),
+            "actions_performed": self.actions_performed,
+            "transitions_followed": self.transitions_followed,
+            "transitions_missed": self.transitions_missed,
+        }
+
+    # ------ Capture ------
+
+    def get_page_source(self) -> Optional[str]:
+        screen = self.current_screen
+        return screen.xml_content if screen else None
+
+    def get_screenshot_bytes(self) -> Optional[bytes]:
+        screen = self.current_screen
+        if screen and screen.screenshot_path:
+            try:
+                with open(screen.screenshot_path, "rb") as f:
+                    return f.read()
+            except OSError as e:
+                logger.warning(f"⚠️ Cannot read recorded screenshot {screen.screenshot_path}: {e}")
+        if self._current_screen_id not in self._placeholders:
+            self._placeholders[self._current_screen_id] = _placeholder_png(self._current_screen_id)
+        return self._placeholders[self._current_screen_id]
+
+    def get_screenshot_as_base64(self) -> Optional[str]:
+        data = self.get_screenshot_bytes()
+        return base64.b64encode(data).decode("ascii") if data else None
+
+    def get_window_size(self) -> Dict[str, int]:
+        return dict(self._window_size)
+
+    # ------ App context ------
+
+    def get_current_package(self) -> Optional[str]:
+        return self.session.app_package if self._in_app else LAUNCHER_PACKAGE
+
+    def get_current_activity(self) -> Optional[str]:
+        screen = self.current_screen
+        return screen.activity_name if self._in_app and screen else None
+
+    def get_current_app_context(self, refresh: bool = False) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        return self.get_current_package(), self.get_current_activity()
+
+    def invalidate_foreground_context(self) -> None:
+        pass
+
+    def terminate_app(self, package_name: str) -> bool:
+        if package_name == self.session.app_package:
+            self._in_app = False
+        return True
+
+    def launch_app(self) -> bool:
+        self._restart()
+        return True
+
+    def start_activity(self, app_package: str, app_activity: str, wait_after_launch: float = 5.0) -> bool:
+        self._restart()
+        return True
+
+    def reset_app(self) -> bool:
+        self._restart()
+        return True
+
+    def press_home(self) -> bool:
+        self._in_app = False
+        return True
+
+    # ------ Actions ------
+
+    def tap(self, target_identifier: Optional[str], bbox: Optional[Dict[str, Any]] = None) -> bool:
+        return self._perform("click", target_identifier, bbox)
+
+    def tap_sequence(self, bboxes: List[Dict[str, Any]], gap_ms: int = 150) -> bool:
+        return all(self._perform("click", None, bbox) for bbox in bboxes)
+
+    def input_text(self, target_identifier: str, text: str) -> bool:
+        return self._perform("input", target_identifier)
+
+    def scroll(self, direction: str, bounds: Optional[Tuple[int, int, int, int]] = None) -> bool:
+        return self._perform(SCROLL_ACTION_OF_DIRECTION.get(direction, f"scroll_{direction}"))
+
+    def scroll_gesture(self, bounds: Tuple[int, int, int, int], direction: str, percent: float) -> bool:
+        return self.scroll(direction, bounds)
+
+    def long_press(self, target_identifier: str, duration: int, bbox: Optional[Dict[str, Any]] = None) -> bool:
+        return self._perform("long_press", target_identifier, bbox)
+
+    def double_tap(self, target_identifier: Optional[str], bbox: Optional[Dict[str, Any]] = None) -> bool:
+        return self._perform("double_tap", target_identifier, bbox)
+
+    def clear_text(self, target_identifier: str) -> bool:
+        return self._perform("clear_text", target_identifier)
+
+    def replace_text(self, target_identifier: str, text: str) -> bool:
+        return self._perform("replace_text", target_identifier)
+
+    def flick(self, direction: str) -> bool:
+        return self._perform("flick")
+
+    def press_back(self) -> bool:
+        return self._perform("back")
+
+    def press_back_button(self) -> bool:
+        return self.press_back()
+
+    def wait_for_toast_to_dismiss(self, timeout_ms: int = 1200):
+        pass
+
+    # ------ Video (not recorded in a simulation) ------
+
+    def start_video_recording(self, **kwargs) -> bool:
+        logger.debug("Video recording is not available in the simulator")
+        return False
+
+    def stop_video_recording(self) -> Optional[str]:
+        return None
+
+    def save_video_recording(self, video_data: str, file_path: str) -> bool:
+        return False
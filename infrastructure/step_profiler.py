@@ -0,0 +1,157 @@
+"""
+Span profiler for crawler steps.
+
+``CrawlerLoop`` starts a ``StepProfiler`` at the beginning of every step.
+Code anywhere below it opens spans with the module-level ``span(name)``.
+When no step is being profiled, ``span`` returns a no-op context manager,
+so helpers (AgentAssistant, AppiumHelper) can be instrumented without
+knowing about the loop:
+
+    with step_profiler.span("model_call"):
+        response = adapter.generate_response(...)
+
+Spans nest. Each span is kept as ``(name, start_ms, duration_ms, depth)``,
+with ``start_ms`` relative to the start of the step. ``to_chrome_trace``
+and ``to_speedscope`` turn stored steps into files for chrome://tracing,
+Perfetto or https://www.speedscope.app.
+"""
+
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# (name, start_ms, duration_ms, depth)
+Span = Tuple[str, float, float, int]
+
+_active_profiler: ContextVar[Optional["StepProfiler"]] = ContextVar("active_step_profiler", default=None)
+
+
+class StepProfiler:
+    """Collects the spans of one step at a time."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._origin: Optional[float] = None
+        self._depth = 0
+
+    def start_step(self) -> None:
+        """Forget the previous step's spans and make this profiler the active one."""
+        self.spans = []
+        self._depth = 0
+        self._origin = time.perf_counter()
+        _active_profiler.set(self)
+
+    def finish_step(self) -> float:
+        """Deactivate the profiler and return the step's wall time in ms."""
+        if _active_profiler.get() is self:
+            _active_profiler.set(None)
+        if self._origin is None:
+            return 0.0
+        total_ms = (time.perf_counter() - self._origin) * 1000.0
+        self._origin = None
+        return total_ms
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        if self._origin is None:
+            yield
+            return
+        start = time.perf_counter()
+        depth = self._depth
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth = depth
+            self.spans.append((name, (start - self._origin) * 1000.0, (time.perf_counter() - start) * 1000.0, depth))
+
+    def totals(self, top_level_only: bool = False) -> Dict[str, float]:
+        """Milliseconds per span name (a name used several times is summed)."""
+        totals: Dict[str, float] = {}
+        for name, _, duration_ms, depth in self.spans:
+            if not top_level_only or depth == 0:
+                totals[name] = totals.get(name, 0.0) + duration_ms
+        return totals
+
+
+def span(name: str) -> ContextManager[None]:
+    """Span of the step being profiled, or a no-op outside a profiled step."""
+    profiler = _active_profiler.get()
+    return profiler.span(name) if profiler is not None else nullcontext()
+
+
+def profiled(name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap ``func`` so every call is a span (for callables handed to other code, e.g. LangChain lambdas)."""
+    def wrapper(*args, **kwargs):
+        with span(name):
+            return func(*args, **kwargs)
+    wrapper.__name__ = getattr(func, "__name__", name)
+    return wrapper
+
+
+def encode_spans(spans: Sequence[Span]) -> List[List[Any]]:
+    """Compact JSON-ready form, spans ordered by start time."""
+    return [[name, round(start_ms, 2), round(duration_ms, 2), depth]
+            for name, start_ms, duration_ms, depth in sorted(spans, key=lambda s: (s[1], s[3]))]
+
+
+def to_chrome_trace(steps: Sequence[Dict[str, Any]], process_name: str = "crawler") -> Dict[str, Any]:
+    """Chrome trace event JSON for stored steps.
+
+    Args:
+        steps: Rows with ``step_number``, ``started_ms`` (since run start), ``total_ms`` and ``spans``
+    """
+    events: List[Dict[str, Any]] = [
+        {"name": "process_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": process_name}},
+    ]
+    for step in steps:
+        base_us = step["started_ms"] * 1000.0
+        events.append({"name": f"step {step['step_number']}", "cat": "step", "ph": "X", "pid": 1, "tid": 1,
+                       "ts": round(base_us, 1), "dur": round(step["total_ms"] * 1000.0, 1)})
+        for name, start_ms, duration_ms, depth in step["spans"]:
+            events.append({"name": name, "cat": "phase", "ph": "X", "pid": 1, "tid": 1,
+                           "ts": round(base_us + start_ms * 1000.0, 1), "dur": round(duration_ms * 1000.0, 1),
+                           "args": {"step": step["step_number"], "depth": depth}})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def to_speedscope(steps: Sequence[Dict[str, Any]], name: str = "crawler run") -> Dict[str, Any]:
+    """Speedscope evented profile for stored steps (same rows as ``to_chrome_trace``)."""
+    frames: List[Dict[str, str]] = []
+    frame_index: Dict[str, int] = {}
+
+    def frame(frame_name: str) -> int:
+        if frame_name not in frame_index:
+            frame_index[frame_name] = len(frames)
+            frames.append({"name": frame_name})
+        return frame_index[frame_name]
+
+    events: List[Dict[str, Any]] = []
+    end_value = 0.0
+    for step in steps:
+        base = step["started_ms"]
+        step_end = base + step["total_ms"]
+        # Children may outlast a rounded parent by a few microseconds; clamp so events stay nested
+        intervals = [(base, step_end, frame("step"))]
+        intervals += [(base + start_ms, min(base + start_ms + duration_ms, step_end), frame(span_name))
+                      for span_name, start_ms, duration_ms, _ in step["spans"]]
+        stack: List[Tuple[float, int]] = []
+        for start, end, frame_id in sorted(intervals, key=lambda item: (item[0], -item[1])):
+            while stack and stack[-1][0] <= start:
+                events.append({"type": "C", "frame": stack[-1][1], "at": stack[-1][0]})
+                stack.pop()
+            end = min(end, stack[-1][0]) if stack else end
+            events.append({"type": "O", "frame": frame_id, "at": start})
+            stack.append((end, frame_id))
+        while stack:
+            events.append({"type": "C", "frame": stack[-1][1], "at": stack[-1][0]})
+            stack.pop()
+        end_value = max(end_value, step_end)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{"type": "evented", "name": name, "unit": "milliseconds",
+                      "startValue": 0, "endValue": end_value, "events": events}],
+        "exporter": "traverser step profiler",
+    }
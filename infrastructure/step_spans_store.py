@@ -0,0 +1,94 @@
+"""
+Storage for the per-step spans of ``infrastructure.step_profiler``.
+
+One row per step in ``step_spans``: when the step started (ms since run
+start), its wall time and its spans as a compact JSON array of
+``[name, start_ms, duration_ms, depth]``. ``summarize_run_spans`` aggregates
+a run's rows per span name for the run-end summary.
+"""
+
+import json
+import logging
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+STEP_SPANS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS step_spans (
+    run_id INTEGER NOT NULL,
+    step_number INTEGER NOT NULL,
+    started_ms REAL NOT NULL,
+    total_ms REAL NOT NULL,
+    spans_json TEXT NOT NULL,
+    PRIMARY KEY (run_id, step_number)
+) WITHOUT ROWID;
+"""
+
+
+def ensure_step_spans_table(conn: sqlite3.Connection) -> None:
+    conn.executescript(STEP_SPANS_SCHEMA)
+
+
+def record_step_spans(conn: sqlite3.Connection, run_id: int, step_number: int, started_ms: float,
+                      total_ms: float, spans: Sequence[Sequence[Any]]) -> None:
+    """Store the encoded spans of a step. The caller commits."""
+    conn.execute(
+        "INSERT OR REPLACE INTO step_spans (run_id, step_number, started_ms, total_ms, spans_json) VALUES (?, ?, ?, ?, ?)",
+        (run_id, step_number, round(started_ms, 1), round(total_ms, 1), json.dumps(spans, separators=(",", ":"))),
+    )
+
+
+def get_step_spans(conn: sqlite3.Connection, run_id: int) -> List[Dict[str, Any]]:
+    """Stored steps of a run ordered by step, with their spans decoded (empty if the table is missing)."""
+    try:
+        rows = conn.execute(
+            "SELECT step_number, started_ms, total_ms, spans_json FROM step_spans WHERE run_id = ? ORDER BY step_number",
+            (run_id,),
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    steps = []
+    for step_number, started_ms, total_ms, spans_json in rows:
+        try:
+            spans = json.loads(spans_json)
+        except ValueError:
+            logger.debug(f"Skipping unreadable spans of run {run_id} step {step_number}")
+            continue
+        steps.append({"step_number": step_number, "started_ms": started_ms, "total_ms": total_ms, "spans": spans})
+    return steps
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def summarize_run_spans(conn: sqlite3.Connection, run_id: int) -> Dict[str, Dict[str, float]]:
+    """Per span name: steps it ran in, total, mean per step, p50, p95 and max (ms per step).
+
+    A name used several times in a step (e.g. hashing before and after the action)
+    counts once per step with the summed duration. The ``step`` entry is the whole step.
+    """
+    per_name: Dict[str, List[float]] = {}
+    for step in get_step_spans(conn, run_id):
+        step_totals: Dict[str, float] = {}
+        for name, _, duration_ms, _ in step["spans"]:
+            step_totals[name] = step_totals.get(name, 0.0) + duration_ms
+        step_totals["step"] = step["total_ms"]
+        for name, value in step_totals.items():
+            per_name.setdefault(name, []).append(value)
+    summary = {}
+    for name, values in per_name.items():
+        values.sort()
+        total = sum(values)
+        summary[name] = {"steps": len(values), "total_ms": round(total, 1), "mean_ms": round(total / len(values), 1),
+                         "p50_ms": round(_percentile(values, 0.5), 1), "p95_ms": round(_percentile(values, 0.95), 1),
+                         "max_ms": round(values[-1], 1)}
+    return dict(sorted(summary.items(), key=lambda item: -item[1]["total_ms"]))
+
+
+def clear_step_spans(conn: sqlite3.Connection, run_id: Optional[int] = None) -> None:
+    """Delete the spans of one run, or of all runs. The caller commits."""
+    where, params = ("WHERE run_id = ?", (run_id,)) if run_id is not None else ("", ())
+    conn.execute(f"DELETE FROM step_spans {where}", params)
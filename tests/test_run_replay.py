@@ -0,0 +1,70 @@
+"""Replayed actions are resolved against the live screen, not the last AI-decided one."""
+
+from unittest.mock import Mock
+
+import pytest
+
+from config.app_config import Config
+from domain.agent_assistant import AgentAssistant, Tools
+from domain.model_adapters import SimulatedAdapter
+from domain.run_replay import ReplayStep
+from infrastructure.user_config_store import UserConfigStore
+
+SCREEN_A = (
+    '<hierarchy><node class="android.widget.FrameLayout" bounds="[0,0][1080,1920]">'
+    '<node class="android.widget.Button" resource-id="app:id/next" text="Next" clickable="true" bounds="[0,0][100,100]"/>'
+    '</node></hierarchy>'
+)
+SCREEN_B = (
+    '<hierarchy><node class="android.widget.FrameLayout" bounds="[0,0][1080,1920]">'
+    '<node class="android.widget.TextView" resource-id="app:id/title" text="Title" bounds="[0,0][1080,200]"/>'
+    '<node class="android.widget.Button" resource-id="app:id/next" text="Next" clickable="true" bounds="[500,1600][700,1800]"/>'
+    '</node></hierarchy>'
+)
+
+
+@pytest.fixture
+def assistant(tmp_path):
+    config = Config(UserConfigStore(str(tmp_path / "config.db")))
+    return AgentAssistant(config, tools=Tools(driver=Mock()), model_adapter=SimulatedAdapter([]))
+
+
+def _replay_step(action):
+    return ReplayStep(step_number=1, action=action, from_hash="x_v", from_visual_hash="v",
+                      to_hash=None, to_visual_hash=None, ai_response_time_ms=0.0)
+
+
+@pytest.mark.unit
+def test_replayed_identifier_resolves_on_live_screen(assistant):
+    assistant.prepare_screen_context(SCREEN_A)  # screen of the last AI-decided step
+    step = _replay_step({"action": "click", "target_identifier": "app:id/next",
+                         "target_bounding_box": {"top_left": [0, 0], "bottom_right": [100, 100]}})
+
+    assistant.prepare_screen_context(SCREEN_B, build_element_table=True)
+    action = step.live_action()
+    assistant._resolve_action_target("click", action)
+
+    assert action["target_bounding_box"] == {"top_left": [1600, 500], "bottom_right": [1800, 700]}
+    assert "target_bounding_box" in step.action  # the recording itself is untouched
+
+
+@pytest.mark.unit
+def test_replayed_index_reference_uses_live_element_table(assistant):
+    assistant.prepare_screen_context(SCREEN_A, build_element_table=True)  # "#N" means another row here
+
+    # The recording was made on screen B, so its reference is B's row number
+    assistant.prepare_screen_context(SCREEN_B, build_element_table=True)
+    recorded_index = next(entry.index for entry in assistant._current_element_table.entries
+                      if entry.resource_id == "app:id/next")
+    action = _replay_step({"action": "click", "target_identifier": f"#{recorded_index}"}).live_action()
+    assistant._resolve_action_target("click", action)
+
+    assert action["element_resolution"] == "element_table"
+    assert action["target_bounding_box"] == {"top_left": [1600, 500], "bottom_right": [1800, 700]}
+
+
+@pytest.mark.unit
+def test_coordinate_only_replay_keeps_recorded_bounds():
+    bbox = {"top_left": [10, 10], "bottom_right": [20, 20]}
+    action = _replay_step({"action": "click", "target_bounding_box": bbox}).live_action()
+    assert action["target_bounding_box"] == bbox
@@ -0,0 +1,111 @@
+"""
+Benchmark master annotation throughput: full JSON rewrite per screenshot vs the append-only log.
+
+- rewrite: load ``annotations.json``, add one screenshot, dump it again with
+  ``indent=4`` (what ``ScreenshotAnnotator`` used to do for every screenshot)
+- append: ``AnnotationStore.append`` per screenshot, then one ``export`` at the end
+
+The rewrite path is quadratic, so it can be capped with ``--rewrite-screenshots``;
+its per-screenshot cost at the cap is printed next to the append path's.
+Both exports are checked to contain the same annotations.
+
+Example:
+    python tools/benchmark_annotation_store.py --screenshots 5000 --elements 25
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from infrastructure.annotation_store import AnnotationStore
+
+
+def make_elements(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    elements = []
+    for index in range(count):
+        x, y = rng.randint(0, 1000), rng.randint(0, 2000)
+        elements.append({
+            "resource_id": f"com.example:id/element_{index}",
+            "class": rng.choice(["android.widget.Button", "android.widget.TextView", "android.widget.EditText"]),
+            "text": f"Label {rng.randint(0, 999)}",
+            "content_desc": "",
+            "clickable": rng.random() < 0.5,
+            "bounds": [x, y, x + rng.randint(20, 400), y + rng.randint(20, 200)],
+        })
+    return elements
+
+
+def rewrite_path(directory: str, screenshots: List[str], elements: List[List[Dict[str, Any]]]) -> float:
+    path = os.path.join(directory, "annotations.json")
+    start = time.perf_counter()
+    for name, data in zip(screenshots, elements):
+        annotations = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                annotations = json.load(f)
+        annotations[name] = data
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(annotations, f, indent=4, ensure_ascii=False)
+    return time.perf_counter() - start
+
+
+def append_path(directory: str, screenshots: List[str], elements: List[List[Dict[str, Any]]],
+                fsync: bool) -> Dict[str, float]:
+    store = AnnotationStore(directory, fsync=fsync)
+    start = time.perf_counter()
+    for name, data in zip(screenshots, elements):
+        store.append(name, data)
+    store.close()
+    append_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    store.export()
+    return {"append": append_seconds, "export": time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark master annotation writes: JSON rewrite vs append-only log.")
+    parser.add_argument("--screenshots", type=int, default=5000)
+    parser.add_argument("--elements", type=int, default=25, help="UI elements per screenshot")
+    parser.add_argument("--rewrite-screenshots", type=int, default=None,
+                        help="Cap for the rewrite path (default: same as --screenshots)")
+    parser.add_argument("--fsync", action="store_true", help="fsync every appended line")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    screenshots = [f"screen_{index}_step{index}.png" for index in range(args.screenshots)]
+    elements = [make_elements(rng, args.elements) for _ in screenshots]
+    rewrite_count = min(args.rewrite_screenshots or args.screenshots, args.screenshots)
+
+    with tempfile.TemporaryDirectory(prefix="annotation_bench_") as rewrite_dir, \
+            tempfile.TemporaryDirectory(prefix="annotation_bench_") as append_dir:
+        rewrite_seconds = rewrite_path(rewrite_dir, screenshots[:rewrite_count], elements[:rewrite_count])
+        append_times = append_path(append_dir, screenshots, elements, args.fsync)
+
+        with open(os.path.join(append_dir, "annotations.json"), "r", encoding="utf-8") as f:
+            exported = json.load(f)
+        with open(os.path.join(rewrite_dir, "annotations.json"), "r", encoding="utf-8") as f:
+            rewritten = json.load(f)
+        final_size = os.path.getsize(os.path.join(append_dir, "annotations.json"))
+
+    print(f"{args.screenshots} screenshots x {args.elements} elements, final file {final_size / 1e6:.1f} MB")
+    print(f"rewrite: {rewrite_seconds:.2f}s for {rewrite_count} screenshots "
+          f"({rewrite_count / rewrite_seconds:.0f} screenshots/s, {rewrite_seconds / rewrite_count * 1000:.2f} ms each)")
+    total_append = append_times["append"] + append_times["export"]
+    print(f"append:  {append_times['append']:.2f}s for {args.screenshots} screenshots "
+          f"({args.screenshots / append_times['append']:.0f} screenshots/s, "
+          f"{append_times['append'] / args.screenshots * 1000:.3f} ms each{', fsync' if args.fsync else ''}) "
+          f"+ export {append_times['export']:.2f}s = {total_append:.2f}s")
+    if any(exported.get(name) != data for name, data in rewritten.items()) or len(exported) != args.screenshots:
+        print("MISMATCH: exported annotations differ from the rewritten file")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Measure the per-step cost of the app context check: synchronous probe vs background watchdog.
+
+Each simulated step spends ``--step-ms`` on other work (screen capture, AI call,
+action) and checks the app context at its start:
+
+- sync: the foreground package is probed on every step, as ``ensure_in_app`` did
+  (``--appium`` probes through an Appium session, otherwise through adb)
+- watchdog: ``AppContextWatchdog`` polls over adb in the background and the step
+  only asks ``needs_check()``; a stale or flagged watchdog falls back to a probe
+
+Without a device, ``--fake-adb DIR`` writes an adb shim into DIR that answers
+``dumpsys window`` with a fixed focus line after ``--fake-latency-ms``.
+
+Example:
+    python tools/benchmark_context_check.py --udid emulator-5554 --package com.example.app --steps 30
+    python tools/benchmark_context_check.py --fake-adb /tmp/fakeadb --steps 50
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from infrastructure.app_context_watchdog import AppContextWatchdog, adb_foreground_probe
+
+FAKE_PACKAGE = "com.example.app"
+
+FAKE_ADB_SCRIPT = '''#!{python}
+"""Fake adb: answers dumpsys window with a focus line for {package}."""
+import sys
+import time
+
+args = sys.argv[1:]
+if args[:1] == ["-s"]:
+    args = args[2:]
+if args[:3] == ["shell", "dumpsys", "window"]:
+    time.sleep({latency_s})
+    print("  mCurrentFocus=Window{{1a2b3c u0 {package}/{package}.MainActivity}}")
+    print("  mFocusedApp=ActivityRecord{{4d5e6f u0 {package}/.MainActivity t12}}")
+else:
+    sys.stderr.write("fake adb: unsupported command %r\\n" % args)
+    sys.exit(1)
+'''
+
+
+def write_fake_adb(directory: Path, latency_ms: float) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    script = directory / "adb"
+    script.write_text(FAKE_ADB_SCRIPT.format(python=sys.executable, package=FAKE_PACKAGE,
+                                             latency_s=latency_ms / 1000))
+    script.chmod(0o755)
+    return script
+
+
+def run_steps(check: Callable[[], None], steps: int, step_ms: float) -> List[float]:
+    """Return the context check time of each step in ms."""
+    overhead: List[float] = []
+    for _ in range(steps):
+        start = time.perf_counter()
+        check()
+        overhead.append((time.perf_counter() - start) * 1000)
+        time.sleep(step_ms / 1000)
+    return overhead
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the per-step app context check.")
+    parser.add_argument("--udid", help="Device serial (default: adb's only device)")
+    parser.add_argument("--adb-path", default="adb")
+    parser.add_argument("--package", help="Target package (default: the package in the foreground at start)")
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--step-ms", type=float, default=1500.0, help="Simulated work per step")
+    parser.add_argument("--interval", type=float, default=1.0, help="Watchdog poll interval in seconds")
+    parser.add_argument("--appium", action="store_true", help="Probe through an Appium session in sync mode")
+    parser.add_argument("--fake-adb", metavar="DIR", help="Write a fake adb shim into DIR and benchmark against it")
+    parser.add_argument("--fake-latency-ms", type=float, default=60.0, help="Latency of the fake dumpsys")
+    args = parser.parse_args()
+
+    adb_path = args.adb_path
+    if args.fake_adb:
+        adb_path = str(write_fake_adb(Path(args.fake_adb), args.fake_latency_ms))
+        print(f"Using fake adb {adb_path}")
+    adb_probe = adb_foreground_probe(adb_path, args.udid)
+    package = args.package or adb_probe()
+    if not package:
+        print("Could not read the foreground package over adb.")
+        return
+    print(f"Target package {package}, {args.steps} steps of {args.step_ms:.0f} ms")
+
+    driver = None
+    sync_probe: Callable[[], Optional[str]] = adb_probe
+    if args.appium:
+        from config.app_config import Config
+        from infrastructure.appium_driver import AppiumDriver
+        driver = AppiumDriver(Config())
+        if not driver.initialize_session(device_udid=args.udid):
+            print("Could not start an Appium session; probing over adb in sync mode.")
+            driver = None
+        else:
+            sync_probe = lambda: (driver.get_current_app_context(refresh=True) or (None, None))[0]
+
+    results = {}
+    try:
+        results["sync"] = run_steps(sync_probe, args.steps, args.step_ms)
+    finally:
+        if driver:
+            driver.disconnect()
+
+    watchdog = AppContextWatchdog(adb_probe, [package], args.interval)
+    watchdog.check_once()
+    watchdog.start()
+
+    def _watchdog_check() -> None:
+        if watchdog.needs_check():
+            adb_probe()
+            watchdog.acknowledge()
+
+    try:
+        results["watchdog"] = run_steps(_watchdog_check, args.steps, args.step_ms)
+    finally:
+        watchdog.stop()
+
+    print(f"\n{'mode':<9} {'mean ms/step':>13} {'p50 ms':>8} {'max ms':>8}")
+    for mode, overhead in results.items():
+        print(f"{mode:<9} {statistics.mean(overhead):>13.2f} {statistics.median(overhead):>8.2f} {max(overhead):>8.2f}")
+    stats = watchdog.get_stats()
+    print(f"\nwatchdog: {stats['probes']} background probes, {stats['checks_skipped']}/{args.steps} "
+          f"steps skipped the probe, {stats['escapes_detected']} escapes")
+
+
+if __name__ == "__main__":
+    main()
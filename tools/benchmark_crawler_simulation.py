@@ -0,0 +1,243 @@
+"""
+Benchmark the host-side crawler pipeline offline: steps/sec and memory, no device or model.
+
+``CrawlerLoop`` runs end to end against ``SimulatedDriver`` (screens and transitions
+of a recorded session DB) and ``SimulatedAdapter`` (recorded actions, fixed latency),
+so capture, hashing, state lookup, prompt building, parsing, action dispatch and
+persistence are measured in isolation. Set ``--latency-ms`` to a model's typical
+response time to see the pipeline with the AI wait included, or leave it at 0 to
+measure host overhead alone.
+
+The crawl writes its own session into a temporary output directory with a private
+config store, so the user's settings and sessions are not touched. Without a
+recorded session, ``--synthetic N`` generates one with N screens.
+
+Example:
+    python tools/benchmark_crawler_simulation.py --db-path output_data/sessions/<session>/database/<pkg>_crawl_data.db --steps 200
+    python tools/benchmark_crawler_simulation.py --synthetic 40 --steps 300 --latency-ms 50 --tracemalloc
+"""
+import argparse
+import json
+import random
+import resource
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from infrastructure.run_timeseries_store import TIMESERIES_PHASES, get_run_timeseries, summarize_phases
+from infrastructure.simulated_driver import load_recorded_session
+
+SYNTHETIC_PACKAGE = "com.example.simulated"
+SYNTHETIC_ACTIVITY = f"{SYNTHETIC_PACKAGE}.MainActivity"
+SYNTHETIC_BUTTONS = 12
+
+
+def _synthetic_xml(screen: int, buttons: int) -> str:
+    nodes = "".join(
+        f'<node index="{i}" class="android.widget.Button" resource-id="{SYNTHETIC_PACKAGE}:id/s{screen}_b{i}" '
+        f'text="Item {screen}.{i}" clickable="true" enabled="true" '
+        f'bounds="[40,{200 + i * 160}][1040,{340 + i * 160}]" />'
+        for i in range(buttons)
+    )
+    return (f'<?xml version="1.0" encoding="UTF-8"?><hierarchy rotation="0">'
+            f'<node index="0" class="android.widget.FrameLayout" package="{SYNTHETIC_PACKAGE}" bounds="[0,0][1080,2400]">'
+            f'<node index="0" class="android.widget.TextView" text="Screen {screen}" bounds="[40,60][1040,180]" />'
+            f'{nodes}</node></hierarchy>')
+
+
+def write_synthetic_session(db_path: str, screens: int, buttons: int = SYNTHETIC_BUTTONS, seed: int = 0) -> None:
+    """Write a session DB with a random screen graph and one run that visits every screen."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(
+            """
+            CREATE TABLE runs (run_id INTEGER PRIMARY KEY, app_package TEXT NOT NULL, start_activity TEXT NOT NULL,
+                               start_time DATETIME, end_time DATETIME, status TEXT);
+            CREATE TABLE screens (screen_id INTEGER PRIMARY KEY, composite_hash TEXT NOT NULL UNIQUE,
+                                  xml_hash TEXT NOT NULL, visual_hash TEXT NOT NULL, screenshot_path TEXT,
+                                  activity_name TEXT, xml_content TEXT);
+            CREATE TABLE steps_log (step_log_id INTEGER PRIMARY KEY, run_id INTEGER NOT NULL, step_number INTEGER,
+                                    from_screen_id INTEGER, to_screen_id INTEGER, ai_suggestion_json TEXT,
+                                    execution_success BOOLEAN, ai_response_time_ms REAL);
+            """
+        )
+        conn.execute("INSERT INTO runs (run_id, app_package, start_activity) VALUES (1, ?, ?)",
+                     (SYNTHETIC_PACKAGE, SYNTHETIC_ACTIVITY))
+        conn.executemany(
+            "INSERT INTO screens (screen_id, composite_hash, xml_hash, visual_hash, activity_name, xml_content) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(s, f"x{s}_v{s}", f"x{s}", f"v{s}", f"{SYNTHETIC_ACTIVITY}{s % 5}", _synthetic_xml(s, buttons))
+             for s in range(1, screens + 1)],
+        )
+        step_number = 0
+        for screen in range(1, screens + 1):
+            for button in range(buttons):
+                # One edge to the next screen keeps them all reachable; the rest are random
+                target = screen % screens + 1 if button == 0 else rng.randint(1, screens)
+                action = {
+                    "action": "click",
+                    "target_identifier": f"{SYNTHETIC_PACKAGE}:id/s{screen}_b{button}",
+                    "target_bounding_box": {"top_left": [200 + button * 160, 40],
+                                            "bottom_right": [340 + button * 160, 1040]},
+                    "reasoning": "Synthetic step",
+                    "focus_influence": [],
+                }
+                step_number += 1
+                conn.execute(
+                    "INSERT INTO steps_log (run_id, step_number, from_screen_id, to_screen_id, ai_suggestion_json, "
+                    "execution_success, ai_response_time_ms) VALUES (1, ?, ?, ?, ?, 1, 0)",
+                    (step_number, screen, target, json.dumps(action)),
+                )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def build_config(work_dir: Path, db_path: str, run_id: int, steps: int, latency_ms: float, jitter_ms: float):
+    """Config on a private store, set up to crawl the recorded session without waits or devices."""
+    import config.app_config as app_config
+    from config.app_config import Config
+    from infrastructure.user_config_store import UserConfigStore
+
+    session = load_recorded_session(db_path, run_id or None)
+    config = Config(UserConfigStore(str(work_dir / "config.db")))
+    # A fresh store skips the path templates ("{session_dir}/..."); the session paths need them
+    settings: Dict[str, Any] = {
+        key: value for key, value in vars(app_config).items()
+        if key.isupper() and isinstance(value, str) and "{" in value
+    }
+    settings.update({
+        "OUTPUT_DATA_DIR": str(work_dir / "output_data"),
+        "PAUSE_FLAG_PATH": str(work_dir / "crawler_pause.flag"),
+        "APP_PACKAGE": session.app_package,
+        "APP_ACTIVITY": session.start_activity,
+        "SIMULATOR_SOURCE_DB": str(Path(db_path).resolve()),
+        "SIMULATOR_RUN_ID": run_id,
+        "SIMULATOR_MODEL_LATENCY_MS": latency_ms,
+        "SIMULATOR_MODEL_JITTER_MS": jitter_ms,
+        "MAX_CRAWL_STEPS": steps,
+        "CRAWL_MODE": "steps",
+        "WAIT_AFTER_ACTION": 0.0,
+        "STABILITY_WAIT": 0.0,
+        "APP_CONTEXT_WATCHDOG_INTERVAL": 0,
+        "ENABLE_TRAFFIC_CAPTURE": False,
+        "ENABLE_VIDEO_RECORDING": False,
+        "ENABLE_MOBSF_ANALYSIS": False,
+        "ENABLE_IMAGE_CONTEXT": False,
+    })
+    for key, value in settings.items():
+        config.set(key, value)
+    return config
+
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_benchmark(config, steps: int, trace_memory: bool) -> Dict[str, Any]:
+    """Crawl ``steps`` steps and return throughput, step latency, phase and memory figures."""
+    from core.crawler_loop import CrawlerLoop
+
+    if trace_memory:
+        tracemalloc.start()
+    crawler = CrawlerLoop(config)
+    started = time.perf_counter()
+    crawler.run(max_steps=steps)
+    wall_s = time.perf_counter() - started
+    heap_peak_mb = tracemalloc.get_traced_memory()[1] / 1e6 if trace_memory else None
+    if trace_memory:
+        tracemalloc.stop()
+
+    db_path = crawler.db_manager.db_path if crawler.db_manager else None
+    result: Dict[str, Any] = {
+        "steps": crawler.step_count,
+        "wall_s": round(wall_s, 3),
+        "steps_per_sec": round(crawler.step_count / wall_s, 2) if wall_s > 0 else None,
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1e6 if sys.platform == "darwin" else 1e3), 1),
+        "heap_peak_mb": round(heap_peak_mb, 1) if heap_peak_mb is not None else None,
+    }
+    if not db_path or not Path(db_path).is_file():
+        print("⚠️ The crawl wrote no session database; only wall time and memory are reported.")
+        return result
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        row = conn.execute("SELECT run_id FROM runs ORDER BY run_id DESC LIMIT 1").fetchone()
+        series = get_run_timeseries(conn, row[0]) if row else []
+        meta_row = conn.execute("SELECT meta_json FROM run_meta WHERE run_id = ? ORDER BY meta_id DESC LIMIT 1",
+                                (row[0],)).fetchone() if row else None
+    finally:
+        conn.close()
+    step_ms = [sum(point.get(f"{phase}_ms") or 0.0 for phase in TIMESERIES_PHASES) for point in series]
+    if step_ms:
+        result.update(
+            # Phase time only: excludes crawler startup and anything between the recorded phases
+            pipeline_steps_per_sec=round(len(step_ms) / (sum(step_ms) / 1000.0), 2) if sum(step_ms) else None,
+            step_mean_ms=round(statistics.mean(step_ms), 1),
+            step_p50_ms=round(_percentile(step_ms, 0.5), 1),
+            step_p95_ms=round(_percentile(step_ms, 0.95), 1),
+            phases_mean_ms={phase: round(total / len(step_ms), 1) for phase, total in summarize_phases(series).items()},
+            unique_screens=series[-1].get("unique_screens"),
+        )
+    if meta_row and meta_row[0]:
+        result["simulation"] = json.loads(meta_row[0]).get("simulation")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the crawler pipeline on a simulated device and model.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--db-path", help="Recorded session DB (<pkg>_crawl_data.db)")
+    source.add_argument("--synthetic", type=int, metavar="SCREENS", help="Generate a session with this many screens")
+    parser.add_argument("--run-id", type=int, default=0, help="Recorded run to start from (0 = latest)")
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated model response time")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter on the model response time")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report the Python heap peak (slows the run)")
+    parser.add_argument("--work-dir", help="Keep the crawl output here instead of a temporary directory")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="crawler_sim_") as tmp:
+        work_dir = Path(args.work_dir or tmp).resolve()
+        work_dir.mkdir(parents=True, exist_ok=True)
+        db_path = args.db_path
+        if args.synthetic:
+            db_path = str(work_dir / "synthetic_crawl_data.db")
+            Path(db_path).unlink(missing_ok=True)
+            write_synthetic_session(db_path, args.synthetic)
+            print(f"Generated a synthetic session with {args.synthetic} screens: {db_path}")
+
+        config = build_config(work_dir, db_path, args.run_id, args.steps, args.latency_ms, args.jitter_ms)
+        result = run_benchmark(config, args.steps, args.tracemalloc)
+
+    result.update(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    print(f"\nSteps: {result['steps']} in {result['wall_s']:.1f}s wall "
+          f"(simulated model latency {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms)")
+    print(f"Throughput: {result['steps_per_sec']} steps/sec (wall time)")
+    if result.get("step_mean_ms") is not None:
+        print(f"Pipeline: {result['pipeline_steps_per_sec']} steps/sec (phase time only); "
+              f"step mean {result['step_mean_ms']} ms, "
+              f"p50 {result['step_p50_ms']} ms, p95 {result['step_p95_ms']} ms; "
+              f"{result['unique_screens']} unique screens")
+        print("Phases (mean ms per step): " + ", ".join(f"{phase} {ms}" for phase, ms in result["phases_mean_ms"].items()))
+    print(f"Memory: peak RSS {result['peak_rss_mb']} MB"
+          + (f", Python heap peak {result['heap_peak_mb']} MB" if result["heap_peak_mb"] is not None else ""))
+    if result.get("simulation"):
+        print(f"Simulator: {result['simulation']}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2), encoding="utf-8")
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark AI image payload preparation across typical phone resolutions.
+
+Compares the old flow (decode, crop, resize, sharpen, a size-estimate JPEG encode
+in the assistant, then the adapter's own encode) with ``ImagePayloadPreparer``
+(one decode shared with the visual hash, one encode, cache hit on a revisited
+screen) and prints the per-stage timings of the new path.
+
+Screens are synthetic UI-like images unless PNG screenshots are given.
+
+Example:
+    python tools/benchmark_image_payload.py --repeat 10
+    python tools/benchmark_image_payload.py output_data/*/screenshots --provider openrouter
+"""
+import argparse
+import io
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from domain.image_payload import ImagePayloadPreparer, ImagePrepSettings, encode_image
+
+PHONE_RESOLUTIONS = [(720, 1600), (1080, 2400), (1440, 3200)]
+
+
+def synthetic_screen(width: int, height: int, seed: int) -> bytes:
+    """PNG with a status bar, text-like rows and buttons, roughly like an app screen."""
+    rng = random.Random(seed)
+    img = Image.new("RGBA", (width, height), (250, 250, 250, 255))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, width, height // 30), fill=(30, 30, 30, 255))
+    y = height // 12
+    while y < height - height // 10:
+        for x in range(width // 20, width - width // 10, width // 40):
+            if rng.random() < 0.8:
+                draw.rectangle((x, y, x + width // 60, y + height // 80), fill=(rng.randint(0, 90),) * 3 + (255,))
+        y += height // 25
+        if rng.random() < 0.2:
+            draw.rounded_rectangle((width // 10, y, width - width // 10, y + height // 20), radius=12,
+                                   fill=(rng.randint(0, 255), 90, 200, 255))
+            y += height // 15
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def legacy_prepare(data: bytes, settings: ImagePrepSettings) -> bytes:
+    img = Image.open(io.BytesIO(data))
+    h = img.height
+    upper = int(settings.crop_top_pct * h)
+    img = img.crop((0, upper, img.width, max(upper + 1, h - int(settings.crop_bottom_pct * h))))
+    if img.width > settings.max_width:
+        img = img.resize((settings.max_width, int(img.height * settings.max_width / img.width)), Image.Resampling.LANCZOS)
+    img = img.convert("RGB")
+    img = img.filter(ImageFilter.UnsharpMask(radius=0.5, percent=150, threshold=3))
+    encode_image(img, settings.image_format, settings.quality)  # size estimate in the assistant
+    return encode_image(img, settings.image_format, settings.quality)  # adapter encode
+
+
+def _ms(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AI image payload preparation.")
+    parser.add_argument("paths", nargs="*", help="PNG screenshots or directories (default: synthetic screens)")
+    parser.add_argument("--repeat", type=int, default=5, help="Screens per resolution (synthetic)")
+    parser.add_argument("--provider", default="gemini", help="Provider whose image capabilities are used")
+    args = parser.parse_args()
+
+    from config.app_config import AI_PROVIDER_CAPABILITIES
+    settings = ImagePrepSettings.from_config({}, AI_PROVIDER_CAPABILITIES.get(args.provider, {}))
+    print(f"Settings: {settings}")
+
+    screens: List[Tuple[str, bytes]] = []
+    if args.paths:
+        for raw in args.paths:
+            path = Path(raw)
+            for file in (sorted(path.glob("**/*.png")) if path.is_dir() else [path]):
+                with Image.open(file) as img:
+                    label = f"{img.width}x{img.height}"
+                screens.append((label, file.read_bytes()))
+    else:
+        for width, height in PHONE_RESOLUTIONS:
+            screens.extend((f"{width}x{height}", synthetic_screen(width, height, seed)) for seed in range(args.repeat))
+    if not screens:
+        print("No screenshots found.")
+        return
+
+    results: Dict[str, Dict[str, List[float]]] = {}
+    stages: Dict[str, Dict[str, List[float]]] = {}
+    for index, (label, data) in enumerate(screens):
+        row = results.setdefault(label, {"legacy": [], "prepared": [], "cached": [], "bytes": []})
+        row["legacy"].append(_ms(legacy_prepare, data, settings))
+        preparer = ImagePayloadPreparer()
+        start = time.perf_counter()
+        prepared = preparer.prepare(data, settings, cache_key=f"screen-{index}")
+        row["prepared"].append((time.perf_counter() - start) * 1000)
+        row["cached"].append(_ms(preparer.prepare, data, settings, f"screen-{index}"))
+        row["bytes"].append(len(prepared.data))
+        for stage, ms in prepared.timings_ms.items():
+            stages.setdefault(label, {}).setdefault(stage, []).append(ms)
+
+    print(f"\n{'resolution':<11} {'n':>3} {'legacy ms':>10} {'prepared ms':>12} {'cached ms':>10} {'payload KB':>11}")
+    for label, row in results.items():
+        print(f"{label:<11} {len(row['legacy']):>3} {statistics.mean(row['legacy']):>10.1f} "
+              f"{statistics.mean(row['prepared']):>12.1f} {statistics.mean(row['cached']):>10.3f} "
+              f"{statistics.mean(row['bytes']) / 1024:>11.1f}")
+    print("\nPer-stage mean ms (prepared path):")
+    for label, by_stage in stages.items():
+        print(f"  {label:<11} " + "  ".join(f"{stage} {statistics.mean(values):.1f}" for stage, values in by_stage.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Measure crawler steps and wall time to complete a multi-field form, per field vs as one macro.
+
+Runs against a live Appium session. The form screen is opened with
+``--package``/``--activity``, ``plan_form_fill`` builds the input steps from the page
+source, and the form is completed twice per repetition:
+
+- per-field: one crawler step per field, each followed by the state capture a
+  normal step performs (screenshot + page source)
+- macro: all fields in one macro step with a single final state capture
+
+AI decision time is not included (it would be paid once per step, so the step count
+column is the multiplier for it).
+
+Example:
+    python tools/benchmark_macro_forms.py --package com.example --activity .LoginActivity \\
+        --field email=test@example.com --field password=secret --repeat 3
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.numeric_constants import MACRO_STEP_PAUSE_MS
+from domain.macro_actions import normalize_macro_steps, plan_form_fill, run_macro
+from domain.element_table import LocalElementIndex
+
+
+def _execute_step(driver, step: Dict) -> bool:
+    action = step["action"]
+    if action == "input":
+        return driver.input_text(step["target_identifier"], step.get("input_text") or "")
+    if action == "click":
+        return driver.tap(step.get("target_identifier"), step.get("target_bounding_box"))
+    if action in ("scroll_down", "scroll_up"):
+        return driver.scroll(action.split("_")[1])
+    if action == "back":
+        return driver.press_back()
+    raise ValueError(f"Unsupported step in benchmark: {action}")
+
+
+def _capture_state(driver) -> None:
+    driver.get_screenshot_as_base64()
+    driver.get_page_source()
+
+
+def _open_form(driver, package: str, activity: str, wait_s: float) -> str:
+    driver.terminate_app(package)
+    driver.start_activity(package, activity, wait_after_launch=wait_s)
+    return driver.get_page_source() or ""
+
+
+def _resolve_locally(steps: List[Dict], page_source: str) -> None:
+    index = LocalElementIndex.from_xml(page_source)
+    for step in steps:
+        if step["action"] == "click" and not step.get("target_bounding_box"):
+            entry = index.find(step.get("target_identifier"))
+            if entry is not None:
+                step["target_bounding_box"] = entry.to_bbox()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-field vs macro form filling on a live device.")
+    parser.add_argument("--package", required=True)
+    parser.add_argument("--activity", required=True, help="Activity that shows the form")
+    parser.add_argument("--field", action="append", default=[], metavar="KEYWORD=VALUE",
+                        help="Field keyword and value (matched against id/hint/desc/text)")
+    parser.add_argument("--no-submit", action="store_true", help="Do not tap the submit button")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--launch-wait", type=float, default=3.0)
+    parser.add_argument("--pause-ms", type=int, default=MACRO_STEP_PAUSE_MS)
+    args = parser.parse_args()
+
+    field_values = dict(item.split("=", 1) for item in args.field if "=" in item)
+    if len(field_values) < 2:
+        parser.error("Give at least two --field KEYWORD=VALUE pairs")
+
+    from config.app_config import Config
+    from infrastructure.appium_driver import AppiumDriver
+    driver = AppiumDriver(Config())
+    if not driver.initialize_session(app_package=args.package, app_activity=args.activity):
+        print("Could not start an Appium session.")
+        return
+
+    timings: Dict[str, List[float]] = {"per-field": [], "macro": []}
+    steps_taken: Dict[str, int] = {}
+    try:
+        for run in range(args.repeat):
+            for mode in ("per-field", "macro"):
+                page_source = _open_form(driver, args.package, args.activity, args.launch_wait)
+                plan = plan_form_fill(page_source, field_values, submit=not args.no_submit)
+                if plan is None:
+                    print("Form planner matched fewer than two fields on the form screen.")
+                    return
+                steps = normalize_macro_steps(plan["steps"])
+                start = time.perf_counter()
+                if mode == "per-field":
+                    ok = True
+                    for step in steps:
+                        ok = _execute_step(driver, step) and ok
+                        _capture_state(driver)
+                    crawler_steps = len(steps)
+                else:
+                    _resolve_locally(steps, page_source)
+                    results = run_macro(
+                        steps,
+                        lambda step: _execute_step(driver, step),
+                        lambda bboxes: driver.tap_sequence(bboxes, args.pause_ms),
+                        args.pause_ms,
+                    )
+                    ok = len(results) == len(steps) and all(r["success"] for r in results)
+                    _capture_state(driver)
+                    crawler_steps = 1
+                elapsed = time.perf_counter() - start
+                timings[mode].append(elapsed)
+                steps_taken[mode] = crawler_steps
+                print(f"run {run + 1} {mode:<9} steps {crawler_steps:>2}  {elapsed:6.2f} s  {'ok' if ok else 'FAILED'}")
+    finally:
+        driver.disconnect()
+
+    print(f"\n{'mode':<10} {'crawler steps':>13} {'mean s':>8} {'median s':>9}")
+    for mode, values in timings.items():
+        if values:
+            print(f"{mode:<10} {steps_taken[mode]:>13} {statistics.mean(values):>8.2f} {statistics.median(values):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
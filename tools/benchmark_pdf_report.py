@@ -0,0 +1,167 @@
+"""
+Benchmark run report generation: time and peak RSS vs step count.
+
+Builds a synthetic crawl database (steps cycling over a pool of generated
+screenshots) for each step count and renders its report in a fresh process:
+
+- chunked: ``RunAnalyzer.analyze_run_to_pdf`` (partial PDFs, cached thumbnails)
+- legacy: one HTML document with every screenshot base64-inlined per appearance,
+  converted in a single ``pisa.CreatePDF`` call, as the report used to be built
+
+A render that fails is reported for its step count; when both modes run, a
+side-by-side table of time and peak RSS per step count follows.
+
+Example:
+    python tools/benchmark_pdf_report.py --steps 100 500 1000 --screens 60
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+APP_PACKAGE = "com.example.app"
+SCREENSHOT_SIZE = (1080, 2400)
+# xhtml2pdf ignores the report's max-height on images, and a full-size screenshot is
+# taller than a page, so the legacy document pins the displayed size (the data stays full size)
+LEGACY_IMAGE_CSS = (".step-screenshots-container img.screenshot "
+                    f"{{ height: 240px; width: {240 * SCREENSHOT_SIZE[0] // SCREENSHOT_SIZE[1]}px; }}")
+
+
+def build_database(directory: Path, steps: int, screens: int) -> Path:
+    """Create a crawl database with ``steps`` steps over ``screens`` screenshots."""
+    from PIL import Image, ImageDraw
+
+    screenshot_dir = directory / "screenshots" / f"crawl_screenshots_{APP_PACKAGE}"
+    screenshot_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(0)
+    for index in range(screens):
+        img = Image.new("RGB", SCREENSHOT_SIZE, (245, 245, 245))
+        draw = ImageDraw.Draw(img)
+        for row in range(40):
+            draw.rectangle((60, 120 + row * 56, 60 + rng.randint(200, 960), 150 + row * 56),
+                           fill=(rng.randint(0, 200), rng.randint(0, 200), rng.randint(0, 200)))
+        img.save(screenshot_dir / f"screen_{index}.png")
+
+    db_path = directory / "crawl.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE runs (run_id INTEGER PRIMARY KEY, app_package TEXT, start_activity TEXT,
+                           start_time DATETIME, end_time DATETIME, status TEXT);
+        CREATE TABLE screens (screen_id INTEGER PRIMARY KEY, composite_hash TEXT, screenshot_path TEXT,
+                              activity_name TEXT);
+        CREATE TABLE steps_log (step_log_id INTEGER PRIMARY KEY, run_id INTEGER, step_number INTEGER,
+                                from_screen_id INTEGER, to_screen_id INTEGER, action_description TEXT,
+                                ai_suggestion_json TEXT, mapped_action_json TEXT, execution_success BOOLEAN,
+                                error_message TEXT, ai_response_time_ms REAL, total_tokens INTEGER,
+                                ai_input_prompt TEXT, element_find_time_ms REAL);
+        CREATE TABLE run_meta (meta_id INTEGER PRIMARY KEY, run_id INTEGER, meta_json TEXT, timestamp DATETIME);
+    """)
+    conn.execute("INSERT INTO runs VALUES (1, ?, '.MainActivity', '2024-01-01T10:00:00', '2024-01-01T11:00:00', 'COMPLETED')",
+                 (APP_PACKAGE,))
+    conn.executemany("INSERT INTO screens VALUES (?, ?, ?, ?)",
+                     [(i + 1, f"hash{i}", f"screen_{i}.png", f".Activity{i % 7}") for i in range(screens)])
+    prompt = "Screen elements:\n" + "\n".join(f"- button_{i}: Button 'Item {i}'" for i in range(80))
+    rows = []
+    for step in range(1, steps + 1):
+        suggestion = {"action": "click", "target_identifier": f"button_{step % 80}", "reasoning": "Explore the list item"}
+        rows.append((step, 1, step, (step - 1) % screens + 1, step % screens + 1, f"click button_{step % 80}",
+                     json.dumps(suggestion), None, True, None, 1800.0, 2500, prompt, 120.0))
+    conn.executemany("INSERT INTO steps_log VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def render_legacy(analyzer, run_id: int, pdf_path: str) -> bool:
+    from xhtml2pdf import pisa
+
+    from domain.analysis_viewer import _REPORT_HTML_HEAD
+
+    run_data, steps = analyzer._fetch_run_and_steps_data(run_id)
+    metrics = analyzer._calculate_summary_metrics(run_id, run_data, steps)
+    head = _REPORT_HTML_HEAD.replace("</style>", f"{LEGACY_IMAGE_CSS}\n    </style>", 1)
+    html_parts = [head, analyzer._generate_summary_table_html(metrics), "<h2>Step Details</h2>"]
+    for step in steps:
+        html_parts.append(analyzer._render_step_html(step, analyzer._image_to_base64))
+        html_parts.append("<hr>")
+    html_parts.append("</body></html>")
+    with open(pdf_path, "wb") as f_pdf:
+        status = pisa.CreatePDF("".join(html_parts), dest=f_pdf, encoding="utf-8")
+    return not status.err
+
+
+def child(mode: str, directory: str) -> None:
+    """Render one report and print its wall time and peak RSS as JSON."""
+    import resource
+
+    from domain.analysis_viewer import RunAnalyzer
+
+    analyzer = RunAnalyzer(os.path.join(directory, "crawl.db"), directory, APP_PACKAGE)
+    pdf_path = os.path.join(directory, f"report_{mode}.pdf")
+    start = time.perf_counter()
+    error = None
+    try:
+        if mode == "legacy":
+            ok = render_legacy(analyzer, 1, pdf_path)
+        else:
+            ok = analyzer.analyze_run_to_pdf(1, pdf_path)["success"]
+    except Exception as e:
+        ok, error = False, f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_kb //= 1024
+    print(json.dumps({"ok": ok, "error": error, "seconds": elapsed, "peak_mb": peak_kb / 1024,
+                      "pdf_mb": os.path.getsize(pdf_path) / 2**20 if os.path.exists(pdf_path) else 0.0}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark run report generation time and peak memory.")
+    parser.add_argument("--steps", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--screens", type=int, default=60, help="Distinct screenshots the steps cycle over")
+    parser.add_argument("--modes", nargs="+", default=["legacy", "chunked"], choices=["legacy", "chunked"])
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    results = {}
+    print(f"{'steps':>6} {'mode':<8} {'ok':>3} {'seconds':>8} {'peak MB':>8} {'pdf MB':>7}")
+    for steps in args.steps:
+        with tempfile.TemporaryDirectory(prefix="report_bench_") as directory:
+            build_database(Path(directory), steps, args.screens)
+            for mode in args.modes:
+                completed = subprocess.run([sys.executable, __file__, "--child", mode, directory],
+                                           capture_output=True, text=True, check=False)
+                lines = completed.stdout.strip().splitlines()
+                if completed.returncode != 0 or not lines:
+                    print(f"{steps:>6} {mode:<8} failed: {completed.stderr.strip().splitlines()[-1:]}")
+                    continue
+                result = json.loads(lines[-1])
+                results[(steps, mode)] = result
+                error = f"  {result['error']}" if result.get("error") else ""
+                print(f"{steps:>6} {mode:<8} {'yes' if result['ok'] else 'no':>3} {result['seconds']:>8.1f} "
+                      f"{result['peak_mb']:>8.0f} {result['pdf_mb']:>7.1f}{error}")
+
+    if set(args.modes) == {"legacy", "chunked"}:
+        print(f"\n{'steps':>6} {'legacy s':>9} {'chunked s':>10} {'legacy MB':>10} {'chunked MB':>11}")
+        for steps in args.steps:
+            cells = []
+            for key in ("seconds", "peak_mb"):
+                for mode in ("legacy", "chunked"):
+                    result = results.get((steps, mode))
+                    cells.append(f"{result[key]:.1f}" if result and result["ok"] else "failed")
+            print(f"{steps:>6} {cells[0]:>9} {cells[1]:>10} {cells[2]:>10} {cells[3]:>11}")
+
+if __name__ == "__main__":
+    main()
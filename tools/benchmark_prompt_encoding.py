@@ -0,0 +1,185 @@
+"""
+Compare the XML and element-table screen encodings on recorded screens.
+
+Screens are read from the ``screens.xml_content`` column of one or more session
+databases (``*_crawl_data.db``). For every screen the script builds both
+encodings and reports prompt size in characters and tokens plus build time.
+
+With --with-model, each encoding is also sent to the configured AI provider and
+the script reports model latency, the share of answers that parse into a valid
+action, and the share whose target resolves on the screen without an Appium
+lookup (table: index resolves; XML: identifier matches an element attribute).
+"""
+import argparse
+import json
+import statistics
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from domain.context_builder import TokenCounter
+from domain.element_table import ElementTable
+
+
+def load_screens(db_paths: List[Path], limit: int) -> List[Tuple[str, str]]:
+    """Return (label, xml) pairs from the screens tables of the given databases."""
+    screens: List[Tuple[str, str]] = []
+    for db_path in db_paths:
+        try:
+            conn = sqlite3.connect(str(db_path))
+            rows = conn.execute(
+                "SELECT screen_id, xml_content FROM screens WHERE xml_content IS NOT NULL AND xml_content != ''"
+            ).fetchall()
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"  Skipping {db_path}: {e}")
+            continue
+        for screen_id, xml_content in rows:
+            screens.append((f"{db_path.stem}#{screen_id}", xml_content))
+            if limit and len(screens) >= limit:
+                return screens
+    return screens
+
+
+def encode_xml(xml: str, provider: str) -> str:
+    from config.numeric_constants import XML_SNIPPET_MAX_LEN_DEFAULT
+    from utils.utils import simplify_xml_for_ai
+    return simplify_xml_for_ai(xml, max_len=XML_SNIPPET_MAX_LEN_DEFAULT, provider=provider, prune_noninteractive=True)
+
+
+def encode_table(xml: str) -> Tuple[str, ElementTable]:
+    table = ElementTable.from_xml(xml)
+    return table.to_prompt(), table
+
+
+def _xml_target_resolves(xml: str, target: str) -> bool:
+    if not target:
+        return False
+    return f'"{target}"' in xml or f'/{target}"' in xml
+
+
+def _build_prompt(config, screen_text: str, encoding: str) -> str:
+    from domain.prompts import JSON_OUTPUT_SCHEMA, build_action_decision_prompt, get_available_actions
+    actions = get_available_actions(config)
+    prompt = build_action_decision_prompt(config.CRAWLER_ACTION_DECISION_PROMPT).format(
+        json_schema=json.dumps(JSON_OUTPUT_SCHEMA, indent=2),
+        action_list="\n".join(f"- {name}: {desc}" for name, desc in actions.items()),
+    )
+    if encoding == "element_table":
+        header = "Current screen elements (set target_identifier to the element's #index, e.g. \"#3\"):"
+    else:
+        header = "Current screen XML:"
+    return f"{prompt}\n\n{header}\n{screen_text}\n\nPlease respond with a JSON object matching the schema above."
+
+
+def _create_adapter(config):
+    from config.urls import ServiceURLs
+    from domain.model_adapters import create_model_adapter
+    from domain.provider_transport import ProviderTransport
+    from domain.provider_utils import get_provider_api_key
+    provider = config.get("AI_PROVIDER", "gemini").lower()
+    adapter = create_model_adapter(
+        provider=provider,
+        api_key=get_provider_api_key(config, provider, ServiceURLs.OLLAMA),
+        model_name=config.DEFAULT_MODEL_TYPE,
+        transport=ProviderTransport.from_config(config, provider),
+    )
+    adapter.initialize({"generation_config": {"temperature": 0.2, "top_p": 0.95, "max_output_tokens": 1024}})
+    return adapter
+
+
+def _summarize(values: List[float]) -> str:
+    if not values:
+        return "n/a"
+    return f"mean {statistics.mean(values):9.1f}  median {statistics.median(values):9.1f}  max {max(values):9.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark XML vs element-table prompt encoding.")
+    parser.add_argument("paths", nargs="+", help="Session databases or directories to search for *_crawl_data.db")
+    parser.add_argument("--limit", type=int, default=200, help="Maximum number of screens")
+    parser.add_argument("--provider", default="gemini", help="Provider used for XML simplification limits")
+    parser.add_argument("--with-model", action="store_true", help="Also call the configured AI model")
+    parser.add_argument("--model-screens", type=int, default=20, help="Screens sent to the model per encoding")
+    args = parser.parse_args()
+
+    db_paths: List[Path] = []
+    for raw in args.paths:
+        path = Path(raw)
+        db_paths.extend(sorted(path.glob("**/*_crawl_data.db")) if path.is_dir() else [path])
+    screens = load_screens(db_paths, args.limit)
+    if not screens:
+        print("No recorded screens with XML found.")
+        return
+    print(f"Loaded {len(screens)} screens from {len(db_paths)} database(s)")
+
+    counter = TokenCounter()
+    sizes: Dict[str, Dict[str, List[float]]] = {
+        enc: {"chars": [], "tokens": [], "build_ms": []} for enc in ("xml", "element_table")
+    }
+    encoded: List[Tuple[str, str, str, Optional[ElementTable]]] = []
+    for label, xml in screens:
+        start = time.perf_counter()
+        xml_text = encode_xml(xml, args.provider)
+        sizes["xml"]["build_ms"].append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        table_text, table = encode_table(xml)
+        sizes["element_table"]["build_ms"].append((time.perf_counter() - start) * 1000)
+        for enc, text in (("xml", xml_text), ("element_table", table_text)):
+            sizes[enc]["chars"].append(len(text))
+            sizes[enc]["tokens"].append(counter.count(text))
+        encoded.append((label, xml_text, table_text, table))
+
+    print(f"Token counting: {'tiktoken' if counter.exact else 'estimated'}")
+    for enc, metrics in sizes.items():
+        print(f"\n[{enc}]")
+        for name, values in metrics.items():
+            print(f"  {name:<9} {_summarize(values)}")
+    ratio = sum(sizes["element_table"]["tokens"]) / max(1, sum(sizes["xml"]["tokens"]))
+    print(f"\nelement_table / xml tokens: {ratio:.2f}")
+
+    if not args.with_model:
+        return
+
+    from config.app_config import Config
+    from domain.agent_assistant import AgentAssistant
+    config = Config()
+    adapter = _create_adapter(config)
+    for enc in ("xml", "element_table"):
+        latencies: List[float] = []
+        valid = 0
+        resolved = 0
+        sample = encoded[:args.model_screens]
+        for label, xml_text, table_text, table in sample:
+            screen_text = table_text if enc == "element_table" else xml_text
+            prompt = _build_prompt(config, screen_text, enc)
+            start = time.perf_counter()
+            try:
+                response_text, _ = adapter.generate_response(prompt=prompt)
+            except Exception as e:
+                print(f"  {label}: model error {e}")
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not AgentAssistant._is_valid_action_response(response_text):
+                continue
+            valid += 1
+            action = AgentAssistant._parse_llm_json(response_text)
+            if action.get("action") in ("back", "scroll_down", "scroll_up", "swipe_left", "swipe_right", "flick", "reset_app"):
+                resolved += 1
+            elif enc == "element_table" and table is not None and table.get(action.get("target_identifier")):
+                resolved += 1
+            elif enc == "xml" and _xml_target_resolves(xml_text, str(action.get("target_identifier", ""))):
+                resolved += 1
+        total = len(sample)
+        print(f"\n[{enc}] model on {total} screens")
+        print(f"  latency_ms {_summarize(latencies)}")
+        print(f"  valid actions      {valid}/{total}")
+        print(f"  resolvable targets {resolved}/{total}")
+
+
+if __name__ == "__main__":
+    main()
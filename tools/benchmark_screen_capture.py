@@ -0,0 +1,157 @@
+"""
+Compare screenshot capture latency and CPU per screenshot: ADB exec-out, persistent ADB shell and Appium.
+
+ADB modes use ``AdbCaptureBackend`` directly; the Appium mode (``--appium``) starts a
+session and times ``get_screenshot_as_base64`` plus the base64 decode the crawler
+used to do. CPU is this process plus reaped child processes (the adb clients); the
+adb server and the Appium server run outside this process tree and are not counted.
+
+Without a device, ``--fake-adb DIR`` writes an adb shim into DIR that serves a
+generated PNG and benchmarks against it (``ADB_CAPTURE_ADB_PATH`` can point at the
+same shim to run the crawler's ADB path without a device).
+
+Example:
+    python tools/benchmark_screen_capture.py --udid emulator-5554 --repeat 30 --appium
+    python tools/benchmark_screen_capture.py --fake-adb /tmp/fakeadb --repeat 50
+"""
+import argparse
+import base64
+import statistics
+import struct
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from infrastructure.adb_capture import AdbCaptureBackend
+
+FAKE_ADB_SCRIPT = '''#!{python}
+"""Fake adb: serves {png} for screencap and a minimal hierarchy for uiautomator dump."""
+import sys
+
+PNG = open({png!r}, "rb").read()
+args = sys.argv[1:]
+if args[:1] == ["-s"]:
+    args = args[2:]
+out = sys.stdout.buffer
+if args[:1] == ["exec-out"] and "screencap" in args:
+    out.write(PNG)
+elif args[:1] == ["exec-out"] and "uiautomator" in args:
+    out.write(b'<?xml version="1.0" encoding="UTF-8"?><hierarchy rotation="0"></hierarchy>'
+              b"UI hierchary dumped to: /dev/tty\\n")
+elif args[:1] == ["shell"]:
+    for line in sys.stdin.buffer:
+        if b"screencap" in line:
+            out.write(b"%d\\n" % len(PNG))
+            out.write(PNG)
+        else:
+            out.write(b"-1\\n")
+        out.flush()
+else:
+    sys.stderr.write("fake adb: unsupported command %r\\n" % args)
+    sys.exit(1)
+'''
+
+
+def _png(width: int, height: int) -> bytes:
+    """Gradient PNG of the given size, large enough to resemble a real screenshot."""
+    rows = b"".join(b"\x00" + bytes((x * 7 + y) & 0xFF for x in range(width * 3)) for y in range(height))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows, 6)) + chunk(b"IEND", b"")
+
+
+def write_fake_adb(directory: Path, width: int, height: int) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    png_path = directory / "screen.png"
+    png_path.write_bytes(_png(width, height))
+    script = directory / "adb"
+    script.write_text(FAKE_ADB_SCRIPT.format(python=sys.executable, png=str(png_path)))
+    script.chmod(0o755)
+    return script
+
+
+def _cpu_seconds() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows: own process only
+        return time.process_time()
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+def measure(capture: Callable[[], Optional[bytes]], repeat: int,
+            finish: Optional[Callable[[], None]] = None) -> Tuple[List[float], float, int]:
+    """Return (latencies in ms, CPU ms per capture, failed captures)."""
+    latencies: List[float] = []
+    failed = 0
+    cpu_start = _cpu_seconds()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = capture()
+        elapsed = (time.perf_counter() - start) * 1000
+        if data:
+            latencies.append(elapsed)
+        else:
+            failed += 1
+    if finish:
+        # Reap the persistent shell so its CPU shows up in RUSAGE_CHILDREN
+        finish()
+    cpu_ms = (_cpu_seconds() - cpu_start) * 1000 / max(1, repeat)
+    return latencies, cpu_ms, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ADB vs Appium screenshot capture.")
+    parser.add_argument("--udid", help="Device serial (default: adb's only device)")
+    parser.add_argument("--adb-path", default="adb")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--appium", action="store_true", help="Also benchmark capture through an Appium session")
+    parser.add_argument("--fake-adb", metavar="DIR", help="Write a fake adb shim into DIR and benchmark against it")
+    parser.add_argument("--fake-size", default="1080x2400", help="Fake screenshot size WIDTHxHEIGHT")
+    args = parser.parse_args()
+
+    adb_path = args.adb_path
+    if args.fake_adb:
+        width, height = (int(v) for v in args.fake_size.lower().split("x"))
+        adb_path = str(write_fake_adb(Path(args.fake_adb), width, height))
+        print(f"Using fake adb {adb_path}")
+
+    results: Dict[str, Tuple[List[float], float, int]] = {}
+    exec_out = AdbCaptureBackend(args.udid, adb_path=adb_path, persistent_shell=False, max_failures=args.repeat + 1)
+    results["adb exec-out"] = measure(exec_out.capture_screenshot, args.repeat)
+    shell = AdbCaptureBackend(args.udid, adb_path=adb_path, persistent_shell=True, max_failures=args.repeat + 1)
+    results["adb shell"] = measure(shell.capture_screenshot, args.repeat, finish=shell.close)
+
+    if args.appium:
+        from config.app_config import Config
+        from infrastructure.appium_driver import AppiumDriver
+        driver = AppiumDriver(Config())
+        if not driver.initialize_session(device_udid=args.udid):
+            print("Could not start an Appium session; skipping the Appium mode.")
+        else:
+            try:
+                def _appium_capture() -> Optional[bytes]:
+                    encoded = driver.get_screenshot_as_base64()
+                    return base64.b64decode(encoded) if encoded else None
+                results["appium"] = measure(_appium_capture, args.repeat)
+            finally:
+                driver.disconnect()
+
+    print(f"\n{'mode':<13} {'ok':>4} {'failed':>6} {'mean ms':>9} {'p50 ms':>9} {'max ms':>9} {'cpu ms/shot':>12}")
+    for mode, (latencies, cpu_ms, failed) in results.items():
+        if latencies:
+            print(f"{mode:<13} {len(latencies):>4} {failed:>6} {statistics.mean(latencies):>9.1f} "
+                  f"{statistics.median(latencies):>9.1f} {max(latencies):>9.1f} {cpu_ms:>12.1f}")
+        else:
+            print(f"{mode:<13} {0:>4} {failed:>6} {'n/a':>9} {'n/a':>9} {'n/a':>9} {cpu_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
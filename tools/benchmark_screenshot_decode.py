@@ -0,0 +1,91 @@
+"""
+Measure decode + hash time per screenshot: repeated full decodes vs the shared decode.
+
+For every PNG the per-step work is replayed both ways:
+
+- legacy: the screenshot is decoded for the visual hash in the crawler loop, again
+  in the screen state manager (pHash on the full-resolution image each time) and
+  again when the AI image is prepared
+- shared: one ``DecodedScreenshot`` serves both hashes (pHash of the reduced
+  thumbnail) and the AI image
+
+The hash distance column is the Hamming distance between the full-resolution and
+the thumbnail pHash; screens are matched with a distance threshold, so small
+values mean the faster hash groups screens the same way.
+
+Example:
+    python tools/benchmark_screenshot_decode.py output_data/*/screenshots --limit 100
+"""
+import argparse
+import io
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import imagehash
+from PIL import Image
+
+from utils.screen_image import DecodedScreenshot
+
+
+def legacy_step(data: bytes) -> str:
+    visual_hash = ""
+    for _ in range(2):
+        visual_hash = str(imagehash.phash(Image.open(io.BytesIO(data))))
+    Image.open(io.BytesIO(data)).load()
+    return visual_hash
+
+
+def shared_step(data: bytes) -> str:
+    screenshot = DecodedScreenshot(data)
+    visual_hash = ""
+    for _ in range(2):
+        visual_hash = screenshot.visual_hash
+    screenshot.image
+    return visual_hash
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark screenshot decode and visual hashing.")
+    parser.add_argument("paths", nargs="+", help="PNG files or directories containing PNG screenshots")
+    parser.add_argument("--limit", type=int, default=100, help="Maximum number of screenshots")
+    args = parser.parse_args()
+
+    files: List[Path] = []
+    for raw in args.paths:
+        path = Path(raw)
+        files.extend(sorted(path.glob("**/*.png")) if path.is_dir() else [path])
+    files = files[:args.limit]
+    if not files:
+        print("No PNG screenshots found.")
+        return
+
+    legacy_ms: List[float] = []
+    shared_ms: List[float] = []
+    distances: List[int] = []
+    for file in files:
+        data = file.read_bytes()
+        start = time.perf_counter()
+        full_hash = legacy_step(data)
+        legacy_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        reduced_hash = shared_step(data)
+        shared_ms.append((time.perf_counter() - start) * 1000)
+        distances.append(imagehash.hex_to_hash(full_hash) - imagehash.hex_to_hash(reduced_hash))
+
+    sizes = {Image.open(file).size for file in files[:20]}
+    print(f"{len(files)} screenshots, sizes e.g. {', '.join(f'{w}x{h}' for w, h in sorted(sizes)[:3])}")
+    print(f"{'mode':<8} {'mean ms':>9} {'median ms':>10} {'max ms':>9}")
+    for mode, values in (("legacy", legacy_ms), ("shared", shared_ms)):
+        print(f"{mode:<8} {statistics.mean(values):>9.1f} {statistics.median(values):>10.1f} {max(values):>9.1f}")
+    print(f"\nspeedup {statistics.mean(legacy_ms) / max(1e-9, statistics.mean(shared_ms)):.2f}x")
+    print(f"hash distance full vs thumbnail: mean {statistics.mean(distances):.2f}, max {max(distances)}, "
+          f"identical {sum(1 for d in distances if d == 0)}/{len(distances)}")
+
+
+if __name__ == "__main__":
+    main()
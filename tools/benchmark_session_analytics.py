@@ -0,0 +1,139 @@
+"""
+Benchmark the cross-session analytics used by ``generate_paper_tables.py``.
+
+Builds synthetic session databases and computes the paper metrics twice:
+
+- rowwise: one database after another, ``LIKE`` scans over the JSON text and a
+  ``json.loads`` per row, as ``generate_paper_tables.py`` used to
+- columnar: ``domain.session_analytics`` (parallel extraction, typed columns)
+
+and checks that both agree.
+
+Example:
+    python tools/benchmark_session_analytics.py --databases 200 --runs 3 --steps 300 --workers 8
+"""
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from domain.session_analytics import (
+    NUMPY_AVAILABLE,
+    find_session_databases,
+    identifier_mapping_counts,
+    load_step_columns,
+    self_correction_counts,
+)
+
+ACTIONS = ["click", "click", "click", "input", "scroll_down", "swipe_left", "back"]
+
+
+def build_databases(root: Path, databases: int, runs: int, steps: int) -> None:
+    rng = random.Random(0)
+    for index in range(databases):
+        db_dir = root / f"session_{index}" / "database"
+        db_dir.mkdir(parents=True)
+        conn = sqlite3.connect(db_dir / f"com.example.app{index}_crawl_data.db")
+        conn.execute("""
+            CREATE TABLE steps_log (step_log_id INTEGER PRIMARY KEY, run_id INTEGER, step_number INTEGER,
+                                    from_screen_id INTEGER, to_screen_id INTEGER, action_description TEXT,
+                                    ai_suggestion_json TEXT, mapped_action_json TEXT, execution_success BOOLEAN,
+                                    error_message TEXT, ai_response_time_ms REAL, total_tokens INTEGER)
+        """)
+        rows = []
+        for run_id in range(1, runs + 1):
+            screen = 1
+            for step in range(1, steps + 1):
+                action = rng.choice(ACTIONS)
+                to_screen = screen if rng.random() < 0.25 else rng.randint(1, 40)
+                suggestion = {"action": action, "target_identifier": f"button_{rng.randint(0, 80)}",
+                              "reasoning": "Explore an unvisited part of the screen " * 4}
+                mapped = {"type": action if rng.random() < 0.8 else "tap_coordinates", "element_id": "x"}
+                rows.append((run_id, step, screen, to_screen, f"{action} button", json.dumps(suggestion),
+                             json.dumps(mapped), rng.random() < 0.9, None, rng.uniform(500, 4000),
+                             rng.randint(1000, 5000)))
+                screen = to_screen
+        conn.executemany("""
+            INSERT INTO steps_log (run_id, step_number, from_screen_id, to_screen_id, action_description,
+                                   ai_suggestion_json, mapped_action_json, execution_success, error_message,
+                                   ai_response_time_ms, total_tokens)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+        conn.close()
+
+
+def rowwise_metrics(db_files):
+    """The per-row loop of the original script, reading the same action fields as the columnar path."""
+    totals = {"targeted_clicks": 0, "identifier_successes": 0, "stuck_events": 0, "corrections": 0}
+    for db_path in db_files:
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        click_steps = conn.execute(
+            "SELECT mapped_action_json FROM steps_log WHERE ai_suggestion_json LIKE '%\"action\": \"click\"%'"
+        ).fetchall()
+        totals["targeted_clicks"] += len(click_steps)
+        for step in click_steps:
+            if step["mapped_action_json"] and json.loads(step["mapped_action_json"]).get("type") == "click":
+                totals["identifier_successes"] += 1
+        all_steps = conn.execute("""
+            SELECT run_id, from_screen_id, to_screen_id, execution_success, ai_suggestion_json
+            FROM steps_log ORDER BY run_id, step_number
+        """).fetchall()
+        was_stuck = False
+        for i, step in enumerate(all_steps):
+            if was_stuck and all_steps[i - 1]["run_id"] == step["run_id"]:
+                prev_action = json.loads(all_steps[i - 1]["ai_suggestion_json"]).get("action")
+                if prev_action != json.loads(step["ai_suggestion_json"]).get("action"):
+                    totals["corrections"] += 1
+            was_stuck = step["from_screen_id"] == step["to_screen_id"] and bool(step["execution_success"])
+            totals["stuck_events"] += was_stuck
+        conn.close()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark row-by-row vs columnar cross-session analytics.")
+    parser.add_argument("--databases", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=3, help="Runs per database")
+    parser.add_argument("--steps", type=int, default=300, help="Steps per run")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="analytics_bench_") as directory:
+        root = Path(directory)
+        start = time.perf_counter()
+        build_databases(root, args.databases, args.runs, args.steps)
+        db_files = find_session_databases(root)
+        print(f"Built {len(db_files)} databases ({args.databases * args.runs * args.steps} steps) "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        expected = rowwise_metrics(db_files)
+        rowwise_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        steps = load_step_columns(db_files, workers=args.workers)
+        load_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = {**identifier_mapping_counts(steps), **self_correction_counts(steps)}
+        aggregate_seconds = time.perf_counter() - start
+
+    print(f"rowwise:  {rowwise_seconds:.2f}s")
+    print(f"columnar: {load_seconds + aggregate_seconds:.2f}s (load {load_seconds:.2f}s, aggregate "
+          f"{aggregate_seconds * 1000:.1f} ms, {'numpy' if NUMPY_AVAILABLE else 'pure Python'}, "
+          f"{args.workers} workers)")
+    print(f"metrics:  {actual}")
+    if actual != expected:
+        print(f"MISMATCH: rowwise computed {expected}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
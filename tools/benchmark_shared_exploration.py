@@ -0,0 +1,158 @@
+"""
+Benchmark for the shared exploration store.
+
+Simulates several crawler workers exploring the same synthetic app graph and
+reports unique screens discovered per wall-clock minute for 1, 2 and 4 workers.
+Each simulated step sleeps for a fixed latency that stands in for capture, AI
+decision and action execution, so the numbers reflect coordination behaviour
+rather than host CPU speed.
+
+With --mode shared, workers allocate screen IDs, merge visit counts and claim
+frontier items through SharedExplorationStore. With --mode independent, each
+worker only knows what it has explored itself (today's behaviour) and the
+global unique-screen count is computed afterwards.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from infrastructure.shared_exploration_store import SharedExplorationStore
+
+
+def build_app_graph(num_screens: int, actions_per_screen: int, seed: int) -> Dict[int, List[int]]:
+    """Build a random app graph: screen -> list of target screens, one per action."""
+    rng = random.Random(seed)
+    graph: Dict[int, List[int]] = {}
+    for screen in range(num_screens):
+        targets = []
+        for _ in range(actions_per_screen):
+            # Bias transitions towards nearby screens so deep screens need several hops
+            targets.append(min(num_screens - 1, max(0, screen + rng.randint(-3, 6))))
+        graph[screen] = targets
+    return graph
+
+
+def _screen_hash(screen: int) -> str:
+    return f"xml{screen:05d}_vis{screen:05d}"
+
+
+def _worker(worker_id: str, db_path: str, mode: str, graph: Dict[int, List[int]],
+            duration_s: float, step_latency_s: float, seed: int, result_queue) -> None:
+    rng = random.Random(seed)
+    store = SharedExplorationStore(db_path, worker_id) if mode == "shared" else None
+    if store:
+        store.connect()
+
+    local_seen = set()
+    local_transitions: Dict[Tuple[str, str], int] = {}
+    local_visits: Dict[int, int] = {}
+    current = 0
+    steps = 0
+    deadline = time.time() + duration_s
+
+    while time.time() < deadline:
+        screen_hash = _screen_hash(current)
+        local_seen.add(current)
+        local_visits[current] = local_visits.get(current, 0) + 1
+        if store:
+            store.allocate_screen_id(screen_hash)
+            store.record_visit(screen_hash)
+            known = {a['action_description']: a['to_screen_id']
+                     for a in store.get_explored_actions(screen_hash, include_own=True)}
+        else:
+            known = {a: target for (h, a), target in local_transitions.items() if h == screen_hash}
+
+        actions = [f"action_{i}" for i in range(len(graph[current]))]
+        unexplored = [a for a in actions if a not in known]
+        if unexplored:
+            action = rng.choice(unexplored)
+        else:
+            # Everything here is explored: head for the least visited known target
+            def visits(target):
+                if target is None:
+                    return 0
+                if store:
+                    return store.get_visit_count(_screen_hash(target))
+                return local_visits.get(target, 0)
+            action = min(actions, key=lambda a: (visits(known[a]), rng.random()))
+
+        if store and not store.claim_action(screen_hash, action):
+            # Another worker is on it; pick any other action instead of waiting
+            action = rng.choice(actions)
+
+        time.sleep(step_latency_s)
+        steps += 1
+        next_screen = graph[current][int(action.split("_")[1])]
+
+        if store:
+            store.complete_action(screen_hash, action, next_screen, True)
+        local_transitions[(screen_hash, action)] = next_screen
+        current = next_screen
+
+    if store:
+        store.close()
+    result_queue.put((worker_id, steps, sorted(local_seen)))
+
+
+def run_trial(num_workers: int, mode: str, graph: Dict[int, List[int]], duration_s: float,
+              step_latency_s: float, seed: int) -> Tuple[int, int]:
+    """Run one trial and return (unique screens discovered, total steps)."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "shared_exploration.db")
+        if mode == "shared":
+            SharedExplorationStore(db_path, "setup").connect()
+
+        result_queue = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(
+                target=_worker,
+                args=(f"worker-{i}", db_path, mode, graph, duration_s, step_latency_s, seed + i, result_queue)
+            )
+            for i in range(num_workers)
+        ]
+        for process in processes:
+            process.start()
+        results = [result_queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+        unique_screens = set()
+        total_steps = 0
+        for _, steps, seen in results:
+            unique_screens.update(seen)
+            total_steps += steps
+        return len(unique_screens), total_steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark unique screens per minute with parallel workers.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to benchmark")
+    parser.add_argument("--mode", choices=["shared", "independent", "both"], default="both")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per trial")
+    parser.add_argument("--step-latency", type=float, default=0.05, help="Simulated seconds per crawl step")
+    parser.add_argument("--screens", type=int, default=400, help="Number of screens in the synthetic app")
+    parser.add_argument("--actions", type=int, default=6, help="Actions per screen")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    graph = build_app_graph(args.screens, args.actions, args.seed)
+    modes = ["independent", "shared"] if args.mode == "both" else [args.mode]
+
+    print(f"{'mode':<12} {'workers':>7} {'steps':>7} {'unique':>7} {'screens/min':>12}")
+    for mode in modes:
+        for num_workers in args.workers:
+            unique, steps = run_trial(num_workers, mode, graph, args.duration, args.step_latency, args.seed)
+            per_minute = unique / (args.duration / 60.0)
+            print(f"{mode:<12} {num_workers:>7} {steps:>7} {unique:>7} {per_minute:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
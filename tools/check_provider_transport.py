@@ -0,0 +1,143 @@
+"""
+Exercise the AI provider transport against a local fake HTTP server.
+
+The server answers like a rate-limited, occasionally slow provider:
+- a configurable fraction of requests gets 429 with a Retry-After header or a 503,
+- a configurable fraction of requests stalls for --slow-seconds before answering.
+
+The script sends the same batch of requests three ways and prints success rate and
+latency percentiles: a bare call (today's adapters), the transport with retries, and
+the transport with retries plus hedged requests.
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from domain.provider_transport import ProviderTransport, TransportPolicy
+
+
+class _FakeProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    error_rate = 0.2
+    slow_rate = 0.1
+    slow_seconds = 2.0
+    rng = random.Random(7)
+    rng_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        with self.rng_lock:
+            roll = self.rng.random()
+            slow = self.rng.random() < self.slow_rate
+        if roll < self.error_rate / 2:
+            self._reply(429, {"error": "rate limited"}, {"Retry-After": "0.2"})
+            return
+        if roll < self.error_rate:
+            self._reply(503, {"error": "unavailable"})
+            return
+        time.sleep(self.slow_seconds if slow else 0.05)
+        self._reply(200, {"choices": [{"message": {"content": '{"action": "click"}'}}]})
+
+    def _reply(self, status: int, body: dict, headers: Optional[dict] = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def _post(url: str, timeout: float) -> dict:
+    request = urllib.request.Request(url, data=b'{"prompt": "x"}', method="POST",
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _run_batch(label: str, send, requests: int, parallel: int) -> None:
+    latencies: List[float] = []
+    failures = 0
+
+    def _one(_):
+        start = time.perf_counter()
+        try:
+            send()
+            return time.perf_counter() - start
+        except Exception:
+            return None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        for result in pool.map(_one, range(requests)):
+            if result is None:
+                failures += 1
+            else:
+                latencies.append(result)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<20} {requests - failures:>4}/{requests:<4} ok  "
+          f"p50 {_percentile(latencies, 0.5) * 1000:7.0f} ms  "
+          f"p95 {_percentile(latencies, 0.95) * 1000:7.0f} ms  wall {elapsed:6.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check AI transport retries/hedging against a fake provider.")
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--parallel", type=int, default=4, help="Concurrent callers (simulated devices)")
+    parser.add_argument("--error-rate", type=float, default=0.2, help="Fraction of 429/503 responses")
+    parser.add_argument("--slow-rate", type=float, default=0.1, help="Fraction of stalled responses")
+    parser.add_argument("--slow-seconds", type=float, default=2.0)
+    parser.add_argument("--hedge-after", type=float, default=0.3)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    _FakeProviderHandler.error_rate = args.error_rate
+    _FakeProviderHandler.slow_rate = args.slow_rate
+    _FakeProviderHandler.slow_seconds = args.slow_seconds
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeProviderHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+    retry_policy = TransportPolicy(timeout_s=10.0, max_retries=4, retry_base_delay_s=0.1,
+                                   retry_max_delay_s=1.0, max_concurrency=args.parallel * 2)
+    hedge_policy = TransportPolicy(timeout_s=10.0, max_retries=4, retry_base_delay_s=0.1,
+                                   retry_max_delay_s=1.0, max_concurrency=args.parallel * 2,
+                                   hedge_after_s=args.hedge_after)
+    retrying = ProviderTransport("fake-retry", retry_policy)
+    hedging = ProviderTransport("fake-hedge", hedge_policy)
+
+    try:
+        _run_batch("bare call", lambda: _post(url, 10.0), args.requests, args.parallel)
+        _run_batch("retries", lambda: retrying.call(_post, url, 10.0), args.requests, args.parallel)
+        _run_batch("retries + hedging", lambda: hedging.call(_post, url, 10.0), args.requests, args.parallel)
+        print(f"retry stats: {retrying.stats}")
+        print(f"hedge stats: {hedging.stats}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
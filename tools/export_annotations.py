@@ -0,0 +1,44 @@
+"""
+Write the master ``annotations.json`` of a screenshots directory from its annotation log.
+
+``ScreenshotAnnotator`` appends one line per screenshot to ``annotations.jsonl``.
+This folds the log (and any existing ``annotations.json``) into the legacy
+single-file format for tools that read it.
+
+Example:
+    python tools/export_annotations.py output_data/session_x/screenshots
+    python tools/export_annotations.py output_data/session_x/screenshots --output /tmp/annotations.json --keep-log
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from infrastructure.annotation_store import AnnotationStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the screenshot annotation log to the legacy annotations.json format.")
+    parser.add_argument("screenshots_dir", help="Screenshots directory containing annotations.jsonl")
+    parser.add_argument("--output", help="Output file (default: annotations.json in the screenshots directory)")
+    parser.add_argument("--keep-log", action="store_true",
+                        help="Keep annotations.jsonl (always kept when --output is given)")
+    args = parser.parse_args()
+
+    directory = Path(args.screenshots_dir)
+    if not directory.is_dir():
+        print(f"Error: {directory} is not a directory", file=sys.stderr)
+        sys.exit(1)
+    store = AnnotationStore(str(directory))
+    if args.output or args.keep_log:
+        output_path = args.output or store.legacy_path
+        count = store.export(output_path)
+    else:
+        output_path = store.legacy_path
+        count = store.compact()
+    print(f"Wrote {count} screenshots to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
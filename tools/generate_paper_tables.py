@@ -1,14 +1,25 @@
-import collections
-import json
-import sqlite3
+import argparse
+import os
+import sys
+import time
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-def analyze_databases(output_dir: Path):
+from domain.session_analytics import (
+    NUMPY_AVAILABLE,
+    find_session_databases,
+    identifier_mapping_counts,
+    load_step_columns,
+    self_correction_counts,
+)
+
+
+def analyze_databases(output_dir: Path, workers: int = 1):
     """
     Analyzes all crawl databases to generate aggregated metrics for the paper.
     """
-    db_files = list(output_dir.glob("**/*_crawl_data.db"))
+    db_files = find_session_databases(output_dir)
 
     if not db_files:
         print(f"Error: No database files found in '{output_dir}'.")
@@ -16,84 +27,20 @@ def analyze_databases(output_dir: Path):
         return
 
     print(f"Found {len(db_files)} database files to analyze...")
+    start = time.perf_counter()
+    steps = load_step_columns(db_files, workers=workers)
+    print(f"Loaded {len(steps)} steps in {time.perf_counter() - start:.2f}s "
+          f"({'numpy' if NUMPY_AVAILABLE else 'pure Python'} columns)")
+
+    # --- Metric 1: Mapper Fallback Reliance ---
+    identifier = identifier_mapping_counts(steps)
+    total_identifier_successes = identifier["identifier_successes"]
+    total_targeted_clicks = identifier["targeted_clicks"]
 
-    # --- Aggregated Metrics Initialization ---
-    total_identifier_successes = 0
-    total_targeted_clicks = 0
-    
-    total_stuck_events = 0
-    total_successful_corrections = 0
-
-    for db_path in db_files:
-        print(f"  Analyzing: {db_path.parent.name}/{db_path.name}")
-        try:
-            conn = sqlite3.connect(db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-
-            # --- Metric 1: Mapper Fallback Reliance ---
-            cursor.execute("""
-                SELECT mapped_action_json
-                FROM steps_log
-                WHERE ai_suggestion_json LIKE '%"action": "click"%'
-            """)
-            click_steps = cursor.fetchall()
-            
-            app_id_success = 0
-
-            for step in click_steps:
-                if not step['mapped_action_json']:
-                    continue
-                try:
-                    mapped_action = json.loads(step['mapped_action_json'])
-                    if mapped_action.get('type') == 'click':
-                        app_id_success += 1
-                except (json.JSONDecodeError, TypeError):
-                    continue
-
-            total_identifier_successes += app_id_success
-            total_targeted_clicks += len(click_steps)
-
-            # --- Metric 2: AI Self-Correction Rate ---
-            cursor.execute("""
-                SELECT from_screen_id, to_screen_id, execution_success, ai_suggestion_json
-                FROM steps_log
-                ORDER BY step_number ASC
-            """)
-            all_steps = cursor.fetchall()
-
-            app_stuck_events = 0
-            app_successful_corrections = 0
-            was_stuck = False
-
-            for i, current_step in enumerate(all_steps):
-                if was_stuck:
-                    # Previous step was a no-op, check if this one is a correction
-                    try:
-                        prev_sugg = json.loads(all_steps[i-1]['ai_suggestion_json'])
-                        curr_sugg = json.loads(current_step['ai_suggestion_json'])
-                        prev_action = prev_sugg.get('action_to_perform', {}).get('action')
-                        curr_action = curr_sugg.get('action_to_perform', {}).get('action')
-                        
-                        if prev_action != curr_action:
-                            app_successful_corrections += 1
-                    except (json.JSONDecodeError, TypeError, IndexError):
-                        pass # Ignore if parsing fails or out of bounds
-                    was_stuck = False # Reset flag
-
-                # Check if the current step is a "no-op" or "stuck step"
-                if current_step['from_screen_id'] == current_step['to_screen_id'] and current_step['execution_success']:
-                    app_stuck_events += 1
-                    was_stuck = True
-
-            total_stuck_events += app_stuck_events
-            total_successful_corrections += app_successful_corrections
-
-            conn.close()
-
-        except sqlite3.Error as e:
-            print(f"    Could not process database {db_path.name}. Error: {e}")
-            continue
+    # --- Metric 2: AI Self-Correction Rate ---
+    correction = self_correction_counts(steps)
+    total_stuck_events = correction["stuck_events"]
+    total_successful_corrections = correction["corrections"]
 
     # --- Final Calculations ---
     self_correction_rate = (total_successful_corrections / total_stuck_events * 100) if total_stuck_events > 0 else 0
@@ -140,10 +87,17 @@ Successful Identifier-Based Mapping & {total_identifier_successes} \\\\ \\hline
     print(latex_table_identifier_success)
 
 
-if __name__ == '__main__':
-    # The script assumes it's run from the project root.
-    # It will look for the database files inside './output_data/' session directories
+def main():
+    # By default the script looks for the database files inside './output_data/' session directories
     project_root = Path(__file__).resolve().parent.parent
-    output_directory = project_root / 'output_data'
-    analyze_databases(output_directory)
+    parser = argparse.ArgumentParser(description="Generate the aggregated LaTeX tables for the paper.")
+    parser.add_argument("output_dir", nargs="?", type=Path, default=project_root / 'output_data',
+                        help="Directory searched recursively for *_crawl_data.db files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes used to read the databases")
+    args = parser.parse_args()
+    analyze_databases(args.output_dir, workers=args.workers)
+
 
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Report the element-find latency distribution recorded in crawl session databases.
+
+Reads ``steps_log.element_find_time_ms`` together with the ``element_resolution``
+field stored in ``mapped_action_json`` and prints count, mean and percentiles per
+resolution path:
+
+- ``local``: target found in the captured page source, executed by coordinates
+- ``element_table``: index reference resolved from the element table
+- ``bbox``: the AI supplied a bounding box
+- ``server``: Appium element lookup (local index missed or resolver disabled)
+- ``legacy``: steps recorded before the local resolver existed (the "before" baseline)
+
+Only steps whose action targets an element (click, double_tap, long_press, input,
+clear_text, replace_text) are included unless --all-actions is given.
+"""
+import argparse
+import json
+import sqlite3
+import statistics
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ELEMENT_ACTIONS = {"click", "double_tap", "long_press", "input", "clear_text", "replace_text"}
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def load_latencies(db_paths: List[Path], all_actions: bool) -> Dict[str, List[float]]:
+    groups: Dict[str, List[float]] = {}
+    for db_path in db_paths:
+        try:
+            conn = sqlite3.connect(str(db_path))
+            rows = conn.execute(
+                "SELECT element_find_time_ms, mapped_action_json FROM steps_log "
+                "WHERE element_find_time_ms IS NOT NULL"
+            ).fetchall()
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"  Skipping {db_path}: {e}", file=sys.stderr)
+            continue
+        for latency_ms, action_json in rows:
+            try:
+                action = json.loads(action_json) if action_json else {}
+            except (TypeError, ValueError):
+                action = {}
+            if not all_actions and str(action.get("action", "")).lower() not in ELEMENT_ACTIONS:
+                continue
+            resolution = action.get("element_resolution") or "legacy"
+            groups.setdefault(resolution, []).append(float(latency_ms))
+    return groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Element-find latency distribution per resolution path.")
+    parser.add_argument("paths", nargs="+", help="Session databases or directories to search for *_crawl_data.db")
+    parser.add_argument("--all-actions", action="store_true", help="Include actions without an element target")
+    args = parser.parse_args()
+
+    db_paths: List[Path] = []
+    for raw in args.paths:
+        path = Path(raw)
+        db_paths.extend(sorted(path.glob("**/*_crawl_data.db")) if path.is_dir() else [path])
+    groups = load_latencies(db_paths, args.all_actions)
+    if not groups:
+        print("No steps with element_find_time_ms found.")
+        return
+
+    print(f"Element-find latency (ms) from {len(db_paths)} database(s)")
+    print(f"{'resolution':<14} {'count':>6} {'mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}")
+    combined_after: List[float] = []
+    for resolution in sorted(groups, key=lambda name: (name == "legacy", name)):
+        values = groups[resolution]
+        if resolution != "legacy":
+            combined_after.extend(values)
+        print(f"{resolution:<14} {len(values):>6} {statistics.mean(values):>9.1f} "
+              f"{_percentile(values, 0.5):>9.1f} {_percentile(values, 0.9):>9.1f} "
+              f"{_percentile(values, 0.99):>9.1f} {max(values):>9.1f}")
+
+    if "legacy" in groups and combined_after:
+        before = groups["legacy"]
+        print(f"\nbefore (legacy) p50 {_percentile(before, 0.5):.1f} ms / p90 {_percentile(before, 0.9):.1f} ms"
+              f"  ->  after p50 {_percentile(combined_after, 0.5):.1f} ms / p90 {_percentile(combined_after, 0.9):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
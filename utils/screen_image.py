@@ -0,0 +1,76 @@
+"""
+Decode-once view of a captured screenshot.
+
+One step used to decode the same full-resolution PNG three times: for the visual
+hash in the crawler loop, again in the screen state manager, and again to prepare
+the AI image. ``get_decoded_screenshot`` returns a shared ``DecodedScreenshot`` for
+the most recent screenshot bytes, which decodes the PNG at most once and derives
+from it:
+
+- ``thumbnail``: grayscale, box-reduced copy used for the perceptual hash
+- ``visual_hash``: pHash of the thumbnail
+- ``image``: the full image, for AI preprocessing and annotation
+"""
+
+import io
+import threading
+from typing import Optional
+
+import imagehash
+from PIL import Image
+
+from config.numeric_constants import VISUAL_HASH_THUMBNAIL_MIN_WIDTH
+
+
+class DecodedScreenshot:
+    """Lazily decoded screenshot with a cached thumbnail and visual hash."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self._image: Optional[Image.Image] = None
+        self._thumbnail: Optional[Image.Image] = None
+        self._visual_hash: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def image(self) -> Image.Image:
+        """Full-resolution image (decoded on first access; callers must not modify it in place)."""
+        with self._lock:
+            if self._image is None:
+                image = Image.open(io.BytesIO(self.data))
+                image.load()
+                self._image = image
+            return self._image
+
+    @property
+    def thumbnail(self) -> Image.Image:
+        """Grayscale copy reduced by an integer factor to at least ``VISUAL_HASH_THUMBNAIL_MIN_WIDTH`` wide."""
+        if self._thumbnail is None:
+            image = self.image
+            factor = max(1, image.width // VISUAL_HASH_THUMBNAIL_MIN_WIDTH)
+            gray = image.convert('L') if factor == 1 else image.reduce(factor).convert('L')
+            self._thumbnail = gray
+        return self._thumbnail
+
+    @property
+    def visual_hash(self) -> str:
+        """Perceptual hash (pHash) as a hex string."""
+        if self._visual_hash is None:
+            self._visual_hash = str(imagehash.phash(self.thumbnail))
+        return self._visual_hash
+
+
+_latest: Optional[DecodedScreenshot] = None
+_latest_lock = threading.Lock()
+
+
+def get_decoded_screenshot(data: bytes) -> DecodedScreenshot:
+    """Shared ``DecodedScreenshot`` for ``data``; reused while the same bytes object is passed around.
+
+    Only the most recent screenshot is kept, so memory stays bounded to one decoded image.
+    """
+    global _latest
+    with _latest_lock:
+        if _latest is None or _latest.data is not data:
+            _latest = DecodedScreenshot(data)
+        return _latest
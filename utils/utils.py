@@ -18,6 +18,8 @@ from typing import Any, Dict, List, Optional, Set, Tuple
 import imagehash
 from PIL import Image, ImageDraw
 
+from utils.screen_image import get_decoded_screenshot
+
 try:
     import lxml.etree as lxml_etree
     USING_LXML = True
@@ -229,13 +231,11 @@ def calculate_xml_hash(xml_string: str) -> str:
     return hashlib.sha256(xml_string.encode('utf-8')).hexdigest()
 
 def calculate_visual_hash(screenshot_bytes: bytes) -> str:
-    """Calculates perceptual hash (pHash) of the screenshot."""
+    """Calculates perceptual hash (pHash) of the screenshot, from a reduced copy of the shared decode."""
     if not screenshot_bytes:
         return "no_image"
     try:
-        img = Image.open(io.BytesIO(screenshot_bytes))
-        v_hash = str(imagehash.phash(img))
-        return v_hash
+        return get_decoded_screenshot(screenshot_bytes).visual_hash
     except Exception as e:
         logging.error(f"🔴 Error calculating visual hash: {e}")
         return "hash_error"
@@ -256,7 +256,8 @@ def visual_hash_distance(hash1: str, hash2: str) -> int:
         logging.error(f"🔴 Error calculating hash distance between {hash1} and {hash2}: {e}")
         return 1000
 
-def simplify_xml_for_ai(xml_string: str, max_len: int, provider: str = "gemini", prune_noninteractive: bool = True) -> str:
+def simplify_xml_for_ai(xml_string: str, max_len: int, provider: str = "gemini", prune_noninteractive: bool = True,
+                        truncate: bool = True) -> str:
     """
     Simplifies XML by removing non-essential attributes and potentially empty nodes,
     aiming to stay under max_len without arbitrary truncation.
@@ -265,6 +266,7 @@ def simplify_xml_for_ai(xml_string: str, max_len: int, provider: str = "gemini",
         xml_string: The XML string to simplify
         max_len: Maximum length in characters
         provider: AI provider ("gemini", etc.) for provider-specific optimizations
+        truncate: Cut the result at max_len; disable when a token budget trims the XML afterwards
     """
     if not xml_string:
         return ""
@@ -442,7 +444,7 @@ def simplify_xml_for_ai(xml_string: str, max_len: int, provider: str = "gemini",
             xml_bytes = std_etree.tostring(root)
         simplified_xml = xml_bytes.decode('utf-8')
 
-        if len(simplified_xml) > effective_max_len:
+        if truncate and len(simplified_xml) > effective_max_len:
             logging.warning(f"⚠️ Simplified XML still exceeds max_len ({len(simplified_xml)} > {effective_max_len}) for {provider}. Performing final smart truncation.")
             trunc_point = simplified_xml.rfind('</', 0, effective_max_len)
             if trunc_point != -1: